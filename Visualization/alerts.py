@@ -2,6 +2,9 @@
 Standalone Alert Execution Script
 Runs all alert checks and sends email notifications if alerts are triggered.
 Designed to be run by Windows Task Scheduler daily.
+
+Checks (freshness, rolling z-scores, day-over-day deltas) are evaluated for every
+game and metric at once by lib/anomaly_engine.py.
 """
 
 import sys
@@ -12,7 +15,14 @@ from datetime import datetime
 # Add lib directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib'))
 
-from alert_engine import run_all_alerts
+from anomaly_engine import run_anomaly_checks, send_alert_email
+
+# Credentials live in config/.env (see config/env.example)
+try:
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', '.env'))
+except ImportError:
+    pass
 
 # Setup logging
 log_file = os.path.join(os.path.dirname(__file__), 'alerts.log')
@@ -38,7 +48,9 @@ def main():
     try:
         # Run all alert checks
         logger.info("Starting alert checks...")
-        summary = run_all_alerts()
+        summary = run_anomaly_checks()
+        if summary['triggered_alerts'] > 0:
+            summary['email_sent'] = send_alert_email(summary['alerts'])
         
         # Display results
         print(f"\nAlert Check Summary:")
@@ -3,10 +3,15 @@
 Chart Export Script
 Standalone script to export dashboard charts to HTML and PNG formats.
 Run this manually when you need to share charts with teammates.
+
+All charts (portfolio and per-game) are rendered in parallel worker processes;
+charts whose input data did not change since the last export are copied
+instead of re-rendered.
 """
 
 import sys
 import os
+import time
 from datetime import datetime
 import pandas as pd
 import warnings
@@ -24,6 +29,47 @@ from lib import (
     create_dau_new_users_chart,
     create_revenue_chart
 )
+from query_cache import cached
+from export_engine import ChartExportEngine
+from metrics_client import get_dau_new_users, get_revenue, metrics_api_address
+from game_registry import all_games
+
+# Repeated exports read the on-disk query cache until the crawler writes new rows
+get_dau_new_users_trend = cached(['game_daily_metrics'])(get_dau_new_users_trend)
+get_revenue_trend = cached(['game_daily_metrics'])(get_revenue_trend)
+
+GAMES = [{'app_id': g['app_id'], 'name': g['name'], 'slug': g['slug']} for g in all_games()]
+
+
+def build_dau_chart(title):
+    return lambda df: create_dau_new_users_chart(df, title=title)
+
+
+def build_revenue_chart(title):
+    return lambda df: create_revenue_chart(df, title=title)
+
+
+def export_jobs(df_dau, df_revenue):
+    """Portfolio charts plus one DAU and one revenue chart per game"""
+    jobs = [
+        {'name': 'dau_new_users', 'data': df_dau, 'title': "DAU & New Users Trend - All Games",
+         'build': build_dau_chart("DAU & New Users Trend - All Games")},
+        {'name': 'revenue', 'data': df_revenue, 'title': "Daily Revenue Trend - Portfolio View",
+         'build': build_revenue_chart("Daily Revenue Trend - Portfolio View")},
+    ]
+    for game in GAMES:
+        game_dau = df_dau[df_dau['game_name'] == game['name']]
+        game_revenue = df_revenue[df_revenue['game_name'] == game['name']]
+        if not game_dau.empty:
+            title = f"DAU & New Users Trend - {game['name']}"
+            jobs.append({'name': f"dau_new_users_{game['slug']}", 'data': game_dau, 'title': title,
+                         'build': build_dau_chart(title)})
+        if not game_revenue.empty:
+            title = f"Daily Revenue Trend - {game['name']}"
+            jobs.append({'name': f"revenue_{game['slug']}", 'data': game_revenue, 'title': title,
+                         'build': build_revenue_chart(title)})
+    return jobs
+
 
 def main():
     print("=" * 60)
@@ -46,60 +92,37 @@ def main():
     print()
     
     # Load data
-    print("Loading data from database...")
+    print(f"Loading data from {'the metrics API at ' + metrics_api_address() if metrics_api_address() else 'database'}...")
     try:
-        df_dau = get_dau_new_users_trend(start_date, end_date)
-        df_revenue = get_revenue_trend(start_date, end_date)
+        # The metrics API (STEAMWORKS_METRICS_API) or the precomputed day/week/month buckets keep long
+        # ranges to a few hundred points; fall back to the daily loaders until the series store is built
+        df_dau = get_dau_new_users(start_date, end_date)
+        df_revenue = get_revenue(start_date, end_date)
+        if df_dau.empty or df_revenue.empty:
+            df_dau = get_dau_new_users_trend(start_date, end_date)
+            df_revenue = get_revenue_trend(start_date, end_date)
+        else:
+            print(f"✓ Using {df_dau.attrs['resolution']} buckets")
         print(f"✓ Loaded {len(df_dau)} rows of DAU/New Users data")
         print(f"✓ Loaded {len(df_revenue)} rows of Revenue data")
     except Exception as e:
         print(f"❌ Error loading data: {str(e)}")
         return False
     
-    # Create charts
-    print("\nCreating charts...")
-    try:
-        fig_dau = create_dau_new_users_chart(df_dau, title="DAU & New Users Trend - All Games")
-        fig_revenue = create_revenue_chart(df_revenue, title="Daily Revenue Trend - Portfolio View")
-        print("✓ Charts created successfully")
-    except Exception as e:
-        print(f"❌ Error creating charts: {str(e)}")
-        return False
-    
-    # Export charts
-    print("\nExporting charts...")
-    
-    # Export DAU chart
-    dau_html_path = os.path.join(export_dir, f'dau_new_users_{timestamp}.html')
-    dau_png_path = os.path.join(export_dir, f'dau_new_users_{timestamp}.png')
-    
-    try:
-        fig_dau.write_html(dau_html_path)
-        print(f"✓ DAU chart exported to HTML: {os.path.basename(dau_html_path)}")
-    except Exception as e:
-        print(f"❌ HTML export failed: {e}")
-    
-    try:
-        fig_dau.write_image(dau_png_path, width=1920, height=1080)
-        print(f"✓ DAU chart exported to PNG: {os.path.basename(dau_png_path)}")
-    except Exception as e:
-        print(f"⚠ PNG export failed (install kaleido): {e}")
-    
-    # Export Revenue chart
-    revenue_html_path = os.path.join(export_dir, f'revenue_{timestamp}.html')
-    revenue_png_path = os.path.join(export_dir, f'revenue_{timestamp}.png')
-    
-    try:
-        fig_revenue.write_html(revenue_html_path)
-        print(f"✓ Revenue chart exported to HTML: {os.path.basename(revenue_html_path)}")
-    except Exception as e:
-        print(f"❌ HTML export failed: {e}")
-    
-    try:
-        fig_revenue.write_image(revenue_png_path, width=1920, height=1080)
-        print(f"✓ Revenue chart exported to PNG: {os.path.basename(revenue_png_path)}")
-    except Exception as e:
-        print(f"⚠ PNG export failed (install kaleido): {e}")
+    # Build and render every chart/format in parallel
+    jobs = export_jobs(df_dau, df_revenue)
+    print(f"\nExporting {len(jobs)} charts (HTML + PNG)...")
+    started = time.perf_counter()
+    engine = ChartExportEngine(export_dir, workers=int(os.environ.get('EXPORT_WORKERS', 0)) or None)
+    summary = engine.export(jobs, timestamp)
+    elapsed = time.perf_counter() - started
+    
+    print(f"✓ Rendered {len(summary['rendered'])} file(s), reused {len(summary['reused'])} unchanged file(s) in {elapsed:.1f}s")
+    for path, error in summary['failed']:
+        if path.endswith('.png'):
+            print(f"⚠ PNG export failed for {os.path.basename(path)} (install kaleido): {error}")
+        else:
+            print(f"❌ Export failed for {os.path.basename(path)}: {error}")
     
     # Summary
     print("\n" + "=" * 60)
@@ -124,7 +147,7 @@ def main():
     print(f"  • PNG files: Use in PowerPoint presentations")
     print(f"  • Share with teammates as needed")
     
-    return True
+    return not any(path.endswith('.html') for path, _ in summary['failed'])
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,212 @@
+"""
+Anomaly Detection Engine
+Loads the last N days of every game and metric with one query and evaluates
+all checks as vectorized pandas/NumPy operations over a date x (metric, game)
+matrix:
+
+- Rolling z-score: the latest day against the mean/std of the preceding window
+- Day-over-day delta: relative change from the previous day
+- Freshness: latest stat_date per game against the expected date (Pacific yesterday)
+
+Adding games or metrics widens the matrix but adds no queries or Python loops,
+so evaluation time stays flat. Only the flagged cells are turned into alert
+dicts (same shape as the rest of the alert system: alert_triggered, severity,
+message, details).
+"""
+
+import logging
+import os
+import smtplib
+import sys
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+
+import numpy as np
+import pandas as pd
+
+try:
+    from zoneinfo import ZoneInfo  # Python 3.9+
+except ImportError:
+    ZoneInfo = None
+
+# storage.py lives in the crawler root (two levels up)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from game_registry import game_names
+from storage import get_storage, load_db_config
+
+GAMES = game_names()
+
+# Metrics checked for every game
+ALERT_METRICS = ['dau', 'pcu', 'new_players', 'daily_total_revenue', 'daily_units', 'wishlist_additions']
+
+DEFAULT_SETTINGS = {
+    'window_days': 14,        # baseline length for the rolling z-score
+    'min_periods': 7,         # minimum baseline days before a z-score is trusted
+    'z_threshold': 3.0,       # |z| at or above this triggers a warning (2x -> critical)
+    'dod_threshold': 0.5,     # |day-over-day change| at or above 50% triggers a warning
+    'dod_min_value': 100,     # ignore DoD swings on tiny values (previous day below this)
+    'max_lag_days': 0,        # freshness: days the latest stat_date may trail the expected date
+}
+
+logger = logging.getLogger(__name__)
+
+
+def expected_stat_date():
+    """Pacific Time date of the day that just ended (what the crawler stores)"""
+    if ZoneInfo:
+        return (datetime.now(ZoneInfo('America/Los_Angeles')) - timedelta(days=1)).date()
+    return (datetime.now() - timedelta(days=1)).date()
+
+
+def load_metric_frame(session, start_date, metrics=None, app_ids=None):
+    """Every game's daily rows since start_date in one query (long format)"""
+    metrics = metrics or ALERT_METRICS
+    app_ids = list(app_ids or GAMES)
+    placeholders = ', '.join(['%s'] * len(app_ids))
+    rows = session.fetch_all(
+        f"SELECT steam_app_id, stat_date, {', '.join(metrics)} FROM game_daily_metrics "
+        f"WHERE stat_date >= %s AND steam_app_id IN ({placeholders}) ORDER BY stat_date",
+        [start_date] + app_ids
+    )
+    frame = pd.DataFrame(rows, columns=['steam_app_id', 'stat_date'] + metrics)
+    frame['steam_app_id'] = frame['steam_app_id'].astype(int)
+    frame['stat_date'] = pd.to_datetime(frame['stat_date'])
+    for metric in metrics:
+        frame[metric] = pd.to_numeric(frame[metric], errors='coerce')
+    return frame
+
+
+def metric_matrix(frame, start_date, end_date, metrics=None):
+    """Pivot to a complete daily index x (metric, steam_app_id) float matrix"""
+    metrics = metrics or ALERT_METRICS
+    matrix = frame.pivot_table(index='stat_date', columns='steam_app_id', values=metrics, aggfunc='last')
+    if matrix.empty:
+        return matrix
+    matrix = matrix.reindex(pd.date_range(pd.Timestamp(start_date), pd.Timestamp(end_date), freq='D'))
+    return matrix.astype(float)
+
+
+def evaluate_matrix(matrix, settings=None):
+    """Latest-day z-scores and DoD deltas for every series; returns a per-series DataFrame"""
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    if matrix.empty:
+        return pd.DataFrame(columns=['value', 'previous', 'mean', 'std', 'z_score', 'dod_change'])
+
+    # Baseline excludes the day being judged
+    baseline = matrix.shift(1).rolling(settings['window_days'], min_periods=settings['min_periods'])
+    mean = baseline.mean().iloc[-1]
+    std = baseline.std().iloc[-1]
+    latest = matrix.iloc[-1]
+    previous = matrix.iloc[-2] if len(matrix) > 1 else latest * np.nan
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_score = (latest - mean) / std.where(std > 0)
+        dod_change = (latest - previous) / previous.where(previous.abs() >= settings['dod_min_value'])
+
+    result = pd.DataFrame({
+        'value': latest, 'previous': previous, 'mean': mean, 'std': std,
+        'z_score': z_score, 'dod_change': dod_change,
+    })
+    result.index.names = ['metric', 'steam_app_id']
+    return result
+
+
+def freshness(frame, expected_date, app_ids=None):
+    """Per-game latest stat_date and lag in days against expected_date"""
+    app_ids = list(app_ids or GAMES)
+    latest = frame.groupby('steam_app_id')['stat_date'].max().reindex(app_ids)
+    lag = (pd.Timestamp(expected_date) - latest).dt.days
+    return pd.DataFrame({'latest_date': latest, 'lag_days': lag})
+
+
+def _alert(severity, message, details):
+    return {'alert_triggered': True, 'severity': severity, 'message': message, 'details': details}
+
+
+def build_alerts(evaluation, fresh, settings=None, expected_date=None):
+    """Turn flagged matrix cells into alert dicts"""
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    alerts = []
+
+    stale = fresh[fresh['lag_days'].isna() | (fresh['lag_days'] > settings['max_lag_days'])]
+    for app_id, row in stale.iterrows():
+        name = GAMES.get(app_id, str(app_id))
+        if pd.isna(row['latest_date']):
+            alerts.append(_alert('critical', f"{name}: no data in the lookback window",
+                                 f"Expected data for {expected_date}"))
+        else:
+            alerts.append(_alert('critical', f"{name}: data is {int(row['lag_days'])} day(s) stale",
+                                 f"Latest stat_date {row['latest_date'].date()}, expected {expected_date}"))
+
+    # Stale games' "latest" row is a gap, so value-based checks are skipped for them
+    evaluation = evaluation[~evaluation.index.get_level_values('steam_app_id').isin(stale.index)]
+    z_flags = evaluation[evaluation['z_score'].abs() >= settings['z_threshold']]
+    for (metric, app_id), row in z_flags.iterrows():
+        severity = 'critical' if abs(row['z_score']) >= 2 * settings['z_threshold'] else 'warning'
+        direction = 'spike' if row['z_score'] > 0 else 'drop'
+        alerts.append(_alert(
+            severity,
+            f"{GAMES.get(app_id, app_id)}: {metric} {direction} (z={row['z_score']:+.1f})",
+            f"{metric}={row['value']:,.0f} vs {settings['window_days']}-day mean {row['mean']:,.0f} (std {row['std']:,.0f})"
+        ))
+
+    dod_flags = evaluation[evaluation['dod_change'].abs() >= settings['dod_threshold']]
+    for (metric, app_id), row in dod_flags.iterrows():
+        alerts.append(_alert(
+            'warning',
+            f"{GAMES.get(app_id, app_id)}: {metric} changed {row['dod_change']:+.0%} day-over-day",
+            f"{metric}={row['value']:,.0f} vs previous day {row['previous']:,.0f}"
+        ))
+    return alerts
+
+
+def run_anomaly_checks(storage=None, settings=None, expected_date=None, metrics=None, app_ids=None):
+    """Load, evaluate and summarise every check (one query for all games and metrics)"""
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    expected_date = expected_date or expected_stat_date()
+    metrics = metrics or ALERT_METRICS
+    app_ids = list(app_ids or GAMES)
+    start_date = expected_date - timedelta(days=settings['window_days'] + 1)
+
+    storage = storage or get_storage(load_db_config())
+    with storage.session() as session:
+        frame = load_metric_frame(session, start_date, metrics, app_ids)
+
+    matrix = metric_matrix(frame, start_date, expected_date, metrics)
+    evaluation = evaluate_matrix(matrix, settings)
+    fresh = freshness(frame, expected_date, app_ids)
+    alerts = build_alerts(evaluation, fresh, settings, expected_date)
+
+    return {
+        'total_checks': len(app_ids) + 2 * len(metrics) * len(app_ids),
+        'triggered_alerts': len(alerts),
+        'alerts': alerts,
+        'email_sent': False,
+    }
+
+
+def send_alert_email(alerts):
+    """Send one consolidated email for the triggered alerts (SMTP_* / ALERT_RECIPIENT env)"""
+    server = os.environ.get('SMTP_SERVER')
+    recipient = os.environ.get('ALERT_RECIPIENT')
+    if not alerts or not server or not recipient:
+        return False
+
+    lines = [f"[{a['severity'].upper()}] {a['message']}\n    {a['details']}" for a in alerts]
+    message = MIMEText("SteamWorks alert check found:\n\n" + "\n".join(lines), 'plain', 'utf-8')
+    message['Subject'] = f"SteamWorks Alerts: {len(alerts)} triggered"
+    message['From'] = os.environ.get('SMTP_USER', recipient)
+    message['To'] = recipient
+
+    try:
+        with smtplib.SMTP_SSL(server, int(os.environ.get('SMTP_PORT', 465)), timeout=30) as smtp:
+            if os.environ.get('SMTP_USER'):
+                smtp.login(os.environ['SMTP_USER'], os.environ.get('SMTP_PASSWORD', ''))
+            smtp.sendmail(message['From'], [recipient], message.as_string())
+        return True
+    except Exception as e:
+        logger.error(f"Failed to send alert email: {e}")
+        return False
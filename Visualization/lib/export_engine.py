@@ -0,0 +1,173 @@
+"""
+Chart Export Engine
+Renders every chart (portfolio and per-game, HTML and PNG) in a process pool.
+Each worker starts kaleido once and keeps it alive for all the PNGs it writes,
+so the Chromium start-up cost is paid once per worker instead of once per image.
+
+Every export is keyed by a content hash of the chart's input DataFrame, its
+build code, title, format and size. The hashes are recorded in
+_export_manifest.json in the export directory. An unchanged export is never
+rebuilt or re-rendered: the previous file is copied to today's name instead.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from query_cache import code_fingerprint
+
+MANIFEST_FILE = '_export_manifest.json'
+
+logger = logging.getLogger(__name__)
+
+
+def frame_hash(frame):
+    """Stable content hash of a DataFrame (values, index and column names)"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in frame.columns]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def _start_renderer():
+    """Process pool initializer: bring up one persistent kaleido renderer per worker"""
+    try:
+        import kaleido
+        if hasattr(kaleido, 'start_sync_server'):
+            # kaleido >= 1.0: explicit long-lived browser process
+            kaleido.start_sync_server(silence_warnings=True)
+            return
+    except ImportError:
+        return
+    except Exception as e:
+        logger.warning(f"Could not start persistent kaleido server: {e}")
+        return
+    # kaleido 0.2: the scope keeps Chromium running after its first image
+    try:
+        import plotly.graph_objects as go
+        go.Figure().to_image(format='png', width=10, height=10)
+    except Exception as e:
+        logger.warning(f"Kaleido warm-up failed: {e}")
+
+
+def _render(fig_json, path, fmt, width, height):
+    """Worker: write one figure to HTML or an image file"""
+    import plotly.io as pio
+    fig = pio.from_json(fig_json)
+    tmp_path = f"{path}.tmp"
+    if fmt == 'html':
+        fig.write_html(tmp_path)
+    else:
+        fig.write_image(tmp_path, format=fmt, width=width, height=height)
+    os.replace(tmp_path, path)
+    return path
+
+
+class ChartExportEngine:
+    def __init__(self, export_dir, workers=None, width=1920, height=1080):
+        self.export_dir = export_dir
+        self.workers = workers
+        self.width = width
+        self.height = height
+        os.makedirs(export_dir, exist_ok=True)
+
+    def manifest_path(self):
+        return os.path.join(self.export_dir, MANIFEST_FILE)
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self, manifest):
+        tmp_path = self.manifest_path() + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path())
+
+    def export_hash(self, job, data_hash, fmt):
+        payload = json.dumps({
+            'code': code_fingerprint(job['build']),
+            'title': job.get('title'),
+            'data': data_hash,
+            'format': fmt,
+            'size': [self.width, self.height] if fmt != 'html' else None,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def export(self, jobs, suffix):
+        """Export jobs [{'name', 'data', 'build', 'title', 'formats'}] as <name>_<suffix>.<fmt>
+
+        Returns {'rendered': [paths], 'reused': [paths], 'failed': [(path, error)]}.
+        """
+        manifest = self.load_manifest()
+        summary = {'rendered': [], 'reused': [], 'failed': []}
+        tasks = []
+        pending = {}
+
+        for job in jobs:
+            data_hash = frame_hash(job['data'])
+            stale_formats = []
+            for fmt in job.get('formats', ('html', 'png')):
+                key = f"{job['name']}.{fmt}"
+                path = os.path.join(self.export_dir, f"{job['name']}_{suffix}.{fmt}")
+                content_hash = self.export_hash(job, data_hash, fmt)
+                previous = manifest.get(key, {})
+                if previous.get('hash') == content_hash and os.path.exists(previous.get('path', '')):
+                    if os.path.abspath(previous['path']) != os.path.abspath(path):
+                        shutil.copy2(previous['path'], path)
+                    manifest[key] = {'hash': content_hash, 'path': path}
+                    summary['reused'].append(path)
+                    continue
+                stale_formats.append((fmt, key, path, content_hash))
+            if not stale_formats:
+                continue
+
+            # Only figures with changed input are built (in this process; rendering is parallel)
+            try:
+                fig_json = job['build'](job['data']).to_json()
+            except Exception as e:
+                logger.error(f"Failed to build chart {job['name']}: {e}")
+                summary['failed'].extend((path, str(e)) for _, _, path, _ in stale_formats)
+                continue
+            for fmt, key, path, content_hash in stale_formats:
+                tasks.append((fig_json, path, fmt))
+                pending[path] = (key, content_hash)
+
+        for path, error in self.render_all(tasks):
+            key, content_hash = pending[path]
+            if error is None:
+                manifest[key] = {'hash': content_hash, 'path': path}
+                summary['rendered'].append(path)
+            else:
+                manifest.pop(key, None)
+                summary['failed'].append((path, error))
+
+        self.save_manifest(manifest)
+        return summary
+
+    def render_all(self, tasks):
+        """Render [(fig_json, path, fmt)] in the process pool; yields (path, error or None)"""
+        if not tasks:
+            return
+        workers = max(1, min(self.workers or os.cpu_count() or 1, len(tasks)))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_start_renderer) as pool:
+            futures = {
+                pool.submit(_render, fig_json, path, fmt, self.width, self.height): path
+                for fig_json, path, fmt in tasks
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    future.result()
+                    yield path, None
+                except Exception as e:
+                    logger.error(f"Failed to render {os.path.basename(path)}: {e}")
+                    yield path, str(e)
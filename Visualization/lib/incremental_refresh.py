@@ -0,0 +1,201 @@
+"""
+Incremental Dashboard Refresh
+Rebuilds only the charts whose input data changed since the last refresh and
+reuses the cached figure for the rest.
+
+Every chart declares its source tables and, optionally, the one game it shows.
+Its fingerprint combines the chart's build code, the start date and per-game
+versions (MAX(updated_at), COUNT(*)) of those tables. A chart is only rebuilt
+when that fingerprint moves, so one game's late re-crawl rebuilds that game's
+breakdown and the portfolio trends, and nothing else. Rendered HTML fragments
+and figure JSON live in cache/figures/; the assembled page is a plain HTML file.
+
+prune_exports() applies the retention policy to exports/ so refresh time and
+disk usage stay flat as history grows.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+# storage.py lives in the crawler root (two levels up)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from storage import get_storage, load_db_config
+from query_cache import code_fingerprint
+
+VISUALIZATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIGURE_CACHE_DIR = os.path.join(VISUALIZATION_DIR, 'cache', 'figures')
+STATE_FILE = 'refresh_state.json'
+
+# Dated export files: dashboard_YYYYMMDD_HHMMSS.ipynb, <chart>_YYYYMMDD.html/.png
+_DATED_EXPORT_RE = re.compile(r"_(\d{8})(?:_\d{6})?\.(ipynb|html|png)$")
+
+logger = logging.getLogger(__name__)
+
+
+def data_versions(session, tables, start_date):
+    """{(table, steam_app_id): 'max_updated_at|row_count'} for rows on/after start_date"""
+    versions = {}
+    for table in sorted(set(tables)):
+        rows = session.fetch_all(
+            f"SELECT steam_app_id, MAX(updated_at) AS max_updated_at, COUNT(*) AS row_count "
+            f"FROM {table} WHERE stat_date >= %s GROUP BY steam_app_id",
+            (start_date,)
+        )
+        for r in rows:
+            versions[(table, int(r['steam_app_id']))] = f"{r['max_updated_at']}|{r['row_count']}"
+    return versions
+
+
+def chart_fingerprint(chart, versions, start_date):
+    """Hash of everything a chart's figure depends on"""
+    relevant = sorted(
+        [table, app_id, version] for (table, app_id), version in versions.items()
+        if table in chart['tables'] and chart.get('app_id') in (None, app_id)
+    )
+    payload = json.dumps({
+        'chart': chart['name'],
+        'code': code_fingerprint(chart['build']),
+        'start_date': str(start_date),
+        'data': relevant,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class IncrementalRefresher:
+    def __init__(self, charts, start_date, storage=None, cache_dir=None, plotlyjs_url=None):
+        self.charts = charts
+        self.start_date = start_date
+        self._storage = storage
+        self.cache_dir = cache_dir or FIGURE_CACHE_DIR
+        self.plotlyjs_url = plotlyjs_url
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            self._storage = get_storage(load_db_config())
+        return self._storage
+
+    def state_path(self):
+        return os.path.join(self.cache_dir, STATE_FILE)
+
+    def load_state(self):
+        try:
+            with open(self.state_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self, state):
+        tmp_path = self.state_path() + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path())
+
+    def fragment_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.html")
+
+    def plan(self):
+        """{chart name: fingerprint} for every chart and the names that need a rebuild"""
+        tables = {table for chart in self.charts for table in chart['tables']}
+        with self.storage.session() as session:
+            versions = data_versions(session, tables, self.start_date)
+        state = self.load_state()
+        fingerprints = {c['name']: chart_fingerprint(c, versions, self.start_date) for c in self.charts}
+        stale = [
+            name for name, fingerprint in fingerprints.items()
+            if state.get(name) != fingerprint or not os.path.exists(self.fragment_path(name))
+        ]
+        return fingerprints, stale
+
+    def refresh(self, end_date=None, force=False):
+        """Rebuild stale charts; returns {'rebuilt', 'reused', 'failed'} chart names"""
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        fingerprints, stale = self.plan()
+        if force:
+            stale = list(fingerprints)
+        state = self.load_state()
+        summary = {'rebuilt': [], 'reused': [], 'failed': []}
+
+        for chart in self.charts:
+            name = chart['name']
+            if name not in stale:
+                summary['reused'].append(name)
+                continue
+            try:
+                fig = chart['build'](self.start_date, end_date)
+                with open(self.fragment_path(name), 'w', encoding='utf-8') as f:
+                    f.write(fig.to_html(full_html=False, include_plotlyjs=False))
+                with open(os.path.join(self.cache_dir, f"{name}.json"), 'w', encoding='utf-8') as f:
+                    f.write(fig.to_json())
+                state[name] = fingerprints[name]
+                summary['rebuilt'].append(name)
+                logger.info(f"Rebuilt chart {name}")
+            except Exception as e:
+                # Keep serving the previous figure (if any); the next run retries
+                logger.error(f"Failed to rebuild chart {name}: {e}")
+                state.pop(name, None)
+                summary['failed'].append(name)
+
+        self.save_state(state)
+        return summary
+
+    def write_dashboard(self, output_path, title="SteamWorks Dashboard"):
+        """Assemble cached chart fragments into one standalone HTML page"""
+        plotlyjs_url = self.plotlyjs_url
+        if plotlyjs_url is None:
+            from plotly.offline import get_plotlyjs_version
+            plotlyjs_url = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+
+        sections = []
+        for chart in self.charts:
+            path = self.fragment_path(chart['name'])
+            if not os.path.exists(path):
+                sections.append(f"<h2>{chart['title']}</h2>\n<p>No data available.</p>")
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                sections.append(f"<h2>{chart['title']}</h2>\n{f.read()}")
+
+        html = (
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{title}</title>\n<script src=\"{plotlyjs_url}\"></script>\n</head>\n<body>\n"
+            f"<h1>{title}</h1>\n<p>Refreshed {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>\n"
+            + "\n".join(sections)
+            + "\n</body>\n</html>\n"
+        )
+        tmp_path = output_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        os.replace(tmp_path, output_path)
+        return output_path
+
+
+def prune_exports(export_dir, retention_days, now=None):
+    """Delete dated exports older than retention_days (never the *_latest files); returns removed paths"""
+    cutoff = (now or datetime.now()).date() - timedelta(days=retention_days)
+    removed = []
+    for directory, _, filenames in os.walk(export_dir):
+        for filename in filenames:
+            match = _DATED_EXPORT_RE.search(filename)
+            if not match:
+                continue
+            try:
+                exported = datetime.strptime(match.group(1), '%Y%m%d').date()
+            except ValueError:
+                continue
+            if exported < cutoff:
+                path = os.path.join(directory, filename)
+                try:
+                    os.remove(path)
+                    removed.append(path)
+                except OSError as e:
+                    logger.warning(f"Could not remove old export {path}: {e}")
+    return sorted(removed)
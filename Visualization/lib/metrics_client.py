@@ -0,0 +1,99 @@
+"""
+Metrics API Client
+Loads the dashboard's trend frames from the local metrics API (metrics_api.py)
+when STEAMWORKS_METRICS_API names its address, so the notebook, the chart
+export and the other consumers share the server's warm cache instead of each
+opening a database connection. Without the variable, or when the API cannot
+be reached, the same frames are read directly from storage (series_loader.py).
+
+Frames have the series_loader shape: game_name, stat_date, then <metric>,
+<metric>_min and <metric>_max per metric, with frame.attrs['resolution'].
+
+    STEAMWORKS_METRICS_API=127.0.0.1:8765 python export_charts.py
+"""
+
+import json
+import logging
+import os
+import urllib.parse
+import urllib.request
+
+import pandas as pd
+
+from series_loader import GAMES, load_series_frame
+from series_store import DEFAULT_MAX_POINTS
+
+
+def metrics_api_address():
+    return os.environ.get('STEAMWORKS_METRICS_API', '').strip()
+
+
+class MetricsClient:
+    """Talks to a running metrics API"""
+
+    def __init__(self, address, timeout=10):
+        self.address = address
+        self.timeout = timeout
+
+    def _get(self, path, **params):
+        query = urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+        with urllib.request.urlopen(f"http://{self.address}{path}?{query}", timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def games(self):
+        return self._get('/api/games')
+
+    def series(self, metric, start_date=None, end_date=None, max_points=DEFAULT_MAX_POINTS, app_ids=None):
+        return self._get('/api/series', metric=metric, start=start_date, end=end_date, max_points=max_points,
+                         app_id=','.join(str(a) for a in app_ids) if app_ids else None)
+
+    def breakdown(self, dimension, app_id, stat_date=None):
+        return self._get('/api/breakdown', dimension=dimension, app_id=app_id, date=stat_date)
+
+    def series_frame(self, metrics, start_date=None, end_date=None, max_points=DEFAULT_MAX_POINTS):
+        """Wide trend frame built from one /api/series call per metric"""
+        rows = {}
+        resolutions = set()
+        for metric in metrics:
+            payload = self.series(metric, start_date, end_date, max_points)
+            resolutions.add(payload['resolution'])
+            for app_id, points in payload['series'].items():
+                name = GAMES.get(int(app_id))
+                if name is None:
+                    continue
+                for point in points:
+                    row = rows.setdefault((name, point['date']), {'game_name': name, 'stat_date': point['date']})
+                    row[metric] = point['value']
+                    row[f"{metric}_min"] = point.get('min', point['value'])
+                    row[f"{metric}_max"] = point.get('max', point['value'])
+        if len(resolutions) > 1:
+            # Columns on different buckets cannot share rows
+            raise ValueError(f"metrics came back at different resolutions: {', '.join(sorted(resolutions))}")
+
+        columns = ['game_name', 'stat_date'] + [c for m in metrics for c in (m, f"{m}_min", f"{m}_max")]
+        frame = pd.DataFrame(list(rows.values()), columns=columns)
+        frame['stat_date'] = pd.to_datetime(frame['stat_date'])
+        frame = frame.sort_values(['game_name', 'stat_date']).reset_index(drop=True)
+        frame.attrs['resolution'] = resolutions.pop() if resolutions else 'day'
+        return frame
+
+
+def load_trend_frame(metrics, start_date=None, end_date=None, max_points=DEFAULT_MAX_POINTS, storage=None):
+    """Trend frame from the metrics API when configured, else straight from storage"""
+    address = metrics_api_address()
+    if address:
+        try:
+            return MetricsClient(address).series_frame(metrics, start_date, end_date, max_points)
+        except Exception as e:
+            logging.warning(f"Metrics API at {address} unavailable, querying storage directly: {e}")
+    return load_series_frame(metrics, start_date, end_date, max_points, storage)
+
+
+def get_dau_new_users(start_date=None, end_date=None, max_points=DEFAULT_MAX_POINTS, storage=None):
+    """DAU / new users trend (metrics API or series store)"""
+    return load_trend_frame(['dau', 'new_players'], start_date, end_date, max_points, storage)
+
+
+def get_revenue(start_date=None, end_date=None, max_points=DEFAULT_MAX_POINTS, storage=None):
+    """Daily revenue trend (metrics API or series store)"""
+    return load_trend_frame(['daily_total_revenue'], start_date, end_date, max_points, storage)
@@ -0,0 +1,187 @@
+"""
+Query Cache
+On-disk Parquet cache for dashboard/export queries. A cached result is keyed by
+the query (the loader's code, SQL included), its parameters and a version of
+every source table: MAX(updated_at) plus COUNT(*), so upserts and deletes both
+invalidate it. Repeated dashboard and export runs read the Parquet file instead
+of MySQL until the crawler writes new rows.
+
+The cache directory is capped by size; least recently used files are evicted
+first (a hit refreshes the file's mtime).
+
+    from query_cache import cached
+    get_revenue_trend = cached(['game_daily_metrics'])(get_revenue_trend)
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+# storage.py lives in the crawler root (two levels up)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from storage import get_storage, load_db_config
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'queries')
+DEFAULT_MAX_BYTES = int(os.environ.get('VIZ_QUERY_CACHE_MAX_MB', 256)) * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def code_fingerprint(func):
+    """Hash of a function's bytecode and constants (changes when its SQL changes)"""
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return getattr(func, '__qualname__', repr(func))
+    return hashlib.sha256(code.co_code + repr(code.co_consts).encode('utf-8')).hexdigest()[:16]
+
+
+class QueryCache:
+    def __init__(self, cache_dir=None, max_bytes=None, storage=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        self._storage = storage
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            self._storage = get_storage(load_db_config())
+        return self._storage
+
+    def table_versions(self, tables):
+        """{table: 'max_updated_at|row_count'} for every source table, in one round trip"""
+        tables = sorted(set(tables))
+        query = " UNION ALL ".join(
+            f"SELECT '{table}' AS source_table, MAX(updated_at) AS max_updated_at, COUNT(*) AS row_count FROM {table}"
+            for table in tables
+        )
+        with self.storage.session() as session:
+            rows = session.fetch_all(query)
+        return {r['source_table']: f"{r['max_updated_at']}|{r['row_count']}" for r in rows}
+
+    def cache_key(self, name, params, versions):
+        payload = json.dumps({'query': name, 'params': params, 'versions': versions}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def get_or_load(self, name, params, tables, loader):
+        """Return the cached DataFrame for (name, params) or run loader() and cache it"""
+        try:
+            versions = self.table_versions(tables)
+        except Exception as e:
+            logger.warning(f"Query cache bypassed for {name} (could not read table versions: {e})")
+            return loader()
+
+        path = self.path_for(self.cache_key(name, params, versions))
+        if os.path.exists(path):
+            try:
+                frame = pd.read_parquet(path)
+                os.utime(path)  # LRU: a hit makes the file most recent
+                logger.info(f"Query cache hit: {name}")
+                return frame
+            except Exception as e:
+                logger.warning(f"Discarding unreadable cache file {path}: {e}")
+                self._remove(path)
+
+        frame = loader()
+        if not isinstance(frame, pd.DataFrame):
+            return frame
+        try:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            frame.to_parquet(tmp_path, index=True)
+            os.replace(tmp_path, path)
+            logger.info(f"Query cache miss: {name} ({len(frame)} rows cached)")
+        except Exception as e:
+            logger.warning(f"Could not cache {name}: {e}")
+            self._remove(f"{path}.{os.getpid()}.tmp")
+        self.evict()
+        return frame
+
+    def read_sql(self, query, params, tables, connection):
+        """pandas.read_sql through the cache"""
+        return self.get_or_load(query, params, tables, lambda: pd.read_sql(query, connection, params=params))
+
+    def entries(self):
+        """[(path, size, mtime)] of cached results, oldest first"""
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.parquet'):
+                continue
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda e: e[2])
+
+    def evict(self):
+        """Remove least recently used results until the cache fits max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            self._remove(path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_default_cache = None
+
+
+def get_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = QueryCache()
+    return _default_cache
+
+
+def cached(tables, cache=None):
+    """Decorator: cache a DataFrame-returning loader until its source tables change"""
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}:{code_fingerprint(func)}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            params = {'args': list(args), 'kwargs': kwargs}
+            return (cache or get_cache()).get_or_load(name, params, tables, lambda: func(*args, **kwargs))
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+if __name__ == "__main__":
+    # Quick look at the cache: python -m lib.query_cache [--clear]
+    cache = get_cache()
+    if '--clear' in sys.argv:
+        cache.clear()
+        print(f"Cleared {cache.cache_dir}")
+    entries = cache.entries()
+    total = sum(size for _, size, _ in entries)
+    print(f"{len(entries)} cached results, {total / 1024 / 1024:.1f} MB of {cache.max_bytes / 1024 / 1024:.0f} MB")
+    for path, size, mtime in reversed(entries):
+        print(f"  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mtime))}  {size:>10,}  {os.path.basename(path)}")
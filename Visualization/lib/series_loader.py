@@ -0,0 +1,75 @@
+"""
+Long-Range Series Loader
+Reads the precomputed day / week / month buckets in game_metric_series
+(series_store.py) and returns frames shaped like data_loader's trend frames
+(game_name, stat_date, metric columns), so create_dau_new_users_chart and
+create_revenue_chart plot a multi-year range from a few hundred points.
+
+Values are bucket means, so a weekly revenue point is the average daily
+revenue of that week and the y-axis keeps its daily meaning. Each metric also
+gets <metric>_min / <metric>_max columns, and frame.attrs['resolution'] names
+the bucket size that was picked.
+"""
+
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+
+# storage.py / series_store.py live in the crawler root (two levels up)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from game_registry import game_names
+from series_store import DEFAULT_MAX_POINTS, fetch_series
+from storage import get_storage, load_db_config
+
+GAMES = game_names()
+
+
+def _to_date(value, default):
+    if value is None:
+        return default
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def load_series_frame(metrics, start_date=None, end_date=None, max_points=DEFAULT_MAX_POINTS, storage=None):
+    """Wide frame (game_name, stat_date, metric, metric_min, metric_max) at one shared resolution"""
+    start = _to_date(start_date, date(2000, 1, 1))
+    end = _to_date(end_date, date(2100, 1, 1))
+    storage = storage or get_storage(load_db_config())
+
+    frames = []
+    resolution = None
+    with storage.session() as session:
+        for metric in metrics:
+            # The first metric picks the resolution so every column shares the same buckets
+            resolution, rows = fetch_series(session, metric, GAMES, start, end, max_points, resolution)
+            frame = pd.DataFrame(rows, columns=['steam_app_id', 'bucket_start', 'mean_value', 'min_value', 'max_value'])
+            frames.append(frame.rename(columns={
+                'bucket_start': 'stat_date', 'mean_value': metric,
+                'min_value': f"{metric}_min", 'max_value': f"{metric}_max",
+            }).set_index(['steam_app_id', 'stat_date']))
+
+    result = pd.concat(frames, axis=1).reset_index() if frames else pd.DataFrame()
+    columns = ['game_name', 'stat_date'] + [c for m in metrics for c in (m, f"{m}_min", f"{m}_max")]
+    if result.empty:
+        result = pd.DataFrame(columns=columns)
+    else:
+        result['game_name'] = result['steam_app_id'].astype(int).map(GAMES)
+        result['stat_date'] = pd.to_datetime(result['stat_date'])
+        result = result[columns].sort_values(['game_name', 'stat_date']).reset_index(drop=True)
+    result.attrs['resolution'] = resolution or 'day'
+    return result
+
+
+def get_dau_new_users_series(start_date=None, end_date=None, max_points=DEFAULT_MAX_POINTS, storage=None):
+    """DAU / new users trend at the finest resolution that fits max_points per game"""
+    return load_series_frame(['dau', 'new_players'], start_date, end_date, max_points, storage)
+
+
+def get_revenue_series(start_date=None, end_date=None, max_points=DEFAULT_MAX_POINTS, storage=None):
+    """Daily revenue trend (bucket means) at the finest resolution that fits max_points per game"""
+    return load_series_frame(['daily_total_revenue'], start_date, end_date, max_points, storage)
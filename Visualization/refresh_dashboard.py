@@ -1,80 +1,184 @@
 """
 Dashboard Refresh Script
-Executes the Jupyter dashboard notebook using Papermill for automated daily refresh.
+Refreshes the dashboard incrementally: only charts whose input data changed since
+the last refresh are rebuilt, the rest are reused from cache/figures/, and the
+result is written to exports/dashboard_latest.html. Old dated exports are pruned
+according to the retention policy.
 Designed to be run by Windows Task Scheduler daily after the crawler completes.
+
+    python refresh_dashboard.py                 # incremental refresh (default)
+    python refresh_dashboard.py --force         # rebuild every chart
+    python refresh_dashboard.py --full          # execute dashboard.ipynb with papermill (legacy)
 """
 
+import argparse
 import sys
 import os
 import logging
+import functools
 from datetime import datetime
-import papermill as pm
-
-# Setup logging
-log_file = os.path.join(os.path.dirname(__file__), 'refresh_dashboard.log')
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+
+# Add lib directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib'))
+
+from incremental_refresh import IncrementalRefresher, prune_exports
+from game_registry import all_games
+
+# Same fixed start date as dashboard.ipynb
+START_DATE = '2025-10-01'
+
+# Dated exports older than this are deleted on every refresh
+RETENTION_DAYS = int(os.environ.get('DASHBOARD_RETENTION_DAYS', 30))
+
+GAMES = [{'app_id': g['app_id'], 'name': g['name']} for g in all_games()]
 
 logger = logging.getLogger(__name__)
 
+
+def build_dau_new_users_chart(start_date, end_date):
+    from data_loader import get_dau_new_users_trend
+    from chart_builder import create_dau_new_users_chart
+    return create_dau_new_users_chart(get_dau_new_users_trend(start_date, end_date), title="DAU & New Users Trend - All Games")
+
+
+def build_revenue_chart(start_date, end_date):
+    from data_loader import get_revenue_trend
+    from chart_builder import create_revenue_chart
+    return create_revenue_chart(get_revenue_trend(start_date, end_date), title="Daily Revenue Trend - Portfolio View")
+
+
+@functools.lru_cache(maxsize=1)
+def load_pie_chart_data(start_date, end_date):
+    """Pie chart data for every game, loaded once per refresh however many games are stale"""
+    from data_loader import get_json_data_for_pie_charts
+    return get_json_data_for_pie_charts(start_date, end_date)
+
+
+def build_breakdown_chart(game_name):
+    def build(start_date, end_date):
+        from pie_charts import create_game_pie_charts_row
+        json_data = load_pie_chart_data(start_date, end_date)
+        if game_name not in json_data:
+            raise ValueError(f"No data available for {game_name}")
+        return create_game_pie_charts_row(json_data[game_name], game_name)
+    return build
+
+
+def dashboard_charts():
+    """Charts in dashboard order, with the tables (and game) each one reads"""
+    charts = [
+        {'name': 'dau_new_users', 'title': 'DAU & New Users Trend', 'tables': ['game_daily_metrics'],
+         'build': build_dau_new_users_chart},
+        {'name': 'revenue', 'title': 'Daily Revenue Trend', 'tables': ['game_daily_metrics'],
+         'build': build_revenue_chart},
+    ]
+    for game in GAMES:
+        charts.append({
+            'name': f"breakdown_{game['app_id']}",
+            'title': f"{game['name']} - Breakdown",
+            'tables': ['game_daily_metrics'],
+            'app_id': game['app_id'],
+            'build': build_breakdown_chart(game['name']),
+        })
+    return charts
+
+
+def run_incremental(output_dir, force=False):
+    """Rebuild changed charts and write exports/dashboard_latest.html"""
+    refresher = IncrementalRefresher(dashboard_charts(), START_DATE)
+    summary = refresher.refresh(force=force)
+    output_path = refresher.write_dashboard(os.path.join(output_dir, 'dashboard_latest.html'))
+    logger.info(f"Charts rebuilt: {summary['rebuilt'] or 'none'}; reused: {summary['reused'] or 'none'}")
+    print(f"✓ Rebuilt {len(summary['rebuilt'])} chart(s), reused {len(summary['reused'])} cached chart(s)")
+    if summary['failed']:
+        print(f"⚠ Failed to rebuild: {', '.join(summary['failed'])} (previous version kept if available)")
+    print(f"  Dashboard: {output_path}")
+    return not summary['failed']
+
+
+def run_full(output_dir):
+    """Execute the whole notebook with papermill (legacy path)"""
+    import papermill as pm
+    import shutil
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    input_notebook = os.path.join(script_dir, 'dashboard.ipynb')
+
+    # Create timestamped output in exports directory
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    output_notebook = os.path.join(output_dir, f'dashboard_{timestamp}.ipynb')
+
+    # Also update the "latest" version
+    latest_notebook = os.path.join(output_dir, 'dashboard_latest.ipynb')
+
+    logger.info(f"Executing notebook: {input_notebook}")
+    print(f"Input notebook: {input_notebook}")
+    print(f"Output notebook: {output_notebook}")
+    print()
+
+    # Execute notebook with papermill
+    pm.execute_notebook(
+        input_notebook,
+        output_notebook,
+        parameters={
+            'auto_refresh': True,
+            'refresh_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        },
+        kernel_name='python3',
+        progress_bar=True
+    )
+
+    # Copy to "latest" version
+    shutil.copy2(output_notebook, latest_notebook)
+    print(f"  Output saved to: {output_notebook}")
+    print(f"  Latest version: {latest_notebook}")
+    return True
+
+
 def main():
     """Main execution function"""
+    # Setup logging
+    log_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'refresh_dashboard.log')
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+    parser = argparse.ArgumentParser(description="Refresh the SteamWorks dashboard")
+    parser.add_argument('--force', action='store_true', help="rebuild every chart even if its data is unchanged")
+    parser.add_argument('--full', action='store_true', help="execute dashboard.ipynb with papermill instead")
+    parser.add_argument('--retention-days', type=int, default=RETENTION_DAYS,
+                        help=f"delete dated exports older than this (default: {RETENTION_DAYS})")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("SteamWorks Dashboard - Automated Refresh")
     print("=" * 60)
     print(f"Execution time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
-    
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    input_notebook = os.path.join(script_dir, 'dashboard.ipynb')
-    
-    # Create timestamped output in exports directory
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    output_dir = os.path.join(script_dir, 'exports')
+
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exports')
     os.makedirs(output_dir, exist_ok=True)
-    output_notebook = os.path.join(output_dir, f'dashboard_{timestamp}.ipynb')
-    
-    # Also update the "latest" version
-    latest_notebook = os.path.join(output_dir, 'dashboard_latest.ipynb')
-    
+
     try:
-        logger.info(f"Executing notebook: {input_notebook}")
-        print(f"Input notebook: {input_notebook}")
-        print(f"Output notebook: {output_notebook}")
-        print()
-        
-        # Execute notebook with papermill
-        pm.execute_notebook(
-            input_notebook,
-            output_notebook,
-            parameters={
-                'auto_refresh': True,
-                'refresh_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            },
-            kernel_name='python3',
-            progress_bar=True
-        )
-        
-        # Copy to "latest" version
-        import shutil
-        shutil.copy2(output_notebook, latest_notebook)
-        
-        logger.info("Dashboard refresh completed successfully")
+        success = run_full(output_dir) if args.full else run_incremental(output_dir, args.force)
+
+        removed = prune_exports(output_dir, args.retention_days)
+        if removed:
+            logger.info(f"Pruned {len(removed)} export(s) older than {args.retention_days} days")
+            print(f"  Pruned {len(removed)} export(s) older than {args.retention_days} days")
+
+        logger.info("Dashboard refresh completed successfully" if success else "Dashboard refresh completed with errors")
         print()
-        print("✓ Dashboard refresh completed successfully!")
-        print(f"  Output saved to: {output_notebook}")
-        print(f"  Latest version: {latest_notebook}")
+        print("✓ Dashboard refresh completed successfully!" if success else "⚠ Dashboard refresh completed with errors")
         print()
         print("=" * 60)
-        
-        sys.exit(0)
-        
+
+        sys.exit(0 if success else 1)
+
     except Exception as e:
         logger.error(f"Dashboard refresh failed: {str(e)}", exc_info=True)
         print(f"\n✗ ERROR: Dashboard refresh failed - {str(e)}")
@@ -83,4 +187,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
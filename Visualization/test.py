@@ -87,6 +87,24 @@ def main():
         print(f"   ❌ Alert system: ERROR - {str(e)}")
         return False
     
+    # Test 5: Query Cache
+    print("\n5. Testing query cache...")
+    try:
+        import time
+        from query_cache import cached
+        
+        cached_revenue = cached(['game_daily_metrics'])(get_revenue_trend)
+        timings = []
+        for _ in range(2):
+            started = time.perf_counter()
+            df_cached = cached_revenue()
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"   ✅ Query cache: {len(df_cached)} rows (first {timings[0]:.0f} ms, repeat {timings[1]:.0f} ms)")
+        
+    except Exception as e:
+        print(f"   ❌ Query cache: ERROR - {str(e)}")
+        return False
+    
     # Success!
     print("\n" + "=" * 60)
     print("🎉 ALL TESTS PASSED!")
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+Browser Daemon
+Keeps one Chrome running between crawls, logged in and switched to the default
+partner account. Crawler processes attach to it through the DevTools
+remote-debugging port (the debuggerAddress option), so a job starts on a warm
+session instead of paying for a cold Chrome start, the profile load and
+warmup_session().
+
+The daemon keeps a pool of warm tabs, each already open on the partner site.
+A crawler leases one tab over a small control API on 127.0.0.1. The tab goes
+back to the pool when the crawler's driver.quit() detaches: it is closed, and
+a fresh warm tab replaces it.
+
+The partner a session views the site as is shared by every tab, so each lease
+names the crawler's partner and the crawler switches to it itself. While tabs
+are out for one partner, leases for another are refused (HTTP 409) and the
+crawler waits for them to come back.
+
+Every health-check interval, the daemon:
+
+- Restarts Chrome if the DevTools endpoint stops answering.
+- Reloads its own tab to keep the login alive. If that lands on a login page,
+  the operator is notified.
+- Reclaims tabs whose lease has outlived lease_timeout (a crashed crawler).
+- Tops the pool back up.
+
+Crawlers attach when STEAMWORKS_BROWSER_DAEMON names the control address. If
+the daemon cannot be reached, they launch Chrome as before.
+
+    python browser_daemon.py                         # run the daemon (log in interactively the first time)
+    python browser_daemon.py --tabs 3 --interval 120
+    python browser_daemon.py --status
+    STEAMWORKS_BROWSER_DAEMON=127.0.0.1:9223 python steamworks_crawler.py
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from session_health import HEALTH_URL, SessionExpiredError, abort_expired_session, check_session, notify_operator
+from storage import load_db_config
+
+DEFAULT_DEBUG_PORT = 9222
+DEFAULT_CONTROL_PORT = 9223
+DEFAULT_TABS = 2
+DEFAULT_HEALTH_INTERVAL = 300    # seconds between health checks
+DEFAULT_LEASE_TIMEOUT = 4 * 3600  # seconds before an unreleased tab is reclaimed
+DEFAULT_PARTNER_WAIT = 600       # seconds a crawler waits for tabs leased to another partner
+
+
+class PartnerBusyError(Exception):
+    """Raised when tabs are leased to a different partner account than the one requested"""
+
+
+class DevTools:
+    """The DevTools HTTP endpoints of a Chrome started with --remote-debugging-port"""
+
+    def __init__(self, address, timeout=5):
+        self.address = address
+        self.timeout = timeout
+
+    def _call(self, path, method='GET'):
+        request = urllib.request.Request(f"http://{self.address}{path}", method=method)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = response.read().decode('utf-8')
+        try:
+            return json.loads(body)
+        except ValueError:
+            return body
+
+    def version(self):
+        return self._call('/json/version')
+
+    def tabs(self):
+        return [t for t in self._call('/json/list') if t.get('type') == 'page']
+
+    def new_tab(self, url):
+        # Chrome 111+ only accepts PUT here
+        return self._call(f"/json/new?{urllib.parse.quote(url, safe=':/')}", method='PUT')['id']
+
+    def close_tab(self, tab_id):
+        try:
+            self._call(f"/json/close/{tab_id}")
+        except Exception as e:
+            logging.debug(f"Closing tab {tab_id} failed: {e}")
+
+
+class TabPool:
+    """Warm tabs waiting to be leased, and the tabs currently out on lease"""
+
+    def __init__(self, devtools, size=DEFAULT_TABS, url=HEALTH_URL, lease_timeout=DEFAULT_LEASE_TIMEOUT,
+                 clock=time.time):
+        self.devtools = devtools
+        self.size = max(1, int(size))
+        self.url = url
+        self.lease_timeout = lease_timeout
+        self.clock = clock
+        self.idle = []
+        self.leased = {}
+        # {tab_id: partner} for leases that named one
+        self.partners = {}
+        self.lock = threading.Lock()
+
+    def fill(self):
+        """Open warm tabs until size of them are idle"""
+        with self.lock:
+            while len(self.idle) < self.size:
+                self.idle.append(self.devtools.new_tab(self.url))
+            return len(self.idle)
+
+    def active_partner(self):
+        """The partner the leased tabs view the site as, or None"""
+        return next(iter(self.partners.values()), None)
+
+    def lease(self, partner=None):
+        with self.lock:
+            active = self.active_partner()
+            if partner and active and partner != active:
+                raise PartnerBusyError(f"tabs are leased to partner {active}")
+            # An empty pool opens a tab on demand (it warms while the crawler attaches)
+            tab_id = self.idle.pop(0) if self.idle else self.devtools.new_tab(self.url)
+            self.leased[tab_id] = self.clock()
+            if partner:
+                self.partners[tab_id] = partner
+        return tab_id
+
+    def release(self, tab_id):
+        """Close a returned tab (dropping whatever the crawl left in it) and open a fresh one in its place"""
+        with self.lock:
+            known = self.leased.pop(tab_id, None) is not None
+            self.partners.pop(tab_id, None)
+        if known:
+            self.devtools.close_tab(tab_id)
+            self.fill()
+        return known
+
+    def reclaim(self):
+        """Close tabs whose lease outlived lease_timeout; returns their ids"""
+        now = self.clock()
+        with self.lock:
+            stale = [tab_id for tab_id, leased_at in self.leased.items() if now - leased_at > self.lease_timeout]
+            for tab_id in stale:
+                del self.leased[tab_id]
+                self.partners.pop(tab_id, None)
+        for tab_id in stale:
+            logging.warning(f"Reclaiming tab {tab_id} leased more than {self.lease_timeout}s ago")
+            self.devtools.close_tab(tab_id)
+        return stale
+
+    def prune(self):
+        """Forget tabs that Chrome no longer has (crashed renderer, closed by hand)"""
+        open_tabs = {t['id'] for t in self.devtools.tabs()}
+        with self.lock:
+            self.idle = [t for t in self.idle if t in open_tabs]
+            for tab_id in [t for t in self.leased if t not in open_tabs]:
+                del self.leased[tab_id]
+                self.partners.pop(tab_id, None)
+
+    def reset(self):
+        with self.lock:
+            self.idle = []
+            self.leased = {}
+            self.partners = {}
+
+
+class BrowserDaemon:
+    """One long-lived, logged-in Chrome whose tabs are leased to crawler processes"""
+
+    def __init__(self, db_config, port=DEFAULT_DEBUG_PORT, tabs=DEFAULT_TABS,
+                 interval=DEFAULT_HEALTH_INTERVAL, lease_timeout=DEFAULT_LEASE_TIMEOUT):
+        self.db_config = db_config
+        self.port = port
+        self.interval = interval
+        self.devtools = DevTools(f"127.0.0.1:{port}")
+        self.pool = TabPool(self.devtools, tabs, lease_timeout=lease_timeout)
+        self.owner = None
+        self.restarts = 0
+        self.logged_in = False
+        self.notified = False
+        self.last_check = None
+
+    def start_browser(self):
+        """Launch Chrome on the persistent profile with the debugging port open, log in and switch to the default partner"""
+        from steamworks_crawler import SteamWorksCrawler
+        owner = SteamWorksCrawler(self.db_config, steam_app_id=None, game_name=None)
+        owner.setup_driver(debugging_port=self.port)
+        owner.warmup_session()
+        try:
+            owner.check_session_health()
+        except SessionExpiredError:
+            self.stop_browser(owner)
+            raise
+        owner.ensure_partner_context()
+        self.owner = owner
+        self.logged_in = True
+        self.pool.reset()
+        self.pool.fill()
+        logging.info(f"Browser daemon ready on 127.0.0.1:{self.port} ({self.pool.size} warm tabs)")
+
+    def stop_browser(self, owner=None):
+        owner = owner or self.owner
+        try:
+            if owner and owner.driver:
+                owner.driver.quit()
+        except Exception as e:
+            logging.warning(f"Failed to close daemon browser: {e}")
+        if owner is self.owner:
+            self.owner = None
+
+    def restart(self):
+        self.stop_browser()
+        self.restarts += 1
+        self.start_browser()
+
+    def chrome_alive(self):
+        try:
+            self.devtools.version()
+            return True
+        except Exception:
+            return False
+
+    def refresh_session(self):
+        """Reload the daemon's own tab (keeping the login alive); False if it lands on a login page"""
+        try:
+            self.owner.driver.get(HEALTH_URL)
+            return check_session(self.owner.driver)
+        except Exception as e:
+            logging.warning(f"Session refresh failed: {e}")
+            return False
+
+    def check_health(self):
+        """One health pass: restart a dead Chrome, refresh the login, recycle stale tabs; returns status()"""
+        if self.owner is None or not self.chrome_alive():
+            logging.warning("Daemon Chrome is not answering; restarting it")
+            self.restart()
+        self.logged_in = self.refresh_session()
+        if not self.logged_in and not self.notified:
+            notify_operator("SteamWorks browser daemon: session expired",
+                            "The daemon's Chrome is on a login page. Log in again in the daemon's browser window.")
+            self.notified = True
+        elif self.logged_in:
+            self.notified = False
+        self.pool.reclaim()
+        self.pool.prune()
+        self.pool.fill()
+        self.last_check = datetime.now()
+        return self.status()
+
+    def lease(self, partner=None):
+        return {'tab': self.pool.lease(partner), 'debugger_address': self.devtools.address}
+
+    def release(self, tab_id):
+        return self.pool.release(tab_id)
+
+    def status(self):
+        return {
+            'chrome': self.owner is not None, 'logged_in': self.logged_in, 'restarts': self.restarts,
+            'idle_tabs': len(self.pool.idle), 'leased_tabs': len(self.pool.leased),
+            'leased_partner': self.pool.active_partner(),
+            'debugger_address': self.devtools.address,
+            'last_check': self.last_check.isoformat(timespec='seconds') if self.last_check else None,
+        }
+
+    def control_server(self, port=DEFAULT_CONTROL_PORT):
+        """HTTP control API on 127.0.0.1 (port 0 picks a free one)"""
+        server = ThreadingHTTPServer(('127.0.0.1', port), _ControlHandler)
+        server.daemon_threads = True
+        server.browser_daemon = self
+        return server
+
+    def serve(self, control_port=DEFAULT_CONTROL_PORT):
+        """Start Chrome and the control API, then run health checks until interrupted"""
+        self.start_browser()
+        server = self.control_server(control_port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logging.info(f"Control API on 127.0.0.1:{server.server_address[1]} "
+                     f"(STEAMWORKS_BROWSER_DAEMON=127.0.0.1:{server.server_address[1]})")
+        try:
+            while True:
+                time.sleep(self.interval)
+                try:
+                    status = self.check_health()
+                    logging.info(f"Health check: {status}")
+                except SessionExpiredError:
+                    # A restart needs a login nobody can give; retry after the next interval
+                    logging.error("Chrome restarted onto a login page; retrying at the next health check")
+                except Exception as e:
+                    logging.error(f"Health check failed: {e}")
+        except KeyboardInterrupt:
+            logging.info("Stopping browser daemon")
+        finally:
+            server.shutdown()
+            self.stop_browser()
+
+
+class _ControlHandler(BaseHTTPRequestHandler):
+    """GET /status, POST /lease[?partner=<id or name>], POST /release?tab=<id>"""
+
+    def _reply(self, code, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if urllib.parse.urlparse(self.path).path == '/status':
+            return self._reply(200, self.server.browser_daemon.status())
+        self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        daemon = self.server.browser_daemon
+        try:
+            if url.path == '/lease':
+                if not daemon.logged_in:
+                    return self._reply(503, {'error': 'session expired'})
+                partner = urllib.parse.parse_qs(url.query).get('partner', [''])[0]
+                return self._reply(200, daemon.lease(partner or None))
+            if url.path == '/release':
+                tab_id = urllib.parse.parse_qs(url.query).get('tab', [''])[0]
+                return self._reply(200, {'released': daemon.release(tab_id)})
+        except PartnerBusyError as e:
+            return self._reply(409, {'error': str(e)})
+        except Exception as e:
+            logging.error(f"Control request {url.path} failed: {e}")
+            return self._reply(500, {'error': str(e)})
+        self._reply(404, {'error': 'not found'})
+
+    def log_message(self, format, *args):
+        logging.debug(f"Control API: {format % args}")
+
+
+class DaemonClient:
+    """Talks to a running daemon's control API"""
+
+    def __init__(self, address, timeout=10):
+        self.address = address
+        self.timeout = timeout
+
+    def _call(self, path, method='GET'):
+        request = urllib.request.Request(f"http://{self.address}{path}", method=method, data=b'' if method == 'POST' else None)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def status(self):
+        return self._call('/status')
+
+    def lease(self, partner=None):
+        query = f"?partner={urllib.parse.quote(partner)}" if partner else ''
+        return self._call(f"/lease{query}", method='POST')
+
+    def release(self, tab_id):
+        return self._call(f"/release?tab={urllib.parse.quote(tab_id)}", method='POST')
+
+
+def daemon_address():
+    return os.environ.get('STEAMWORKS_BROWSER_DAEMON', '').strip()
+
+
+def lease_tab(client, partner=None, wait=DEFAULT_PARTNER_WAIT, sleep=time.sleep):
+    """Lease a tab for partner, waiting while the daemon's tabs are out for another partner"""
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            return client.lease(partner)
+        except urllib.error.HTTPError as e:
+            if e.code != 409 or time.monotonic() >= deadline:
+                raise
+            logging.info(f"Browser daemon tabs are leased to another partner; waiting to view as {partner}")
+            sleep(5)
+
+
+def attach_to_daemon(address=None, partner=None):
+    """WebDriver on a leased warm tab of the daemon's Chrome; None (launch Chrome instead) if unreachable.
+    partner (id or name) keeps other partners' crawls off the shared session until this one releases its tab;
+    the caller still switches the tab to it. The driver's quit() detaches without closing Chrome and hands the tab back."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    class LeasedChrome(webdriver.Chrome):
+        def quit(self):
+            try:
+                super().quit()
+            finally:
+                try:
+                    self.daemon_client.release(self.leased_tab)
+                except Exception as e:
+                    logging.warning(f"Returning tab {self.leased_tab} to the browser daemon failed: {e}")
+
+    client = DaemonClient(address or daemon_address())
+    try:
+        lease = lease_tab(client, partner)
+    except Exception as e:
+        logging.warning(f"Browser daemon at {client.address} unavailable, launching Chrome instead: {e}")
+        return None
+    options = Options()
+    options.add_experimental_option('debuggerAddress', lease['debugger_address'])
+    try:
+        driver = LeasedChrome(options=options)
+        driver.daemon_client = client
+        driver.leased_tab = lease['tab']
+        # ChromeDriver window handles are the DevTools target ids
+        driver.switch_to.window(lease['tab'])
+    except Exception as e:
+        logging.warning(f"Attaching to the browser daemon failed, launching Chrome instead: {e}")
+        client.release(lease['tab'])
+        return None
+    logging.info(f"Attached to browser daemon tab {lease['tab']} at {lease['debugger_address']}")
+    return driver
+
+
+def main():
+    """Main function to run the browser daemon or query its status"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('browser_daemon.log'),
+            logging.StreamHandler()
+        ]
+    )
+    parser = argparse.ArgumentParser(description="Keep a logged-in Chrome running for the crawlers to attach to")
+    parser.add_argument('--port', type=int, default=DEFAULT_DEBUG_PORT, help="Chrome remote-debugging port")
+    parser.add_argument('--control-port', type=int, default=DEFAULT_CONTROL_PORT, help="control API port")
+    parser.add_argument('--tabs', type=int, default=DEFAULT_TABS, help="warm tabs kept ready")
+    parser.add_argument('--interval', type=int, default=DEFAULT_HEALTH_INTERVAL, help="seconds between health checks")
+    parser.add_argument('--status', action='store_true', help="print the running daemon's status and exit")
+    args = parser.parse_args()
+
+    if args.status:
+        address = daemon_address() or f"127.0.0.1:{args.control_port}"
+        try:
+            print(json.dumps(DaemonClient(address).status(), indent=2))
+        except Exception as e:
+            print(f"Browser daemon at {address} is not running: {e}")
+            sys.exit(1)
+        return
+
+    daemon = BrowserDaemon(load_db_config(), port=args.port, tabs=args.tabs, interval=args.interval)
+    try:
+        daemon.serve(args.control_port)
+    except SessionExpiredError as e:
+        abort_expired_session(e, "browser daemon")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,25 @@
-import mysql.connector
-from mysql.connector import Error
+from storage import get_storage, load_db_config, StorageError
 
 def check_database():
     """Check what data is in the database"""
     
-    # Database configuration
-    config = {
-        'host': 'localhost',
-        'port': 3306,
-        'database': 'steamworks_crawler',
-        'user': 'root',
-        'password': 'Zh1149191843!'
-    }
-    
-    connection = None
-    cursor = None
+    # Database configuration (STEAMWORKS_DB_* / STEAMWORKS_STORAGE env vars)
+    storage = get_storage(load_db_config())
     
     try:
         print("=== Database Content Check ===")
         
-        # Connect to database
-        connection = mysql.connector.connect(**config)
-        cursor = connection.cursor()
-        
-        # Check total records
-        cursor.execute("SELECT COUNT(*) FROM terminull_brigade_swcrawler")
-        count = cursor.fetchone()[0]
-        print(f"Total records in table: {count}")
+        with storage.session() as session:
+            # Check total records
+            count = session.fetch_one("SELECT COUNT(*) AS total FROM terminull_brigade_swcrawler")['total']
+            print(f"Total records in table: {count}")
+            records = session.fetch_all("SELECT * FROM terminull_brigade_swcrawler ORDER BY date DESC") if count > 0 else []
         
         if count > 0:
             # Show all records
-            cursor.execute("SELECT * FROM terminull_brigade_swcrawler ORDER BY date DESC")
-            records = cursor.fetchall()
-            
             print(f"\nLatest {min(5, len(records))} records:")
             for i, record in enumerate(records[:5]):
+                record = list(record.values())
                 print(f"\nRecord {i+1}:")
                 print(f"  ID: {record[0]}")
                 print(f"  Date: {record[1]}")
@@ -45,15 +30,10 @@ def check_database():
         else:
             print("No records found in the table")
         
-    except Error as e:
+    except StorageError as e:
         print(f"Database error: {e}")
     except Exception as e:
         print(f"Error: {e}")
-    finally:
-        if cursor:
-            cursor.close()
-        if connection and connection.is_connected():
-            connection.close()
 
 if __name__ == "__main__":
     check_database() 
\ No newline at end of file
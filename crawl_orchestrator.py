@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Crawl Orchestrator
+Runs the financial and marketing crawls (and optional marketing backfills) for
+every game as one job graph over a single Chrome session. Chrome is launched
+and warmed up once, and every job attaches to that driver instead of paying
+for its own browser start-up. Attaching switches the browser to the job's
+game's partner account (a no-op when it is already there).
+
+    python crawl_orchestrator.py                                  # financial + marketing, all games
+    python crawl_orchestrator.py --only marketing --games 2507950
+    python crawl_orchestrator.py --backfill-from 20251001 --backfill-to 20251007
+
+Jobs run game by game (financial, then marketing, then backfill). A job whose
+dependency failed is skipped rather than run against a broken page state; a
+dead browser is restarted before the next job. The exit code is non-zero if
+any job did not succeed, so Task Scheduler can flag the run. An expired login
+skips every remaining job, notifies the operator and exits with
+EXIT_SESSION_EXPIRED (see session_health.py).
+"""
+
+import argparse
+import logging
+import sys
+import time
+from datetime import date, datetime
+
+from game_registry import game_name, load_games
+from session_health import EXIT_SESSION_EXPIRED, SessionExpiredError, notify_operator
+from storage import load_db_config
+
+DOMAINS = ['financial', 'marketing']
+
+
+class BrowserSession:
+    """One authenticated Chrome shared by every job; started lazily and restarted if it dies"""
+
+    def __init__(self, db_config):
+        self.db_config = db_config
+        self.owner = None
+        self.restarts = 0
+
+    @property
+    def driver(self):
+        return self.owner.driver if self.owner else None
+
+    def start(self):
+        from steamworks_crawler import SteamWorksCrawler
+        # The financial crawler owns the driver; its Chrome profile setup is shared by both domains
+        self.owner = SteamWorksCrawler(self.db_config, steam_app_id=None, game_name=None)
+        self.owner.setup_driver()
+        self.owner.warmup_session()
+        try:
+            self.owner.check_session_health()
+        except SessionExpiredError:
+            self.close()
+            raise
+        self.owner.ensure_partner_context()
+        logging.info("Shared browser session ready")
+
+    def alive(self):
+        try:
+            return self.driver is not None and bool(self.driver.current_url)
+        except Exception:
+            return False
+
+    def ensure_alive(self):
+        if self.owner is None:
+            self.start()
+        elif not self.alive():
+            logging.warning("Shared browser session is gone; restarting Chrome")
+            self.close()
+            self.restarts += 1
+            self.start()
+
+    def attach(self, crawler, partner_id=None):
+        """Point a crawler at the shared driver (it will not set up or quit Chrome itself)
+        and switch the browser to partner_id, or else to the crawler's game's partner"""
+        self.ensure_alive()
+        crawler.attach_driver(self.owner.driver, self.owner.wait)
+        # run_crawler skips the partner switch for attached crawlers; games can belong to different partners
+        crawler.ensure_partner_context(partner_id)
+        return crawler
+
+    def close(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+                logging.info("Shared WebDriver closed")
+            except Exception as e:
+                logging.warning(f"Failed to close shared WebDriver: {e}")
+        self.owner = None
+
+
+def run_financial(app_id, name):
+    def run(session):
+        from steamworks_crawler import SteamWorksCrawler
+        crawler = session.attach(SteamWorksCrawler(session.db_config, steam_app_id=app_id, game_name=name))
+        return crawler.run_crawler()
+    return run
+
+
+def run_marketing(app_id, name):
+    def run(session):
+        from steamworks_marketing_crawler import SteamworksMarketingCrawler
+        crawler = session.attach(SteamworksMarketingCrawler(session.db_config, steam_app_id=app_id, game_name=name))
+        return crawler.run_crawler()
+    return run
+
+
+def run_backfill(app_id, name, start_date, end_date):
+    def run(session):
+        from steamworks_historical_marketing_crawler import SteamworksHistoricalMarketingCrawler
+        crawler = session.attach(SteamworksHistoricalMarketingCrawler(
+            session.db_config, steam_app_id=app_id, game_name=name, start_date=start_date, end_date=end_date
+        ))
+        return crawler.run_historical_crawler()
+    return run
+
+
+def build_jobs(games, domains=None, backfill=None):
+    """Job graph as an ordered list of {'name', 'kind', 'app_id', 'game_name', 'depends_on', 'run'}"""
+    domains = domains or DOMAINS
+    jobs = []
+    for app_id, name in games:
+        if 'financial' in domains:
+            jobs.append({'name': f"financial:{app_id}", 'kind': 'financial', 'app_id': app_id,
+                         'game_name': name, 'depends_on': [], 'run': run_financial(app_id, name)})
+        if 'marketing' in domains:
+            jobs.append({'name': f"marketing:{app_id}", 'kind': 'marketing', 'app_id': app_id,
+                         'game_name': name, 'depends_on': [], 'run': run_marketing(app_id, name)})
+        if backfill:
+            # Backfills reuse the marketing page state, so they wait for today's marketing crawl
+            depends_on = [f"marketing:{app_id}"] if 'marketing' in domains else []
+            jobs.append({'name': f"backfill:{app_id}", 'kind': 'backfill', 'app_id': app_id,
+                         'game_name': name, 'depends_on': depends_on,
+                         'run': run_backfill(app_id, name, backfill[0], backfill[1])})
+    return jobs
+
+
+def run_job_graph(jobs, session):
+    """Run jobs in order, skipping any whose dependencies did not succeed; returns per-job status dicts"""
+    names = {job['name'] for job in jobs}
+    for job in jobs:
+        unknown = [d for d in job['depends_on'] if d not in names]
+        if unknown:
+            raise ValueError(f"Job {job['name']} depends on unknown job(s): {', '.join(unknown)}")
+
+    statuses = {}
+    results = []
+    expired = None
+    for job in jobs:
+        label = f"{job['kind']} {job['game_name']} ({job['app_id']})"
+        blocked = [d for d in job['depends_on'] if statuses.get(d) != 'succeeded']
+        started = time.time()
+        if expired is not None:
+            # Every job needs the same login; retrying it per job only stalls the batch
+            status, message = 'skipped', f"session expired: {expired}"
+        elif blocked:
+            status, message = 'skipped', f"dependency not satisfied: {', '.join(blocked)}"
+            logging.warning(f"Skipping {label}: {message}")
+        else:
+            logging.info(f"=== Running {label} ===")
+            try:
+                success, result = job['run'](session)
+                status = 'succeeded' if success else 'failed'
+                message = '' if success else str(result)
+            except SessionExpiredError as e:
+                expired = e
+                status, message = 'failed', f"session expired: {e}"
+            except Exception as e:
+                status, message = 'failed', str(e)
+            if status == 'failed':
+                logging.error(f"{label} failed: {message}")
+        statuses[job['name']] = status
+        results.append({'name': job['name'], 'kind': job['kind'], 'app_id': job['app_id'],
+                        'game_name': job['game_name'], 'status': status,
+                        'seconds': round(time.time() - started, 1), 'message': message})
+    return results
+
+
+def format_report(results, total_seconds):
+    lines = [f"{'Job':<12} {'Game':<28} {'Status':<10} {'Time':>8}  Message"]
+    for r in results:
+        lines.append(f"{r['kind']:<12} {r['game_name'][:28]:<28} {r['status']:<10} {r['seconds']:>7.1f}s  {r['message'][:80]}")
+    counts = {s: sum(1 for r in results if r['status'] == s) for s in ('succeeded', 'failed', 'skipped')}
+    lines.append(f"{counts['succeeded']} succeeded, {counts['failed']} failed, {counts['skipped']} skipped "
+                 f"in {total_seconds:.1f}s")
+    return "\n".join(lines)
+
+
+def main():
+    """Main function to run every crawl over one browser session"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('crawl_orchestrator.log'),
+            logging.StreamHandler()
+        ],
+        force=True
+    )
+    parser = argparse.ArgumentParser(description="Run financial and marketing crawls over one Chrome session")
+    parser.add_argument('--only', nargs='+', choices=DOMAINS, help="domains to crawl (default: all)")
+    parser.add_argument('--games', help="comma-separated app ids (default: STEAMWORKS_GAMES or games.json)")
+    parser.add_argument('--backfill-from', help="also backfill marketing data from YYYYMMDD")
+    parser.add_argument('--backfill-to', help="last backfill date YYYYMMDD (default: same as --backfill-from)")
+    args = parser.parse_args()
+
+    games = load_games(date.today())
+    if args.games:
+        wanted = {int(a) for a in args.games.split(',') if a.strip()}
+        games = [g for g in games if g[0] in wanted] + [(a, game_name(a)) for a in wanted if a not in {g[0] for g in games}]
+
+    backfill = None
+    if args.backfill_from:
+        start_date = datetime.strptime(args.backfill_from, '%Y%m%d').date()
+        end_date = datetime.strptime(args.backfill_to, '%Y%m%d').date() if args.backfill_to else start_date
+        backfill = (start_date, end_date)
+
+    jobs = build_jobs(games, args.only, backfill)
+    session = BrowserSession(load_db_config())
+    started = time.time()
+    try:
+        results = run_job_graph(jobs, session)
+    finally:
+        session.close()
+
+    report = format_report(results, time.time() - started)
+    logging.info(f"Orchestrator summary (browser restarts: {session.restarts}):\n{report}")
+    print("\n" + report)
+    if any(r['message'].startswith('session expired') for r in results):
+        notify_operator("SteamWorks crawl: session expired",
+                        f"Run the crawler once interactively to log in again.\n\n{report}")
+        sys.exit(EXIT_SESSION_EXPIRED)
+    sys.exit(0 if all(r['status'] == 'succeeded' for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Pipelined Crawl
+Splits the financial crawl into three stages joined by bounded queues:
+
+    fetch   one browser navigates (and sets the 'yesterday' filter), then captures the page HTML
+    parse   a pool of threads runs the page extractors on the captured snapshots
+    write   a background thread saves finished games, several per transaction
+
+The browser moves to the next page as soon as a snapshot is captured, so
+parsing never holds it. A finished game is written while the next game is
+still being fetched. The queues are bounded, so a slow stage backs up the one
+before it instead of buffering a whole run in memory.
+
+Snapshots are parsed with lxml: PageSnapshot answers the extractors' XPath
+lookups from the captured HTML instead of the live DOM. The run manifest and
+the page cache apply exactly as in run_crawler. Every payload is spooled
+before its batch is written, so a failed write is replayed by
+replay_spool.py.
+
+    STEAMWORKS_PIPELINE=1 python steamworks_crawler.py
+    STEAMWORKS_PIPELINE=1 STEAMWORKS_PARSE_WORKERS=4 python steamworks_crawler.py
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+
+from session_health import SessionExpiredError
+from storage import get_storage
+
+DEFAULT_PARSE_WORKERS = 2
+DEFAULT_BATCH_SIZE = 4        # games per write transaction
+DEFAULT_QUEUE_SIZE = 8        # snapshots (or games) waiting between two stages
+DEFAULT_FLUSH_INTERVAL = 2.0  # seconds the writer waits for a batch to fill
+
+
+class SnapshotElement:
+    """The part of Selenium's WebElement the page extractors use, backed by an lxml element"""
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    def tag_name(self):
+        return self.node.tag
+
+    @property
+    def text(self):
+        # Selenium returns rendered text; collapsing whitespace matches it for the table cells parsed here
+        return ' '.join(self.node.text_content().split())
+
+    def get_attribute(self, name):
+        if name in ('innerText', 'textContent'):
+            return self.text
+        return self.node.get(name)
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def find_element(self, by, xpath):
+        return _first(self.node, xpath)
+
+    def find_elements(self, by, xpath):
+        return _select(self.node, xpath)
+
+
+class PageSnapshot:
+    """HTML captured by the fetch stage; stands in for the driver while a page is parsed"""
+
+    def __init__(self, html, url):
+        from lxml import html as lxml_html
+        self.page_source = html
+        self.current_url = url
+        self.root = lxml_html.document_fromstring(html or '<html></html>')
+
+    def find_element(self, by, xpath):
+        return _first(self.root, xpath)
+
+    def find_elements(self, by, xpath):
+        return _select(self.root, xpath)
+
+
+def _select(node, xpath):
+    # Like Selenium, only elements are returned (no text or attribute nodes)
+    return [SnapshotElement(e) for e in node.xpath(xpath) if isinstance(getattr(e, 'tag', None), str)]
+
+
+def _first(node, xpath):
+    found = _select(node, xpath)
+    if not found:
+        raise LookupError(f"No element matches {xpath}")
+    return found[0]
+
+
+class CrawlPipeline:
+    """Fetch, parse and write financial pages in overlapping stages"""
+
+    def __init__(self, db_config, parse_workers=DEFAULT_PARSE_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+                 queue_size=DEFAULT_QUEUE_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.db_config = db_config
+        self.parse_workers = max(1, int(parse_workers))
+        self.batch_size = max(1, int(batch_size))
+        self.queue_size = max(1, int(queue_size))
+        self.flush_interval = flush_interval
+        self.owner = None
+        self.expired = None
+        self.stat_date = None
+        self.results = []
+        self._lock = threading.Lock()
+
+    def new_crawler(self, app_id, name):
+        from steamworks_crawler import SteamWorksCrawler
+        return SteamWorksCrawler(self.db_config, steam_app_id=app_id, game_name=name)
+
+    def start_browser(self):
+        """The logged-in browser shared by every game's fetches (each game switches to its own partner)"""
+        owner = self.new_crawler(None, None)
+        owner.setup_driver()
+        owner.warmup_session()
+        try:
+            owner.check_session_health()
+        except SessionExpiredError:
+            self.stop_browser(owner)
+            raise
+        owner.ensure_partner_context()
+        self.owner = owner
+        return owner
+
+    def stop_browser(self, owner=None):
+        owner = owner or self.owner
+        try:
+            if owner and owner.driver:
+                owner.driver.quit()
+        except Exception as e:
+            logging.warning(f"Failed to close pipeline browser: {e}")
+        if owner is self.owner:
+            self.owner = None
+
+    def plan(self, games, stat_date):
+        """{app_id: (pages still to crawl, pages carried from the page cache)}"""
+        plan = {}
+        for app_id, name in games:
+            crawler = self.new_crawler(app_id, name)
+            pages = crawler.pending_pages(stat_date)
+            plan[app_id] = (pages, crawler.cached_pages(stat_date, pages) if pages else {})
+        return plan
+
+    def fetch_stage(self, work, parses, writes):
+        """Navigate to every page of every game in turn, handing each snapshot to the parse pool"""
+        for app_id, name, fetch, carried in work:
+            crawler = self.new_crawler(app_id, name)
+            game = {'crawler': crawler, 'app_id': app_id, 'game_name': name, 'expected': len(fetch),
+                    'carried': carried, 'parsed': {}, 'started': time.time()}
+            if not fetch:
+                self._finish(game, writes)
+                continue
+            if self.owner is None:
+                self.start_browser()
+            crawler.attach_driver(self.owner.driver, self.owner.wait)
+            # Games can belong to different partners; fetches are sequential, so switching here is safe
+            crawler.ensure_partner_context()
+            logging.info(f"Fetching {len(fetch)} page(s) for {name} ({app_id})")
+            for page in fetch:
+                # Blocks while the parse pool is queue_size snapshots behind
+                parses.put((game, page, crawler.fetch_page(page)))
+
+    def _parse_loop(self, parses, writes):
+        while True:
+            item = parses.get()
+            if item is None:
+                return
+            game, page, snapshot = item
+            try:
+                page_data = game['crawler'].parse_snapshot(page, snapshot)
+            except Exception as e:
+                logging.error(f"Parsing {page} for {game['game_name']} failed: {e}")
+                page_data = None
+            with self._lock:
+                game['parsed'][page] = page_data
+                complete = len(game['parsed']) == game['expected']
+            if complete:
+                self._finish(game, writes)
+
+    def _finish(self, game, writes):
+        """Merge a game's parsed and carried pages and queue it for the writer"""
+        data = game['crawler'].merge_pages(game['parsed'], self.stat_date, game['carried'])
+        logging.info(f"Parsed {game['game_name']} ({game['app_id']}) in {time.time() - game['started']:.1f}s")
+        writes.put({'crawler': game['crawler'], 'app_id': game['app_id'], 'game_name': game['game_name'],
+                    'data': data, 'error': None if data else 'Data extraction failed',
+                    'seconds': time.time() - game['started'], 'saved': False})
+
+    def _write_loop(self, writes):
+        batch = []
+        while True:
+            try:
+                item = writes.get(timeout=self.flush_interval) if batch else writes.get()
+            except queue.Empty:
+                # Nothing new for flush_interval; write what has accumulated
+                self.save_batch(batch)
+                batch = []
+                continue
+            if item is None:
+                if batch:
+                    self.save_batch(batch)
+                return
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self.save_batch(batch)
+                batch = []
+
+    def save_batch(self, batch):
+        """Spool every payload, then write the batch in one transaction; sets each result's 'saved' flag"""
+        from crawl_spool import CrawlSpool
+        pending = [(result, result['crawler'].spool_payload(result['data'], self.stat_date,
+                                                            result['crawler'].page_status))
+                   for result in batch if result['data']]
+        saved = False
+        if pending:
+            try:
+                merged = []
+                with get_storage(self.db_config).session() as session:
+                    for result, _ in pending:
+                        crawler = result['crawler']
+                        merged.append(crawler._save_with_session(session, result['data'], self.stat_date, crawler.page_status))
+                saved = True
+            except Exception as e:
+                logging.error(f"Batched save of {len(pending)} game(s) failed; payloads stay spooled for replay: {e}")
+        if saved:
+            spool = CrawlSpool()
+            for (result, spool_id), data in zip(pending, merged):
+                if spool_id is not None:
+                    spool.mark_drained(spool_id)
+                result['crawler']._save_derived(data, self.stat_date, result['crawler'].page_status)
+            logging.info(f"Saved {len(pending)} game(s) in one transaction")
+        for result in batch:
+            result['saved'] = saved and bool(result['data'])
+            del result['crawler']
+        with self._lock:
+            self.results.extend(batch)
+
+    def process(self, work):
+        """Run the three stages over [(app_id, name, pages to fetch, carried pages)]; returns result dicts"""
+        self.results = []
+        parses = queue.Queue(maxsize=self.queue_size)
+        writes = queue.Queue(maxsize=self.queue_size)
+        parsers = [threading.Thread(target=self._parse_loop, args=(parses, writes), daemon=True)
+                   for _ in range(self.parse_workers)]
+        writer = threading.Thread(target=self._write_loop, args=(writes,), daemon=True)
+        for thread in parsers + [writer]:
+            thread.start()
+        try:
+            self.fetch_stage(work, parses, writes)
+        except SessionExpiredError as e:
+            # Games already fetched are still parsed and written; the rest wait for a fresh login
+            self.expired = e
+        finally:
+            # Chrome is released as soon as fetching ends, while parsing and writing drain
+            self.stop_browser()
+            for _ in parsers:
+                parses.put(None)
+            for thread in parsers:
+                thread.join()
+            writes.put(None)
+            writer.join()
+        if self.expired is not None:
+            raise self.expired
+        return self.results
+
+    def run(self, games, stat_date):
+        """Crawl and save; returns the per-game result dicts (as CrawlWorkerPool.run) in input order"""
+        self.stat_date = stat_date
+        plan = self.plan(games, stat_date)
+        results = []
+        work = []
+        for app_id, name in games:
+            pages, carried = plan[app_id]
+            if not pages:
+                logging.info(f"All pages already stored for {name} on {stat_date}; skipping")
+                results.append({'app_id': app_id, 'game_name': name, 'data': {}, 'error': None,
+                                'seconds': 0.0, 'saved': True})
+                continue
+            work.append((app_id, name, [page for page in pages if page not in carried], carried))
+        if work:
+            results += self.process(work)
+        order = {game[0]: i for i, game in enumerate(games)}
+        return sorted(results, key=lambda r: order[r['app_id']])
+
+
+def pipeline_enabled():
+    return os.environ.get('STEAMWORKS_PIPELINE', '').strip() == '1'
+
+
+def parse_workers_from_env():
+    try:
+        return max(1, int(os.environ.get('STEAMWORKS_PARSE_WORKERS', DEFAULT_PARSE_WORKERS)))
+    except ValueError:
+        return DEFAULT_PARSE_WORKERS
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Parallel Crawl Pool
+Crawls several games at once, one Chrome per worker, and writes every result in
+a single batched database transaction.
+
+Only the first browser goes through login and warmup. The other workers start
+Chrome on throwaway profiles and copy its cookies, so no extra logins are
+needed. Sharing cookies also shares the partner account the session views the
+site as, so games are crawled one partner at a time: every worker switches to
+that partner before each game (a no-op once it is there), and the next
+partner's games start after the last worker is done. A shared token bucket caps page loads per second
+across all workers, so adding workers never hammers SteamWorks harder than
+STEAMWORKS_RATE_LIMIT allows.
+
+Every payload is spooled locally before the batched write. If that write
+fails, nothing is lost: replay_spool.py picks the payloads up. Pages that the
+run manifest already records for the date are not crawled again (see
+run_manifest.py).
+
+    STEAMWORKS_CRAWL_WORKERS=4 python steamworks_crawler.py
+"""
+
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+from game_registry import partner_for
+from session_health import SessionExpiredError
+from storage import get_storage
+
+BASE_URL = "https://partner.steampowered.com/"
+
+DEFAULT_RATE_LIMIT = 1.0   # page loads per second across all workers
+
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() blocks until a token is available"""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+
+def share_cookies(source_driver, target_driver, base_url=BASE_URL):
+    """Copy the authenticated partner-site cookies into another browser"""
+    target_driver.get(base_url)
+    copied = 0
+    for cookie in source_driver.get_cookies():
+        cookie = {k: v for k, v in cookie.items() if k in ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry')}
+        try:
+            target_driver.add_cookie(cookie)
+            copied += 1
+        except Exception as e:
+            logging.debug(f"Skipping cookie {cookie.get('name')}: {e}")
+    target_driver.get(base_url)
+    return copied
+
+
+class CrawlWorkerPool:
+    """Crawl games on N browsers in parallel, then save all results in one transaction"""
+
+    def __init__(self, db_config, workers=2, rate_limit=DEFAULT_RATE_LIMIT):
+        self.db_config = db_config
+        self.workers = max(1, int(workers))
+        self.limiter = TokenBucket(rate_limit, capacity=self.workers)
+        self.primary = None
+        self.expired = None
+        # {app_id: page keys to crawl}, from the run manifest; games missing from it crawl every page
+        self.pending = {}
+        # {app_id: {page key: fields extracted}} for the manifest rows written with the batch
+        self.page_status = {}
+        self.stat_date = None
+        self._profile_dirs = []
+
+    def start_primary(self):
+        """The logged-in browser (persistent profile); its cookies seed the other workers"""
+        from steamworks_crawler import SteamWorksCrawler
+        owner = SteamWorksCrawler(self.db_config, steam_app_id=None, game_name=None)
+        owner.setup_driver()
+        owner.warmup_session()
+        try:
+            owner.check_session_health()
+        except SessionExpiredError:
+            self.stop_worker(owner)
+            raise
+        owner.ensure_partner_context()
+        self.primary = owner
+        return owner
+
+    def start_worker(self, index):
+        """Extra browser on a throwaway profile, authenticated with the primary's cookies"""
+        if index == 0:
+            return self.primary or self.start_primary()
+        from steamworks_crawler import SteamWorksCrawler
+        profile_dir = tempfile.mkdtemp(prefix=f"steamworks_worker{index}_")
+        self._profile_dirs.append(profile_dir)
+        owner = SteamWorksCrawler(self.db_config, steam_app_id=None, game_name=None)
+        owner.setup_driver(profile_dir=profile_dir)
+        copied = share_cookies(self.primary.driver, owner.driver)
+        logging.info(f"Worker {index} ready ({copied} cookies shared)")
+        return owner
+
+    def crawl_game(self, owner, app_id, name):
+        """Extract one game's pages on a worker's browser; returns the payload dict"""
+        from steamworks_crawler import SteamWorksCrawler
+        crawler = SteamWorksCrawler(self.db_config, steam_app_id=app_id, game_name=name)
+        crawler.attach_driver(owner.driver, owner.wait)
+        crawler.ensure_partner_context()
+        crawler.rate_limiter = self.limiter
+        data = crawler.extract_all_pages(self.pending.get(app_id), self.stat_date)
+        self.page_status[app_id] = crawler.page_status
+        return data
+
+    def plan(self, games, stat_date):
+        """{app_id: pages still to crawl} according to the run manifest"""
+        from steamworks_crawler import SteamWorksCrawler
+        return {app_id: SteamWorksCrawler(self.db_config, app_id, name).pending_pages(stat_date)
+                for app_id, name in games}
+
+    def stop_worker(self, owner):
+        try:
+            if owner and owner.driver:
+                owner.driver.quit()
+        except Exception as e:
+            logging.warning(f"Failed to close worker browser: {e}")
+
+    def _worker_loop(self, index, jobs, results):
+        try:
+            owner = self.start_worker(index)
+        except Exception as e:
+            # The remaining workers keep draining the queue
+            logging.error(f"Worker {index} failed to start: {e}")
+            return
+        try:
+            while True:
+                try:
+                    app_id, name = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                started = time.time()
+                try:
+                    data = self.crawl_game(owner, app_id, name)
+                    results.append({'app_id': app_id, 'game_name': name, 'data': data, 'error': None,
+                                    'seconds': time.time() - started})
+                    logging.info(f"Worker {index} finished {name} ({app_id}) in {time.time() - started:.1f}s")
+                except SessionExpiredError as e:
+                    # Every worker shares the primary's cookies, so stop them all
+                    self.expired = e
+                    results.append({'app_id': app_id, 'game_name': name, 'data': None, 'error': str(e),
+                                    'seconds': time.time() - started})
+                    while True:
+                        try:
+                            jobs.get_nowait()
+                        except queue.Empty:
+                            return
+                except Exception as e:
+                    results.append({'app_id': app_id, 'game_name': name, 'data': None, 'error': str(e),
+                                    'seconds': time.time() - started})
+                    logging.error(f"Worker {index} failed on {name} ({app_id}): {e}")
+        finally:
+            if index != 0:
+                self.stop_worker(owner)
+
+    def crawl(self, games):
+        """Extract every game in parallel; returns result dicts in the input order.
+        An expired session stops the workers and sets self.expired; the games finished before it are still returned."""
+        jobs = queue.Queue()
+        for game in games:
+            jobs.put(game)
+        results = []
+        # The primary browser must be authenticated before others can copy its cookies
+        if self.primary is None:
+            self.start_primary()
+        threads = [threading.Thread(target=self._worker_loop, args=(i, jobs, results), daemon=True)
+                   for i in range(min(self.workers, len(games)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Games never picked up (every worker died) are reported as failures
+        while not jobs.empty():
+            app_id, name = jobs.get_nowait()
+            results.append({'app_id': app_id, 'game_name': name, 'data': None, 'error': 'no worker available',
+                            'seconds': 0.0})
+        order = {game[0]: i for i, game in enumerate(games)}
+        return sorted(results, key=lambda r: order[r['app_id']])
+
+    def save_results(self, results, stat_date):
+        """Spool every payload, then write them all in one transaction; returns True on commit"""
+        from crawl_spool import CrawlSpool
+        from steamworks_crawler import SteamWorksCrawler
+        pending = []
+        for result in results:
+            if not result['data']:
+                continue
+            crawler = SteamWorksCrawler(self.db_config, steam_app_id=result['app_id'], game_name=result['game_name'])
+            page_status = self.page_status.get(result['app_id'])
+            pending.append((crawler, result, crawler.spool_payload(result['data'], stat_date, page_status)))
+        if not pending:
+            return False
+
+        merged = []
+        try:
+            with get_storage(self.db_config).session() as session:
+                for crawler, result, _ in pending:
+                    page_status = self.page_status.get(result['app_id'])
+                    merged.append(crawler._save_with_session(session, result['data'], stat_date, page_status))
+        except Exception as e:
+            logging.error(f"Batched save of {len(pending)} game(s) failed; payloads stay spooled for replay: {e}")
+            return False
+
+        spool = CrawlSpool()
+        for (crawler, result, spool_id), data in zip(pending, merged):
+            if spool_id is not None:
+                spool.mark_drained(spool_id)
+            crawler._save_derived(data, stat_date, self.page_status.get(result['app_id']))
+        logging.info(f"Saved {len(pending)} game(s) in one transaction")
+        return True
+
+    def run(self, games, stat_date):
+        """Crawl and save; returns the per-game result dicts with a 'saved' flag"""
+        self.stat_date = stat_date
+        self.pending = self.plan(games, stat_date)
+        complete = [game for game in games if self.pending.get(game[0]) == []]
+        results = [{'app_id': app_id, 'game_name': name, 'data': {}, 'error': None, 'seconds': 0.0, 'saved': True}
+                   for app_id, name in complete]
+        for app_id, name in complete:
+            logging.info(f"All pages already stored for {name} on {stat_date}; skipping")
+        to_crawl = [game for game in games if game not in complete]
+        if not to_crawl:
+            return results
+
+        try:
+            crawled = []
+            for group in partner_groups(to_crawl):
+                crawled += self.crawl(group)
+                if self.expired is not None:
+                    break
+        finally:
+            self.stop_worker(self.primary)
+            self.primary = None
+            for profile_dir in self._profile_dirs:
+                shutil.rmtree(profile_dir, ignore_errors=True)
+            self._profile_dirs = []
+        # Games finished before a session expired are saved before the expiry is raised
+        saved = self.save_results(crawled, stat_date)
+        if self.expired is not None:
+            raise self.expired
+        for result in crawled:
+            result['saved'] = saved and bool(result['data'])
+            if result['data'] == {}:
+                result['error'] = result['error'] or 'Data extraction failed'
+        order = {game[0]: i for i, game in enumerate(games)}
+        return sorted(results + crawled, key=lambda r: order[r['app_id']])
+
+
+def partner_groups(games):
+    """Games split by the partner account they are viewed as, in first-seen order"""
+    groups = {}
+    for game in games:
+        groups.setdefault(partner_for(game[0]), []).append(game)
+    return list(groups.values())
+
+
+def workers_from_env():
+    try:
+        return max(1, int(os.environ.get('STEAMWORKS_CRAWL_WORKERS', '1')))
+    except ValueError:
+        return 1
+
+
+def rate_limit_from_env():
+    try:
+        return float(os.environ.get('STEAMWORKS_RATE_LIMIT', DEFAULT_RATE_LIMIT))
+    except ValueError:
+        return DEFAULT_RATE_LIMIT
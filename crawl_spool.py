@@ -0,0 +1,184 @@
+"""
+Local write-ahead spool for crawl payloads.
+
+Every extracted payload is appended to a local SQLite database (WAL mode,
+synchronous=FULL) before it is written to MySQL. Entries stay pending until
+the MySQL write succeeds, so a database outage never costs a re-crawl:
+replay_spool.py drains the pending entries once MySQL is reachable again.
+
+Metrics entries also keep the crawl's page_status ({page: {'fields',
+'source_date', 'data'}}), so a replay records the run manifest and the page
+cache exactly as the original save would have.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import date, datetime
+
+DEFAULT_SPOOL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crawl_spool.db')
+
+
+def _json_default(value):
+    """Serialize dates and Decimals found in crawler payloads"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return float(value)
+
+
+def _load_page_status(text):
+    """page_status as spooled, with each source_date back as a date"""
+    if not text:
+        return None
+    page_status = json.loads(text)
+    for status in page_status.values():
+        if isinstance(status, dict) and status.get('source_date'):
+            status['source_date'] = date.fromisoformat(status['source_date'][:10])
+    return page_status
+
+
+def _entry(row):
+    return {
+        'id': row[0],
+        'kind': row[1],
+        'steam_app_id': row[2],
+        'game_name': row[3],
+        'stat_date': date.fromisoformat(row[4]),
+        'payload': json.loads(row[5]),
+        'attempts': row[6],
+        'page_status': _load_page_status(row[7]),
+    }
+
+
+class CrawlSpool:
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('STEAMWORKS_SPOOL_PATH') or DEFAULT_SPOOL_PATH
+        self._ensure_schema()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=FULL")
+        return connection
+
+    def _ensure_schema(self):
+        connection = self._connect()
+        try:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS spool (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    steam_app_id INTEGER NOT NULL,
+                    game_name TEXT,
+                    stat_date TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    page_status TEXT,
+                    created_at TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    drained_at TEXT
+                )
+                """
+            )
+            # Spools created before page_status was kept
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(spool)")]
+            if 'page_status' not in columns:
+                connection.execute("ALTER TABLE spool ADD COLUMN page_status TEXT")
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_spool_pending ON spool (drained_at, id)")
+            connection.commit()
+        finally:
+            connection.close()
+
+    def append(self, kind, steam_app_id, game_name, stat_date, payload, page_status=None):
+        """Durably append a payload (and the crawl's page_status, if any); returns the spool entry id"""
+        connection = self._connect()
+        try:
+            cursor = connection.execute(
+                "INSERT INTO spool (kind, steam_app_id, game_name, stat_date, payload, page_status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    kind,
+                    int(steam_app_id),
+                    game_name,
+                    str(stat_date),
+                    json.dumps(payload, default=_json_default),
+                    json.dumps(page_status, default=_json_default) if page_status else None,
+                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                )
+            )
+            connection.commit()
+            return cursor.lastrowid
+        finally:
+            connection.close()
+
+    def mark_drained(self, entry_id):
+        """Mark an entry as written to the database"""
+        connection = self._connect()
+        try:
+            connection.execute(
+                "UPDATE spool SET drained_at = ? WHERE id = ?",
+                (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), entry_id)
+            )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def record_failure(self, entry_id, error):
+        """Count a failed write attempt for an entry"""
+        connection = self._connect()
+        try:
+            connection.execute(
+                "UPDATE spool SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (str(error)[:1000], entry_id)
+            )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def pending(self, kind=None, limit=None):
+        """Return undrained entries in append order"""
+        query = ("SELECT id, kind, steam_app_id, game_name, stat_date, payload, attempts, page_status FROM spool "
+                 "WHERE drained_at IS NULL")
+        params = []
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        query += " ORDER BY id"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        connection = self._connect()
+        try:
+            rows = connection.execute(query, params).fetchall()
+        finally:
+            connection.close()
+        return [_entry(row) for row in rows]
+
+    def latest(self, kind, steam_app_id, stat_date):
+        """Most recent entry (drained or not) for one game and day, or None"""
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT id, kind, steam_app_id, game_name, stat_date, payload, attempts, page_status FROM spool "
+                "WHERE kind = ? AND steam_app_id = ? AND stat_date = ? ORDER BY id DESC LIMIT 1",
+                (kind, int(steam_app_id), str(stat_date))
+            ).fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        return _entry(row)
+
+    def purge_drained(self, older_than_days=30):
+        """Delete drained entries older than the given number of days"""
+        connection = self._connect()
+        try:
+            cursor = connection.execute(
+                "DELETE FROM spool WHERE drained_at IS NOT NULL AND drained_at < datetime('now', 'localtime', ?)",
+                (f"-{int(older_than_days)} days",)
+            )
+            connection.commit()
+            return cursor.rowcount
+        finally:
+            connection.close()
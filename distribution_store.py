@@ -0,0 +1,119 @@
+"""
+Full country/region distribution storage.
+
+The crawler keeps the top 10 entries of each geographic breakdown in the
+JSON columns of game_daily_metrics. The complete distributions are stored
+here in a compact columnar form: one row per (game, date, distribution)
+holding an array of geo ids plus one array per metric. Geo ids point into
+the global geo_dictionary table, so country and region names are stored
+once instead of on every row.
+"""
+
+import json
+import logging
+
+# distribution name -> (crawler data key, name field, metric fields)
+DISTRIBUTIONS = {
+    'country_dau': ('full_country_dau', 'country', ['players', 'share']),
+    'country_revenue': ('full_country_revenue', 'country', ['revenue', 'units', 'share', 'change_vs_prior']),
+    'region_revenue': ('full_region_revenue', 'region', ['revenue', 'units', 'share', 'change_vs_prior']),
+    'country_downloads': ('full_country_downloads', 'country', ['downloads', 'share']),
+    'region_downloads': ('full_region_downloads', 'region', ['downloads', 'share']),
+}
+
+
+def parse_percent(value):
+    """Convert '12.34%' / '+1.50%' strings to floats, pass numbers through"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace('%', '').replace('+', '').strip())
+    except ValueError:
+        return None
+
+
+def encode_columnar(entries, name_field, metric_fields, geo_ids):
+    """Encode a list of entry dicts as (geo id array, {metric: array})"""
+    ids = []
+    metrics = {field: [] for field in metric_fields}
+    for entry in entries:
+        name = (entry.get(name_field) or '').strip()
+        if not name or name not in geo_ids:
+            continue
+        ids.append(geo_ids[name])
+        for field in metric_fields:
+            value = entry.get(field)
+            if field in ('share', 'change_vs_prior'):
+                value = parse_percent(value)
+            metrics[field].append(value)
+    return ids, metrics
+
+
+def decode_columnar(ids, metrics, geo_names, name_field='country'):
+    """Rebuild entry dicts (ranked by position) from the columnar form"""
+    entries = []
+    for idx, geo_id in enumerate(ids):
+        entry = {name_field: geo_names.get(geo_id), 'rank': idx + 1}
+        for field, values in metrics.items():
+            entry[field] = values[idx] if idx < len(values) else None
+        entries.append(entry)
+    return entries
+
+
+def ensure_geo_ids(session, names):
+    """Return {name: geo_id}, inserting unseen names into geo_dictionary"""
+    names = sorted({n for n in names if n})
+    if not names:
+        return {}
+    placeholders = ', '.join(['%s'] * len(names))
+    select_query = f"SELECT geo_name, geo_id FROM geo_dictionary WHERE geo_name IN ({placeholders})"
+    geo_ids = {row['geo_name']: int(row['geo_id']) for row in session.fetch_all(select_query, names)}
+    missing = [n for n in names if n not in geo_ids]
+    if missing:
+        session.insert_ignore('geo_dictionary', [{'geo_name': n} for n in missing])
+        geo_ids = {row['geo_name']: int(row['geo_id']) for row in session.fetch_all(select_query, names)}
+    return geo_ids
+
+
+def collect_distributions(data):
+    """Pick the full distribution lists out of the crawler's combined data"""
+    found = {}
+    for dist_name, (data_key, name_field, metric_fields) in DISTRIBUTIONS.items():
+        entries = data.get(data_key)
+        if isinstance(entries, list) and entries:
+            found[dist_name] = entries
+    return found
+
+
+def save_distributions(session, steam_app_id, stat_date, data):
+    """Upsert every full distribution present in data; returns rows written"""
+    distributions = collect_distributions(data)
+    if not distributions:
+        return 0
+
+    names = []
+    for dist_name, entries in distributions.items():
+        name_field = DISTRIBUTIONS[dist_name][1]
+        names.extend((e.get(name_field) or '').strip() for e in entries)
+    geo_ids = ensure_geo_ids(session, names)
+
+    rows = []
+    for dist_name, entries in distributions.items():
+        _, name_field, metric_fields = DISTRIBUTIONS[dist_name]
+        ids, metrics = encode_columnar(entries, name_field, metric_fields, geo_ids)
+        if not ids:
+            continue
+        rows.append({
+            'steam_app_id': int(steam_app_id),
+            'stat_date': stat_date,
+            'distribution': dist_name,
+            'geo_ids': json.dumps(ids, separators=(',', ':')),
+            'metrics': json.dumps(metrics, separators=(',', ':')),
+        })
+
+    if rows:
+        session.upsert_many('game_daily_distribution', rows, ['steam_app_id', 'stat_date', 'distribution'])
+        logging.info(f"Saved {len(rows)} full distributions to game_daily_distribution")
+    return len(rows)
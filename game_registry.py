@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Game Registry
+One list of games shared by the crawlers, the orchestrator, the queue, the
+reports and the dashboard. It used to be copied into each of them. Each game
+in games.json has:
+
+    app_id, name, slug      identity (slug prefixes file names and chart exports)
+    partner                 {"id", "name"} of the partner account, or null for default_partner
+    enabled                 false keeps the game in reports but out of new crawls
+    pages                   financial page keys to crawl (null = every page)
+    page_ttl                optional {page: days} refresh overrides (see page_cache.py)
+    cadence                 "daily" or "weekly" (weekly games are due on Mondays)
+    metrics_table           game-specific financial table
+    marketing_table         game-specific marketing table
+
+The file is loaded once per process. STEAMWORKS_GAMES_FILE points at another
+registry, and STEAMWORKS_GAMES ("2507950:Delta Force,...") still restricts a
+single run to the listed games.
+
+    python game_registry.py                    # list the registry
+    python game_registry.py --create-tables    # create game-specific tables for newly added games
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_REGISTRY_PATH = os.path.join(BASE_DIR, 'games.json')
+
+CADENCES = ['daily', 'weekly']
+
+_REQUIRED_FIELDS = ['app_id', 'name', 'slug', 'metrics_table', 'marketing_table']
+
+_registry = None
+
+
+def _validate(registry, path):
+    games = registry.get('games')
+    if not isinstance(games, list) or not games:
+        raise ValueError(f"{path}: 'games' must be a non-empty list")
+    seen = set()
+    for game in games:
+        missing = [f for f in _REQUIRED_FIELDS if not game.get(f)]
+        if missing:
+            raise ValueError(f"{path}: game {game.get('app_id') or game.get('name')} is missing {', '.join(missing)}")
+        if game['app_id'] in seen:
+            raise ValueError(f"{path}: app_id {game['app_id']} is listed twice")
+        seen.add(game['app_id'])
+        game.setdefault('partner', None)
+        game.setdefault('enabled', True)
+        game.setdefault('pages', None)
+        game.setdefault('cadence', 'daily')
+        if game['cadence'] not in CADENCES:
+            raise ValueError(f"{path}: unknown cadence {game['cadence']!r} for {game['name']} "
+                             f"(expected one of {', '.join(CADENCES)})")
+    registry.setdefault('default_partner', {'id': '', 'name': ''})
+    return registry
+
+
+def load_registry(path=None, reload=False):
+    """The parsed registry (cached after the first load unless reload or an explicit path is given)"""
+    global _registry
+    if _registry is not None and path is None and not reload:
+        return _registry
+    source = path or os.environ.get('STEAMWORKS_GAMES_FILE') or DEFAULT_REGISTRY_PATH
+    with open(source, encoding='utf-8') as f:
+        registry = _validate(json.load(f), source)
+    if path is None:
+        _registry = registry
+    return registry
+
+
+def all_games(registry=None):
+    """Every registered game (enabled or not), in registry order"""
+    return list((registry or load_registry())['games'])
+
+
+def enabled_games(day=None, registry=None):
+    """Games to crawl; with a day, only those whose cadence is due on it"""
+    games = [g for g in all_games(registry) if g['enabled']]
+    if day is not None:
+        games = [g for g in games if is_due(g, day)]
+    return games
+
+
+def is_due(game, day):
+    return game['cadence'] == 'daily' or day.weekday() == 0
+
+
+def get_game(app_id, registry=None):
+    """Registry entry for app_id, or None"""
+    for game in all_games(registry):
+        if game['app_id'] == app_id:
+            return game
+    return None
+
+
+def game_name(app_id):
+    game = get_game(app_id)
+    return game['name'] if game else str(app_id)
+
+
+def game_names():
+    """{app_id: name} for every registered game"""
+    return {g['app_id']: g['name'] for g in all_games()}
+
+
+def metrics_table(app_id):
+    game = get_game(app_id)
+    return game['metrics_table'] if game else None
+
+
+def marketing_table(app_id):
+    game = get_game(app_id)
+    return game['marketing_table'] if game else None
+
+
+def enabled_pages(app_id, pages):
+    """The given page keys restricted to the game's configured pages (all of them when unset)"""
+    game = get_game(app_id)
+    if not game or game['pages'] is None:
+        return list(pages)
+    return [page for page in pages if page in game['pages']]
+
+
+def partner_for(app_id=None):
+    """(partner_id, partner_name) to view the game as: env override, then the game's partner, then the default"""
+    registry = load_registry()
+    default = registry['default_partner']
+    game = get_game(app_id) if app_id is not None else None
+    partner = (game or {}).get('partner') or default
+    partner_id = os.environ.get('STEAMWORKS_TARGET_PARTNER_ID', '').strip() or (partner.get('id') or '').strip()
+    partner_name = os.environ.get('STEAMWORKS_TARGET_PARTNER_NAME') or partner.get('name') or default.get('name')
+    return partner_id, partner_name
+
+
+def load_games(day=None):
+    """Games to run as [(app_id, name)]. Override via env var STEAMWORKS_GAMES, format:
+    STEAMWORKS_GAMES="2507950:Delta Force,3104410:Terminull Brigade"
+    """
+    games_env = os.environ.get('STEAMWORKS_GAMES', '').strip()
+    games = []
+    if games_env:
+        try:
+            parts = [p for p in games_env.split(',') if p.strip()]
+            for p in parts:
+                if ':' in p:
+                    app_id_str, name = p.split(':', 1)
+                    app_id = int(app_id_str.strip())
+                    games.append((app_id, name.strip()))
+        except Exception:
+            games = []
+    if not games:
+        games = [(g['app_id'], g['name']) for g in enabled_games(day)]
+    return games
+
+
+def create_game_tables(session, registry=None):
+    """Create missing game-specific tables from the generic schema; returns the tables ensured"""
+    from migrate import create_table
+    from storage import SCHEMA, METRICS_COLUMNS, MARKETING_COLUMNS
+    tables = []
+    for game in all_games(registry):
+        for table, columns, key in ((game['metrics_table'], METRICS_COLUMNS, ['stat_date']),
+                                    (game['marketing_table'], MARKETING_COLUMNS, ['steam_app_id', 'stat_date'])):
+            SCHEMA.setdefault(table, (columns, key))
+            create_table(session, table)
+            tables.append(table)
+    return tables
+
+
+def main():
+    """Main function to list the registry or create game tables"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('game_registry.log'),
+            logging.StreamHandler()
+        ]
+    )
+    parser = argparse.ArgumentParser(description="List the game registry or create game-specific tables")
+    parser.add_argument('--create-tables', action='store_true', help="create missing game-specific tables")
+    args = parser.parse_args()
+
+    try:
+        registry = load_registry()
+    except (OSError, ValueError) as e:
+        logging.error(f"Invalid game registry: {e}")
+        sys.exit(1)
+
+    if args.create_tables:
+        from storage import get_storage, load_db_config, StorageError
+        try:
+            with get_storage(load_db_config()).session() as session:
+                tables = create_game_tables(session, registry)
+        except StorageError as e:
+            logging.error(f"Creating game tables failed: {e}")
+            sys.exit(1)
+        print(f"Ensured {len(tables)} game tables")
+        return
+
+    print(f"{'App':<10} {'Game':<28} {'Enabled':<8} {'Cadence':<8} {'Partner':<28} Pages")
+    for game in registry['games']:
+        partner = (game['partner'] or registry['default_partner']).get('name') or '-'
+        pages = ', '.join(game['pages']) if game['pages'] else 'all'
+        print(f"{game['app_id']:<10} {game['name'][:28]:<28} {str(game['enabled']):<8} {game['cadence']:<8} "
+              f"{partner[:28]:<28} {pages}")
+
+
+if __name__ == "__main__":
+    main()
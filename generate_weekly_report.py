@@ -1,67 +1,130 @@
 """
 SteamWorks Weekly Report Generator
-Generates a weekly report for 4 games with key metrics and week-over-week comparisons.
+Generates a weekly report for 4 games with key financial and marketing metrics and
+week-over-week comparisons.
+
+Run without arguments for the interactive prompt, or pass dates for unattended
+batch generation (one worker process per report):
+
+    python generate_weekly_report.py --dates 20251006 20251013
+    python generate_weekly_report.py --from 20250707 --to 20250929 --period week month quarter
 """
 
-import mysql.connector
-from mysql.connector import Error
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
+import argparse
+import json
+import os
+import pandas as pd
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
 import sys
 import logging
+from game_registry import all_games
+from storage import get_storage, load_db_config, StorageError
+from rollup import PERIOD_TYPES, period_bounds, period_length, ensure_rollups
+
+# Columns read for the report (numeric ones are coerced to floats)
+REPORT_COLUMNS = [
+    'new_players',
+    'unique_player',
+    'daily_total_revenue',
+    'lifetime_total_revenue',
+    'dau',
+    'median_playtime',
+]
+NUMERIC_COLUMNS = [c for c in REPORT_COLUMNS if c != 'median_playtime']
+
+# Period type -> (report name, period-over-period label)
+PERIOD_LABELS = {
+    'week': ('Weekly', 'WoW'),
+    'month': ('Monthly', 'MoM'),
+    'quarter': ('Quarterly', 'QoQ'),
+}
+
+# Marketing section: JSON breakdown columns summarised as impressions / visits
+MARKETING_FEATURES = ['main_cluster', 'takeover_banner']
+MARKETING_SUM_COLUMNS = ['impressions', 'visits'] + [
+    f"{feature}_{metric}" for feature in MARKETING_FEATURES for metric in ('impressions', 'visits')
+]
+
+# Daily detail sheet: (header, daily column)
+DETAIL_COLUMNS = [
+    ('Date', 'stat_date'),
+    ('New Players', 'new_players'),
+    ('Unique Player', 'unique_player'),
+    ('Daily Revenue', 'daily_total_revenue'),
+    ('Lifetime Total Revenue', 'lifetime_total_revenue'),
+    ('Units', 'daily_units'),
+    ('DAU', 'dau'),
+    ('PCU', 'pcu'),
+    ('Median Playtime', 'median_playtime'),
+]
+
+def _json_metric(value, field):
+    """Read one numeric field from a JSON breakdown column (str or already decoded)"""
+    if value in (None, ''):
+        return None
+    if isinstance(value, (str, bytes)):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    if not isinstance(value, dict):
+        return None
+    number = pd.to_numeric(value.get(field), errors='coerce')
+    return None if pd.isna(number) else float(number)
+
+
+def parse_report_date(date_str):
+    """Parse YYYYMMDD format to date object"""
+    try:
+        return datetime.strptime(date_str, '%Y%m%d').date()
+    except ValueError:
+        raise ValueError(f"Invalid date format: {date_str}. Expected YYYYMMDD (e.g., 20251006)")
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('weekly_report_generator.log'),
-        logging.StreamHandler()
-    ]
-)
 
 class WeeklyReportGenerator:
     def __init__(self, db_config):
         self.db_config = db_config
-        self.games = [
-            {'app_id': 2507950, 'name': 'Delta Force'},
-            {'app_id': 2073620, 'name': 'Arena Breakout: Infinite'},
-            {'app_id': 3478050, 'name': 'Road to Empress'},
-            {'app_id': 3104410, 'name': 'Terminull Brigade'}
-        ]
+        self.storage = get_storage(db_config)
+        # Every registered game, including disabled ones that still have history
+        self.games = [{'app_id': g['app_id'], 'name': g['name']} for g in all_games()]
         
     def parse_date_input(self, date_str):
         """Parse YYYYMMDD format to date object"""
-        try:
-            return datetime.strptime(date_str, '%Y%m%d').date()
-        except ValueError:
-            raise ValueError(f"Invalid date format: {date_str}. Expected YYYYMMDD (e.g., 20251006)")
+        return parse_report_date(date_str)
     
-    def get_date_ranges(self, start_date):
-        """Calculate current week and previous week date ranges"""
-        # Current week: start_date to start_date + 6 days
-        current_week_start = start_date
-        current_week_end = start_date + timedelta(days=6)
-        
-        # Previous week: 7 days before start_date to start_date - 1
-        previous_week_start = start_date - timedelta(days=7)
-        previous_week_end = start_date - timedelta(days=1)
+    def get_date_ranges(self, start_date, period='week'):
+        """Calculate current and previous period date ranges"""
+        if period == 'week':
+            # Current week: start_date to start_date + 6 days (any start day is accepted)
+            current_start = start_date
+            current_end = start_date + timedelta(days=6)
+            previous_start = start_date - timedelta(days=7)
+            previous_end = start_date - timedelta(days=1)
+        else:
+            # Calendar month/quarter containing start_date, and the one before it
+            current_start, current_end = period_bounds(period, start_date)
+            previous_start, previous_end = period_bounds(period, current_start - timedelta(days=1))
         
         return {
-            'current_week_start': current_week_start,
-            'current_week_end': current_week_end,
-            'previous_week_start': previous_week_start,
-            'previous_week_end': previous_week_end
+            'period': period,
+            'current_start': current_start,
+            'current_end': current_end,
+            'previous_start': previous_start,
+            'previous_end': previous_end
         }
     
-    def fetch_game_data(self, connection, app_id, start_date, end_date):
-        """Fetch data for a specific game and date range"""
-        cursor = connection.cursor(dictionary=True)
-        
-        query = """
+    def fetch_report_frame(self, session, start_date, end_date, app_ids=None):
+        """Fetch every game's daily rows for a date range in a single query"""
+        app_ids = list(app_ids or [game['app_id'] for game in self.games])
+        placeholders = ', '.join(['%s'] * len(app_ids))
+        query = f"""
         SELECT 
+            steam_app_id,
             stat_date,
             new_players,
             unique_player,
@@ -70,81 +133,227 @@ class WeeklyReportGenerator:
             dau,
             median_playtime
         FROM game_daily_metrics
-        WHERE steam_app_id = %s 
-        AND stat_date BETWEEN %s AND %s
-        ORDER BY stat_date
+        WHERE stat_date BETWEEN %s AND %s
+        AND steam_app_id IN ({placeholders})
+        ORDER BY steam_app_id, stat_date
         """
         
-        cursor.execute(query, (app_id, start_date, end_date))
-        results = cursor.fetchall()
-        cursor.close()
-        
-        return results
+        rows = session.fetch_all(query, [start_date, end_date] + app_ids)
+        frame = pd.DataFrame(rows, columns=['steam_app_id', 'stat_date'] + REPORT_COLUMNS)
+        frame['stat_date'] = pd.to_datetime(frame['stat_date'])
+        for column in NUMERIC_COLUMNS:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce')
+        return frame
     
-    def validate_data_completeness(self, data, game_name, start_date, end_date):
-        """Validate that all 7 days of data exist for a game"""
-        expected_days = 7
-        actual_days = len(data)
+    def find_missing_dates(self, frame, first_week_start, weeks, app_ids=None):
+        """Return {(app_id, week): [missing dates]} for weeks without all 7 days"""
+        app_ids = list(app_ids or [game['app_id'] for game in self.games])
+        start = pd.Timestamp(first_week_start)
+        expected = pd.MultiIndex.from_product(
+            [app_ids, pd.date_range(start, periods=7 * weeks, freq='D')],
+            names=['steam_app_id', 'stat_date']
+        )
+        present = pd.MultiIndex.from_frame(frame[['steam_app_id', 'stat_date']])
+        missing = expected.difference(present).to_frame(index=False)
+        missing['week'] = (missing['stat_date'] - start).dt.days // 7
+        return {
+            (app_id, week): [d.date() for d in group['stat_date']]
+            for (app_id, week), group in missing.groupby(['steam_app_id', 'week'])
+        }
+    
+    def calculate_weekly_metrics(self, frame, first_week_start, weeks, app_ids=None):
+        """Vectorized per-game, per-week aggregates with week-over-week changes"""
+        app_ids = list(app_ids or [game['app_id'] for game in self.games])
+        start = pd.Timestamp(first_week_start)
+        frame = frame.sort_values(['steam_app_id', 'stat_date'])
+        frame = frame.assign(week=(frame['stat_date'] - start).dt.days // 7)
+        frame = frame[(frame['week'] >= 0) & (frame['week'] < weeks)]
         
-        if actual_days != expected_days:
-            # Find which dates are missing
-            date_range = [start_date + timedelta(days=i) for i in range(7)]
-            existing_dates = {row['stat_date'] for row in data}
-            missing_dates = [d for d in date_range if d not in existing_dates]
-            
-            return False, missing_dates
+        grouped = frame.groupby(['steam_app_id', 'week'])
+        metrics = grouped.agg(
+            days=('stat_date', 'size'),
+            sum_new_players=('new_players', 'sum'),
+            sum_revenue=('daily_total_revenue', 'sum'),
+            dau_total=('dau', 'sum'),
+        )
+        metrics['avg_dau'] = metrics['dau_total'] / metrics['days']
         
-        return True, []
-    
-    def calculate_wow_change(self, current_value, previous_value):
-        """Calculate week-over-week percentage change"""
-        if previous_value is None or previous_value == 0:
-            return None
+        # "Latest" values come from the last day present in each week (even if NULL)
+        latest = frame.drop_duplicates(['steam_app_id', 'week'], keep='last').set_index(['steam_app_id', 'week'])
+        metrics['latest_unique_player'] = latest['unique_player']
+        metrics['latest_lifetime_revenue'] = latest['lifetime_total_revenue']
+        metrics['median_playtime'] = latest['median_playtime']
         
-        change = ((current_value - previous_value) / previous_value) * 100
+        # Full game x week grid so shift() compares each week with the one before it
+        full_index = pd.MultiIndex.from_product([app_ids, range(weeks)], names=['steam_app_id', 'week'])
+        metrics = metrics.reindex(full_index)
+        metrics['days'] = metrics['days'].fillna(0).astype(int)
+        for column in ('sum_new_players', 'sum_revenue'):
+            previous = metrics.groupby(level='steam_app_id')[column].shift(1)
+            previous = previous.where(previous != 0)
+            metrics[f"{column}_wow_pct"] = (metrics[column] - previous) / previous * 100
+        metrics['week_start'] = [start + pd.Timedelta(days=7 * week) for week in metrics.index.get_level_values('week')]
+        return metrics.drop(columns=['dau_total'])
+    
+    def format_wow_change(self, change):
+        """Format a week-over-week percentage change (None/NaN -> N/A)"""
+        if change is None or pd.isna(change):
+            return "N/A"
         sign = "+" if change >= 0 else ""
         return f"{sign}{change:.1f}%"
     
-    def calculate_metrics(self, current_week_data, previous_week_data):
-        """Calculate all metrics for a game"""
-        # Sum of new_players
-        current_new_players = sum(row['new_players'] or 0 for row in current_week_data)
-        previous_new_players = sum(row['new_players'] or 0 for row in previous_week_data)
-        new_players_wow = self.calculate_wow_change(current_new_players, previous_new_players)
+    def metrics_for_week(self, weekly_metrics, app_id, week):
+        """Report dict for one game/week (the shape create_excel_report expects)"""
+        row = weekly_metrics.loc[(app_id, week)]
         
-        # Latest unique_player (from last day of current week)
-        latest_unique_player = current_week_data[-1]['unique_player']
+        def value(column):
+            return None if pd.isna(row[column]) else row[column]
         
-        # Sum of daily_total_revenue
-        current_revenue = sum(row['daily_total_revenue'] or 0 for row in current_week_data)
-        previous_revenue = sum(row['daily_total_revenue'] or 0 for row in previous_week_data)
-        revenue_wow = self.calculate_wow_change(current_revenue, previous_revenue)
+        return {
+            'sum_new_players': value('sum_new_players') or 0,
+            'new_players_wow': self.format_wow_change(row['sum_new_players_wow_pct']),
+            'latest_unique_player': value('latest_unique_player'),
+            'sum_revenue': value('sum_revenue') or 0,
+            'revenue_wow': self.format_wow_change(row['sum_revenue_wow_pct']),
+            'latest_lifetime_revenue': value('latest_lifetime_revenue'),
+            'avg_dau': value('avg_dau') or 0,
+            'median_playtime': value('median_playtime') or "N/A"
+        }
+    
+    def fetch_marketing_frame(self, session, start_date, end_date, app_ids=None):
+        """Fetch every game's daily marketing rows for a date range in a single query"""
+        app_ids = list(app_ids or [game['app_id'] for game in self.games])
+        placeholders = ', '.join(['%s'] * len(app_ids))
+        query = f"""
+        SELECT 
+            steam_app_id,
+            stat_date,
+            total_impressions,
+            total_visits,
+            owner_visits,
+            main_cluster,
+            takeover_banner
+        FROM game_daily_marketing
+        WHERE stat_date BETWEEN %s AND %s
+        AND steam_app_id IN ({placeholders})
+        ORDER BY steam_app_id, stat_date
+        """
         
-        # Latest lifetime_total_revenue
-        latest_lifetime_revenue = current_week_data[-1]['lifetime_total_revenue']
+        rows = session.fetch_all(query, [start_date, end_date] + app_ids)
+        frame = pd.DataFrame(rows, columns=['steam_app_id', 'stat_date', 'total_impressions', 'total_visits',
+                                            'owner_visits'] + MARKETING_FEATURES)
+        frame['stat_date'] = pd.to_datetime(frame['stat_date'])
+        frame['impressions'] = pd.to_numeric(frame['total_impressions'], errors='coerce')
+        frame['visits'] = pd.to_numeric(frame['total_visits'], errors='coerce')
+        # owner_visits is the owners' share of visits in percent
+        frame['owner_visits'] = pd.to_numeric(frame['owner_visits'], errors='coerce')
+        for feature in MARKETING_FEATURES:
+            for metric in ('impressions', 'visits'):
+                frame[f"{feature}_{metric}"] = pd.to_numeric(
+                    frame[feature].map(lambda value: _json_metric(value, metric)), errors='coerce'
+                )
+        return frame.drop(columns=['total_impressions', 'total_visits'] + MARKETING_FEATURES)
+    
+    def calculate_marketing_metrics(self, frame, date_ranges, app_ids=None):
+        """Per-game marketing totals for the previous (0) and current (1) period with changes"""
+        app_ids = list(app_ids or [game['app_id'] for game in self.games])
+        current_start = pd.Timestamp(date_ranges['current_start'])
+        frame = frame[(frame['stat_date'] >= pd.Timestamp(date_ranges['previous_start'])) &
+                      (frame['stat_date'] <= pd.Timestamp(date_ranges['current_end']))]
+        frame = frame.assign(
+            period=(frame['stat_date'] >= current_start).astype(int),
+            # Visit-weighted owner share: only days that report both numbers count
+            owner_weighted=frame['owner_visits'] * frame['visits'],
+            owner_base=frame['visits'].where(frame['owner_visits'].notna()),
+        )
         
-        # Average DAU
-        avg_dau = sum(row['dau'] or 0 for row in current_week_data) / len(current_week_data)
+        grouped = frame.groupby(['steam_app_id', 'period'])
+        metrics = grouped[MARKETING_SUM_COLUMNS + ['owner_weighted', 'owner_base']].sum(min_count=1)
+        metrics['days'] = grouped.size()
+        metrics['ctr'] = metrics['visits'] / metrics['impressions'].where(metrics['impressions'] != 0) * 100
+        metrics['owner_share'] = metrics['owner_weighted'] / metrics['owner_base'].where(metrics['owner_base'] != 0)
         
-        # Latest median_playtime
-        latest_median_playtime = current_week_data[-1]['median_playtime']
+        full_index = pd.MultiIndex.from_product([app_ids, range(2)], names=['steam_app_id', 'period'])
+        metrics = metrics.reindex(full_index)
+        metrics['days'] = metrics['days'].fillna(0).astype(int)
+        by_game = metrics.groupby(level='steam_app_id')
+        for column in MARKETING_SUM_COLUMNS:
+            previous = by_game[column].shift(1)
+            previous = previous.where(previous != 0)
+            metrics[f"{column}_pct"] = (metrics[column] - previous) / previous * 100
+        # Rates change in percentage points
+        for column in ('ctr', 'owner_share'):
+            metrics[f"{column}_pp"] = metrics[column] - by_game[column].shift(1)
+        return metrics.drop(columns=['owner_weighted', 'owner_base'])
+    
+    def format_point_change(self, change):
+        """Format a percentage-point change (None/NaN -> N/A)"""
+        if change is None or pd.isna(change):
+            return "N/A"
+        sign = "+" if change >= 0 else ""
+        return f"{sign}{change:.1f}pp"
+    
+    def marketing_for_game(self, marketing_metrics, app_id):
+        """Formatted marketing cells for one game's current period"""
+        row = marketing_metrics.loc[(app_id, 1)]
+        if row['days'] == 0:
+            return None
+        
+        def count(column):
+            return "N/A" if pd.isna(row[column]) else f"{int(round(row[column])):,}"
+        
+        def rate(column):
+            return "N/A" if pd.isna(row[column]) else f"{row[column]:.2f}%"
+        
+        def feature(name):
+            if pd.isna(row[f"{name}_impressions"]) and pd.isna(row[f"{name}_visits"]):
+                return "N/A"
+            return (f"{count(f'{name}_impressions')} / {count(f'{name}_visits')} "
+                    f"({self.format_wow_change(row[f'{name}_visits_pct'])})")
         
         return {
-            'sum_new_players': current_new_players,
-            'new_players_wow': new_players_wow if new_players_wow else "N/A",
-            'latest_unique_player': latest_unique_player,
-            'sum_revenue': current_revenue,
-            'revenue_wow': revenue_wow if revenue_wow else "N/A",
-            'latest_lifetime_revenue': latest_lifetime_revenue,
-            'avg_dau': avg_dau,
-            'median_playtime': latest_median_playtime or "N/A"
+            'impressions': f"{count('impressions')} ({self.format_wow_change(row['impressions_pct'])})",
+            'visits': f"{count('visits')} ({self.format_wow_change(row['visits_pct'])})",
+            'ctr': f"{rate('ctr')} ({self.format_point_change(row['ctr_pp'])})",
+            'owner_share': f"{rate('owner_share')} ({self.format_point_change(row['owner_share_pp'])})",
+            'main_cluster': feature('main_cluster'),
+            'takeover_banner': feature('takeover_banner'),
+            'days': int(row['days']),
         }
     
-    def create_excel_report(self, all_metrics, date_ranges, output_filename):
-        """Create formatted Excel report"""
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Weekly Report"
+    def collect_marketing(self, session, date_ranges):
+        """Marketing cells for every game; one query covers all games and both periods"""
+        frame = self.fetch_marketing_frame(session, date_ranges['previous_start'], date_ranges['current_end'])
+        marketing_metrics = self.calculate_marketing_metrics(frame, date_ranges)
+        period_days = (date_ranges['current_end'] - date_ranges['current_start']).days + 1
+        marketing = {}
+        for game in self.games:
+            marketing[game['app_id']] = self.marketing_for_game(marketing_metrics, game['app_id'])
+            days = marketing[game['app_id']]['days'] if marketing[game['app_id']] else 0
+            if days < period_days:
+                # Marketing gaps do not block the report; the section shows what was crawled
+                logging.warning(f"{game['name']}: marketing data for {days}/{period_days} days of the current {date_ranges['period']}")
+        return marketing
+    
+    def iter_daily_detail(self, session, start_date, end_date):
+        """Stream one row per game and day for the detail sheet"""
+        names = {game['app_id']: game['name'] for game in self.games}
+        placeholders = ', '.join(['%s'] * len(names))
+        query = f"""
+        SELECT steam_app_id, {', '.join(column for _, column in DETAIL_COLUMNS)}
+        FROM game_daily_metrics
+        WHERE stat_date BETWEEN %s AND %s
+        AND steam_app_id IN ({placeholders})
+        ORDER BY steam_app_id, stat_date
+        """
+        for row in session.iter_rows(query, [start_date, end_date] + list(names)):
+            yield [names[int(row['steam_app_id'])]] + [row[column] for _, column in DETAIL_COLUMNS]
+    
+    def create_excel_report(self, all_metrics, date_ranges, output_filename, detail_rows=None, marketing=None):
+        """Create formatted Excel report (write-only workbook; detail rows are streamed)"""
+        wb = openpyxl.Workbook(write_only=True)
+        report_name, change_label = PERIOD_LABELS[date_ranges['period']]
+        ws = wb.create_sheet(f"{report_name} Report")
         
         # Define styles
         header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
@@ -159,198 +368,241 @@ class WeeklyReportGenerator:
             bottom=Side(style='thin')
         )
         
-        # Row 1: Game names (merged cells)
-        col_idx = 1
-        for game in self.games:
-            cell = ws.cell(row=1, column=col_idx)
-            cell.value = game['name']
-            cell.fill = header_fill
-            cell.font = header_font
+        def styled(value, fill=None, font=None):
+            cell = WriteOnlyCell(ws, value=value)
             cell.alignment = center_alignment
             cell.border = border
-            
-            # Merge 6 columns for game name
-            ws.merge_cells(start_row=1, start_column=col_idx, end_row=1, end_column=col_idx+5)
-            
-            # Apply border to all merged cells
-            for i in range(6):
-                ws.cell(row=1, column=col_idx+i).border = border
-            
-            col_idx += 6
+            if fill:
+                cell.fill = fill
+            if font:
+                cell.font = font
+            return cell
+        
+        # Write-only sheets need dimensions before the first row
+        for col in range(1, 6 * len(self.games) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = 18
+        ws.row_dimensions[1].height = 30
+        ws.row_dimensions[2].height = 40
+        ws.row_dimensions[3].height = 25
+        ws.row_dimensions[5].height = 25
+        ws.row_dimensions[6].height = 40
+        ws.row_dimensions[7].height = 25
+        
+        # Row 1: Game names (write-only mode cannot merge, so the name spans 6 filled cells)
+        row = []
+        for game in self.games:
+            row.append(styled(game['name'], header_fill, header_font))
+            row.extend(styled(None, header_fill, header_font) for _ in range(5))
+        ws.append(row)
         
         # Row 2: Column headers
         headers = [
-            'Sum New Players\n(WoW %)',
+            f'Sum New Players\n({change_label} %)',
             'Latest\nUnique Player',
-            'Sum Revenue\n(WoW %)',
+            f'Sum Revenue\n({change_label} %)',
             'Lifetime\nTotal Revenue',
             'Average\nDAU',
             'Median\nPlaytime'
         ]
-        
-        col_idx = 1
-        for game in self.games:
-            for header in headers:
-                cell = ws.cell(row=2, column=col_idx)
-                cell.value = header
-                cell.fill = subheader_fill
-                cell.font = subheader_font
-                cell.alignment = center_alignment
-                cell.border = border
-                col_idx += 1
+        ws.append([styled(header, subheader_fill, subheader_font) for game in self.games for header in headers])
         
         # Row 3: Data values
-        col_idx = 1
+        row = []
         for game in self.games:
             metrics = all_metrics[game['app_id']]
-            
-            # Sum New Players (WoW %)
-            cell = ws.cell(row=3, column=col_idx)
-            cell.value = f"{int(round(metrics['sum_new_players'])):,} ({metrics['new_players_wow']})"
-            cell.alignment = center_alignment
-            cell.border = border
-            col_idx += 1
-            
-            # Latest Unique Player
-            cell = ws.cell(row=3, column=col_idx)
-            cell.value = f"{int(round(metrics['latest_unique_player'])):,}" if metrics['latest_unique_player'] else "N/A"
-            cell.alignment = center_alignment
-            cell.border = border
-            col_idx += 1
-            
-            # Sum Revenue (WoW %)
-            cell = ws.cell(row=3, column=col_idx)
-            cell.value = f"${int(round(metrics['sum_revenue'])):,} ({metrics['revenue_wow']})"
-            cell.alignment = center_alignment
-            cell.border = border
-            col_idx += 1
-            
-            # Lifetime Total Revenue
-            cell = ws.cell(row=3, column=col_idx)
-            cell.value = f"${int(round(metrics['latest_lifetime_revenue'])):,}" if metrics['latest_lifetime_revenue'] else "N/A"
-            cell.alignment = center_alignment
-            cell.border = border
-            col_idx += 1
-            
-            # Average DAU
-            cell = ws.cell(row=3, column=col_idx)
-            cell.value = f"{int(round(metrics['avg_dau'])):,}"
-            cell.alignment = center_alignment
-            cell.border = border
-            col_idx += 1
-            
-            # Median Playtime
-            cell = ws.cell(row=3, column=col_idx)
-            cell.value = metrics['median_playtime']
-            cell.alignment = center_alignment
-            cell.border = border
-            col_idx += 1
+            row.extend([
+                # Sum New Players (change %)
+                styled(f"{int(round(metrics['sum_new_players'])):,} ({metrics['new_players_wow']})"),
+                # Latest Unique Player
+                styled(f"{int(round(metrics['latest_unique_player'])):,}" if metrics['latest_unique_player'] else "N/A"),
+                # Sum Revenue (change %)
+                styled(f"${int(round(metrics['sum_revenue'])):,} ({metrics['revenue_wow']})"),
+                # Lifetime Total Revenue
+                styled(f"${int(round(metrics['latest_lifetime_revenue'])):,}" if metrics['latest_lifetime_revenue'] else "N/A"),
+                # Average DAU
+                styled(f"{int(round(metrics['avg_dau'])):,}"),
+                # Median Playtime
+                styled(metrics['median_playtime']),
+            ])
+        ws.append(row)
         
-        # Auto-adjust column widths
-        for col in range(1, 25):  # 24 columns total
-            ws.column_dimensions[get_column_letter(col)].width = 18
+        # Rows 5-7: Marketing section, same 6-column band per game
+        if marketing is not None:
+            ws.append([])
+            ws.append([styled(f"{game['name']} - Marketing" if i == 0 else None, header_fill, header_font)
+                       for game in self.games for i in range(6)])
+            marketing_headers = [
+                f'Impressions\n({change_label} %)',
+                f'Visits\n({change_label} %)',
+                f'CTR\n({change_label} pp)',
+                f'Owner Share of Visits\n({change_label} pp)',
+                f'Main Cluster\nImpr. / Visits ({change_label} %)',
+                f'Takeover Banner\nImpr. / Visits ({change_label} %)'
+            ]
+            ws.append([styled(header, subheader_fill, subheader_font) for game in self.games for header in marketing_headers])
+            row = []
+            for game in self.games:
+                cells = marketing.get(game['app_id'])
+                keys = ['impressions', 'visits', 'ctr', 'owner_share', 'main_cluster', 'takeover_banner']
+                row.extend(styled(cells[key] if cells else "N/A") for key in keys)
+            ws.append(row)
         
-        # Set row heights
-        ws.row_dimensions[1].height = 30
-        ws.row_dimensions[2].height = 40
-        ws.row_dimensions[3].height = 25
+        # Daily detail sheet: rows go straight from the cursor to the file
+        if detail_rows is not None:
+            detail = wb.create_sheet("Daily Detail")
+            detail.column_dimensions['A'].width = 24
+            for col in range(2, len(DETAIL_COLUMNS) + 2):
+                detail.column_dimensions[get_column_letter(col)].width = 16
+            detail.freeze_panes = 'A2'
+            header_cell = lambda value: styled(value, subheader_fill, subheader_font)
+            detail.append([header_cell('Game')] + [header_cell(header) for header, _ in DETAIL_COLUMNS])
+            count = 0
+            for detail_row in detail_rows:
+                detail.append(detail_row)
+                count += 1
+            logging.info(f"Daily detail sheet: {count} rows")
         
         # Save workbook
         wb.save(output_filename)
         logging.info(f"Excel report saved: {output_filename}")
     
-    def generate_report(self, start_date_str):
-        """Main method to generate the weekly report"""
+    def missing_dates_in(self, session, app_id, start_date, end_date):
+        """Dates without a daily row for one game (used for error messages)"""
+        frame = self.fetch_report_frame(session, start_date, end_date, [app_id])
+        present = set(frame['stat_date'].dt.date)
+        days = (end_date - start_date).days + 1
+        return [start_date + timedelta(days=i) for i in range(days) if start_date + timedelta(days=i) not in present]
+    
+    def collect_from_daily(self, session, date_ranges):
+        """Scan daily rows (ad-hoc 7-day windows that do not start on a Monday)"""
+        # One query covers every game and both weeks
+        frame = self.fetch_report_frame(session, date_ranges['previous_start'], date_ranges['current_end'])
+        
+        # Week 0 = previous week, week 1 = current week
+        missing = self.find_missing_dates(frame, date_ranges['previous_start'], 2)
+        weekly_metrics = self.calculate_weekly_metrics(frame, date_ranges['previous_start'], 2)
+        
+        all_metrics = {}
+        errors = []
+        for game in self.games:
+            logging.info(f"Processing {game['name']} ({game['app_id']})...")
+            
+            if (game['app_id'], 1) in missing:
+                missing_str = ", ".join(str(d) for d in missing[(game['app_id'], 1)])
+                errors.append(f"{game['name']}: Missing current week data for dates: {missing_str}")
+                continue
+            
+            if (game['app_id'], 0) in missing:
+                missing_str = ", ".join(str(d) for d in missing[(game['app_id'], 0)])
+                errors.append(f"{game['name']}: Missing previous week data for dates: {missing_str}")
+                continue
+            
+            all_metrics[game['app_id']] = self.metrics_for_week(weekly_metrics, game['app_id'], 1)
+            logging.info(f"[OK] {game['name']} metrics calculated successfully")
+        return all_metrics, errors
+    
+    def collect_from_rollup(self, session, date_ranges):
+        """Look up calendar periods in game_period_rollup (no scan over daily rows)"""
+        period = date_ranges['period']
+        app_ids = [game['app_id'] for game in self.games]
+        starts = {'current': date_ranges['current_start'], 'previous': date_ranges['previous_start']}
+        rollups = ensure_rollups(session, period, list(starts.values()), app_ids)
+        
+        all_metrics = {}
+        errors = []
+        for game in self.games:
+            logging.info(f"Processing {game['name']} ({game['app_id']})...")
+            rows = {}
+            for label in ('current', 'previous'):
+                row = rollups.get((game['app_id'], starts[label]))
+                if row is None or row['days'] < period_length(period, starts[label]):
+                    missing = self.missing_dates_in(session, game['app_id'], date_ranges[f'{label}_start'], date_ranges[f'{label}_end'])
+                    missing_str = ", ".join(str(d) for d in missing)
+                    errors.append(f"{game['name']}: Missing {label} {period} data for dates: {missing_str}")
+                    break
+                rows[label] = row
+            if len(rows) < 2:
+                continue
+            
+            all_metrics[game['app_id']] = self.metrics_from_rollup(rows['current'], rows['previous'])
+            logging.info(f"[OK] {game['name']} metrics looked up successfully")
+        return all_metrics, errors
+    
+    def metrics_from_rollup(self, current, previous):
+        """Report dict (create_excel_report shape) from two rollup rows"""
+        def change(column):
+            if previous[column] in (None, 0) or current[column] is None:
+                return None
+            return (float(current[column]) - float(previous[column])) / float(previous[column]) * 100
+        
+        return {
+            'sum_new_players': current['sum_new_players'] or 0,
+            'new_players_wow': self.format_wow_change(change('sum_new_players')),
+            'latest_unique_player': current['latest_unique_player'],
+            'sum_revenue': float(current['sum_revenue'] or 0),
+            'revenue_wow': self.format_wow_change(change('sum_revenue')),
+            'latest_lifetime_revenue': current['latest_lifetime_revenue'],
+            'avg_dau': float(current['avg_dau'] or 0),
+            'median_playtime': current['latest_median_playtime'] or "N/A"
+        }
+    
+    def generate_report(self, start_date_str, period='week', output_dir='.', include_detail=True):
+        """Main method to generate the weekly (or monthly/quarterly) report"""
         try:
+            if period not in PERIOD_LABELS:
+                raise ValueError(f"Invalid period: {period}. Expected one of {', '.join(PERIOD_TYPES)}")
+            report_name = PERIOD_LABELS[period][0]
+            
             # Parse input date
             logging.info(f"Parsing start date: {start_date_str}")
             start_date = self.parse_date_input(start_date_str)
             
             # Calculate date ranges
-            date_ranges = self.get_date_ranges(start_date)
-            logging.info(f"Current week: {date_ranges['current_week_start']} to {date_ranges['current_week_end']}")
-            logging.info(f"Previous week: {date_ranges['previous_week_start']} to {date_ranges['previous_week_end']}")
+            date_ranges = self.get_date_ranges(start_date, period)
+            logging.info(f"Current {period}: {date_ranges['current_start']} to {date_ranges['current_end']}")
+            logging.info(f"Previous {period}: {date_ranges['previous_start']} to {date_ranges['previous_end']}")
             
             # Connect to database
-            logging.info("Connecting to database...")
-            connection = mysql.connector.connect(**self.db_config)
+            logging.info(f"Connecting to database ({self.storage.name})...")
+            with self.storage.session() as session:
+                # Calendar periods (Monday weeks, months, quarters) are rollup lookups
+                if period != 'week' or start_date.weekday() == 0:
+                    all_metrics, errors = self.collect_from_rollup(session, date_ranges)
+                else:
+                    all_metrics, errors = self.collect_from_daily(session, date_ranges)
             
-            # Collect data and validate
-            all_metrics = {}
-            errors = []
-            
-            for game in self.games:
-                logging.info(f"Processing {game['name']} ({game['app_id']})...")
-                
-                # Fetch current week data
-                current_week_data = self.fetch_game_data(
-                    connection,
-                    game['app_id'],
-                    date_ranges['current_week_start'],
-                    date_ranges['current_week_end']
-                )
-                
-                # Validate current week
-                is_valid, missing_dates = self.validate_data_completeness(
-                    current_week_data,
-                    game['name'],
-                    date_ranges['current_week_start'],
-                    date_ranges['current_week_end']
-                )
+                # Check for errors
+                if errors:
+                    logging.error("[ERROR] Data validation failed. Missing data detected:")
+                    for error in errors:
+                        logging.error(f"  - {error}")
+                    print(f"\n[ERROR] Cannot generate report for {start_date_str} due to missing data.")
+                    print("Missing data details:")
+                    for error in errors:
+                        print(f"  - {error}")
+                    return False
                 
-                if not is_valid:
-                    missing_str = ", ".join(str(d) for d in missing_dates)
-                    errors.append(f"{game['name']}: Missing current week data for dates: {missing_str}")
-                    continue
+                # Marketing section (optional: a failure here should not cost the financial report)
+                try:
+                    marketing = self.collect_marketing(session, date_ranges)
+                except StorageError as e:
+                    logging.warning(f"Skipping marketing section: {e}")
+                    marketing = None
                 
-                # Fetch previous week data
-                previous_week_data = self.fetch_game_data(
-                    connection,
-                    game['app_id'],
-                    date_ranges['previous_week_start'],
-                    date_ranges['previous_week_end']
+                # Generate Excel report (inside the session so detail rows stream from the cursor)
+                output_filename = os.path.join(
+                    output_dir,
+                    f"{report_name.lower()}_report_{date_ranges['current_start'].strftime('%Y%m%d')}_to_{date_ranges['current_end'].strftime('%Y%m%d')}.xlsx"
                 )
-                
-                # Validate previous week
-                is_valid, missing_dates = self.validate_data_completeness(
-                    previous_week_data,
-                    game['name'],
-                    date_ranges['previous_week_start'],
-                    date_ranges['previous_week_end']
-                )
-                
-                if not is_valid:
-                    missing_str = ", ".join(str(d) for d in missing_dates)
-                    errors.append(f"{game['name']}: Missing previous week data for dates: {missing_str}")
-                    continue
-                
-                # Calculate metrics
-                metrics = self.calculate_metrics(current_week_data, previous_week_data)
-                all_metrics[game['app_id']] = metrics
-                logging.info(f"[OK] {game['name']} metrics calculated successfully")
-            
-            # Close database connection
-            connection.close()
+                logging.info(f"Generating Excel report: {output_filename}")
+                detail_rows = None
+                if include_detail:
+                    detail_rows = self.iter_daily_detail(session, date_ranges['current_start'], date_ranges['current_end'])
+                self.create_excel_report(all_metrics, date_ranges, output_filename, detail_rows, marketing)
             
-            # Check for errors
-            if errors:
-                logging.error("[ERROR] Data validation failed. Missing data detected:")
-                for error in errors:
-                    logging.error(f"  - {error}")
-                print("\n[ERROR] Cannot generate report due to missing data.")
-                print("Missing data details:")
-                for error in errors:
-                    print(f"  - {error}")
-                return False
-            
-            # Generate Excel report
-            output_filename = f"weekly_report_{date_ranges['current_week_start'].strftime('%Y%m%d')}_to_{date_ranges['current_week_end'].strftime('%Y%m%d')}.xlsx"
-            logging.info(f"Generating Excel report: {output_filename}")
-            self.create_excel_report(all_metrics, date_ranges, output_filename)
-            
-            print(f"\n[SUCCESS] Weekly report generated successfully!")
+            print(f"\n[SUCCESS] {report_name} report generated successfully!")
             print(f"File: {output_filename}")
-            print(f"Period: {date_ranges['current_week_start']} to {date_ranges['current_week_end']}")
+            print(f"Period: {date_ranges['current_start']} to {date_ranges['current_end']}")
             
             return True
             
@@ -358,7 +610,7 @@ class WeeklyReportGenerator:
             logging.error(f"Input error: {str(e)}")
             print(f"\n[ERROR] {str(e)}")
             return False
-        except Error as e:
+        except StorageError as e:
             logging.error(f"Database error: {str(e)}")
             print(f"\n[ERROR] DATABASE ERROR: {str(e)}")
             return False
@@ -370,40 +622,124 @@ class WeeklyReportGenerator:
             return False
 
 
+def report_start_dates(period, first_date, last_date):
+    """Start dates of every report in [first_date, last_date] (weeks step 7 days from first_date)"""
+    starts = []
+    if period == 'week':
+        current = first_date
+        while current <= last_date:
+            starts.append(current)
+            current += timedelta(days=7)
+        return starts
+    current = period_bounds(period, first_date)[0]
+    while current <= last_date:
+        starts.append(current)
+        current = period_bounds(period, current)[1] + timedelta(days=1)
+    return starts
+
+
+def batch_tasks(periods, dates=(), first=None, last=None):
+    """[(start_date_str, period)] for the requested dates and range, one task per report file.
+    Each date maps to the start of its period, so two dates in the same month or quarter share one report."""
+    tasks = []
+    for period in periods:
+        starts = [report_start_dates(period, d, d)[0] for d in dates]
+        if first:
+            starts += report_start_dates(period, first, last or first)
+        tasks += [(start.strftime('%Y%m%d'), period) for start in starts]
+    return list(dict.fromkeys(tasks))
+
+
+def _generate_in_worker(db_config, start_date_str, period, output_dir, include_detail):
+    """Process pool entry point: each worker opens its own storage connection"""
+    generator = WeeklyReportGenerator(db_config)
+    return generator.generate_report(start_date_str, period, output_dir, include_detail)
+
+
+def run_batch(db_config, tasks, output_dir='.', workers=None, include_detail=True):
+    """Generate [(start_date_str, period)] reports in parallel; returns {task: success}"""
+    os.makedirs(output_dir, exist_ok=True)
+    # Duplicate tasks would write the same workbook from two processes at once
+    tasks = list(dict.fromkeys(tasks))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_generate_in_worker, db_config, start, period, output_dir, include_detail): (start, period)
+            for start, period in tasks
+        }
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                results[task] = future.result()
+            except Exception as e:
+                logging.error(f"Report {task[1]} {task[0]} failed in worker: {e}")
+                results[task] = False
+    return results
+
+
+def run_interactive(db_config):
+    """Prompt for one period/date and generate a single report"""
+    period = input("Period (week/month/quarter) [week]: ").strip().lower() or 'week'
+    print("\nEnter the starting date (Monday) in YYYYMMDD format")
+    print("Example: 20251006 for October 6, 2025 (for month/quarter any date inside the period)")
+    start_date_input = input("Start Date: ").strip()
+    
+    if not start_date_input:
+        print("[ERROR] No date provided")
+        return False
+    
+    generator = WeeklyReportGenerator(db_config)
+    return generator.generate_report(start_date_input, period)
+
+
 def main():
     """Main function"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('weekly_report_generator.log'),
+            logging.StreamHandler()
+        ]
+    )
+    parser = argparse.ArgumentParser(description="Generate weekly/monthly/quarterly Excel reports")
+    parser.add_argument('--dates', nargs='+', metavar='YYYYMMDD', help="report start dates")
+    parser.add_argument('--from', dest='first', metavar='YYYYMMDD', help="first start date of a range")
+    parser.add_argument('--to', dest='last', metavar='YYYYMMDD', help="last date of a range (default: --from)")
+    parser.add_argument('--period', nargs='+', choices=PERIOD_TYPES, default=['week'], help="report period(s) (default: week)")
+    parser.add_argument('--output-dir', default='.', help="directory for the workbooks")
+    parser.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    parser.add_argument('--no-detail', action='store_true', help="skip the daily detail sheet")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("SteamWorks Weekly Report Generator")
     print("=" * 60)
     
-    # Database configuration
-    db_config = {
-        'host': 'localhost',
-        'port': 3306,
-        'database': 'steamworks_crawler',
-        'user': 'root',
-        'password': 'Zh1149191843!'
-    }
-    
-    # Get user input
-    print("\nEnter the starting date (Monday) in YYYYMMDD format")
-    print("Example: 20251006 for October 6, 2025")
-    start_date_input = input("Start Date: ").strip()
+    # Database configuration (STEAMWORKS_DB_* env vars override the defaults)
+    db_config = load_db_config()
     
-    if not start_date_input:
-        print("[ERROR] No date provided")
-        sys.exit(1)
+    if not args.dates and not args.first:
+        sys.exit(0 if run_interactive(db_config) else 1)
     
-    # Generate report
-    generator = WeeklyReportGenerator(db_config)
-    success = generator.generate_report(start_date_input)
+    # Unattended batch: every requested period for every date / range
+    try:
+        dates = [parse_report_date(d) for d in args.dates or []]
+        first = parse_report_date(args.first) if args.first else None
+        last = parse_report_date(args.last) if args.last else None
+        tasks = batch_tasks(args.period, dates, first, last)
+    except ValueError as e:
+        parser.error(str(e))
     
-    if success:
-        sys.exit(0)
-    else:
-        sys.exit(1)
+    logging.info(f"Generating {len(tasks)} report(s) into {args.output_dir}")
+    results = run_batch(db_config, tasks, args.output_dir, args.workers, not args.no_detail)
+    failed = sorted(task for task, success in results.items() if not success)
+    print(f"\n{len(results) - len(failed)}/{len(results)} report(s) generated")
+    for start, period in failed:
+        print(f"  [FAILED] {period} {start}")
+    sys.exit(1 if failed else 0)
 
 
 if __name__ == "__main__":
     main()
-
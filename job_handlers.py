@@ -0,0 +1,116 @@
+"""
+Job handlers for job_queue.py workers.
+
+Each handler takes a leased job dict and returns a small JSON-able result, or
+raises. Crawl and backfill jobs reuse one shared browser session per worker
+(see crawl_orchestrator.BrowserSession). Reparse and report jobs need no
+browser. Every write goes through the crawlers' keyed upserts, so running a job
+twice stores the same rows.
+"""
+
+import logging
+from datetime import date, timedelta
+
+from game_registry import game_name, load_games
+from job_queue import PermanentJobError
+from storage import load_db_config
+
+
+def _job_date(job):
+    return date.fromisoformat(job['stat_date']) if job['stat_date'] else None
+
+
+class JobHandlers:
+    def __init__(self, db_config=None):
+        self.db_config = db_config or load_db_config()
+        self.session = None
+
+    def handlers(self):
+        return {'crawl': self.crawl, 'backfill': self.backfill, 'reparse': self.reparse, 'report': self.report}
+
+    def _game_name(self, app_id):
+        return dict(load_games()).get(app_id) or game_name(app_id)
+
+    def _attach(self, job, crawler):
+        """Attach a crawler to the shared browser session, viewing as the job's partner account if it names one.
+        Jobs naming none view as the game's registry (or default) partner, whatever the previous job used."""
+        from crawl_orchestrator import BrowserSession
+        if self.session is None:
+            self.session = BrowserSession(self.db_config)
+        partner_id = ((job.get('payload') or {}).get('partner_id') or '').strip()
+        return self.session.attach(crawler, partner_id or None)
+
+    def crawl(self, job):
+        """Financial pages for one game (optionally one page); SteamWorks only serves 'yesterday'"""
+        from steamworks_crawler import PAGE_EXTRACTORS, SteamWorksCrawler
+        pages = [job['page']] if job['page'] else None
+        if pages and pages[0] not in [p[0] for p in PAGE_EXTRACTORS]:
+            raise PermanentJobError(f"Unknown page: {job['page']}")
+
+        crawler = SteamWorksCrawler(self.db_config, steam_app_id=job['app_id'], game_name=self._game_name(job['app_id']))
+        stat_date = _job_date(job) or crawler.get_stat_date()
+        if stat_date != crawler.get_stat_date():
+            raise PermanentJobError(f"Financial pages only expose yesterday ({crawler.get_stat_date()}), not {stat_date}")
+
+        # Whole-game jobs only fetch the pages the run manifest has not recorded yet
+        pages = pages or crawler.pending_pages(stat_date)
+        if not pages:
+            return {'fields': 0, 'pages': []}
+
+        self._attach(job, crawler)
+        # A job naming one page always fetches it; whole-game jobs may carry slow pages forward
+        data = crawler.extract_all_pages(pages, stat_date, {} if job['page'] else None)
+        if not data:
+            raise RuntimeError("No data extracted")
+        spool_id = crawler.spool_payload(data, stat_date, crawler.page_status)
+        if not crawler.save_to_database(data, stat_date=stat_date, page_status=crawler.page_status):
+            raise RuntimeError(f"Database save failed; payload spooled for replay (spool id={spool_id})")
+        if spool_id is not None:
+            from crawl_spool import CrawlSpool
+            CrawlSpool().mark_drained(spool_id)
+        return {'fields': len(data), 'pages': pages}
+
+    def backfill(self, job):
+        """Marketing data for one game and one past day"""
+        from steamworks_historical_marketing_crawler import SteamworksHistoricalMarketingCrawler
+        stat_date = _job_date(job)
+        if stat_date is None:
+            raise PermanentJobError("Backfill jobs need a stat_date")
+        crawler = SteamworksHistoricalMarketingCrawler(
+            self.db_config, steam_app_id=job['app_id'], game_name=self._game_name(job['app_id']),
+            start_date=stat_date, end_date=stat_date
+        )
+        self._attach(job, crawler)
+        success, result = crawler.run_historical_crawler()
+        if not success:
+            raise RuntimeError(result)
+        return {'result': result}
+
+    def reparse(self, job):
+        """Re-save the latest spooled payload for (app, date) through the current save logic"""
+        from crawl_spool import CrawlSpool
+        from replay_spool import replay_entry
+        stat_date = _job_date(job)
+        kind = (job.get('payload') or {}).get('spool_kind', 'metrics')
+        entry = CrawlSpool().latest(kind, job['app_id'], stat_date)
+        if entry is None:
+            raise PermanentJobError(f"No spooled {kind} payload for app {job['app_id']} on {stat_date}")
+        if not replay_entry(self.db_config, entry):
+            raise RuntimeError(f"Re-save of spool entry {entry['id']} failed")
+        return {'spool_id': entry['id']}
+
+    def report(self, job):
+        """Weekly/monthly/quarterly report starting at stat_date (page holds the period)"""
+        from generate_weekly_report import WeeklyReportGenerator
+        stat_date = _job_date(job) or (date.today() - timedelta(days=7))
+        output_dir = (job.get('payload') or {}).get('output_dir', '.')
+        generator = WeeklyReportGenerator(self.db_config)
+        if not generator.generate_report(stat_date.strftime('%Y%m%d'), job['page'] or 'week', output_dir):
+            raise RuntimeError(f"Report generation failed for {stat_date}")
+        return {'period': job['page'] or 'week', 'start': str(stat_date)}
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+        logging.info("Job handlers closed")
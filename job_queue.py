@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+Crawl Job Queue
+A small work queue so crawl, backfill, reparse and report tasks can be spread
+over several machines instead of one Task Scheduler box.
+
+Jobs have (kind, app, page, date) granularity and are deduplicated by an
+idempotency key. Workers lease a job for a limited time and extend the lease
+with heartbeats while they run it. If a worker dies, its lease expires and the
+job goes back to the queue. Failures are retried with exponential backoff
+until max_attempts, then the job is marked dead.
+
+Every lease carries a fencing token, and only the current holder can complete
+or fail the job. Together with the crawlers' keyed upserts, (app, stat_date)
+ends up written exactly once even if a job runs twice.
+
+Backends (STEAMWORKS_QUEUE):
+    sqlite  shared file (STEAMWORKS_QUEUE_PATH, default crawl_queue.db), the default
+    redis   STEAMWORKS_QUEUE_URL, e.g. redis://queue-host:6379/0 (pip install redis)
+    memory  in-process, for tests and dry runs
+
+    python job_queue.py enqueue crawl --apps 2507950,3104410 [--pages default players]
+    python job_queue.py enqueue backfill --apps 2507950 --from 20251001 --to 20251007
+    python job_queue.py enqueue reparse --apps 2507950 --from 20251001 --to 20251007
+    python job_queue.py enqueue report --from 20251006 --period week
+    python job_queue.py worker [--kinds crawl backfill] [--once]
+    python job_queue.py status
+
+A worker whose SteamWorks login has expired hands its job back untouched and
+exits with EXIT_SESSION_EXPIRED instead of burning through the queue.
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from run_manifest import pacific_stat_date
+from session_health import SessionExpiredError, abort_expired_session
+
+JOB_KINDS = ['crawl', 'backfill', 'reparse', 'report']
+
+STATUSES = ['queued', 'leased', 'done', 'dead']
+
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 60
+
+DEFAULT_QUEUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crawl_queue.db')
+
+JOB_FIELDS = [
+    'id', 'idempotency_key', 'kind', 'app_id', 'page', 'stat_date', 'payload', 'status', 'attempts',
+    'max_attempts', 'available_at', 'lease_owner', 'lease_token', 'lease_expires', 'last_error',
+    'result', 'created_at', 'finished_at',
+]
+
+
+class LeaseLost(Exception):
+    """The job's lease expired or was taken over; the caller must stop working on it"""
+
+
+class PermanentJobError(Exception):
+    """A failure that retrying cannot fix (bad parameters, unsupported date)"""
+
+
+def job_key(kind, app_id=None, page=None, stat_date=None, extra=None):
+    """Idempotency key: one live job per (kind, app, page, date[, extra])"""
+    parts = [kind, str(app_id or '*'), page or '*', str(stat_date or '*')]
+    if extra:
+        parts.append(str(extra))
+    return ':'.join(parts)
+
+
+class SQLiteQueueBackend:
+    """Queue table in a SQLite file (or ':memory:'); leases are taken under BEGIN IMMEDIATE"""
+
+    name = 'sqlite'
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('STEAMWORKS_QUEUE_PATH') or DEFAULT_QUEUE_PATH
+        self._lock = threading.Lock()
+        # An in-memory database only lives as long as its connection, so keep one
+        self._shared = self._open() if self.path == ':memory:' else None
+        self._ensure_schema()
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        if self.path != ':memory:':
+            connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def _transaction(self, fn):
+        with self._lock:
+            connection = self._shared or self._open()
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    result = fn(connection)
+                    connection.execute("COMMIT")
+                    return result
+                except Exception:
+                    connection.execute("ROLLBACK")
+                    raise
+            finally:
+                if connection is not self._shared:
+                    connection.close()
+
+    def _ensure_schema(self):
+        def create(connection):
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    kind TEXT NOT NULL,
+                    app_id INTEGER,
+                    page TEXT,
+                    stat_date TEXT,
+                    payload TEXT,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    available_at REAL NOT NULL,
+                    lease_owner TEXT,
+                    lease_token TEXT,
+                    lease_expires REAL,
+                    last_error TEXT,
+                    result TEXT,
+                    created_at REAL NOT NULL,
+                    finished_at REAL
+                )
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, available_at, id)")
+        self._transaction(create)
+
+    @staticmethod
+    def _row(cursor, row):
+        return dict(zip([d[0] for d in cursor.description], row)) if row else None
+
+    def insert(self, job, force=False):
+        """Insert unless the idempotency key exists; returns (id, created). force requeues a finished job"""
+        def run(connection):
+            cursor = connection.execute("SELECT id, status FROM jobs WHERE idempotency_key = ?", (job['idempotency_key'],))
+            existing = cursor.fetchone()
+            if existing:
+                if force and existing[1] in ('done', 'dead'):
+                    connection.execute(
+                        "UPDATE jobs SET status = 'queued', attempts = 0, available_at = ?, last_error = NULL, "
+                        "result = NULL, finished_at = NULL, payload = ?, max_attempts = ? WHERE id = ?",
+                        (job['available_at'], job['payload'], job['max_attempts'], existing[0])
+                    )
+                    return existing[0], True
+                return existing[0], False
+            columns = [c for c in JOB_FIELDS if c in job and c != 'id']
+            cursor = connection.execute(
+                f"INSERT INTO jobs ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})",
+                [job[c] for c in columns]
+            )
+            return cursor.lastrowid, True
+        return self._transaction(run)
+
+    def lease(self, worker_id, token, kinds, now, lease_seconds):
+        def run(connection):
+            # Expired leases go back to the queue (or die once out of attempts)
+            connection.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'queued' END, "
+                "last_error = 'lease expired (worker ' || COALESCE(lease_owner, '?') || ')', "
+                "finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END, "
+                "lease_owner = NULL, lease_token = NULL, lease_expires = NULL "
+                "WHERE status = 'leased' AND lease_expires < ?",
+                (now, now)
+            )
+            query = "SELECT id FROM jobs WHERE status = 'queued' AND available_at <= ?"
+            params = [now]
+            if kinds:
+                query += f" AND kind IN ({', '.join(['?'] * len(kinds))})"
+                params.extend(kinds)
+            row = connection.execute(query + " ORDER BY available_at, id LIMIT 1", params).fetchone()
+            if not row:
+                return None
+            connection.execute(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, lease_token = ?, "
+                "lease_expires = ? WHERE id = ?",
+                (worker_id, token, now + lease_seconds, row[0])
+            )
+            cursor = connection.execute("SELECT * FROM jobs WHERE id = ?", (row[0],))
+            return self._row(cursor, cursor.fetchone())
+        return self._transaction(run)
+
+    def update_leased(self, job_id, token, fields):
+        """Apply fields only while token still holds the lease; returns False if it was lost"""
+        def run(connection):
+            assignments = ', '.join(f"{c} = ?" for c in fields)
+            cursor = connection.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                list(fields.values()) + [job_id, token]
+            )
+            return cursor.rowcount == 1
+        return self._transaction(run)
+
+    def get(self, job_id):
+        def run(connection):
+            cursor = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            return self._row(cursor, cursor.fetchone())
+        return self._transaction(run)
+
+    def counts(self):
+        def run(connection):
+            rows = connection.execute("SELECT kind, status, COUNT(*) FROM jobs GROUP BY kind, status").fetchall()
+            return {(kind, status): n for kind, status, n in rows}
+        return self._transaction(run)
+
+
+class RedisQueueBackend:
+    """Same semantics on Redis: a hash per job, ready/leased sorted sets, Lua for atomic steps"""
+
+    name = 'redis'
+
+    _INSERT = """
+    local existing = redis.call('HGET', KEYS[1], ARGV[1])
+    if existing then
+        local status = redis.call('HGET', KEYS[3] .. existing, 'status')
+        if ARGV[3] == '1' and (status == 'done' or status == 'dead') then
+            local job = cjson.decode(ARGV[2])
+            redis.call('HSET', KEYS[3] .. existing, 'status', 'queued', 'attempts', 0, 'available_at', job.available_at,
+                       'payload', job.payload or '', 'max_attempts', job.max_attempts, 'last_error', '', 'result', '',
+                       'finished_at', '')
+            redis.call('ZADD', KEYS[4], job.available_at, existing)
+            return {tonumber(existing), 1}
+        end
+        return {tonumber(existing), 0}
+    end
+    local id = redis.call('INCR', KEYS[2])
+    local job = cjson.decode(ARGV[2])
+    job.id = id
+    for field, value in pairs(job) do
+        redis.call('HSET', KEYS[3] .. id, field, tostring(value))
+    end
+    redis.call('HSET', KEYS[1], ARGV[1], id)
+    redis.call('ZADD', KEYS[4], job.available_at, id)
+    return {id, 1}
+    """
+
+    _LEASE = """
+    local now = tonumber(ARGV[1])
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+        local key = KEYS[3] .. id
+        local attempts = tonumber(redis.call('HGET', key, 'attempts'))
+        local max_attempts = tonumber(redis.call('HGET', key, 'max_attempts'))
+        redis.call('ZREM', KEYS[2], id)
+        redis.call('HSET', key, 'last_error', 'lease expired (worker ' .. (redis.call('HGET', key, 'lease_owner') or '?') .. ')',
+                   'lease_owner', '', 'lease_token', '', 'lease_expires', '')
+        if attempts >= max_attempts then
+            redis.call('HSET', key, 'status', 'dead', 'finished_at', now)
+        else
+            redis.call('HSET', key, 'status', 'queued')
+            redis.call('ZADD', KEYS[1], now, id)
+        end
+    end
+    local kinds = {}
+    for i = 5, #ARGV do kinds[ARGV[i]] = true end
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)) do
+        local key = KEYS[3] .. id
+        if #ARGV < 5 or kinds[redis.call('HGET', key, 'kind')] then
+            local expires = now + tonumber(ARGV[4])
+            redis.call('ZREM', KEYS[1], id)
+            redis.call('ZADD', KEYS[2], expires, id)
+            redis.call('HINCRBY', key, 'attempts', 1)
+            redis.call('HSET', key, 'status', 'leased', 'lease_owner', ARGV[2], 'lease_token', ARGV[3],
+                       'lease_expires', expires)
+            return redis.call('HGETALL', key)
+        end
+    end
+    return nil
+    """
+
+    _UPDATE = """
+    local key = KEYS[1] .. ARGV[1]
+    if redis.call('HGET', key, 'status') ~= 'leased' or redis.call('HGET', key, 'lease_token') ~= ARGV[2] then
+        return 0
+    end
+    local fields = cjson.decode(ARGV[3])
+    for field, value in pairs(fields) do
+        if value == cjson.null then value = '' end
+        redis.call('HSET', key, field, tostring(value))
+    end
+    if fields.status and fields.status ~= 'leased' then
+        redis.call('ZREM', KEYS[2], ARGV[1])
+        if fields.status == 'queued' then redis.call('ZADD', KEYS[3], fields.available_at, ARGV[1]) end
+    elseif fields.lease_expires then
+        redis.call('ZADD', KEYS[2], fields.lease_expires, ARGV[1])
+    end
+    return 1
+    """
+
+    _INT_FIELDS = ('id', 'app_id', 'attempts', 'max_attempts')
+    _FLOAT_FIELDS = ('available_at', 'lease_expires', 'created_at', 'finished_at')
+
+    def __init__(self, url=None, prefix='steamworks:queue'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("Redis queue backend requires the redis package: pip install redis")
+        self.client = redis.Redis.from_url(url or os.environ.get('STEAMWORKS_QUEUE_URL', 'redis://localhost:6379/0'),
+                                           decode_responses=True)
+        self.prefix = prefix
+        self._insert = self.client.register_script(self._INSERT)
+        self._lease = self.client.register_script(self._LEASE)
+        self._update = self.client.register_script(self._UPDATE)
+
+    def _k(self, name):
+        return f"{self.prefix}:{name}"
+
+    def _decode(self, flat):
+        if not flat:
+            return None
+        job = dict(zip(flat[::2], flat[1::2])) if isinstance(flat, list) else dict(flat)
+        for field in JOB_FIELDS:
+            value = job.get(field)
+            if value in (None, ''):
+                job[field] = None
+            elif field in self._INT_FIELDS:
+                job[field] = int(float(value))
+            elif field in self._FLOAT_FIELDS:
+                job[field] = float(value)
+        return job
+
+    def insert(self, job, force=False):
+        fields = {k: v for k, v in job.items() if v is not None}
+        job_id, created = self._insert(
+            keys=[self._k('keys'), self._k('seq'), self._k('job:'), self._k('ready')],
+            args=[job['idempotency_key'], json.dumps(fields), '1' if force else '0']
+        )
+        return int(job_id), bool(created)
+
+    def lease(self, worker_id, token, kinds, now, lease_seconds):
+        flat = self._lease(
+            keys=[self._k('ready'), self._k('leased'), self._k('job:')],
+            args=[now, worker_id, token, lease_seconds] + list(kinds or [])
+        )
+        return self._decode(flat)
+
+    def update_leased(self, job_id, token, fields):
+        return bool(self._update(
+            keys=[self._k('job:'), self._k('leased'), self._k('ready')],
+            args=[job_id, token, json.dumps(fields)]
+        ))
+
+    def get(self, job_id):
+        return self._decode(self.client.hgetall(self._k(f"job:{job_id}")))
+
+    def counts(self):
+        counts = {}
+        for key in self.client.scan_iter(self._k('job:*')):
+            kind, status = self.client.hmget(key, 'kind', 'status')
+            counts[(kind, status)] = counts.get((kind, status), 0) + 1
+        return counts
+
+
+def get_queue_backend(backend=None):
+    """Backend selected by name or STEAMWORKS_QUEUE (sqlite by default)"""
+    backend = (backend or os.environ.get('STEAMWORKS_QUEUE', 'sqlite')).lower()
+    if backend == 'sqlite':
+        return SQLiteQueueBackend()
+    if backend == 'memory':
+        return SQLiteQueueBackend(':memory:')
+    if backend == 'redis':
+        return RedisQueueBackend()
+    raise ValueError(f"Unknown queue backend: {backend} (expected sqlite, redis or memory)")
+
+
+class JobQueue:
+    """Enqueue / lease / complete / fail with retry policy on top of a backend"""
+
+    def __init__(self, backend=None, clock=time.time):
+        self.backend = backend or get_queue_backend()
+        self.clock = clock
+
+    def enqueue(self, kind, app_id=None, page=None, stat_date=None, payload=None,
+                max_attempts=DEFAULT_MAX_ATTEMPTS, key=None, force=False, delay=0):
+        """Add a job unless an identical one exists; returns (job_id, created)"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind} (expected one of {', '.join(JOB_KINDS)})")
+        now = self.clock()
+        job = {
+            'idempotency_key': key or job_key(kind, app_id, page, stat_date),
+            'kind': kind,
+            'app_id': int(app_id) if app_id is not None else None,
+            'page': page,
+            'stat_date': str(stat_date) if stat_date is not None else None,
+            'payload': json.dumps(payload) if payload is not None else None,
+            'status': 'queued',
+            'attempts': 0,
+            'max_attempts': int(max_attempts),
+            'available_at': now + delay,
+            'created_at': now,
+        }
+        return self.backend.insert(job, force=force)
+
+    def lease(self, worker_id, kinds=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Next ready job (payload decoded) leased to worker_id, or None"""
+        job = self.backend.lease(worker_id, uuid.uuid4().hex, list(kinds or []), self.clock(), lease_seconds)
+        if job and job.get('payload'):
+            job['payload'] = json.loads(job['payload'])
+        return job
+
+    def heartbeat(self, job, lease_seconds=DEFAULT_LEASE_SECONDS):
+        if not self.backend.update_leased(job['id'], job['lease_token'], {'lease_expires': self.clock() + lease_seconds}):
+            raise LeaseLost(f"Lease on job {job['id']} was lost")
+
+    def complete(self, job, result=None):
+        fields = {'status': 'done', 'finished_at': self.clock(), 'lease_token': None, 'lease_expires': None,
+                  'result': json.dumps(result, default=str) if result is not None else None}
+        if not self.backend.update_leased(job['id'], job['lease_token'], fields):
+            raise LeaseLost(f"Lease on job {job['id']} was lost before completion")
+
+    def fail(self, job, error, retry=True):
+        """Record a failure; returns the new status ('queued' for a retry, else 'dead')"""
+        now = self.clock()
+        fields = {'last_error': str(error)[:1000], 'lease_owner': None, 'lease_token': None, 'lease_expires': None}
+        if retry and job['attempts'] < job['max_attempts']:
+            fields.update(status='queued', available_at=now + RETRY_BASE_SECONDS * 2 ** (job['attempts'] - 1))
+        else:
+            fields.update(status='dead', finished_at=now)
+        if not self.backend.update_leased(job['id'], job['lease_token'], fields):
+            raise LeaseLost(f"Lease on job {job['id']} was lost before recording failure")
+        return fields['status']
+
+    def release(self, job, error):
+        """Hand a leased job back without spending an attempt (the worker, not the job, is broken)"""
+        fields = {'status': 'queued', 'available_at': self.clock(), 'attempts': max(0, job['attempts'] - 1),
+                  'last_error': str(error)[:1000], 'lease_owner': None, 'lease_token': None, 'lease_expires': None}
+        if not self.backend.update_leased(job['id'], job['lease_token'], fields):
+            raise LeaseLost(f"Lease on job {job['id']} was lost before release")
+
+    def get(self, job_id):
+        return self.backend.get(job_id)
+
+    def counts(self):
+        return self.backend.counts()
+
+
+class _Heartbeat(threading.Thread):
+    """Extends a lease every third of its length while a handler runs"""
+
+    def __init__(self, queue, job, lease_seconds):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.job = job
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        while not self.stopped.wait(self.lease_seconds / 3):
+            try:
+                self.queue.heartbeat(self.job, self.lease_seconds)
+            except LeaseLost:
+                self.lost = True
+                return
+            except Exception as e:
+                logging.warning(f"Heartbeat for job {self.job['id']} failed: {e}")
+
+
+def run_worker(queue, handlers, worker_id=None, kinds=None, lease_seconds=DEFAULT_LEASE_SECONDS,
+               poll_interval=30, max_jobs=None, stop=None):
+    """Lease and run jobs until stopped, max_jobs is reached or (poll_interval=None) nothing is ready; returns jobs processed"""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    kinds = kinds or list(handlers)
+    processed = 0
+    while stop is None or not stop.is_set():
+        if max_jobs is not None and processed >= max_jobs:
+            break
+        job = queue.lease(worker_id, kinds, lease_seconds)
+        if job is None:
+            # poll_interval=None means "drain what is ready, then exit"
+            if poll_interval is None:
+                break
+            if stop is not None:
+                stop.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+            continue
+
+        label = f"job {job['id']} {job['kind']} app={job['app_id']} page={job['page']} date={job['stat_date']}"
+        logging.info(f"[{worker_id}] Running {label} (attempt {job['attempts']}/{job['max_attempts']})")
+        heartbeat = _Heartbeat(queue, job, lease_seconds)
+        heartbeat.start()
+        try:
+            result = handlers[job['kind']](job)
+            heartbeat.stopped.set()
+            queue.complete(job, result)
+            logging.info(f"[{worker_id}] Completed {label}")
+        except LeaseLost as e:
+            logging.warning(f"[{worker_id}] {e}; another worker owns {label} now")
+        except SessionExpiredError as e:
+            # Every later job would hit the same login page: give this one back and stop
+            heartbeat.stopped.set()
+            try:
+                queue.release(job, e)
+            except LeaseLost as lost:
+                logging.warning(f"[{worker_id}] {lost}")
+            logging.error(f"[{worker_id}] Session expired during {label}; stopping worker")
+            raise
+        except Exception as e:
+            heartbeat.stopped.set()
+            retry = not isinstance(e, PermanentJobError)
+            try:
+                status = queue.fail(job, e, retry=retry)
+                logging.error(f"[{worker_id}] {label} failed ({status}): {e}")
+            except LeaseLost as lost:
+                logging.warning(f"[{worker_id}] {lost}")
+        finally:
+            heartbeat.stopped.set()
+        processed += 1
+    return processed
+
+
+def _date_range(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def main():
+    """Main function for the job queue CLI"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('job_queue.log'),
+            logging.StreamHandler()
+        ]
+    )
+    parser = argparse.ArgumentParser(description="Distributed crawl/report job queue")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = commands.add_parser('enqueue', help="add jobs")
+    enqueue.add_argument('kind', choices=JOB_KINDS)
+    enqueue.add_argument('--apps', help="comma-separated app ids (crawl/backfill/reparse)")
+    enqueue.add_argument('--pages', nargs='+', help="crawl only these pages (default: all pages in one job)")
+    enqueue.add_argument('--from', dest='start', help="first date YYYYMMDD (default: yesterday)")
+    enqueue.add_argument('--to', dest='end', help="last date YYYYMMDD (default: --from)")
+    enqueue.add_argument('--period', default='week', help="report period (week/month/quarter)")
+    enqueue.add_argument('--partner-id', help="partner account to switch to before crawling")
+    enqueue.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+    enqueue.add_argument('--force', action='store_true', help="re-run jobs that already finished")
+
+    worker = commands.add_parser('worker', help="lease and run jobs")
+    worker.add_argument('--kinds', nargs='+', choices=JOB_KINDS, help="job kinds to take (default: all)")
+    worker.add_argument('--id', help="worker name (default: host:pid)")
+    worker.add_argument('--once', action='store_true', help="exit when no job is ready instead of polling")
+    worker.add_argument('--lease', type=int, default=DEFAULT_LEASE_SECONDS, help="lease length in seconds")
+
+    commands.add_parser('status', help="job counts by kind and status")
+    args = parser.parse_args()
+
+    queue = JobQueue()
+    if args.command == 'status':
+        counts = queue.counts()
+        for kind in JOB_KINDS:
+            row = '  '.join(f"{status}={counts.get((kind, status), 0)}" for status in STATUSES)
+            print(f"{kind:<9} {row}")
+        return
+
+    if args.command == 'worker':
+        from job_handlers import JobHandlers
+        handlers = JobHandlers()
+        try:
+            processed = run_worker(queue, handlers.handlers(), args.id, args.kinds, args.lease,
+                                   poll_interval=None if args.once else 30)
+        except SessionExpiredError as e:
+            abort_expired_session(e, f"queue worker {args.id or socket.gethostname()}")
+        finally:
+            handlers.close()
+        print(f"Processed {processed} job(s)")
+        return
+
+    # Same Pacific "yesterday" the crawlers (and JobHandlers.crawl) use
+    yesterday = pacific_stat_date()
+    start = datetime.strptime(args.start, '%Y%m%d').date() if args.start else yesterday
+    end = datetime.strptime(args.end, '%Y%m%d').date() if args.end else start
+    apps = [int(a) for a in (args.apps or '').split(',') if a.strip()]
+    payload = {'partner_id': args.partner_id} if args.partner_id else None
+    if args.kind != 'report' and not apps:
+        parser.error(f"--apps is required for {args.kind} jobs")
+
+    created = existing = 0
+    specs = []
+    if args.kind == 'report':
+        specs = [dict(stat_date=day, page=args.period) for day in _date_range(start, end)]
+    elif args.kind == 'crawl':
+        # Financial pages only expose "yesterday", so crawl jobs are always for one date
+        specs = [dict(app_id=app, page=page, stat_date=start) for app in apps for page in (args.pages or [None])]
+    else:
+        specs = [dict(app_id=app, stat_date=day) for app in apps for day in _date_range(start, end)]
+    for spec in specs:
+        _, is_new = queue.enqueue(args.kind, payload=payload, max_attempts=args.max_attempts, force=args.force, **spec)
+        created += is_new
+        existing += not is_new
+    print(f"Enqueued {created} {args.kind} job(s); {existing} already queued or finished")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
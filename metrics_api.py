@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Local Metrics API
+Small JSON HTTP service over the storage layer so the notebook, export script,
+alerts and reports share one warm cache instead of each opening its own MySQL
+connection and re-running the same queries.
+
+    python metrics_api.py                      # http://127.0.0.1:8765
+    python metrics_api.py --port 9000 --ttl 300
+
+Endpoints (all GET, JSON):
+    /health
+    /api/games                                          games with their latest stat_date
+    /api/series?metric=dau[&app_id=..][&start=YYYY-MM-DD][&end=..][&max_points=500]
+    /api/breakdown?dimension=top10_country_dau&app_id=..[&date=YYYY-MM-DD]
+
+Series longer than max_points are downsampled to weekly, then monthly buckets
+(mean plus min/max). Chart metrics kept in game_metric_series (series_store.py)
+are read from its precomputed buckets, so long ranges never scan daily rows. Responses are cached server-side for --ttl seconds and
+carry an ETag; clients sending If-None-Match get 304 Not Modified.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+from game_registry import all_games
+from series_store import SERIES_METRICS, fetch_series
+from storage import METRICS_COLUMNS, MARKETING_COLUMNS, get_storage, load_db_config, StorageError
+
+GAMES = [{'app_id': g['app_id'], 'name': g['name']} for g in all_games()]
+
+_NUMERIC_TYPES = ('INTEGER', 'BIGINT', 'DOUBLE')
+
+# Whitelisted metric / breakdown columns -> source table (never interpolate user input otherwise)
+SERIES_SOURCES = {name: 'game_daily_metrics' for name, t in METRICS_COLUMNS if t in _NUMERIC_TYPES}
+SERIES_SOURCES.update({
+    name: 'game_daily_marketing' for name, t in MARKETING_COLUMNS
+    if t in _NUMERIC_TYPES and name != 'steam_app_id'
+})
+SERIES_SOURCES.pop('steam_app_id', None)
+BREAKDOWN_SOURCES = {name: 'game_daily_metrics' for name, t in METRICS_COLUMNS if t == 'JSON'}
+BREAKDOWN_SOURCES.update({name: 'game_daily_marketing' for name, t in MARKETING_COLUMNS if t == 'JSON'})
+
+# Bucket sizes tried in order when a series exceeds max_points
+RESOLUTIONS = [('day', 'D'), ('week', 'W-MON'), ('month', 'MS')]
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_POINTS = 500
+
+
+class APIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise APIError(400, f"Invalid {name}: {value} (expected YYYY-MM-DD)")
+
+
+def downsample(frame, max_points):
+    """Pick the finest resolution whose bucket count fits max_points; returns (resolution, frame)"""
+    if frame.empty:
+        return 'day', frame
+    span_days = (frame['stat_date'].max() - frame['stat_date'].min()).days + 1
+    for resolution, rule in RESOLUTIONS:
+        buckets = {'day': span_days, 'week': span_days / 7, 'month': span_days / 30}[resolution]
+        if buckets <= max_points or resolution == 'month':
+            break
+    if resolution == 'day':
+        return resolution, frame
+    # Buckets are dated by their first day (Monday / 1st of month)
+    grouper = pd.Grouper(key='stat_date', freq=rule, label='left', closed='left')
+    grouped = frame.groupby(['steam_app_id', grouper])['value']
+    result = grouped.agg(['mean', 'min', 'max', 'count']).reset_index()
+    result = result[result['count'] > 0].rename(columns={'mean': 'value'})
+    return resolution, result
+
+
+class MetricsAPI:
+    """Request handling and TTL cache, independent of the HTTP server (easy to test)"""
+
+    def __init__(self, storage=None, ttl=DEFAULT_TTL):
+        self.storage = storage or get_storage(load_db_config())
+        self.ttl = ttl
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def handle(self, path, params, if_none_match=None):
+        """Return (status, headers, body bytes) for a GET request"""
+        key = (path, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None or entry['expires'] <= now:
+            try:
+                payload = self.route(path, {k: v[-1] for k, v in params.items()})
+            except APIError as e:
+                return e.status, {'Content-Type': 'application/json'}, json.dumps({'error': str(e)}).encode('utf-8')
+            except StorageError as e:
+                logging.error(f"Storage error serving {path}: {e}")
+                return 503, {'Content-Type': 'application/json'}, json.dumps({'error': 'storage unavailable'}).encode('utf-8')
+            body = json.dumps(payload, default=_json_default, separators=(',', ':')).encode('utf-8')
+            entry = {'body': body, 'etag': '"' + hashlib.sha256(body).hexdigest()[:32] + '"', 'expires': now + self.ttl}
+            with self._lock:
+                self._cache[key] = entry
+                self._evict_expired(now)
+
+        headers = {
+            'Content-Type': 'application/json',
+            'ETag': entry['etag'],
+            'Cache-Control': f"max-age={max(0, int(entry['expires'] - now))}",
+        }
+        if if_none_match and entry['etag'] in [t.strip() for t in if_none_match.split(',')]:
+            return 304, headers, b''
+        return 200, headers, entry['body']
+
+    def _evict_expired(self, now):
+        for key in [k for k, e in self._cache.items() if e['expires'] <= now]:
+            del self._cache[key]
+
+    def route(self, path, params):
+        if path == '/health':
+            return {'status': 'ok', 'backend': self.storage.name}
+        if path == '/api/games':
+            return self.games()
+        if path == '/api/series':
+            return self.series(params)
+        if path == '/api/breakdown':
+            return self.breakdown(params)
+        raise APIError(404, f"Unknown endpoint: {path}")
+
+    def _app_ids(self, params):
+        if not params.get('app_id'):
+            return [game['app_id'] for game in GAMES]
+        try:
+            return [int(a) for a in params['app_id'].split(',')]
+        except ValueError:
+            raise APIError(400, f"Invalid app_id: {params['app_id']}")
+
+    def games(self):
+        with self.storage.session() as session:
+            rows = session.fetch_all(
+                "SELECT steam_app_id, MIN(stat_date) AS first_date, MAX(stat_date) AS latest_date "
+                "FROM game_daily_metrics GROUP BY steam_app_id"
+            )
+        by_id = {int(r['steam_app_id']): r for r in rows}
+        return [
+            dict(game, first_date=by_id.get(game['app_id'], {}).get('first_date'),
+                 latest_date=by_id.get(game['app_id'], {}).get('latest_date'))
+            for game in GAMES
+        ]
+
+    def series(self, params):
+        metric = params.get('metric')
+        if metric not in SERIES_SOURCES:
+            raise APIError(400, f"Unknown metric: {metric}. Expected one of {', '.join(sorted(SERIES_SOURCES))}")
+        app_ids = self._app_ids(params)
+        start = _parse_date(params['start'], 'start') if params.get('start') else date(2000, 1, 1)
+        end = _parse_date(params['end'], 'end') if params.get('end') else date(2100, 1, 1)
+        try:
+            max_points = max(1, int(params.get('max_points', DEFAULT_MAX_POINTS)))
+        except ValueError:
+            raise APIError(400, f"Invalid max_points: {params['max_points']}")
+
+        if metric in SERIES_METRICS:
+            stored = self.stored_series(metric, app_ids, start, end, max_points)
+            if stored is not None:
+                return stored
+
+        placeholders = ', '.join(['%s'] * len(app_ids))
+        with self.storage.session() as session:
+            rows = session.fetch_all(
+                f"SELECT steam_app_id, stat_date, {metric} AS value FROM {SERIES_SOURCES[metric]} "
+                f"WHERE stat_date BETWEEN %s AND %s AND steam_app_id IN ({placeholders}) "
+                f"ORDER BY steam_app_id, stat_date",
+                [start, end] + app_ids
+            )
+        frame = pd.DataFrame(rows, columns=['steam_app_id', 'stat_date', 'value'])
+        frame['steam_app_id'] = frame['steam_app_id'].astype(int)
+        frame['stat_date'] = pd.to_datetime(frame['stat_date'])
+        frame['value'] = pd.to_numeric(frame['value'], errors='coerce')
+        resolution, frame = downsample(frame, max_points)
+
+        series = {}
+        for app_id, group in frame.groupby('steam_app_id'):
+            points = []
+            for row in group.itertuples(index=False):
+                point = {'date': row.stat_date.date().isoformat(), 'value': None if pd.isna(row.value) else float(row.value)}
+                if resolution != 'day':
+                    point['min'] = None if pd.isna(row.min) else float(row.min)
+                    point['max'] = None if pd.isna(row.max) else float(row.max)
+                points.append(point)
+            series[str(app_id)] = points
+        return {'metric': metric, 'resolution': resolution, 'series': series}
+
+    def stored_series(self, metric, app_ids, start, end, max_points):
+        """Series from the precomputed buckets, or None when the store has nothing for the range"""
+        try:
+            with self.storage.session() as session:
+                resolution, rows = fetch_series(session, metric, app_ids, start, end, max_points)
+        except StorageError as e:
+            logging.warning(f"Series store unavailable, reading daily rows (run migrate.py up): {e}")
+            return None
+        if not rows:
+            return None
+
+        series = {}
+        for row in rows:
+            point = {'date': row['bucket_start'], 'value': row['mean_value']}
+            if resolution != 'day':
+                point['min'] = row['min_value']
+                point['max'] = row['max_value']
+            series.setdefault(str(int(row['steam_app_id'])), []).append(point)
+        return {'metric': metric, 'resolution': resolution, 'series': series}
+
+    def breakdown(self, params):
+        dimension = params.get('dimension')
+        if dimension not in BREAKDOWN_SOURCES:
+            raise APIError(400, f"Unknown dimension: {dimension}. Expected one of {', '.join(sorted(BREAKDOWN_SOURCES))}")
+        if not params.get('app_id'):
+            raise APIError(400, "app_id is required")
+        app_id = self._app_ids(params)[0]
+        table = BREAKDOWN_SOURCES[dimension]
+        with self.storage.session() as session:
+            if params.get('date'):
+                row = session.fetch_one(
+                    f"SELECT stat_date, {dimension} AS data FROM {table} WHERE steam_app_id = %s AND stat_date = %s",
+                    (app_id, _parse_date(params['date'], 'date'))
+                )
+            else:
+                row = session.fetch_one(
+                    f"SELECT stat_date, {dimension} AS data FROM {table} WHERE steam_app_id = %s "
+                    f"AND {dimension} IS NOT NULL ORDER BY stat_date DESC LIMIT 1",
+                    (app_id,)
+                )
+        if row is None:
+            raise APIError(404, f"No {dimension} data for app {app_id}")
+        data = row['data']
+        if isinstance(data, (str, bytes)):
+            try:
+                data = json.loads(data)
+            except ValueError:
+                pass
+        return {'app_id': app_id, 'dimension': dimension, 'stat_date': row['stat_date'], 'data': data}
+
+
+def make_handler(api):
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            status, headers, body = api.handle(url.path, parse_qs(url.query), self.headers.get('If-None-Match'))
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.info(f"{self.address_string()} - {format % args}")
+
+    return MetricsRequestHandler
+
+
+def create_server(api, host='127.0.0.1', port=8765):
+    return ThreadingHTTPServer((host, port), make_handler(api))
+
+
+def main():
+    """Main function to run the metrics API"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('metrics_api.log'),
+            logging.StreamHandler()
+        ]
+    )
+    parser = argparse.ArgumentParser(description="Serve cached JSON metrics over HTTP")
+    parser.add_argument('--host', default='127.0.0.1', help="bind address (default: localhost only)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ttl', type=int, default=DEFAULT_TTL, help="server-side cache lifetime in seconds")
+    args = parser.parse_args()
+
+    server = create_server(MetricsAPI(ttl=args.ttl), args.host, args.port)
+    logging.info(f"Metrics API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
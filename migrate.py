@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Schema Migration Runner
+Applies the numbered migrations in migrations/ in order and records each one in
+the schema_version table, so every database (production MySQL, embedded SQLite
+or DuckDB) can be brought to the same schema with one command:
+
+    python migrate.py status         # list applied / pending migrations
+    python migrate.py up             # apply all pending migrations
+    python migrate.py up --to 2      # apply pending migrations up to version 2
+    python migrate.py down --to 1    # roll back everything above version 1
+
+A migration is a file migrations/NNNN_short_name.py with a one-line docstring
+and two functions, up(session) and down(session). Use the helpers below
+(add_column, add_index, create_table and their drop_* counterparts) rather than
+raw DDL: they skip work that is already done, which keeps fresh setups
+(setup_*.sql already has the change) and old databases converging on the same
+schema. On MySQL they run as
+online DDL (ALGORITHM=INPLACE, LOCK=NONE) so the crawler can keep writing while
+a migration runs.
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import re
+import sys
+
+from storage import SCHEMA, get_storage, load_db_config, StorageError
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+_MIGRATION_RE = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+# Generic column types (see storage.SCHEMA) for embedded backends
+_EMBEDDED_TYPES = {
+    'sqlite': {'VARCHAR': 'TEXT', 'DOUBLE': 'REAL', 'JSON': 'TEXT'},
+    'duckdb': {'JSON': 'VARCHAR'},
+}
+
+
+def column_exists(session, table, column):
+    backend = session.backend.name
+    if backend == 'mysql':
+        row = session.fetch_one(
+            "SELECT COUNT(*) AS n FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+            (table, column)
+        )
+        return row['n'] > 0
+    if backend == 'sqlite':
+        return any(r['name'] == column for r in session.fetch_all(f"PRAGMA table_info({table})"))
+    row = session.fetch_one(
+        "SELECT COUNT(*) AS n FROM information_schema.columns WHERE table_name = %s AND column_name = %s",
+        (table, column)
+    )
+    return row['n'] > 0
+
+
+def index_exists(session, table, index):
+    backend = session.backend.name
+    if backend == 'mysql':
+        row = session.fetch_one(
+            "SELECT COUNT(*) AS n FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+            (table, index)
+        )
+        return row['n'] > 0
+    if backend == 'sqlite':
+        return any(r['name'] == index for r in session.fetch_all(f"PRAGMA index_list({table})"))
+    row = session.fetch_one(
+        "SELECT COUNT(*) AS n FROM duckdb_indexes() WHERE table_name = %s AND index_name = %s",
+        (table, index)
+    )
+    return row['n'] > 0
+
+
+def _online_alter(session, table, clause):
+    """ALTER TABLE without blocking writers; fall back to MySQL's default algorithm if refused"""
+    try:
+        session.execute(f"ALTER TABLE {table} {clause}, ALGORITHM=INPLACE, LOCK=NONE")
+    except StorageError as e:
+        logging.warning(f"Online DDL not supported for '{clause}' on {table} ({e}); retrying with default algorithm")
+        session.execute(f"ALTER TABLE {table} {clause}")
+
+
+def add_column(session, table, column, mysql_definition, generic_type):
+    """Add a column if missing; returns True if it was added"""
+    if column_exists(session, table, column):
+        logging.info(f"{table}.{column} already exists - skipping")
+        return False
+    if session.backend.name == 'mysql':
+        _online_alter(session, table, f"ADD COLUMN {column} {mysql_definition}")
+    else:
+        column_type = _EMBEDDED_TYPES.get(session.backend.name, {}).get(generic_type, generic_type)
+        session.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+    logging.info(f"Added column {table}.{column}")
+    return True
+
+
+def drop_column(session, table, column):
+    if not column_exists(session, table, column):
+        return False
+    if session.backend.name == 'mysql':
+        _online_alter(session, table, f"DROP COLUMN {column}")
+    else:
+        session.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+    logging.info(f"Dropped column {table}.{column}")
+    return True
+
+
+def add_index(session, table, index, columns):
+    """Create an index if missing; returns True if it was created"""
+    if index_exists(session, table, index):
+        logging.info(f"Index {index} on {table} already exists - skipping")
+        return False
+    if session.backend.name == 'mysql':
+        _online_alter(session, table, f"ADD INDEX {index} ({', '.join(columns)})")
+    else:
+        session.execute(f"CREATE INDEX {index} ON {table} ({', '.join(columns)})")
+    logging.info(f"Created index {index} on {table}")
+    return True
+
+
+def drop_index(session, table, index):
+    if not index_exists(session, table, index):
+        return False
+    if session.backend.name == 'mysql':
+        _online_alter(session, table, f"DROP INDEX {index}")
+    else:
+        session.execute(f"DROP INDEX {index}")
+    logging.info(f"Dropped index {index} on {table}")
+    return True
+
+
+def create_table(session, table):
+    """Create a table from its storage.SCHEMA definition (no-op if it exists)"""
+    columns, primary_key = SCHEMA[table]
+    session.execute(session.backend.create_table_sql(table, columns, primary_key))
+    logging.info(f"Ensured table {table}")
+
+
+def drop_table(session, table):
+    session.execute(f"DROP TABLE IF EXISTS {table}")
+    logging.info(f"Dropped table {table}")
+
+
+def discover_migrations(directory=None):
+    """Return [(version, name, module)] sorted by version"""
+    directory = directory or MIGRATIONS_DIR
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = _MIGRATION_RE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        spec = importlib.util.spec_from_file_location(f"migration_{match.group(1)}", os.path.join(directory, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        migrations.append((version, match.group(2), module))
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+class MigrationRunner:
+    def __init__(self, storage=None, directory=None):
+        self.storage = storage or get_storage(load_db_config())
+        self.migrations = discover_migrations(directory)
+
+    def ensure_version_table(self, session):
+        session.execute(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER NOT NULL PRIMARY KEY, "
+            "name VARCHAR(255) NOT NULL, "
+            "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        )
+
+    def applied_versions(self):
+        with self.storage.session() as session:
+            self.ensure_version_table(session)
+            return {r['version'] for r in session.fetch_all("SELECT version FROM schema_version")}
+
+    def status(self):
+        """[(version, name, applied)] for every known migration"""
+        applied = self.applied_versions()
+        return [(version, name, version in applied) for version, name, _ in self.migrations]
+
+    def up(self, target=None):
+        """Apply pending migrations (up to target); returns versions applied"""
+        applied = self.applied_versions()
+        done = []
+        for version, name, module in self.migrations:
+            if version in applied or (target is not None and version > target):
+                continue
+            logging.info(f"Applying migration {version:04d}_{name}")
+            # One session per migration: MySQL DDL auto-commits, so record each step as soon as it lands
+            with self.storage.session() as session:
+                module.up(session)
+                session.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)", (version, name))
+            done.append(version)
+        return done
+
+    def down(self, target=0):
+        """Roll back applied migrations above target, newest first; returns versions rolled back"""
+        applied = self.applied_versions()
+        done = []
+        for version, name, module in reversed(self.migrations):
+            if version not in applied or version <= target:
+                continue
+            logging.info(f"Rolling back migration {version:04d}_{name}")
+            with self.storage.session() as session:
+                module.down(session)
+                session.execute("DELETE FROM schema_version WHERE version = %s", (version,))
+            done.append(version)
+        return done
+
+
+def main():
+    """Main function for the migration CLI"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('migrate.log'),
+            logging.StreamHandler()
+        ]
+    )
+    parser = argparse.ArgumentParser(description="Apply or roll back schema migrations")
+    parser.add_argument('command', choices=['status', 'up', 'down'])
+    parser.add_argument('--to', type=int, help="target version (up: highest to apply, down: version to keep)")
+    args = parser.parse_args()
+
+    runner = MigrationRunner()
+    try:
+        if args.command == 'status':
+            for version, name, applied in runner.status():
+                print(f"{version:04d}_{name}: {'applied' if applied else 'pending'}")
+        elif args.command == 'up':
+            applied = runner.up(args.to)
+            print(f"Applied {len(applied)} migration(s): {applied}")
+        else:
+            if args.to is None:
+                parser.error("down requires --to VERSION (use --to 0 to roll back everything)")
+            rolled_back = runner.down(args.to)
+            print(f"Rolled back {len(rolled_back)} migration(s): {rolled_back}")
+    except StorageError as e:
+        logging.error(f"Migration failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""Track row changes on game_daily_metrics (drives the incremental Parquet export)"""
+
+from migrate import add_column, add_index, drop_column, drop_index
+
+
+def up(session):
+    add_column(session, 'game_daily_metrics', 'updated_at',
+               "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP", 'TIMESTAMP')
+    add_index(session, 'game_daily_metrics', 'idx_metrics_updated_at', ['updated_at'])
+    add_index(session, 'game_daily_marketing', 'idx_marketing_updated_at', ['updated_at'])
+
+
+def down(session):
+    drop_index(session, 'game_daily_marketing', 'idx_marketing_updated_at')
+    drop_index(session, 'game_daily_metrics', 'idx_metrics_updated_at')
+    drop_column(session, 'game_daily_metrics', 'updated_at')
@@ -0,0 +1,25 @@
+"""Covering indexes for cross-game stat_date range queries (weekly report, dashboard, marketing)"""
+
+from migrate import add_index, drop_index
+
+# Leading stat_date serves `WHERE stat_date BETWEEN ...` across all games; the
+# trailing columns are the ones the report/dashboard select, so the range scan
+# is answered from the index without touching the clustered rows.
+METRICS_REPORT_COLUMNS = [
+    'stat_date', 'steam_app_id', 'dau', 'new_players', 'unique_player',
+    'daily_total_revenue', 'lifetime_total_revenue', 'median_playtime',
+]
+MARKETING_REPORT_COLUMNS = [
+    'stat_date', 'steam_app_id', 'total_impressions', 'total_visits',
+    'total_click_through_rate', 'owner_visits',
+]
+
+
+def up(session):
+    add_index(session, 'game_daily_metrics', 'idx_metrics_date_cover', METRICS_REPORT_COLUMNS)
+    add_index(session, 'game_daily_marketing', 'idx_marketing_date_cover', MARKETING_REPORT_COLUMNS)
+
+
+def down(session):
+    drop_index(session, 'game_daily_marketing', 'idx_marketing_date_cover')
+    drop_index(session, 'game_daily_metrics', 'idx_metrics_date_cover')
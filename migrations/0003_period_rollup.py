@@ -0,0 +1,13 @@
+"""Week / month / quarter rollup table, backfilled from game_daily_metrics"""
+
+from migrate import create_table, drop_table
+from rollup import rebuild_rollups
+
+
+def up(session):
+    create_table(session, 'game_period_rollup')
+    rebuild_rollups(session)
+
+
+def down(session):
+    drop_table(session, 'game_period_rollup')
@@ -0,0 +1,13 @@
+"""Day / week / month chart series table, backfilled from game_daily_metrics"""
+
+from migrate import create_table, drop_table
+from series_store import rebuild_series
+
+
+def up(session):
+    create_table(session, 'game_metric_series')
+    rebuild_series(session)
+
+
+def down(session):
+    drop_table(session, 'game_metric_series')
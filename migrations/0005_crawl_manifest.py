@@ -0,0 +1,11 @@
+"""Run manifest of stored (game, stat_date, page) crawl units"""
+
+from migrate import create_table, drop_table
+
+
+def up(session):
+    create_table(session, 'crawl_manifest')
+
+
+def down(session):
+    drop_table(session, 'crawl_manifest')
@@ -0,0 +1,13 @@
+"""Game-specific tables for every game in games.json (adds the missing Arena Breakout marketing table)"""
+
+from game_registry import create_game_tables
+from migrate import drop_table
+
+
+def up(session):
+    create_game_tables(session)
+
+
+def down(session):
+    # The other game tables predate the registry (setup_*.sql); only this one was new
+    drop_table(session, 'arena_breakout_infinite_daily_marketing')
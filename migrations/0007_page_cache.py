@@ -0,0 +1,13 @@
+"""Per-page result cache and the source date of every manifest entry"""
+
+from migrate import add_column, create_table, drop_column, drop_table
+
+
+def up(session):
+    create_table(session, 'page_cache')
+    add_column(session, 'crawl_manifest', 'source_date', "DATE NULL", 'DATE')
+
+
+def down(session):
+    drop_column(session, 'crawl_manifest', 'source_date')
+    drop_table(session, 'page_cache')
@@ -0,0 +1,111 @@
+"""
+Per-page refresh policy for the financial crawl.
+
+Some pages change slowly. The Lifetime Play Time page is the main example, so
+it does not need a fetch every day. Each page has a TTL in days, and the last
+parsed result of every page is kept in the page_cache table. While a page's
+cached result is younger than its TTL, the crawler skips the fetch and carries
+the cached fields forward.
+
+The run manifest labels each page of a day with its source date
+(crawl_manifest.source_date). Dashboards can therefore tell a fresh value from
+a carried one.
+
+TTLs (days; 1 = fetch every day, 0 = never cache) come from, in order:
+    games.json          "page_ttl": {"playtime": 14} on a game
+    STEAMWORKS_PAGE_TTL "playtime=7,in_game_purchases=1"
+    DEFAULT_PAGE_TTL    below
+"""
+
+import json
+import logging
+import os
+from datetime import date, datetime
+
+from game_registry import get_game
+from storage import get_storage, StorageError
+
+CACHE_TABLE = 'page_cache'
+
+# The default page carries unique_player (new_players is its daily delta), so it stays daily
+DEFAULT_PAGE_TTL = {
+    'default': 1,
+    'playtime': 7,
+    'wishlist': 1,
+    'players': 1,
+    'regions_revenue': 1,
+    'downloads_region': 1,
+    'in_game_purchases': 1,
+}
+
+
+def _env_ttls():
+    ttls = {}
+    for part in os.environ.get('STEAMWORKS_PAGE_TTL', '').split(','):
+        if '=' not in part:
+            continue
+        page, days = part.split('=', 1)
+        try:
+            ttls[page.strip()] = max(0, int(days))
+        except ValueError:
+            logging.warning(f"Ignoring invalid STEAMWORKS_PAGE_TTL entry: {part}")
+    return ttls
+
+
+def page_ttl(steam_app_id, page):
+    """TTL in days for one game's page"""
+    game = get_game(steam_app_id) or {}
+    game_ttls = game.get('page_ttl') or {}
+    if page in game_ttls:
+        return max(0, int(game_ttls[page]))
+    return _env_ttls().get(page, DEFAULT_PAGE_TTL.get(page, 1))
+
+
+def _to_date(value):
+    return value if isinstance(value, date) and not isinstance(value, datetime) else date.fromisoformat(str(value)[:10])
+
+
+def fresh_entries(session, steam_app_id, stat_date, pages):
+    """{page: (source_date, data)} for pages whose cached result is still within its TTL on stat_date"""
+    rows = session.fetch_all(
+        f"SELECT page, source_date, payload FROM {CACHE_TABLE} WHERE steam_app_id = %s",
+        (int(steam_app_id),)
+    )
+    fresh = {}
+    for row in rows:
+        if row['page'] not in pages:
+            continue
+        source_date = _to_date(row['source_date'])
+        age = (stat_date - source_date).days
+        # TTL 1 means "fetch every day"; a same-day entry is the manifest's job, not the cache's
+        if 0 < age < page_ttl(steam_app_id, row['page']):
+            payload = row['payload']
+            fresh[row['page']] = (source_date, json.loads(payload) if isinstance(payload, (str, bytes)) else payload)
+    return fresh
+
+
+def cached_pages(db_config, steam_app_id, stat_date, pages):
+    """fresh_entries() through a new session; empty (fetch everything) if the cache is unreadable"""
+    if os.environ.get('STEAMWORKS_FORCE_RECRAWL', '').strip() == '1':
+        return {}
+    try:
+        with get_storage(db_config).session() as session:
+            return fresh_entries(session, steam_app_id, stat_date, pages)
+    except StorageError as e:
+        logging.warning(f"Page cache unavailable, fetching every page: {e}")
+        return {}
+
+
+def store_pages(session, steam_app_id, stat_date, page_status):
+    """Cache the parsed result of every page fetched (not carried) for stat_date"""
+    rows = []
+    for page, status in page_status.items():
+        if not isinstance(status, dict) or not status.get('data') or status.get('source_date') != stat_date:
+            continue
+        rows.append({
+            'steam_app_id': int(steam_app_id), 'page': page, 'source_date': stat_date,
+            'payload': json.dumps(status['data'], default=str), 'updated_at': datetime.now(),
+        })
+    if rows:
+        session.upsert_many(CACHE_TABLE, rows, ['steam_app_id', 'page'])
+    return len(rows)
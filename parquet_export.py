@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Incremental Parquet export
+Maintains month-partitioned Parquet datasets of game_daily_metrics,
+game_daily_marketing and their exploded JSON breakdowns so the dashboard and
+reports can scan columnar files instead of querying MySQL row by row.
+
+Only months containing rows whose updated_at moved past the last export are
+rewritten. The watermark is the MAX(updated_at) seen by the database itself,
+so clock differences between this machine and the server do not matter.
+
+Layout (hive partitioning, readable with pyarrow.dataset / pandas.read_parquet):
+    exports/parquet/metrics/stat_month=2025-10/part.parquet
+    exports/parquet/marketing/stat_month=2025-10/part.parquet
+    exports/parquet/breakdowns/stat_month=2025-10/metrics.parquet
+    exports/parquet/breakdowns/stat_month=2025-10/marketing.parquet
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from distribution_store import parse_percent
+from storage import SCHEMA, get_storage, load_db_config, StorageError
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_EXPORT_DIR = os.path.join(BASE_DIR, 'exports', 'parquet')
+STATE_FILE = '_export_state.json'
+
+# dataset name -> source table
+DATASETS = {
+    'metrics': 'game_daily_metrics',
+    'marketing': 'game_daily_marketing',
+}
+
+# Fields used as the row label when exploding a breakdown entry, in priority order
+LABEL_FIELDS = ['country', 'region', 'item', 'page_feature']
+
+# Entry fields that are identifiers rather than metrics
+NON_METRIC_FIELDS = set(LABEL_FIELDS) | {'rank', 'id'}
+
+BREAKDOWN_COLUMNS = [
+    ('steam_app_id', 'INTEGER'),
+    ('stat_date', 'DATE'),
+    ('breakdown', 'VARCHAR'),
+    ('rank', 'INTEGER'),
+    ('label', 'VARCHAR'),
+    ('metric', 'VARCHAR'),
+    ('value', 'DOUBLE'),
+]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("pyarrow is required for Parquet export (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+def arrow_schema(columns):
+    """Build a fixed Arrow schema so every partition unifies cleanly"""
+    pa, _ = _require_pyarrow()
+    types = {
+        'INTEGER': pa.int64(),
+        'BIGINT': pa.int64(),
+        'DOUBLE': pa.float64(),
+        'VARCHAR': pa.string(),
+        'DATE': pa.date32(),
+        'TIMESTAMP': pa.timestamp('s'),
+    }
+    return pa.schema([(name, types[column_type]) for name, column_type in columns])
+
+
+def scalar_columns(table):
+    """Non-JSON columns of a source table (JSON goes to the breakdowns dataset)"""
+    return [(name, t) for name, t in SCHEMA[table][0] if t != 'JSON']
+
+
+def json_columns(table):
+    return [name for name, t in SCHEMA[table][0] if t == 'JSON']
+
+
+def month_key(value):
+    return value.strftime('%Y-%m')
+
+
+def month_bounds(key):
+    """First and last date of a 'YYYY-MM' month"""
+    first = datetime.strptime(key + '-01', '%Y-%m-%d').date()
+    following = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return first, following - timedelta(days=1)
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _to_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def _to_number(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        return float(value)
+    return parse_percent(value)
+
+
+def normalize_row(row, columns):
+    """Coerce driver values (Decimal, str dates) to the export schema types"""
+    out = {}
+    for name, column_type in columns:
+        value = row.get(name)
+        if value is None:
+            out[name] = None
+        elif column_type == 'DATE':
+            out[name] = _to_date(value)
+        elif column_type == 'TIMESTAMP':
+            out[name] = _to_datetime(value)
+        elif column_type == 'DOUBLE':
+            out[name] = _to_number(value)
+        elif column_type in ('INTEGER', 'BIGINT'):
+            out[name] = int(value)
+        else:
+            out[name] = str(value)
+    return out
+
+
+def explode_breakdowns(rows, columns):
+    """Turn JSON breakdown columns into long rows (one per entry and metric)"""
+    exploded = []
+    for row in rows:
+        for column in columns:
+            value = row.get(column)
+            if value in (None, ''):
+                continue
+            if isinstance(value, (str, bytes)):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    continue
+            entries = value if isinstance(value, list) else [value]
+            for position, entry in enumerate(entries):
+                if not isinstance(entry, dict):
+                    continue
+                label = next((entry[f] for f in LABEL_FIELDS if entry.get(f)), column)
+                rank = entry.get('rank') if isinstance(entry.get('rank'), int) else position + 1
+                for metric, metric_value in entry.items():
+                    if metric in NON_METRIC_FIELDS:
+                        continue
+                    number = _to_number(metric_value)
+                    if number is None:
+                        continue
+                    exploded.append({
+                        'steam_app_id': int(row['steam_app_id']),
+                        'stat_date': _to_date(row['stat_date']),
+                        'breakdown': column,
+                        'rank': rank,
+                        'label': str(label),
+                        'metric': metric,
+                        'value': number,
+                    })
+    return exploded
+
+
+def write_partition(path, rows, columns):
+    """Atomically replace one Parquet file"""
+    pa, pq = _require_pyarrow()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pylist(rows, schema=arrow_schema(columns))
+    tmp_path = path + '.tmp'
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+
+class ParquetExporter:
+    def __init__(self, storage=None, export_dir=None):
+        self.storage = storage or get_storage(load_db_config())
+        self.export_dir = export_dir or os.environ.get('STEAMWORKS_PARQUET_DIR') or DEFAULT_EXPORT_DIR
+        self.state_path = os.path.join(self.export_dir, STATE_FILE)
+
+    def load_state(self):
+        """Watermarks per source table ({table: 'YYYY-MM-DD HH:MM:SS'})"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self, state):
+        os.makedirs(self.export_dir, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def changed_months(self, session, table, since):
+        """Months with rows updated at/after the watermark, plus the new watermark"""
+        query = f"SELECT stat_date, updated_at FROM {table}"
+        params = None
+        if since:
+            # >= rather than >: updated_at has second resolution, re-exporting the boundary month is harmless
+            query += " WHERE updated_at >= %s"
+            params = (since,)
+        rows = session.fetch_all(query, params)
+        months = sorted({month_key(_to_date(r['stat_date'])) for r in rows})
+        stamps = [_to_datetime(r['updated_at']) for r in rows if r['updated_at'] is not None]
+        watermark = max(stamps).strftime('%Y-%m-%d %H:%M:%S') if stamps else since
+        return months, watermark
+
+    def export_month(self, session, dataset, table, month):
+        """Rewrite the dataset and breakdown partitions for one month; returns row count"""
+        first, last = month_bounds(month)
+        scalars = scalar_columns(table)
+        blobs = json_columns(table)
+        select = ', '.join([name for name, _ in scalars] + blobs)
+        rows = session.fetch_all(
+            f"SELECT {select} FROM {table} WHERE stat_date BETWEEN %s AND %s ORDER BY stat_date, steam_app_id",
+            (first, last)
+        )
+        partition = os.path.join(self.export_dir, dataset, f"stat_month={month}", 'part.parquet')
+        write_partition(partition, [normalize_row(r, scalars) for r in rows], scalars)
+
+        if blobs:
+            breakdown_path = os.path.join(self.export_dir, 'breakdowns', f"stat_month={month}", f"{dataset}.parquet")
+            write_partition(breakdown_path, explode_breakdowns(rows, blobs), BREAKDOWN_COLUMNS)
+        return len(rows)
+
+    def export(self, full=False):
+        """Export every dataset; returns {dataset: [months rewritten]}"""
+        _require_pyarrow()
+        state = {} if full else self.load_state()
+        exported = {}
+        with self.storage.session() as session:
+            for dataset, table in DATASETS.items():
+                months, watermark = self.changed_months(session, table, state.get(table))
+                for month in months:
+                    count = self.export_month(session, dataset, table, month)
+                    logging.info(f"Exported {dataset} {month}: {count} rows")
+                if watermark:
+                    state[table] = watermark
+                # Persist per table so a failure later does not redo finished work
+                self.save_state(state)
+                exported[dataset] = months
+        return exported
+
+
+def read_dataset(dataset, start_date=None, end_date=None, export_dir=None, columns=None, filters=None):
+    """Load an exported dataset as a pandas DataFrame with partition pruning and predicate pushdown"""
+    import pyarrow.dataset as ds
+    export_dir = export_dir or os.environ.get('STEAMWORKS_PARQUET_DIR') or DEFAULT_EXPORT_DIR
+    data = ds.dataset(os.path.join(export_dir, dataset), format='parquet', partitioning='hive')
+    expression = filters
+    if start_date is not None:
+        start = _to_date(start_date)
+        clause = (ds.field('stat_month') >= month_key(start)) & (ds.field('stat_date') >= start)
+        expression = clause if expression is None else expression & clause
+    if end_date is not None:
+        end = _to_date(end_date)
+        clause = (ds.field('stat_month') <= month_key(end)) & (ds.field('stat_date') <= end)
+        expression = clause if expression is None else expression & clause
+    return data.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def main():
+    """Main function to run an incremental export"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('parquet_export.log'),
+            logging.StreamHandler()
+        ]
+    )
+    parser = argparse.ArgumentParser(description="Incrementally export metrics to Parquet")
+    parser.add_argument('--full', action='store_true', help="ignore watermarks and rewrite every month")
+    parser.add_argument('--output', help="export directory (default exports/parquet)")
+    args = parser.parse_args()
+
+    try:
+        exported = ParquetExporter(export_dir=args.output).export(full=args.full)
+    except (StorageError, RuntimeError) as e:
+        logging.error(f"Parquet export failed: {e}")
+        sys.exit(1)
+
+    for dataset, months in exported.items():
+        print(f"{dataset}: {len(months)} month partition(s) rewritten {', '.join(months)}")
+
+
+if __name__ == "__main__":
+    main()
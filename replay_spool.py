@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Spool Replayer
+Drains payloads that were spooled locally while the database was unavailable.
+Writes are upserts keyed on (steam_app_id, stat_date), so replaying an entry
+more than once is harmless.
+"""
+
+import sys
+import logging
+from crawl_spool import CrawlSpool
+from storage import get_storage, load_db_config
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('replay_spool.log'),
+        logging.StreamHandler()
+    ]
+)
+
+
+def replay_entry(db_config, entry):
+    """Write one spooled entry to the configured storage; returns True on success"""
+    if entry['kind'] == 'metrics':
+        from steamworks_crawler import SteamWorksCrawler
+        crawler = SteamWorksCrawler(db_config, steam_app_id=entry['steam_app_id'], game_name=entry['game_name'])
+        # page_status lets the replay record the run manifest and page cache like the original save
+        return crawler.save_to_database(entry['payload'], stat_date=entry['stat_date'],
+                                        page_status=entry.get('page_status'))
+    if entry['kind'] == 'marketing':
+        from steamworks_marketing_crawler import SteamworksMarketingCrawler
+        crawler = SteamworksMarketingCrawler(db_config, steam_app_id=entry['steam_app_id'], game_name=entry['game_name'])
+        crawler.store_marketing_data(entry['payload'], stat_date=entry['stat_date'])
+        return True
+    raise ValueError(f"Unknown spool entry kind: {entry['kind']}")
+
+
+def drain_spool(db_config, spool=None):
+    """Replay every pending entry in append order; returns (replayed, failed)"""
+    spool = spool or CrawlSpool()
+    entries = spool.pending()
+    if not entries:
+        logging.info("Spool is empty - nothing to replay")
+        return 0, 0
+
+    # Fail fast if the database is still unreachable instead of erroring per entry
+    storage = get_storage(db_config)
+    if not storage.is_available():
+        logging.error(f"{storage.name} still unreachable, leaving {len(entries)} entries spooled")
+        return 0, len(entries)
+
+    replayed = failed = 0
+    for entry in entries:
+        label = f"{entry['kind']} {entry['game_name']} ({entry['steam_app_id']}) {entry['stat_date']}"
+        try:
+            if replay_entry(db_config, entry):
+                spool.mark_drained(entry['id'])
+                replayed += 1
+                logging.info(f"Replayed spool entry {entry['id']}: {label}")
+            else:
+                spool.record_failure(entry['id'], 'save returned False')
+                failed += 1
+                logging.warning(f"Replay failed for spool entry {entry['id']}: {label}")
+        except Exception as e:
+            spool.record_failure(entry['id'], e)
+            failed += 1
+            logging.error(f"Replay failed for spool entry {entry['id']}: {label}: {e}")
+
+    purged = spool.purge_drained()
+    if purged:
+        logging.info(f"Purged {purged} drained spool entries")
+    return replayed, failed
+
+
+def main():
+    """Main function to drain the local spool"""
+    # Database configuration (STEAMWORKS_DB_* env vars override the defaults)
+    db_config = load_db_config()
+
+    replayed, failed = drain_spool(db_config)
+    print(f"\nReplayed: {replayed}, still pending: {failed}")
+    sys.exit(0 if failed == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Period Rollups
+Maintains week / month / quarter aggregates per game in game_period_rollup so
+reports for any of those periods are a primary-key lookup instead of a scan
+over daily rows.
+
+Weeks start on Monday. Whenever a daily row is upserted, refresh_rollups()
+recomputes the three periods containing that day from their daily rows. That
+touches at most ~92 rows and, unlike adding deltas, stays exact when a day is
+re-crawled or corrected.
+
+    python rollup.py                  # rebuild every rollup from game_daily_metrics
+    python rollup.py --since 20251001 # rebuild periods touching days on/after a date
+"""
+
+import argparse
+import logging
+import sys
+from datetime import date, datetime, timedelta
+
+from storage import get_storage, load_db_config, StorageError
+
+PERIOD_TYPES = ['week', 'month', 'quarter']
+
+ROLLUP_KEY = ['steam_app_id', 'period_type', 'period_start']
+
+DAILY_COLUMNS = [
+    'stat_date', 'new_players', 'daily_total_revenue', 'daily_units', 'dau', 'pcu',
+    'unique_player', 'lifetime_total_revenue', 'median_playtime',
+]
+
+
+def period_bounds(period_type, day):
+    """(first, last) date of the week/month/quarter containing day"""
+    if period_type == 'week':
+        first = day - timedelta(days=day.weekday())
+        return first, first + timedelta(days=6)
+    if period_type == 'month':
+        first = day.replace(day=1)
+    elif period_type == 'quarter':
+        first = date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+    else:
+        raise ValueError(f"Unknown period type: {period_type} (expected one of {', '.join(PERIOD_TYPES)})")
+    months = 1 if period_type == 'month' else 3
+    month_index = first.month - 1 + months
+    following = date(first.year + month_index // 12, month_index % 12 + 1, 1)
+    return first, following - timedelta(days=1)
+
+
+def previous_period_start(period_type, period_start):
+    return period_bounds(period_type, period_start - timedelta(days=1))[0]
+
+
+def period_length(period_type, period_start):
+    first, last = period_bounds(period_type, period_start)
+    return (last - first).days + 1
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _total(rows, column):
+    values = [row[column] for row in rows if row[column] is not None]
+    return sum(values) if values else None
+
+
+def aggregate_period(steam_app_id, period_type, period_start, rows):
+    """Build one rollup row from the period's daily rows (sorted by stat_date)"""
+    first, last = period_bounds(period_type, period_start)
+    rows = [r for r in rows if first <= _to_date(r['stat_date']) <= last]
+    if not rows:
+        return None
+    latest = rows[-1]
+    sum_dau = _total(rows, 'dau')
+    sum_revenue = _total(rows, 'daily_total_revenue')
+    latest_revenue = latest['lifetime_total_revenue']
+    pcu_values = [r['pcu'] for r in rows if r['pcu'] is not None]
+    return {
+        'steam_app_id': int(steam_app_id),
+        'period_type': period_type,
+        'period_start': first,
+        'period_end': last,
+        'days': len(rows),
+        'last_date': _to_date(latest['stat_date']),
+        'sum_new_players': _total(rows, 'new_players'),
+        'sum_revenue': float(sum_revenue) if sum_revenue is not None else None,
+        'sum_units': _total(rows, 'daily_units'),
+        'sum_dau': sum_dau,
+        # Same convention as the weekly report: missing DAU counts as 0 over the days present
+        'avg_dau': float(sum_dau or 0) / len(rows),
+        'max_pcu': max(pcu_values) if pcu_values else None,
+        'latest_unique_player': latest['unique_player'],
+        'latest_lifetime_revenue': float(latest_revenue) if latest_revenue is not None else None,
+        'latest_median_playtime': latest['median_playtime'],
+    }
+
+
+def fetch_daily_rows(session, start_date, end_date, steam_app_id=None):
+    """Daily rows needed for rollups, grouped {steam_app_id: [rows sorted by date]}"""
+    query = f"SELECT steam_app_id, {', '.join(DAILY_COLUMNS)} FROM game_daily_metrics WHERE stat_date BETWEEN %s AND %s"
+    params = [start_date, end_date]
+    if steam_app_id is not None:
+        query += " AND steam_app_id = %s"
+        params.append(int(steam_app_id))
+    query += " ORDER BY steam_app_id, stat_date"
+    grouped = {}
+    for row in session.fetch_all(query, params):
+        grouped.setdefault(int(row['steam_app_id']), []).append(row)
+    return grouped
+
+
+def refresh_periods(session, periods, steam_app_id=None):
+    """Recompute the given (period_type, period_start) rollups; returns rows written"""
+    periods = sorted(set(periods))
+    if not periods:
+        return 0
+    bounds = [period_bounds(t, s) for t, s in periods]
+    daily = fetch_daily_rows(session, min(b[0] for b in bounds), max(b[1] for b in bounds), steam_app_id)
+    if steam_app_id is not None:
+        daily.setdefault(int(steam_app_id), [])
+
+    written = 0
+    for app_id, rows in daily.items():
+        for period_type, period_start in periods:
+            rollup = aggregate_period(app_id, period_type, period_start, rows)
+            if rollup is None:
+                session.execute(
+                    "DELETE FROM game_period_rollup WHERE steam_app_id = %s AND period_type = %s AND period_start = %s",
+                    (app_id, period_type, period_start)
+                )
+                continue
+            session.upsert('game_period_rollup', rollup, ROLLUP_KEY)
+            written += 1
+    return written
+
+
+def refresh_rollups(session, steam_app_id, stat_date):
+    """Incremental update after one daily row was upserted"""
+    periods = [(t, period_bounds(t, stat_date)[0]) for t in PERIOD_TYPES]
+    return refresh_periods(session, periods, steam_app_id)
+
+
+def rebuild_rollups(session, since=None):
+    """Recompute every period touching days on/after since (all history if None)"""
+    query = "SELECT MIN(stat_date) AS first_day, MAX(stat_date) AS last_day FROM game_daily_metrics"
+    bounds = session.fetch_one(query)
+    if not bounds or bounds['first_day'] is None:
+        return 0
+    first_day = max(_to_date(bounds['first_day']), since) if since else _to_date(bounds['first_day'])
+    last_day = _to_date(bounds['last_day'])
+
+    written = 0
+    for period_type in PERIOD_TYPES:
+        periods = []
+        start = period_bounds(period_type, first_day)[0]
+        while start <= last_day:
+            periods.append((period_type, start))
+            start = period_bounds(period_type, start)[1] + timedelta(days=1)
+        written += refresh_periods(session, periods)
+    return written
+
+
+def fetch_rollups(session, period_type, period_starts, app_ids):
+    """Rollup rows keyed by (steam_app_id, period_start)"""
+    period_starts = list(period_starts)
+    app_ids = [int(a) for a in app_ids]
+    query = (
+        "SELECT * FROM game_period_rollup WHERE period_type = %s "
+        f"AND period_start IN ({', '.join(['%s'] * len(period_starts))}) "
+        f"AND steam_app_id IN ({', '.join(['%s'] * len(app_ids))})"
+    )
+    rows = session.fetch_all(query, [period_type] + period_starts + app_ids)
+    return {(int(r['steam_app_id']), _to_date(r['period_start'])): r for r in rows}
+
+
+def ensure_rollups(session, period_type, period_starts, app_ids):
+    """Lookup rollups, computing any that were never built (e.g. before backfill)"""
+    found = fetch_rollups(session, period_type, period_starts, app_ids)
+    missing = [s for s in period_starts if any((int(a), s) not in found for a in app_ids)]
+    if missing:
+        refresh_periods(session, [(period_type, s) for s in missing])
+        found = fetch_rollups(session, period_type, period_starts, app_ids)
+    return found
+
+
+def main():
+    """Main function to rebuild rollups"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('rollup.log'),
+            logging.StreamHandler()
+        ]
+    )
+    parser = argparse.ArgumentParser(description="Rebuild week/month/quarter rollups")
+    parser.add_argument('--since', help="only periods touching days on/after YYYYMMDD")
+    args = parser.parse_args()
+
+    since = datetime.strptime(args.since, '%Y%m%d').date() if args.since else None
+    try:
+        with get_storage(load_db_config()).session() as session:
+            written = rebuild_rollups(session, since)
+    except StorageError as e:
+        logging.error(f"Rollup rebuild failed: {e}")
+        sys.exit(1)
+    print(f"Rebuilt {written} rollup rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,25 +4,31 @@ Configuration script for running historical marketing data crawler
 """
 
 from datetime import date, timedelta
+from game_registry import all_games, get_game, marketing_table
+from storage import load_db_config
 from steamworks_historical_marketing_crawler import SteamworksHistoricalMarketingCrawler
 
 def main():
     """Main function to configure and run historical crawler"""
     
-    # Database configuration
-    db_config = {
-        'host': 'localhost',
-        'port': 3306,
-        'database': 'steamworks_crawler',
-        'user': 'root',
-        'password': 'Zh1149191843!'
-    }
-    
-    # Fixed configuration for Delta Force only
-    steam_app_id = 2507950
-    game_name = 'Delta Force'
+    # Database configuration (STEAMWORKS_DB_* env vars override the defaults)
+    db_config = load_db_config()
     
     print("=== SteamWorks Historical Marketing Data Crawler ===")
+    
+    # Pick a registered game (games.json); Enter keeps the first one
+    games = all_games()
+    for game in games:
+        print(f"  {game['app_id']}: {game['name']}")
+    while True:
+        app_id_str = input(f"Enter Steam app ID [{games[0]['app_id']}]: ").strip()
+        game = games[0] if not app_id_str else (get_game(int(app_id_str)) if app_id_str.isdigit() else None)
+        if game:
+            break
+        print("Error: Not a registered app ID")
+    steam_app_id = game['app_id']
+    game_name = game['name']
+    
     print(f"Game: {game_name} (ID: {steam_app_id})")
     print("This will fetch 30 days of marketing data starting from your input date.")
     print()
@@ -55,7 +61,7 @@ def main():
     print(f"Start date: {start_date}")
     print(f"End date: {end_date}")
     print(f"Total days: 30")
-    print(f"Data will be stored in: steamworks_crawler.delta_force_daily_marketing table only")
+    print(f"Data will be stored in: steamworks_crawler.{marketing_table(steam_app_id)} table only")
     
     # Confirm before proceeding
     confirm = input("\nDo you want to proceed? (y/N): ")
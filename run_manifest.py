@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Run Manifest
+Records which (game, page, stat_date) units of the daily financial crawl are
+already stored. A rerun (for example after a partial failure) fetches only the
+missing or failed pages, and merges them into the existing daily row.
+
+Manifest rows are written in the same transaction as the data they describe,
+so a page is only marked succeeded once its fields are committed. Fields that
+a partial rerun did not fetch are taken from the stored row. That way:
+
+- The existing row is never nulled.
+- Derived columns (new_players, d1_retention, daily_arpu, ...) are recomputed
+  from complete inputs.
+
+STEAMWORKS_FORCE_RECRAWL=1 ignores the manifest and crawls every page.
+
+    python run_manifest.py                      # manifest for yesterday
+    python run_manifest.py --date 20251014
+    python run_manifest.py --date 20251014 --reset [--apps 2507950]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+try:
+    from zoneinfo import ZoneInfo  # Python 3.9+
+except ImportError:
+    ZoneInfo = None
+
+from storage import get_storage, load_db_config, StorageError
+
+MANIFEST_TABLE = 'crawl_manifest'
+
+MANIFEST_KEY = ['steam_app_id', 'stat_date', 'page']
+
+# Extracted fields stored as-is in game_daily_metrics (derived columns are recomputed on save)
+STORED_FIELDS = [
+    'unique_player', 'lifetime_total_units', 'wishlist', 'dau', 'pcu', 'players_20h_plus',
+    'total_downloads', 'daily_total_revenue', 'daily_units', 'lifetime_total_revenue', 'top3_iap_share',
+    'wishlist_additions', 'wishlist_deletions', 'wishlist_conversions', 'lifetime_wishlist_conversion_rate',
+    'median_playtime', 'avg_playtime',
+]
+STORED_JSON_FIELDS = [
+    'top10_country_dau', 'top10_country_downloads', 'top10_region_downloads',
+    'top10_country_revenue', 'top10_region_revenue', 'iap_breakdown_json',
+]
+
+
+def pacific_stat_date():
+    """Pacific Time date of the day that just ended (the stat_date the crawlers store)"""
+    if ZoneInfo:
+        return (datetime.now(ZoneInfo('America/Los_Angeles')) - timedelta(days=1)).date()
+    return (datetime.now() - timedelta(days=1)).date()
+
+
+def force_recrawl():
+    return os.environ.get('STEAMWORKS_FORCE_RECRAWL', '').strip() == '1'
+
+
+def completed_pages(session, steam_app_id, stat_date):
+    """Pages already stored for (game, stat_date)"""
+    rows = session.fetch_all(
+        f"SELECT page FROM {MANIFEST_TABLE} WHERE steam_app_id = %s AND stat_date = %s AND status = 'succeeded'",
+        (int(steam_app_id), stat_date)
+    )
+    return {row['page'] for row in rows}
+
+
+def pending_pages(db_config, steam_app_id, stat_date, pages):
+    """Subset of pages still to crawl; every page if the manifest is unreadable or a recrawl is forced"""
+    if force_recrawl():
+        return list(pages)
+    try:
+        with get_storage(db_config).session() as session:
+            done = completed_pages(session, steam_app_id, stat_date)
+    except StorageError as e:
+        logging.warning(f"Run manifest unavailable, crawling every page: {e}")
+        return list(pages)
+    return [page for page in pages if page not in done]
+
+
+def record_pages(session, steam_app_id, stat_date, page_status):
+    """Upsert page_status ({page: fields extracted} or {page: {'fields', 'source_date'}}); 0 fields marks
+    the page failed unless it already succeeded. source_date labels values carried forward from an earlier day."""
+    done = completed_pages(session, steam_app_id, stat_date)
+    now = datetime.now()
+    rows = []
+    for page, status in page_status.items():
+        fields = status.get('fields') if isinstance(status, dict) else status
+        source_date = (status.get('source_date') if isinstance(status, dict) else None) or stat_date
+        if not fields and page in done:
+            # A forced recrawl that failed leaves the earlier fields (and their status) in place
+            continue
+        rows.append({
+            'steam_app_id': int(steam_app_id), 'stat_date': stat_date, 'page': page,
+            'status': 'succeeded' if fields else 'failed', 'fields': int(fields or 0),
+            'source_date': source_date if fields else None, 'updated_at': now,
+        })
+    if rows:
+        session.upsert_many(MANIFEST_TABLE, rows, MANIFEST_KEY)
+    return len(rows)
+
+
+def merge_stored_fields(session, steam_app_id, stat_date, data):
+    """Copy of data with fields it lacks filled in from the stored game_daily_metrics row"""
+    row = session.fetch_one(
+        "SELECT * FROM game_daily_metrics WHERE steam_app_id = %s AND stat_date = %s",
+        (int(steam_app_id), stat_date)
+    )
+    merged = dict(data)
+    if row is None:
+        return merged
+    for field in STORED_FIELDS + STORED_JSON_FIELDS:
+        if merged.get(field) is not None or row.get(field) is None:
+            continue
+        value = row[field]
+        if field in STORED_JSON_FIELDS and isinstance(value, (str, bytes)):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                continue
+        merged[field] = value
+    return merged
+
+
+def reset(session, stat_date, app_ids=None):
+    """Forget manifest rows for a date so the next run crawls those games in full"""
+    sql = f"DELETE FROM {MANIFEST_TABLE} WHERE stat_date = %s"
+    params = [stat_date]
+    if app_ids:
+        sql += f" AND steam_app_id IN ({', '.join(['%s'] * len(app_ids))})"
+        params.extend(int(a) for a in app_ids)
+    session.execute(sql, params)
+
+
+def main():
+    """Main function to show or reset the run manifest"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('run_manifest.log'),
+            logging.StreamHandler()
+        ]
+    )
+    parser = argparse.ArgumentParser(description="Show or reset the crawl run manifest")
+    parser.add_argument('--date', help="stat date YYYYMMDD (default: yesterday, Pacific Time)")
+    parser.add_argument('--apps', help="comma-separated app ids (default: all)")
+    parser.add_argument('--reset', action='store_true', help="forget the date so the next run crawls it in full")
+    args = parser.parse_args()
+
+    stat_date = datetime.strptime(args.date, '%Y%m%d').date() if args.date else pacific_stat_date()
+    app_ids = [int(a) for a in (args.apps or '').split(',') if a.strip()]
+    try:
+        with get_storage(load_db_config()).session() as session:
+            if args.reset:
+                reset(session, stat_date, app_ids)
+                print(f"Manifest reset for {stat_date}")
+                return
+            rows = session.fetch_all(
+                f"SELECT steam_app_id, page, status, fields, source_date, updated_at FROM {MANIFEST_TABLE} "
+                f"WHERE stat_date = %s ORDER BY steam_app_id, page", (stat_date,)
+            )
+    except StorageError as e:
+        logging.error(f"Run manifest unavailable: {e}")
+        sys.exit(1)
+
+    rows = [r for r in rows if not app_ids or r['steam_app_id'] in app_ids]
+    print(f"{'App':<10} {'Page':<20} {'Status':<10} {'Fields':>6}  {'Source':<11} Updated")
+    for r in rows:
+        # A source date before the stat date means the values were carried forward from the page cache
+        source = str(r['source_date'] or '-')
+        print(f"{r['steam_app_id']:<10} {r['page']:<20} {r['status']:<10} {r['fields']:>6}  {source:<11} {r['updated_at']}")
+    if not rows:
+        print(f"No manifest entries for {stat_date}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Multi-Resolution Series Store
+Keeps day / week / month buckets (mean, min, max, sum) per game and chart
+metric in game_metric_series, so long-range charts read a few hundred
+pre-aggregated points instead of every daily row since launch.
+
+Weeks start on Monday, months on the 1st. Whenever a daily row is upserted,
+refresh_series() recomputes the day, week and month buckets containing that
+day from their daily rows, so re-crawls and corrections stay exact.
+fetch_series() picks the finest resolution that fits a point budget.
+
+    python series_store.py                  # rebuild every bucket from game_daily_metrics
+    python series_store.py --since 20251001 # rebuild buckets touching days on/after a date
+"""
+
+import argparse
+import logging
+import sys
+from datetime import datetime
+
+from rollup import period_bounds, _to_date
+from storage import get_storage, load_db_config, StorageError
+
+# Metrics plotted by the long-range charts (DAU / new users and revenue)
+SERIES_METRICS = ['dau', 'new_players', 'daily_total_revenue', 'daily_units', 'pcu']
+
+# Finest first; fetch_series() walks this list until the bucket count fits
+RESOLUTIONS = ['day', 'week', 'month']
+
+SERIES_KEY = ['steam_app_id', 'metric', 'resolution', 'bucket_start']
+
+DEFAULT_MAX_POINTS = 500
+
+
+def bucket_bounds(resolution, day):
+    """(first, last) date of the day/week/month bucket containing day"""
+    if resolution == 'day':
+        return day, day
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution} (expected one of {', '.join(RESOLUTIONS)})")
+    return period_bounds(resolution, day)
+
+
+def choose_resolution(first_day, last_day, max_points=DEFAULT_MAX_POINTS):
+    """Finest resolution whose bucket count over [first_day, last_day] fits max_points"""
+    span_days = (last_day - first_day).days + 1
+    for resolution in RESOLUTIONS:
+        buckets = {'day': span_days, 'week': span_days / 7, 'month': span_days / 30}[resolution]
+        if buckets <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def aggregate_bucket(steam_app_id, metric, resolution, bucket_start, values):
+    """One series row from the bucket's non-null daily values (None when there are none)"""
+    values = [float(v) for v in values if v is not None]
+    if not values:
+        return None
+    first, last = bucket_bounds(resolution, bucket_start)
+    total = sum(values)
+    return {
+        'steam_app_id': int(steam_app_id),
+        'metric': metric,
+        'resolution': resolution,
+        'bucket_start': first,
+        'bucket_end': last,
+        'points': len(values),
+        'mean_value': total / len(values),
+        'min_value': min(values),
+        'max_value': max(values),
+        'sum_value': total,
+    }
+
+
+def _collect(rows, buckets=None):
+    """Group daily rows into {(app_id, metric, resolution, bucket_start): [values]}"""
+    grouped = {}
+    for row in rows:
+        day = _to_date(row['stat_date'])
+        for resolution in RESOLUTIONS:
+            start = bucket_bounds(resolution, day)[0]
+            if buckets is not None and (resolution, start) not in buckets:
+                continue
+            for metric in SERIES_METRICS:
+                grouped.setdefault((int(row['steam_app_id']), metric, resolution, start), []).append(row[metric])
+    return grouped
+
+
+def _write(session, grouped):
+    """Upsert the aggregated buckets, deleting those left without values; returns rows written"""
+    rows = []
+    for (app_id, metric, resolution, start), values in grouped.items():
+        row = aggregate_bucket(app_id, metric, resolution, start, values)
+        if row is None:
+            session.execute(
+                "DELETE FROM game_metric_series WHERE steam_app_id = %s AND metric = %s "
+                "AND resolution = %s AND bucket_start = %s",
+                (app_id, metric, resolution, start)
+            )
+            continue
+        rows.append(row)
+    session.upsert_many('game_metric_series', rows, SERIES_KEY)
+    return len(rows)
+
+
+def refresh_series(session, steam_app_id, stat_date):
+    """Incremental update after one daily row was upserted; returns buckets written"""
+    buckets = {(r, bucket_bounds(r, stat_date)[0]) for r in RESOLUTIONS}
+    first = min(bucket_bounds(r, s)[0] for r, s in buckets)
+    last = max(bucket_bounds(r, s)[1] for r, s in buckets)
+    rows = session.fetch_all(
+        f"SELECT steam_app_id, stat_date, {', '.join(SERIES_METRICS)} FROM game_daily_metrics "
+        f"WHERE steam_app_id = %s AND stat_date BETWEEN %s AND %s",
+        (int(steam_app_id), first, last)
+    )
+    grouped = _collect(rows, buckets)
+    # Buckets whose daily rows all disappeared are deleted rather than left stale
+    for resolution, start in buckets:
+        for metric in SERIES_METRICS:
+            grouped.setdefault((int(steam_app_id), metric, resolution, start), [])
+    return _write(session, grouped)
+
+
+def rebuild_series(session, since=None):
+    """Recompute every bucket touching days on/after since (all history if None)"""
+    query = f"SELECT steam_app_id, stat_date, {', '.join(SERIES_METRICS)} FROM game_daily_metrics"
+    params = []
+    cutoff = None
+    if since:
+        # Read from the earliest bucket containing since so its week/month is complete,
+        # and rewrite only the buckets that contain days on/after since
+        cutoff = min(bucket_bounds(r, since)[0] for r in RESOLUTIONS)
+        query += " WHERE stat_date >= %s"
+        params.append(cutoff)
+        session.execute("DELETE FROM game_metric_series WHERE bucket_end >= %s", (since,))
+    else:
+        session.execute("DELETE FROM game_metric_series")
+    grouped = _collect(session.iter_rows(query, params))
+    if cutoff:
+        grouped = {k: v for k, v in grouped.items() if bucket_bounds(k[2], k[3])[1] >= since}
+    return _write(session, grouped)
+
+
+def fetch_series(session, metric, app_ids, start_date, end_date, max_points=DEFAULT_MAX_POINTS, resolution=None):
+    """(resolution, rows) for the buckets overlapping [start_date, end_date]; rows sorted per game.
+
+    Unless a resolution is forced, the span used to pick it is clipped to the
+    days actually stored, so an open-ended range over a short history still
+    comes back daily.
+    """
+    if metric not in SERIES_METRICS:
+        raise ValueError(f"Unknown series metric: {metric} (expected one of {', '.join(SERIES_METRICS)})")
+    app_ids = [int(a) for a in app_ids]
+    placeholders = ', '.join(['%s'] * len(app_ids))
+    if resolution is None:
+        bounds = session.fetch_one(
+            f"SELECT MIN(bucket_start) AS first_day, MAX(bucket_start) AS last_day FROM game_metric_series "
+            f"WHERE resolution = 'day' AND metric = %s AND bucket_start BETWEEN %s AND %s "
+            f"AND steam_app_id IN ({placeholders})",
+            [metric, start_date, end_date] + app_ids
+        )
+        if not bounds or bounds['first_day'] is None:
+            return 'day', []
+        resolution = choose_resolution(_to_date(bounds['first_day']), _to_date(bounds['last_day']), max_points)
+    elif resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution} (expected one of {', '.join(RESOLUTIONS)})")
+    rows = session.fetch_all(
+        f"SELECT steam_app_id, bucket_start, bucket_end, points, mean_value, min_value, max_value, sum_value "
+        f"FROM game_metric_series WHERE resolution = %s AND metric = %s "
+        f"AND bucket_end >= %s AND bucket_start <= %s AND steam_app_id IN ({placeholders}) "
+        f"ORDER BY steam_app_id, bucket_start",
+        [resolution, metric, start_date, end_date] + app_ids
+    )
+    return resolution, rows
+
+
+def main():
+    """Main function to rebuild the series store"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('series_store.log'),
+            logging.StreamHandler()
+        ]
+    )
+    parser = argparse.ArgumentParser(description="Rebuild day/week/month chart series")
+    parser.add_argument('--since', help="only buckets touching days on/after YYYYMMDD")
+    args = parser.parse_args()
+
+    since = datetime.strptime(args.since, '%Y%m%d').date() if args.since else None
+    try:
+        with get_storage(load_db_config()).session() as session:
+            written = rebuild_series(session, since)
+    except StorageError as e:
+        logging.error(f"Series rebuild failed: {e}")
+        sys.exit(1)
+    print(f"Rebuilt {written} series buckets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Session health and unattended-mode helpers shared by the crawlers.
+
+Interactive runs still pause for a manual login. Unattended runs (Task
+Scheduler, queue workers) must never wait on input(). For those runs:
+
+- A login page raises SessionExpiredError.
+- Entry points stop the whole batch.
+- The operator is notified.
+- The process exits with EXIT_SESSION_EXPIRED, so the scheduler log shows
+  "log in again" rather than a generic failure.
+
+Unattended mode is on when STEAMWORKS_UNATTENDED=1, or when stdin is not a
+terminal and STEAMWORKS_UNATTENDED is not 0.
+
+Notifications use the same SMTP_* / ALERT_RECIPIENT settings as the dashboard
+alerts. They can also be posted as JSON to STEAMWORKS_NOTIFY_WEBHOOK.
+"""
+
+import json
+import logging
+import os
+import smtplib
+import socket
+import sys
+import urllib.request
+from datetime import datetime
+from email.mime.text import MIMEText
+
+# Distinct from 1 (some jobs failed) so schedulers can tell "log in again" apart
+EXIT_SESSION_EXPIRED = 3
+
+HEALTH_URL = "https://partner.steampowered.com/"
+
+_LOGIN_MARKERS = ('login', 'signin')
+
+
+class SessionExpiredError(Exception):
+    """The SteamWorks session needs a manual login and nobody is there to do it"""
+
+
+def is_unattended():
+    flag = os.environ.get('STEAMWORKS_UNATTENDED', '').strip()
+    if flag in ('0', '1'):
+        return flag == '1'
+    try:
+        return not sys.stdin or not sys.stdin.isatty()
+    except (AttributeError, ValueError):
+        return True
+
+
+def is_login_url(url):
+    url = (url or '').lower()
+    return any(marker in url for marker in _LOGIN_MARKERS)
+
+
+def check_session(driver):
+    """True if the page the driver is on is not a login page (no extra request)"""
+    try:
+        return not is_login_url(driver.current_url)
+    except Exception as e:
+        logging.warning(f"Session health check failed: {e}")
+        return False
+
+
+def wait_for_manual_login(page_name, instructions=None):
+    """Interactive runs: prompt and wait. Unattended runs: raise SessionExpiredError"""
+    if is_unattended():
+        raise SessionExpiredError(f"Login required for {page_name} (unattended run; log in once interactively)")
+    print(f"\nManual login required for {page_name}")
+    print("Please:")
+    for i, line in enumerate(instructions or ["Log in to SteamWorks in the browser window",
+                                              "Navigate to the correct page if needed",
+                                              "Press Enter here when ready..."], 1):
+        print(f"{i}. {line}")
+    input("Press Enter after logging in...")
+
+
+def notify_operator(subject, message):
+    """Best-effort email and/or webhook; returns True if any channel delivered"""
+    body = f"{message}\n\nHost: {socket.gethostname()}\nTime: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    delivered = False
+
+    webhook = os.environ.get('STEAMWORKS_NOTIFY_WEBHOOK')
+    if webhook:
+        try:
+            request = urllib.request.Request(
+                webhook, data=json.dumps({'subject': subject, 'text': body}).encode('utf-8'),
+                headers={'Content-Type': 'application/json'}
+            )
+            urllib.request.urlopen(request, timeout=15).close()
+            delivered = True
+        except Exception as e:
+            logging.error(f"Failed to post operator notification: {e}")
+
+    server = os.environ.get('SMTP_SERVER')
+    recipient = os.environ.get('ALERT_RECIPIENT')
+    if server and recipient:
+        email = MIMEText(body, 'plain', 'utf-8')
+        email['Subject'] = subject
+        email['From'] = os.environ.get('SMTP_USER', recipient)
+        email['To'] = recipient
+        try:
+            with smtplib.SMTP_SSL(server, int(os.environ.get('SMTP_PORT', 465)), timeout=30) as smtp:
+                if os.environ.get('SMTP_USER'):
+                    smtp.login(os.environ['SMTP_USER'], os.environ.get('SMTP_PASSWORD', ''))
+                smtp.sendmail(email['From'], [recipient], email.as_string())
+            delivered = True
+        except Exception as e:
+            logging.error(f"Failed to email operator notification: {e}")
+
+    if not delivered:
+        logging.warning(f"No operator notification channel delivered: {subject}")
+    return delivered
+
+
+def abort_expired_session(error, run_name):
+    """Log, notify and exit with EXIT_SESSION_EXPIRED (used by the entry points)"""
+    logging.error(f"{run_name} aborted: {error}")
+    notify_operator(
+        f"SteamWorks {run_name}: session expired",
+        f"{error}\n\nThe remaining games were skipped. Run the crawler once interactively to log in; "
+        f"the next scheduled run will pick up from there."
+    )
+    print(f"\nSession expired - {run_name} aborted (exit code {EXIT_SESSION_EXPIRED}). See logs.")
+    sys.exit(EXIT_SESSION_EXPIRED)
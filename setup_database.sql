@@ -16,7 +16,8 @@
 --   top3_iap_share, wishlist, lifetime_wishlist_conversion_rate, 
 --   wishlist_additions, wishlist_deletions, wishlist_conversions, 
 --   top10_country_dau, top10_country_downloads, top10_region_downloads, 
---   top10_country_revenue, top10_region_revenue, iap_breakdown_json
+--   top10_country_revenue, top10_region_revenue, iap_breakdown_json,
+--   updated_at (main table only; drives the incremental Parquet export)
 --
 -- TIMEZONE/DATE RULE:
 --   stat_date is computed as the Pacific Time date of the day that just ended when the crawler runs.
@@ -70,8 +71,10 @@ CREATE TABLE IF NOT EXISTS game_daily_metrics (
     top10_country_revenue JSON NULL,
     top10_region_revenue JSON NULL,
     iap_breakdown_json JSON NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
 
-    PRIMARY KEY (steam_app_id, stat_date)
+    PRIMARY KEY (steam_app_id, stat_date),
+    INDEX idx_metrics_updated_at (updated_at)
 );
 
 -- Create Delta Force specific table (steam_app_id: 2507950)
@@ -179,6 +182,28 @@ CREATE TABLE IF NOT EXISTS road_to_empress_daily_metrics (
     iap_breakdown_json JSON NULL
 );
 
+-- Global dictionary of country/region names shared by all distributions
+CREATE TABLE IF NOT EXISTS geo_dictionary (
+    geo_id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    geo_name VARCHAR(255) NOT NULL,
+    UNIQUE KEY uniq_geo_name (geo_name)
+);
+
+-- Full (untruncated) country/region distributions in columnar form.
+-- One row per game, date and distribution; arrays are position-aligned:
+--   distribution: country_dau | country_revenue | region_revenue | country_downloads | region_downloads
+--   geo_ids:      [12, 3, 45, ...]                       (ids into geo_dictionary, ranked order)
+--   metrics:      {"players":[...], "share":[...]}        (one array per metric; share values are numeric %)
+CREATE TABLE IF NOT EXISTS game_daily_distribution (
+    steam_app_id INT UNSIGNED NOT NULL,
+    stat_date DATE NOT NULL,
+    distribution VARCHAR(32) NOT NULL,
+    geo_ids JSON NOT NULL,
+    metrics JSON NOT NULL,
+
+    PRIMARY KEY (steam_app_id, stat_date, distribution)
+);
+
 -- Verify table creation
 SELECT 'Database setup completed successfully!' as status;
 SELECT TABLE_NAME, TABLE_ROWS 
@@ -30,7 +30,8 @@ CREATE TABLE IF NOT EXISTS game_daily_marketing (
     UNIQUE KEY unique_daily_marketing (steam_app_id, stat_date),
     INDEX idx_steam_app_id (steam_app_id),
     INDEX idx_stat_date (stat_date),
-    INDEX idx_game_name (game_name)
+    INDEX idx_game_name (game_name),
+    INDEX idx_marketing_updated_at (updated_at)
 );
 
 -- Individual game tables (same structure, different names)
@@ -3,8 +3,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-import mysql.connector
-from mysql.connector import Error
 import json
 import time
 import logging
@@ -12,11 +10,19 @@ from datetime import date, datetime, timedelta
 import os
 import shutil
 from urllib.parse import quote
-try:
-    from zoneinfo import ZoneInfo  # Python 3.9+
-except ImportError:
-    ZoneInfo = None
 import tempfile
+from distribution_store import save_distributions
+from game_registry import enabled_pages, load_games, metrics_table, partner_for
+from lean_browser import apply_lean_options, enable_resource_blocking, lean_mode, page_metrics
+from page_cache import cached_pages, store_pages
+from browser_daemon import attach_to_daemon, daemon_address
+from crawl_pipeline import PageSnapshot
+from crawl_spool import CrawlSpool
+from rollup import refresh_rollups
+from run_manifest import merge_stored_fields, pacific_stat_date, pending_pages, record_pages
+from series_store import refresh_series
+from session_health import SessionExpiredError, abort_expired_session, check_session, wait_for_manual_login
+from storage import get_storage, load_db_config, StorageError
 
 # Setup logging
 logging.basicConfig(
@@ -28,20 +34,79 @@ logging.basicConfig(
     ]
 )
 
+# Crawl order: (page key, label, extractor method)
+PAGE_EXTRACTORS = [
+    ('default', 'Default Game Page', 'extract_default_page_data'),
+    ('playtime', 'Lifetime Play Time Page', 'extract_playtime_page_data'),
+    ('wishlist', 'Wishlist Page', 'extract_wishlist_page_data'),
+    ('players', 'Players Page', 'extract_players_page_data'),
+    ('regions_revenue', 'Regions Revenue Page', 'extract_regions_revenue_page_data'),
+    ('downloads_region', 'Downloads Region Page', 'extract_downloads_region_page_data'),
+    ('in_game_purchases', 'In-Game Purchases Page', 'extract_in_game_purchases_page_data'),
+]
+
+PAGE_URLS = {
+    'default': "https://partner.steampowered.com/app/details/{app_id}/",
+    'playtime': "https://partner.steampowered.com//app/playtime/{app_id}/",
+    'wishlist': "https://partner.steampowered.com/app/wishlist/{app_id}/",
+    'players': "https://partner.steampowered.com/app/players/{app_id}/",
+    'regions_revenue': "https://partner.steampowered.com/region/?&appID={app_id}",
+    'downloads_region': "https://partner.steampowered.com/nav_regions.php?downloads=1&appID={app_id}",
+    'in_game_purchases': "https://partner.steampowered.com/app/microtxn/{app_id}/",
+}
+
+# Pages whose extractor switches the time filter to 'yesterday' before reading
+YESTERDAY_FILTER_PAGES = ['wishlist', 'players', 'regions_revenue', 'downloads_region', 'in_game_purchases']
+
 class SteamWorksCrawler:
     def __init__(self, db_config, steam_app_id, game_name):
         self.db_config = db_config
+        self.storage = get_storage(db_config)
         self.steam_app_id = steam_app_id
         self.game_name = game_name
         self.driver = None
         self.wait = None
+        # False when the driver was attached from a shared session (see crawl_orchestrator.py)
+        self.owns_driver = True
+        # True when attached to a warm browser_daemon.py tab (no warmup needed)
+        self.warm = False
+        # Optional shared TokenBucket throttling page loads across parallel workers (see crawl_pool.py)
+        self.rate_limiter = None
+        # {page key: {'fields', 'source_date', 'data'}} from the last extract_all_pages(), recorded in the
+        # run manifest; source_date is earlier than the stat date for pages carried forward from the page cache
+        self.page_status = {}
+        
+    def attach_driver(self, driver, wait=None):
+        """Reuse an already warmed-up, partner-switched driver instead of launching Chrome"""
+        self.driver = driver
+        self.wait = wait or WebDriverWait(driver, 30)
+        self.owns_driver = False
+    
+    def setup_driver(self, profile_dir=None, debugging_port=None):
+        """Setup Chrome with persistent user data directory to retain login.
         
-    def setup_driver(self):
-        """Setup Chrome with persistent user data directory to retain login"""
+        profile_dir forces a specific (e.g. throwaway) profile; parallel workers use
+        one each because Chrome locks a profile to a single running instance.
+        debugging_port opens the DevTools port other processes attach to (see browser_daemon.py).
+        """
+        # STEAMWORKS_BROWSER_DAEMON: lease a warm, logged-in tab from browser_daemon.py instead of launching Chrome
+        if profile_dir is None and debugging_port is None and daemon_address():
+            # The lease names this game's partner; run_crawler switches the tab to it
+            target_id, target_name = partner_for(self.steam_app_id)
+            driver = attach_to_daemon(partner=target_id or target_name)
+            if driver is not None:
+                self.driver = driver
+                self.wait = WebDriverWait(self.driver, 30)
+                self.warm = True
+                if lean_mode():
+                    # Request blocking is per tab, so a leased tab needs it too
+                    enable_resource_blocking(self.driver)
+                return
+
         chrome_options = Options()
         
         # Decide which Chrome profile to use
-        use_system_profile = os.environ.get('STEAMWORKS_USE_SYSTEM_CHROME_PROFILE', '0') == '1'
+        use_system_profile = profile_dir is None and os.environ.get('STEAMWORKS_USE_SYSTEM_CHROME_PROFILE', '0') == '1'
         if use_system_profile:
             # Use existing system Chrome profile (already Steam Guard trusted)
             system_user_data = os.environ.get('STEAMWORKS_CHROME_USER_DATA_DIR')
@@ -91,7 +156,7 @@ class SteamWorksCrawler:
                 chrome_options.add_argument(f"--profile-directory={profile_name}")
         else:
             # Use a persistent local profile inside repo to retain login across runs
-            profile_dir = os.path.join(os.path.dirname(__file__), 'chrome_profile')
+            profile_dir = profile_dir or os.path.join(os.path.dirname(__file__), 'chrome_profile')
             try:
                 os.makedirs(profile_dir, exist_ok=True)
             except Exception:
@@ -116,17 +181,29 @@ class SteamWorksCrawler:
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--window-size=1920,1080")
+        if debugging_port:
+            chrome_options.add_argument(f"--remote-debugging-port={debugging_port}")
         
         # Don't run headless so user can manually log in
         # chrome_options.add_argument("--headless")
         
+        # STEAMWORKS_LEAN_BROWSER=1: eager loads without images, fonts, chart scripts or analytics
+        lean = lean_mode()
+        if lean:
+            apply_lean_options(chrome_options)
+        
         self.driver = webdriver.Chrome(options=chrome_options)
         self.wait = WebDriverWait(self.driver, 30)
+        if lean:
+            enable_resource_blocking(self.driver)
         
         logging.info("Chrome WebDriver setup completed")
     
     def warmup_session(self):
         """Open SteamWorks home once to ensure domain session is active"""
+        if self.warm:
+            # Daemon tabs are opened on the partner site and kept logged in
+            return
         try:
             base_url = "https://partner.steampowered.com/"
             self.driver.get(base_url)
@@ -136,11 +213,24 @@ class SteamWorksCrawler:
         except Exception as e:
             logging.warning(f"Warmup failed: {str(e)}")
 
-    def ensure_partner_context(self):
-        """Switch to the correct partner account if needed (View as: select)."""
+    def check_session_health(self):
+        """Fail fast before any game if warmup landed on a login page (unattended runs raise SessionExpiredError)"""
+        if check_session(self.driver):
+            return True
+        logging.warning("SteamWorks session is not logged in")
+        wait_for_manual_login("SteamWorks")
+        self.warmup_session()
+        if not check_session(self.driver):
+            raise SessionExpiredError("Still on login page after manual login")
+        return True
+
+    def ensure_partner_context(self, partner_id=None):
+        """Switch to the correct partner account if needed (View as: select).
+        partner_id overrides the game's registry partner for this call only (queue jobs naming an account)."""
         try:
-            target_name = os.environ.get('STEAMWORKS_TARGET_PARTNER_NAME', 'Proxima Beta Europe B.V.')
-            target_id = os.environ.get('STEAMWORKS_TARGET_PARTNER_ID', '').strip()
+            target_id, target_name = partner_for(self.steam_app_id)
+            if partner_id:
+                target_id, target_name = partner_id, None
 
             # Find the partner switcher select
             selects = self.driver.find_elements(By.XPATH, "//select[@name='runasPubid']")
@@ -209,6 +299,8 @@ class SteamWorksCrawler:
         """Navigate to a specific page and handle login if needed"""
         try:
             logging.info(f"Navigating to {page_name}: {url}")
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
             self.driver.get(url)
             
             # Wait for page to load
@@ -217,6 +309,9 @@ class SteamWorksCrawler:
             # Check current URL to see if we were redirected to login
             current_url = self.driver.current_url
             logging.info(f"Current URL: {current_url}")
+            metrics = page_metrics(self.driver)
+            if metrics:
+                logging.info(f"Page load: {metrics}")
             
             # If page shows access denied, retry via login goto route once
             try:
@@ -236,12 +331,7 @@ class SteamWorksCrawler:
             # Check if we're on a login page
             if "login" in current_url.lower() or "signin" in current_url.lower():
                 logging.warning(f"Detected login page for {page_name}. Manual login required.")
-                print(f"\nManual login required for {page_name}")
-                print("Please:")
-                print("1. Log in to SteamWorks in the browser window")
-                print("2. Navigate to the correct page if needed")
-                print("3. Press Enter here when ready...")
-                input("Press Enter after logging in...")
+                wait_for_manual_login(page_name)
                 
                 # Try to navigate again after manual login
                 logging.info(f"Navigating to {page_name} again after manual login...")
@@ -262,6 +352,8 @@ class SteamWorksCrawler:
                 logging.info(f"Successfully accessed {page_name}")
                 return True
                 
+        except SessionExpiredError:
+            raise
         except Exception as e:
             logging.error(f"Error navigating to {page_name}: {str(e)}")
             return False
@@ -302,7 +394,7 @@ class SteamWorksCrawler:
     
     def extract_default_page_data(self):
         """Extract data from the Default Game Page"""
-        url = f"https://partner.steampowered.com/app/details/{self.steam_app_id}/"
+        url = PAGE_URLS['default'].format(app_id=self.steam_app_id)
         
         if not self.navigate_to_page(url, "Default Game Page"):
             return None
@@ -451,7 +543,7 @@ class SteamWorksCrawler:
     
     def extract_playtime_page_data(self):
         """Extract data from the Lifetime Play Time Page"""
-        url = f"https://partner.steampowered.com//app/playtime/{self.steam_app_id}/"
+        url = PAGE_URLS['playtime'].format(app_id=self.steam_app_id)
         
         if not self.navigate_to_page(url, "Lifetime Play Time Page"):
             return None
@@ -562,7 +654,7 @@ class SteamWorksCrawler:
     
     def extract_wishlist_page_data(self):
         """Extract data from the Wishlist Page"""
-        url = f"https://partner.steampowered.com/app/wishlist/{self.steam_app_id}/"
+        url = PAGE_URLS['wishlist'].format(app_id=self.steam_app_id)
         
         if not self.navigate_to_page(url, "Wishlist Page"):
             return None
@@ -647,7 +739,7 @@ class SteamWorksCrawler:
     
     def extract_players_page_data(self):
         """Extract data from the Players Page"""
-        url = f"https://partner.steampowered.com/app/players/{self.steam_app_id}/"
+        url = PAGE_URLS['players'].format(app_id=self.steam_app_id)
         
         if not self.navigate_to_page(url, "Players Page"):
             return None
@@ -716,7 +808,7 @@ class SteamWorksCrawler:
             except Exception as e:
                 logging.warning(f"Failed to get Peak Concurrent Users: {str(e)}")
             
-            # Extract Top 10 countries by % of players
+            # Extract countries by % of players (full list + top 10)
             try:
                 # Locate the table with headers Country and % of Players
                 country_table_xpath = (
@@ -755,10 +847,8 @@ class SteamWorksCrawler:
                             'country': country_text,
                             'share': share_pct_str,
                         }
-                        # Rank based on order encountered
+                        # Rank based on order encountered; keep the full distribution
                         top_list.append(entry)
-                        if len(top_list) >= 10:
-                            break
                 if top_list:
                     # Add rank and players if dau known
                     dau_val = data.get('dau')
@@ -770,8 +860,9 @@ class SteamWorksCrawler:
                                 item['players'] = int(round(float(dau_val) * pct_num))
                             except Exception:
                                 pass
-                    data['top10_country_dau'] = top_list
-                    logging.info(f"Extracted top10_country_dau with {len(top_list)} entries")
+                    data['top10_country_dau'] = top_list[:10]
+                    data['full_country_dau'] = top_list
+                    logging.info(f"Extracted top10_country_dau with {len(data['top10_country_dau'])} entries ({len(top_list)} countries total)")
                 else:
                     logging.warning("Failed to extract top10_country_dau")
             except Exception as e:
@@ -785,7 +876,7 @@ class SteamWorksCrawler:
     
     def extract_regions_revenue_page_data(self):
         """Extract data from the Regions and Countries Revenue Page"""
-        url = f"https://partner.steampowered.com/region/?&appID={self.steam_app_id}"
+        url = PAGE_URLS['regions_revenue'].format(app_id=self.steam_app_id)
         
         if not self.navigate_to_page(url, "Regions and Countries Revenue Page"):
             return None
@@ -839,7 +930,7 @@ class SteamWorksCrawler:
             except Exception as e:
                 logging.warning(f"Error extracting World daily units: {str(e)}")
             
-            # Extract Top 10 Regions by revenue (parse rows under 'Regions' header)
+            # Extract Regions by revenue (parse rows under 'Regions' header)
             try:
                 header_regions = self.driver.find_elements(By.XPATH, "//th[normalize-space()='Regions']/ancestor::tr")
                 if header_regions:
@@ -896,20 +987,21 @@ class SteamWorksCrawler:
                             region_to_metrics[name] = entry
                         except Exception:
                             continue
-                    # Build list limited to top 10 by revenue
+                    # Rank every region by revenue; the JSON column keeps the top 10
                     region_entries = [
                         {**v} for v in region_to_metrics.values()
                         if isinstance(v.get('revenue'), (int, float))
                     ]
                     region_entries.sort(key=lambda x: x.get('revenue', 0), reverse=True)
-                    top_regions = region_entries[:10]
-                    for i, item in enumerate(top_regions, start=1):
+                    for i, item in enumerate(region_entries, start=1):
                         item['rank'] = i
                         if 'units' not in item or not isinstance(item.get('units'), int):
                             item['units'] = 0
+                    top_regions = region_entries[:10]
                     if top_regions:
                         data['top10_region_revenue'] = top_regions
-                        logging.info(f"Extracted top10_region_revenue with {len(top_regions)} entries")
+                        data['full_region_revenue'] = region_entries
+                        logging.info(f"Extracted top10_region_revenue with {len(top_regions)} entries ({len(region_entries)} regions total)")
                     else:
                         logging.warning("Failed to extract top10_region_revenue")
                 else:
@@ -917,7 +1009,7 @@ class SteamWorksCrawler:
             except Exception as e:
                 logging.warning(f"Error extracting top10_region_revenue: {str(e)}")
 
-            # Extract Top 10 Countries by revenue (parse rows under 'Countries' header)
+            # Extract Countries by revenue (parse rows under 'Countries' header)
             try:
                 header_countries = self.driver.find_elements(By.XPATH, "//th[normalize-space()='Countries']/ancestor::tr")
                 if header_countries:
@@ -970,20 +1062,21 @@ class SteamWorksCrawler:
                             country_to_metrics[name] = entry
                         except Exception:
                             continue
-                    # Build list limited to top 10 by revenue
+                    # Rank every country by revenue; the JSON column keeps the top 10
                     country_entries = [
                         {**v} for v in country_to_metrics.values()
                         if isinstance(v.get('revenue'), (int, float))
                     ]
                     country_entries.sort(key=lambda x: x.get('revenue', 0), reverse=True)
-                    top_countries = country_entries[:10]
-                    for i, item in enumerate(top_countries, start=1):
+                    for i, item in enumerate(country_entries, start=1):
                         item['rank'] = i
                         if 'units' not in item or not isinstance(item.get('units'), int):
                             item['units'] = 0
+                    top_countries = country_entries[:10]
                     if top_countries:
                         data['top10_country_revenue'] = top_countries
-                        logging.info(f"Extracted top10_country_revenue with {len(top_countries)} entries")
+                        data['full_country_revenue'] = country_entries
+                        logging.info(f"Extracted top10_country_revenue with {len(top_countries)} entries ({len(country_entries)} countries total)")
                     else:
                         logging.warning("Failed to extract top10_country_revenue")
                 else:
@@ -999,7 +1092,7 @@ class SteamWorksCrawler:
     
     def extract_downloads_region_page_data(self):
         """Extract data from the Downloads by Region Page"""
-        url = f"https://partner.steampowered.com/nav_regions.php?downloads=1&appID={self.steam_app_id}"
+        url = PAGE_URLS['downloads_region'].format(app_id=self.steam_app_id)
         
         if not self.navigate_to_page(url, "Downloads by Region Page"):
             return None
@@ -1052,7 +1145,7 @@ class SteamWorksCrawler:
             except Exception as e:
                 logging.warning(f"Failed to get Total Downloads: {str(e)}")
             
-            # Extract top 10 regions by downloads
+            # Extract regions by downloads (full list + top 10)
             try:
                 region_table_xpath = "//table[.//td/b[normalize-space()='Region'] and .//td/b[normalize-space()='Total downloads'] and .//td/b[translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')='share']]"
                 tables = self.driver.find_elements(By.XPATH, region_table_xpath)
@@ -1086,19 +1179,18 @@ class SteamWorksCrawler:
                             'downloads': int(downloads_val),
                             'share': f"{float(share_val):.2f}%",
                         })
-                        if len(region_list) >= 10:
-                            break
                     if region_list:
                         for idx, item in enumerate(region_list, start=1):
                             item['rank'] = idx
-                        data['top10_region_downloads'] = region_list
-                        logging.info(f"Extracted top10_region_downloads with {len(region_list)} entries")
+                        data['top10_region_downloads'] = region_list[:10]
+                        data['full_region_downloads'] = region_list
+                        logging.info(f"Extracted top10_region_downloads with {len(data['top10_region_downloads'])} entries ({len(region_list)} regions total)")
                     else:
                         logging.warning("Failed to extract top10_region_downloads")
             except Exception as e:
                 logging.warning(f"Error extracting top10_region_downloads: {str(e)}")
 
-            # Extract top 10 countries by downloads
+            # Extract countries by downloads (full list + top 10)
             try:
                 country_table_xpath = "//table[.//td/b[normalize-space()='Country'] and .//td/b[normalize-space()='Total downloads'] and .//td/b[translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')='share']]"
                 tables = self.driver.find_elements(By.XPATH, country_table_xpath)
@@ -1132,13 +1224,12 @@ class SteamWorksCrawler:
                             'downloads': int(downloads_val),
                             'share': f"{float(share_val):.2f}%",
                         })
-                        if len(country_list) >= 10:
-                            break
                     if country_list:
                         for idx, item in enumerate(country_list, start=1):
                             item['rank'] = idx
-                        data['top10_country_downloads'] = country_list
-                        logging.info(f"Extracted top10_country_downloads with {len(country_list)} entries")
+                        data['top10_country_downloads'] = country_list[:10]
+                        data['full_country_downloads'] = country_list
+                        logging.info(f"Extracted top10_country_downloads with {len(data['top10_country_downloads'])} entries ({len(country_list)} countries total)")
                     else:
                         logging.warning("Failed to extract top10_country_downloads")
             except Exception as e:
@@ -1152,7 +1243,7 @@ class SteamWorksCrawler:
     
     def extract_in_game_purchases_page_data(self):
         """Extract data from the In-Game Purchases Page"""
-        url = f"https://partner.steampowered.com/app/microtxn/{self.steam_app_id}/"
+        url = PAGE_URLS['in_game_purchases'].format(app_id=self.steam_app_id)
         
         if not self.navigate_to_page(url, "In-Game Purchases Page"):
             return None
@@ -1256,259 +1347,304 @@ class SteamWorksCrawler:
     
     def get_game_table_name(self):
         """Get the game-specific table name based on steam_app_id"""
-        game_tables = {
-            2507950: 'delta_force_daily_metrics',
-            3104410: 'terminull_brigade_daily_metrics', 
-            3478050: 'road_to_empress_daily_metrics',
-            2073620: 'arena_breakout_infinite_daily_metrics'
-        }
-        return game_tables.get(self.steam_app_id)
+        return metrics_table(self.steam_app_id)
 
-    def save_to_database(self, data):
+    def get_stat_date(self):
+        """Pacific Time date of the day that just ended"""
+        return pacific_stat_date()
+
+    def spool_payload(self, data, stat_date, page_status=None):
+        """Append the extracted payload (and its page_status) to the local spool before touching MySQL"""
+        try:
+            spool_id = CrawlSpool().append('metrics', self.steam_app_id, self.game_name, stat_date, data, page_status)
+            logging.info(f"Payload spooled locally (spool id={spool_id})")
+            return spool_id
+        except Exception as e:
+            logging.error(f"Failed to spool payload locally: {e}")
+            return None
+
+    def save_to_database(self, data, stat_date=None, page_status=None):
         """Save extracted data to both main table and game-specific table"""
         if not data:
             logging.warning("No data to save")
             return False
         
-        connection = None
-        cursor = None
+        # stat_date defaults to Pacific yesterday; replays pass the spooled date
+        if stat_date is None:
+            stat_date = self.get_stat_date()
         
         try:
-            logging.info("Connecting to database...")
-            connection = mysql.connector.connect(**self.db_config)
-            cursor = connection.cursor()
-            
-            # Compute stat_date as Pacific yesterday
-            if ZoneInfo:
-                now_pt = datetime.now(ZoneInfo('America/Los_Angeles'))
-                stat_date = (now_pt - timedelta(days=1)).date()
-            else:
-                # Fallback to system local time minus one day
-                stat_date = (datetime.now() - timedelta(days=1)).date()
-            
-            # Compute new_players from yesterday's unique_player (same steam_app_id)
-            new_players_val = None
-            unique_today = data.get('unique_player')
-            if unique_today is not None:
-                try:
-                    prev_date = stat_date - timedelta(days=1)
-                    cursor_prev = connection.cursor()
-                    cursor_prev.execute(
-                        "SELECT unique_player FROM game_daily_metrics WHERE steam_app_id=%s AND stat_date=%s",
-                        (int(self.steam_app_id), prev_date)
-                    )
-                    prev_row = cursor_prev.fetchone()
-                    if prev_row is None:
-                        # First run: use today's unique_player
-                        new_players_val = int(unique_today)
-                    else:
-                        prev_unique = prev_row[0]
-                        if prev_unique is None:
-                            new_players_val = None
-                        else:
-                            delta = int(unique_today) - int(prev_unique)
-                            new_players_val = delta if delta >= 0 else 0
-                except Exception:
-                    new_players_val = None
-                finally:
-                    try:
-                        cursor_prev.close()
-                    except Exception:
-                        pass
+            logging.info(f"Connecting to database ({self.storage.name})...")
+            with self.storage.session() as session:
+                data = self._save_with_session(session, data, stat_date, page_status)
+        except StorageError as e:
+            logging.error(f"Database error: {e}")
+            return False
+        except Exception as e:
+            logging.error(f"Error saving to database: {e}")
+            return False
+        
+        self._save_derived(data, stat_date, page_status)
+        logging.info(f"Data saved to database successfully (main table + game-specific table)")
+        return True
 
-            # Compute d1_retention = (today_dau - today_new_players) / yesterday_dau
-            d1_retention_val = None
+    def _save_derived(self, data, stat_date, page_status=None):
+        """Best-effort writes derived from the committed day, each in its own transaction.
+        A failed statement aborts the whole transaction on some backends (DuckDB), so these
+        never share one with the daily rows or with each other."""
+        writes = [
+            ("save full distributions", save_distributions, (self.steam_app_id, stat_date, data)),
+            ("refresh period rollups (run rollup.py to rebuild)", refresh_rollups, (self.steam_app_id, stat_date)),
+            ("refresh chart series (run series_store.py to rebuild)", refresh_series, (self.steam_app_id, stat_date)),
+        ]
+        if page_status:
+            writes.append(("update page cache (slow pages are fetched again next run)",
+                           store_pages, (self.steam_app_id, stat_date, page_status)))
+        for description, write, args in writes:
             try:
-                today_dau = data.get('dau')
-                if today_dau is not None and new_players_val is not None:
-                    prev_date = stat_date - timedelta(days=1)
-                    cursor_prev_dau = connection.cursor()
-                    cursor_prev_dau.execute(
-                        "SELECT dau FROM game_daily_metrics WHERE steam_app_id=%s AND stat_date=%s",
-                        (int(self.steam_app_id), prev_date)
-                    )
-                    row = cursor_prev_dau.fetchone()
-                    if row is not None and row[0] is not None and float(row[0]) > 0:
-                        numerator = float(today_dau) - float(new_players_val)
-                        denom = float(row[0])
-                        if denom > 0:
-                            d1_retention_val = round(numerator / denom, 2)
-            except Exception:
-                d1_retention_val = None
-            finally:
-                try:
-                    cursor_prev_dau.close()
-                except Exception:
-                    pass
+                with self.storage.session() as session:
+                    write(session, *args)
+            except Exception as e:
+                logging.warning(f"Failed to {description}: {e}")
 
-            # Compute new_vs_returning_ratio = new_players / (dau - new_players)
-            new_vs_returning_ratio_val = None
+    def _save_with_session(self, session, data, stat_date, page_status=None):
+        """Write one day's data through an open storage session; returns the merged data"""
+        # Partial reruns only fetch some pages: fill the rest from the stored row so derived fields stay complete
+        data = merge_stored_fields(session, self.steam_app_id, stat_date, data)
+        
+        # Compute new_players from yesterday's unique_player (same steam_app_id)
+        new_players_val = None
+        unique_today = data.get('unique_player')
+        if unique_today is not None:
             try:
-                today_dau = data.get('dau')
-                if today_dau is not None and new_players_val is not None:
-                    returning = float(today_dau) - float(new_players_val)
-                    if returning > 0:
-                        new_vs_returning_ratio_val = round(float(new_players_val) / returning, 2)
+                prev_date = stat_date - timedelta(days=1)
+                prev_row = session.fetch_one(
+                    "SELECT unique_player FROM game_daily_metrics WHERE steam_app_id=%s AND stat_date=%s",
+                    (int(self.steam_app_id), prev_date)
+                )
+                if prev_row is None:
+                    # First run: use today's unique_player
+                    new_players_val = int(unique_today)
+                else:
+                    prev_unique = prev_row['unique_player']
+                    if prev_unique is None:
+                        new_players_val = None
+                    else:
+                        delta = int(unique_today) - int(prev_unique)
+                        new_players_val = delta if delta >= 0 else 0
             except Exception:
-                new_vs_returning_ratio_val = None
+                new_players_val = None
 
-            # Compute pcu_over_dau (rounded to 2 decimals) if possible
+        # Compute d1_retention = (today_dau - today_new_players) / yesterday_dau
+        d1_retention_val = None
+        try:
+            today_dau = data.get('dau')
+            if today_dau is not None and new_players_val is not None:
+                prev_date = stat_date - timedelta(days=1)
+                row = session.fetch_one(
+                    "SELECT dau FROM game_daily_metrics WHERE steam_app_id=%s AND stat_date=%s",
+                    (int(self.steam_app_id), prev_date)
+                )
+                if row is not None and row['dau'] is not None and float(row['dau']) > 0:
+                    numerator = float(today_dau) - float(new_players_val)
+                    denom = float(row['dau'])
+                    if denom > 0:
+                        d1_retention_val = round(numerator / denom, 2)
+        except Exception:
+            d1_retention_val = None
+
+        # Compute new_vs_returning_ratio = new_players / (dau - new_players)
+        new_vs_returning_ratio_val = None
+        try:
+            today_dau = data.get('dau')
+            if today_dau is not None and new_players_val is not None:
+                returning = float(today_dau) - float(new_players_val)
+                if returning > 0:
+                    new_vs_returning_ratio_val = round(float(new_players_val) / returning, 2)
+        except Exception:
+            new_vs_returning_ratio_val = None
+
+        # Compute pcu_over_dau (rounded to 2 decimals) if possible
+        pcu_over_dau_val = None
+        try:
+            dau_val = data.get('dau')
+            pcu_val = data.get('pcu')
+            if dau_val is not None and pcu_val is not None and float(dau_val) > 0:
+                pcu_over_dau_val = round(float(pcu_val) / float(dau_val), 2)
+        except Exception:
             pcu_over_dau_val = None
-            try:
-                dau_val = data.get('dau')
-                pcu_val = data.get('pcu')
-                if dau_val is not None and pcu_val is not None and float(dau_val) > 0:
-                    pcu_over_dau_val = round(float(pcu_val) / float(dau_val), 2)
-            except Exception:
-                pcu_over_dau_val = None
 
-            # Compute daily_arpu = daily_total_revenue / dau (round to 6 decimals per schema)
+        # Compute daily_arpu = daily_total_revenue / dau (round to 6 decimals per schema)
+        daily_arpu_val = None
+        try:
+            revenue_val = data.get('daily_total_revenue')
+            dau_val = data.get('dau')
+            if revenue_val is not None and dau_val is not None and float(dau_val) > 0:
+                daily_arpu_val = round(float(revenue_val) / float(dau_val), 2)
+        except Exception:
             daily_arpu_val = None
-            try:
-                revenue_val = data.get('daily_total_revenue')
-                dau_val = data.get('dau')
-                if revenue_val is not None and dau_val is not None and float(dau_val) > 0:
-                    daily_arpu_val = round(float(revenue_val) / float(dau_val), 2)
-            except Exception:
-                daily_arpu_val = None
 
-            # Enrich top10_country_revenue with ARPU using players from top10_country_dau
-            try:
-                country_dau_list = data.get('top10_country_dau')
-                country_rev_list = data.get('top10_country_revenue')
-                if isinstance(country_dau_list, list) and isinstance(country_rev_list, list):
-                    # Build map: country -> players
-                    players_map = {}
-                    for entry in country_dau_list:
-                        try:
-                            country_name = (entry.get('country') or '').strip()
-                            players_val = entry.get('players')
-                            if country_name and isinstance(players_val, (int, float)) and float(players_val) > 0:
-                                players_map[country_name] = int(round(float(players_val)))
-                        except Exception:
-                            continue
-                    # Inject ARPU in revenue list when possible
-                    enriched = []
-                    for entry in country_rev_list:
-                        try:
-                            country_name = (entry.get('country') or '').strip()
-                            revenue_val = entry.get('revenue')
-                            if country_name and isinstance(revenue_val, (int, float)) and country_name in players_map:
-                                players_val = players_map[country_name]
-                                if players_val > 0:
-                                    arpu_val = round(float(revenue_val) / float(players_val), 2)
-                                    new_entry = dict(entry)
-                                    new_entry['arpu'] = arpu_val
-                                    enriched.append(new_entry)
-                                    continue
-                            # If cannot compute, keep entry as-is
-                            enriched.append(entry)
-                        except Exception:
-                            enriched.append(entry)
-                    data['top10_country_revenue'] = enriched
-            except Exception:
-                pass
+        # Enrich top10_country_revenue with ARPU using players from top10_country_dau
+        try:
+            country_dau_list = data.get('top10_country_dau')
+            country_rev_list = data.get('top10_country_revenue')
+            if isinstance(country_dau_list, list) and isinstance(country_rev_list, list):
+                # Build map: country -> players
+                players_map = {}
+                for entry in country_dau_list:
+                    try:
+                        country_name = (entry.get('country') or '').strip()
+                        players_val = entry.get('players')
+                        if country_name and isinstance(players_val, (int, float)) and float(players_val) > 0:
+                            players_map[country_name] = int(round(float(players_val)))
+                    except Exception:
+                        continue
+                # Inject ARPU in revenue list when possible
+                enriched = []
+                for entry in country_rev_list:
+                    try:
+                        country_name = (entry.get('country') or '').strip()
+                        revenue_val = entry.get('revenue')
+                        if country_name and isinstance(revenue_val, (int, float)) and country_name in players_map:
+                            players_val = players_map[country_name]
+                            if players_val > 0:
+                                arpu_val = round(float(revenue_val) / float(players_val), 2)
+                                new_entry = dict(entry)
+                                new_entry['arpu'] = arpu_val
+                                enriched.append(new_entry)
+                                continue
+                        # If cannot compute, keep entry as-is
+                        enriched.append(entry)
+                    except Exception:
+                        enriched.append(entry)
+                data['top10_country_revenue'] = enriched
+        except Exception:
+            pass
 
-            # Prepare insert payload (same for both tables)
-            insert_payload = {
-                'steam_app_id': int(self.steam_app_id),
-                'game_name': self.game_name,
-                'stat_date': stat_date,
-                # Direct fields if present
-                'unique_player': data.get('unique_player'),
-                'lifetime_total_units': data.get('lifetime_total_units'),
-                'new_players': new_players_val,
-                'wishlist': data.get('wishlist'),
-                'dau': data.get('dau'),
-                'pcu': data.get('pcu'),
-                'pcu_over_dau': pcu_over_dau_val,
-                'players_20h_plus': data.get('players_20h_plus'),
-                'd1_retention': d1_retention_val,
-                'new_vs_returning_ratio': new_vs_returning_ratio_val,
-                'total_downloads': data.get('total_downloads'),
-                'daily_total_revenue': data.get('daily_total_revenue'),
-                'daily_units': data.get('daily_units'),
-                'daily_arpu': daily_arpu_val,
-                'lifetime_total_revenue': data.get('lifetime_total_revenue'),
-                'top10_country_dau': json.dumps(data.get('top10_country_dau')) if data.get('top10_country_dau') is not None else None,
-                'top10_country_downloads': json.dumps(data.get('top10_country_downloads')) if data.get('top10_country_downloads') is not None else None,
-                'top10_region_downloads': json.dumps(data.get('top10_region_downloads')) if data.get('top10_region_downloads') is not None else None,
-                'top10_country_revenue': json.dumps(data.get('top10_country_revenue')) if data.get('top10_country_revenue') is not None else None,
-                'top10_region_revenue': json.dumps(data.get('top10_region_revenue')) if data.get('top10_region_revenue') is not None else None,
-                'iap_breakdown_json': json.dumps(data.get('iap_breakdown_json')) if data.get('iap_breakdown_json') is not None else None,
-                'top3_iap_share': data.get('top3_iap_share'),
-                'wishlist_additions': data.get('wishlist_additions'),
-                'wishlist_deletions': data.get('wishlist_deletions'),
-                'wishlist_conversions': data.get('wishlist_conversions'),
-                'lifetime_wishlist_conversion_rate': data.get('lifetime_wishlist_conversion_rate'),
-                'median_playtime': data.get('median_playtime'),
-                'avg_playtime': data.get('avg_playtime'),
-            }
-            # Remove None values to build dynamic column list
-            insert_payload = {k: v for k, v in insert_payload.items() if v is not None}
-            
-            columns = list(insert_payload.keys())
-            placeholders = ', '.join([f'%({col})s' for col in columns])
-            column_names = ', '.join(columns)
-            
-            # Save to main table (game_daily_metrics)
-            main_insert_query = f"""
-            INSERT INTO game_daily_metrics ({column_names})
-            VALUES ({placeholders})
-            ON DUPLICATE KEY UPDATE
-            """
-            
-            # Add update clauses for main table (exclude PK columns)
-            main_update_clauses = []
-            for col in columns:
-                if col not in ('stat_date', 'steam_app_id'):  # Do not update PK
-                    main_update_clauses.append(f"{col} = VALUES({col})")
-            
-            main_insert_query += ', '.join(main_update_clauses)
-            
-            logging.info("Saving data to main table (game_daily_metrics)...")
-            cursor.execute(main_insert_query, insert_payload)
-            
-            # Save to game-specific table
-            game_table_name = self.get_game_table_name()
-            if game_table_name:
-                # For game-specific table, exclude steam_app_id from PK update clauses
-                game_insert_query = f"""
-                INSERT INTO {game_table_name} ({column_names})
-                VALUES ({placeholders})
-                ON DUPLICATE KEY UPDATE
-                """
-                
-                # Add update clauses for game table (exclude stat_date from updates)
-                game_update_clauses = []
-                for col in columns:
-                    if col != 'stat_date':  # Only exclude stat_date (PK for game tables)
-                        game_update_clauses.append(f"{col} = VALUES({col})")
-                
-                game_insert_query += ', '.join(game_update_clauses)
-                
-                logging.info(f"Saving data to game-specific table ({game_table_name})...")
-                cursor.execute(game_insert_query, insert_payload)
-            else:
-                logging.warning(f"No game-specific table found for steam_app_id: {self.steam_app_id}")
-            
-            connection.commit()
-            
-            logging.info(f"Data saved to database successfully (main table + game-specific table)")
-            return True
-            
-        except Error as e:
-            logging.error(f"Database error: {e}")
-            return False
+        # Prepare insert payload (same for both tables)
+        insert_payload = {
+            'steam_app_id': int(self.steam_app_id),
+            'game_name': self.game_name,
+            'stat_date': stat_date,
+            # Direct fields if present
+            'unique_player': data.get('unique_player'),
+            'lifetime_total_units': data.get('lifetime_total_units'),
+            'new_players': new_players_val,
+            'wishlist': data.get('wishlist'),
+            'dau': data.get('dau'),
+            'pcu': data.get('pcu'),
+            'pcu_over_dau': pcu_over_dau_val,
+            'players_20h_plus': data.get('players_20h_plus'),
+            'd1_retention': d1_retention_val,
+            'new_vs_returning_ratio': new_vs_returning_ratio_val,
+            'total_downloads': data.get('total_downloads'),
+            'daily_total_revenue': data.get('daily_total_revenue'),
+            'daily_units': data.get('daily_units'),
+            'daily_arpu': daily_arpu_val,
+            'lifetime_total_revenue': data.get('lifetime_total_revenue'),
+            'top10_country_dau': json.dumps(data.get('top10_country_dau')) if data.get('top10_country_dau') is not None else None,
+            'top10_country_downloads': json.dumps(data.get('top10_country_downloads')) if data.get('top10_country_downloads') is not None else None,
+            'top10_region_downloads': json.dumps(data.get('top10_region_downloads')) if data.get('top10_region_downloads') is not None else None,
+            'top10_country_revenue': json.dumps(data.get('top10_country_revenue')) if data.get('top10_country_revenue') is not None else None,
+            'top10_region_revenue': json.dumps(data.get('top10_region_revenue')) if data.get('top10_region_revenue') is not None else None,
+            'iap_breakdown_json': json.dumps(data.get('iap_breakdown_json')) if data.get('iap_breakdown_json') is not None else None,
+            'top3_iap_share': data.get('top3_iap_share'),
+            'wishlist_additions': data.get('wishlist_additions'),
+            'wishlist_deletions': data.get('wishlist_deletions'),
+            'wishlist_conversions': data.get('wishlist_conversions'),
+            'lifetime_wishlist_conversion_rate': data.get('lifetime_wishlist_conversion_rate'),
+            'median_playtime': data.get('median_playtime'),
+            'avg_playtime': data.get('avg_playtime'),
+        }
+        # Remove None values to build dynamic column list
+        insert_payload = {k: v for k, v in insert_payload.items() if v is not None}
+        
+        # Save to main table (game_daily_metrics)
+        logging.info("Saving data to main table (game_daily_metrics)...")
+        session.upsert('game_daily_metrics', insert_payload, ['steam_app_id', 'stat_date'])
+        
+        # Save to game-specific table (stat_date is its primary key)
+        game_table_name = self.get_game_table_name()
+        if game_table_name:
+            logging.info(f"Saving data to game-specific table ({game_table_name})...")
+            session.upsert(game_table_name, insert_payload, ['stat_date'])
+        else:
+            logging.warning(f"No game-specific table found for steam_app_id: {self.steam_app_id}")
+        
+        # Mark the pages as stored in the same transaction, so reruns skip them
+        if page_status:
+            record_pages(session, self.steam_app_id, stat_date, page_status)
+        
+        # Distributions, rollups, series and the page cache follow in their own transactions (_save_derived)
+        return data
+
+    def extract_all_pages(self, pages=None, stat_date=None, carried=None):
+        """Visit every page (or the given PAGE_EXTRACTORS keys) and merge the extracted fields (no database writes).
+        With a stat_date, pages whose page-cache entry is within its TTL are carried forward instead of fetched."""
+        if carried is None:
+            carried = self.cached_pages(stat_date, pages) if stat_date else {}
+        parsed = {}
+        for page, label, method in PAGE_EXTRACTORS:
+            if pages is not None and page not in pages:
+                continue
+            if page in carried:
+                continue
+            logging.info(f"=== Extracting from {label} ===")
+            parsed[page] = getattr(self, method)()
+        return self.merge_pages(parsed, stat_date, carried)
+
+    def merge_pages(self, parsed, stat_date=None, carried=None):
+        """Merge {page: extracted fields} in crawl order, then the carried pages; sets page_status"""
+        all_data = {}
+        self.page_status = {}
+        for page, _, _ in PAGE_EXTRACTORS:
+            if page not in parsed:
+                continue
+            page_data = parsed[page]
+            self.page_status[page] = {'fields': len(page_data or {}), 'source_date': stat_date, 'data': page_data}
+            if page_data:
+                all_data.update(page_data)
+        # Carried values never overwrite a field fetched today (the default page also reports median playtime)
+        for page, (source_date, page_data) in (carried or {}).items():
+            logging.info(f"Carrying forward {page} page from {source_date} (within its refresh TTL)")
+            self.page_status[page] = {'fields': len(page_data), 'source_date': source_date, 'data': page_data}
+            for field, value in page_data.items():
+                all_data.setdefault(field, value)
+        return all_data
+
+    def fetch_page(self, page):
+        """Navigate to a page (setting the 'yesterday' filter where its extractor would) and capture its HTML.
+        Returns a PageSnapshot, or None when the page could not be reached."""
+        label = {p: l for p, l, _ in PAGE_EXTRACTORS}[page]
+        url = PAGE_URLS[page].format(app_id=self.steam_app_id)
+        logging.info(f"=== Fetching {label} ===")
+        if not self.navigate_to_page(url, label):
+            return None
+        try:
+            if page in YESTERDAY_FILTER_PAGES:
+                self.set_yesterday_filter()
+            return PageSnapshot(self.driver.page_source, self.driver.current_url)
         except Exception as e:
-            logging.error(f"Error saving to database: {e}")
-            return False
-        finally:
-            if cursor:
-                cursor.close()
-            if connection and connection.is_connected():
-                connection.close()
-    
+            logging.error(f"Failed to capture {label}: {e}")
+            return None
+
+    def parse_snapshot(self, page, snapshot):
+        """Run a page's extractor on a snapshot from fetch_page() (no browser calls, safe off the driver thread)"""
+        if snapshot is None:
+            return None
+        method = {p: m for p, _, m in PAGE_EXTRACTORS}[page]
+        return getattr(SnapshotParser(self, snapshot), method)()
+
+    def cached_pages(self, stat_date, pages=None):
+        """{page: (source_date, data)} for pages the page cache can serve on stat_date"""
+        pages = pages if pages is not None else [p[0] for p in PAGE_EXTRACTORS]
+        return cached_pages(self.db_config, self.steam_app_id, stat_date, pages)
+
+    def pending_pages(self, stat_date):
+        """PAGE_EXTRACTORS keys not yet stored for stat_date according to the run manifest"""
+        pages = enabled_pages(self.steam_app_id, [p[0] for p in PAGE_EXTRACTORS])
+        return pending_pages(self.db_config, self.steam_app_id, stat_date, pages)
+
     def run_crawler(self):
         """Main crawler execution method"""
         start_time = time.time()
@@ -1516,119 +1652,136 @@ class SteamWorksCrawler:
         try:
             logging.info("Starting SteamWorks crawler...")
             
-            # Setup Chrome driver
-            self.setup_driver()
-            # Warmup: open SteamWorks home once to ensure proper session
-            self.warmup_session()
-            # Ensure we are viewing as the target partner account
-            self.ensure_partner_context()
-            
-            # Initialize combined data
-            all_data = {}
-            
-            # Extract data from Default Game Page
-            logging.info("=== Extracting from Default Game Page ===")
-            default_data = self.extract_default_page_data()
-            if default_data:
-                all_data.update(default_data)
-            
-            # Extract data from Lifetime Play Time Page
-            logging.info("=== Extracting from Lifetime Play Time Page ===")
-            playtime_data = self.extract_playtime_page_data()
-            if playtime_data:
-                all_data.update(playtime_data)
-            
-            # Extract data from Wishlist Page
-            logging.info("=== Extracting from Wishlist Page ===")
-            wishlist_data = self.extract_wishlist_page_data()
-            if wishlist_data:
-                all_data.update(wishlist_data)
+            # Reruns only fetch the pages the run manifest has not recorded for this date
+            stat_date = self.get_stat_date()
+            pages = self.pending_pages(stat_date)
+            if not pages:
+                logging.info(f"All pages already stored for {self.game_name} on {stat_date}; nothing to crawl")
+                return True, {}
+            carried = self.cached_pages(stat_date, pages)
+            fetch = [page for page in pages if page not in carried]
+            logging.info(f"Pages to crawl for {self.game_name} on {stat_date}: {', '.join(fetch) or 'none'}"
+                         f"{' (cached: ' + ', '.join(carried) + ')' if carried else ''}")
             
-            # Extract data from Players Page
-            logging.info("=== Extracting from Players Page ===")
-            players_data = self.extract_players_page_data()
-            if players_data:
-                all_data.update(players_data)
+            if self.owns_driver and fetch:
+                # Setup Chrome driver
+                self.setup_driver()
+                # Warmup: open SteamWorks home once to ensure proper session
+                self.warmup_session()
+                self.check_session_health()
+                # Ensure we are viewing as the target partner account
+                self.ensure_partner_context()
             
-            # Extract data from Regions and Countries Revenue Page
-            logging.info("=== Extracting from Regions Revenue Page ===")
-            regions_revenue_data = self.extract_regions_revenue_page_data()
-            if regions_revenue_data:
-                all_data.update(regions_revenue_data)
-            
-            # Extract data from Downloads by Region Page
-            logging.info("=== Extracting from Downloads Region Page ===")
-            downloads_region_data = self.extract_downloads_region_page_data()
-            if downloads_region_data:
-                all_data.update(downloads_region_data)
-            
-            # Extract data from In-Game Purchases Page
-            logging.info("=== Extracting from In-Game Purchases Page ===")
-            in_game_purchases_data = self.extract_in_game_purchases_page_data()
-            if in_game_purchases_data:
-                all_data.update(in_game_purchases_data)
+            all_data = self.extract_all_pages(pages, stat_date, carried)
             
             if all_data:
+                # Spool locally first so a database failure never costs a re-crawl
+                spool_id = self.spool_payload(all_data, stat_date, self.page_status)
                 # Save to database
-                success = self.save_to_database(all_data)
+                success = self.save_to_database(all_data, stat_date=stat_date, page_status=self.page_status)
                 if success:
+                    if spool_id is not None:
+                        CrawlSpool().mark_drained(spool_id)
+                    failed_pages = [page for page, status in self.page_status.items() if not status['fields']]
+                    if failed_pages:
+                        logging.warning(f"Pages with no data (retried on the next run): {', '.join(failed_pages)}")
                     logging.info("Crawler completed successfully")
                     return True, all_data
                 else:
                     logging.error("✗ Failed to save data to database")
+                    if spool_id is not None:
+                        logging.warning("Payload kept in local spool; run replay_spool.py once MySQL is reachable")
+                        return False, f"Database save failed; payload spooled for replay (spool id={spool_id})"
                     return False, "Database save failed"
             else:
                 logging.error("✗ Failed to extract any data")
                 return False, "Data extraction failed"
                 
+        except SessionExpiredError:
+            # Not a per-game failure: the caller stops the whole batch
+            raise
         except Exception as e:
             logging.error(f"Crawler execution failed: {str(e)}")
             return False, str(e)
         finally:
-            if self.driver:
+            if self.driver and self.owns_driver:
                 self.driver.quit()
                 logging.info("WebDriver closed")
 
+class SnapshotParser(SteamWorksCrawler):
+    """A crawler whose extractors read a captured PageSnapshot instead of the live browser"""
+
+    def __init__(self, crawler, snapshot):
+        super().__init__(crawler.db_config, crawler.steam_app_id, crawler.game_name)
+        self.driver = snapshot
+        self.owns_driver = False
+
+    def navigate_to_page(self, url, page_name):
+        # The fetch stage already navigated (and handled any login) before capturing the snapshot
+        return True
+
+    def set_yesterday_filter(self):
+        return True
+
+
+def report_results(results):
+    """Print the outcome of a pooled or pipelined run"""
+    for result in results:
+        if result['saved']:
+            print(f"Crawler completed successfully for {result['game_name']} ({result['seconds']:.0f}s).")
+        else:
+            print(f"Crawler failed for {result['game_name']} ({result['app_id']}): "
+                  f"{result['error'] or 'database save failed; payload spooled for replay'}")
+    if all(r['saved'] for r in results):
+        print("\nAll crawls completed.")
+    else:
+        print("\nSome crawls failed. See logs for details.")
+
+
 def main():
     """Main function to run the crawler"""
     
-    # Database configuration
-    db_config = {
-        'host': 'localhost',
-        'port': 3306,
-        'database': 'steamworks_crawler',
-        'user': 'root',
-        'password': 'Zh1149191843!'
-    }
+    # Database configuration (STEAMWORKS_DB_* env vars override the defaults)
+    db_config = load_db_config()
     
-    # Games to run. You can override via env var STEAMWORKS_GAMES, format:
-    # STEAMWORKS_GAMES="2507950:Delta Force,3104410:Terminull Brigade"
-    games_env = os.environ.get('STEAMWORKS_GAMES', '').strip()
-    games = []
-    if games_env:
+    # Games due today (STEAMWORKS_GAMES overrides games.json)
+    games = load_games(date.today())
+
+    # STEAMWORKS_PIPELINE=1 overlaps page loads, parsing and database writes on one browser
+    from crawl_pipeline import CrawlPipeline, parse_workers_from_env, pipeline_enabled
+    if pipeline_enabled():
+        print(f"\n=== Crawling {len(games)} games through the fetch/parse/write pipeline ===")
+        pipeline = CrawlPipeline(db_config, parse_workers=parse_workers_from_env())
+        stat_date = SteamWorksCrawler(db_config, None, None).get_stat_date()
         try:
-            parts = [p for p in games_env.split(',') if p.strip()]
-            for p in parts:
-                if ':' in p:
-                    app_id_str, name = p.split(':', 1)
-                    app_id = int(app_id_str.strip())
-                    games.append((app_id, name.strip()))
-        except Exception:
-            games = []
-    if not games:
-        # Default games list
-        games = [
-            (2507950, 'Delta Force'),
-            (2073620, 'Arena Breakout: Infinite'),
-            (3478050, 'Road to Empress'),
-            (3104410, 'Terminull Brigade'),
-        ]
+            results = pipeline.run(games, stat_date)
+        except SessionExpiredError as e:
+            abort_expired_session(e, "financial crawl")
+        report_results(results)
+        return
+
+    # STEAMWORKS_CRAWL_WORKERS > 1 crawls games in parallel browsers with one batched commit
+    from crawl_pool import CrawlWorkerPool, workers_from_env, rate_limit_from_env
+    workers = workers_from_env()
+    if workers > 1 and len(games) > 1:
+        print(f"\n=== Crawling {len(games)} games with {workers} workers ===")
+        pool = CrawlWorkerPool(db_config, workers=workers, rate_limit=rate_limit_from_env())
+        stat_date = SteamWorksCrawler(db_config, None, None).get_stat_date()
+        try:
+            results = pool.run(games, stat_date)
+        except SessionExpiredError as e:
+            abort_expired_session(e, "financial crawl")
+        report_results(results)
+        return
 
     overall_success = True
     for app_id, name in games:
         print(f"\n=== Running crawler for {name} ({app_id}) ===")
         crawler = SteamWorksCrawler(db_config, steam_app_id=app_id, game_name=name)
-        success, result = crawler.run_crawler()
+        try:
+            success, result = crawler.run_crawler()
+        except SessionExpiredError as e:
+            abort_expired_session(e, "financial crawl")
         if success:
             print("Crawler completed successfully for this game.")
         else:
@@ -3,8 +3,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-import mysql.connector
-from mysql.connector import Error
 import json
 import time
 import logging
@@ -20,6 +18,9 @@ except ImportError:
 import tempfile
 
 # Import the existing marketing crawler class and translation function
+from lean_browser import lean_mode
+from session_health import SessionExpiredError
+from storage import StorageError
 from steamworks_marketing_crawler import SteamworksMarketingCrawler, translate_feature_name_to_english, CHINESE_TO_ENGLISH_FEATURES
 
 # Setup logging
@@ -529,13 +530,7 @@ class SteamworksHistoricalMarketingCrawler(SteamworksMarketingCrawler):
     
     def store_historical_marketing_data(self, data, target_date):
         """Store historical marketing data in game-specific table only"""
-        connection = None
-        cursor = None
-        
         try:
-            connection = mysql.connector.connect(**self.db_config)
-            cursor = connection.cursor()
-            
             # Prepare data for insertion
             insert_data = {
                 'steam_app_id': self.steam_app_id,
@@ -556,49 +551,21 @@ class SteamworksHistoricalMarketingCrawler(SteamworksMarketingCrawler):
             # Insert into game-specific table only
             game_table = self.get_game_table_name()
             if game_table:
-                game_query = f"""
-                    INSERT INTO {game_table} 
-                    (steam_app_id, game_name, stat_date, total_impressions, total_visits, 
-                     total_click_through_rate, owner_visits, top_country_visits, takeover_banner, 
-                     pop_up_message, main_cluster, all_source_breakdown, homepage_breakdown)
-                    VALUES (%(steam_app_id)s, %(game_name)s, %(stat_date)s, %(total_impressions)s, 
-                            %(total_visits)s, %(total_click_through_rate)s, %(owner_visits)s, 
-                            %(top_country_visits)s, %(takeover_banner)s, %(pop_up_message)s, 
-                            %(main_cluster)s, %(all_source_breakdown)s, %(homepage_breakdown)s)
-                    ON DUPLICATE KEY UPDATE
-                        total_impressions = VALUES(total_impressions),
-                        total_visits = VALUES(total_visits),
-                        total_click_through_rate = VALUES(total_click_through_rate),
-                        owner_visits = VALUES(owner_visits),
-                        top_country_visits = VALUES(top_country_visits),
-                        takeover_banner = VALUES(takeover_banner),
-                        pop_up_message = VALUES(pop_up_message),
-                        main_cluster = VALUES(main_cluster),
-                        all_source_breakdown = VALUES(all_source_breakdown),
-                        homepage_breakdown = VALUES(homepage_breakdown),
-                        updated_at = CURRENT_TIMESTAMP
-                """
-                
-                cursor.execute(game_query, insert_data)
+                with self.storage.session() as session:
+                    session.upsert(game_table, insert_data, ['steam_app_id', 'stat_date'], {'updated_at': 'CURRENT_TIMESTAMP'})
                 logging.info(f"Inserted historical data into {game_table} for {self.game_name} on {target_date}")
             else:
                 logging.error(f"No game-specific table found for steam_app_id: {self.steam_app_id}")
                 raise Exception(f"No game-specific table found for steam_app_id: {self.steam_app_id}")
             
-            connection.commit()
             logging.info(f"Historical marketing data stored successfully for {target_date}")
             
-        except Error as e:
+        except StorageError as e:
             logging.error(f"Database error: {str(e)}")
             raise
         except Exception as e:
             logging.error(f"Error storing historical marketing data: {str(e)}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection and connection.is_connected():
-                connection.close()
     
     def run_historical_crawler(self):
         """Main execution method for historical data crawling"""
@@ -608,12 +575,14 @@ class SteamworksHistoricalMarketingCrawler(SteamworksMarketingCrawler):
             logging.info(f"Starting historical marketing crawler for {self.game_name} ({self.steam_app_id})")
             logging.info(f"Date range: {self.start_date} to {self.end_date}")
             
-            # Setup Chrome driver
-            self.setup_driver()
-            # Warmup: open SteamWorks home once to ensure proper session
-            self.warmup_session()
-            # Ensure we are viewing as the target partner account
-            self.ensure_partner_context()
+            if self.owns_driver:
+                # Setup Chrome driver
+                self.setup_driver()
+                # Warmup: open SteamWorks home once to ensure proper session
+                self.warmup_session()
+                self.check_session_health()
+                # Ensure we are viewing as the target partner account
+                self.ensure_partner_context()
             
             # Navigate to marketing page
             if not self.navigate_to_marketing_page():
@@ -637,15 +606,28 @@ class SteamworksHistoricalMarketingCrawler(SteamworksMarketingCrawler):
                 try:
                     logging.info(f"Processing date {i}/{len(dates_to_process)}: {target_date}")
                     
-                    # Set custom date filter for this specific date
-                    filter_success = self.set_custom_date_filter_for_date(target_date)
-                    if not filter_success:
-                        logging.warning(f"Could not set custom date filter for {target_date}, skipping")
-                        failed_dates += 1
-                        continue
-                    
-                    # Extract basic metrics for this date
-                    basic_metrics = self.extract_basic_metrics()
+                    # Lean mode fetches each day's HTML directly instead of driving the date picker
+                    basic_metrics = None
+                    if lean_mode():
+                        snapshot = self.fetch_marketing_snapshot(target_date)
+                        if snapshot is not None:
+                            basic_metrics = self.extract_from_snapshot(snapshot)
+                    if basic_metrics is None:
+                        if 'navtrafficstats' not in (self.driver.current_url or ''):
+                            # The rendered fallback drives the date picker on the marketing page
+                            if not self.navigate_to_marketing_page():
+                                logging.warning(f"Could not reach the marketing page for {target_date}, skipping")
+                                failed_dates += 1
+                                continue
+                        # Set custom date filter for this specific date
+                        filter_success = self.set_custom_date_filter_for_date(target_date)
+                        if not filter_success:
+                            logging.warning(f"Could not set custom date filter for {target_date}, skipping")
+                            failed_dates += 1
+                            continue
+                        
+                        # Extract basic metrics for this date
+                        basic_metrics = self.extract_basic_metrics()
                     
                     if basic_metrics:
                         # Store data for this specific date
@@ -677,11 +659,13 @@ class SteamworksHistoricalMarketingCrawler(SteamworksMarketingCrawler):
             else:
                 return False, "No dates were successfully processed"
                 
+        except SessionExpiredError:
+            raise
         except Exception as e:
             logging.error(f"Historical marketing crawler failed for {self.game_name}: {str(e)}")
             return False, str(e)
         finally:
-            if self.driver:
+            if self.driver and self.owns_driver:
                 self.driver.quit()
                 logging.info("WebDriver closed")
 
@@ -3,21 +3,26 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-import mysql.connector
-from mysql.connector import Error
 import json
 import time
 import logging
 from datetime import date, datetime, timedelta
 import os
 import shutil
-from urllib.parse import quote
+from urllib.parse import quote, urlencode
 import re
 try:
     from zoneinfo import ZoneInfo  # Python 3.9+
 except ImportError:
     ZoneInfo = None
 import tempfile
+from browser_daemon import attach_to_daemon, daemon_address
+from crawl_pipeline import PageSnapshot
+from crawl_spool import CrawlSpool
+from game_registry import load_games, marketing_table, partner_for
+from lean_browser import apply_lean_options, enable_resource_blocking, fetch_html, lean_mode
+from session_health import SessionExpiredError, abort_expired_session, check_session, wait_for_manual_login
+from storage import get_storage, load_db_config, StorageError
 
 # Setup logging
 logging.basicConfig(
@@ -29,6 +34,8 @@ logging.basicConfig(
     ]
 )
 
+MARKETING_URL = "https://partner.steamgames.com/apps/navtrafficstats/{app_id}"
+
 # Chinese to English translation dictionary for feature names
 CHINESE_TO_ENGLISH_FEATURES = {
     '主页': 'Home Page',
@@ -240,13 +247,38 @@ def translate_feature_name_to_english(chinese_name):
 class SteamworksMarketingCrawler:
     def __init__(self, db_config, steam_app_id, game_name):
         self.db_config = db_config
+        self.storage = get_storage(db_config)
         self.steam_app_id = steam_app_id
         self.game_name = game_name
         self.driver = None
         self.wait = None
+        # False when the driver was attached from a shared session (see crawl_orchestrator.py)
+        self.owns_driver = True
+        # True when attached to a warm browser_daemon.py tab (no warmup needed)
+        self.warm = False
         
+    def attach_driver(self, driver, wait=None):
+        """Reuse an already warmed-up, partner-switched driver instead of launching Chrome"""
+        self.driver = driver
+        self.wait = wait or WebDriverWait(driver, 30)
+        self.owns_driver = False
+    
     def setup_driver(self):
         """Setup Chrome with persistent user data directory to retain login"""
+        # STEAMWORKS_BROWSER_DAEMON: lease a warm, logged-in tab from browser_daemon.py instead of launching Chrome
+        if daemon_address():
+            # The lease names this game's partner; run_crawler switches the tab to it
+            target_id, target_name = partner_for(self.steam_app_id)
+            driver = attach_to_daemon(partner=target_id or target_name)
+            if driver is not None:
+                self.driver = driver
+                self.wait = WebDriverWait(self.driver, 30)
+                self.warm = True
+                if lean_mode():
+                    # Request blocking is per tab, so a leased tab needs it too
+                    enable_resource_blocking(self.driver)
+                return
+
         chrome_options = Options()
         
         # Decide which Chrome profile to use
@@ -329,13 +361,23 @@ class SteamworksMarketingCrawler:
         # Don't run headless so user can manually log in
         # chrome_options.add_argument("--headless")
         
+        # STEAMWORKS_LEAN_BROWSER=1: eager loads without images, fonts, chart scripts or analytics
+        lean = lean_mode()
+        if lean:
+            apply_lean_options(chrome_options)
+        
         self.driver = webdriver.Chrome(options=chrome_options)
         self.wait = WebDriverWait(self.driver, 30)
+        if lean:
+            enable_resource_blocking(self.driver)
         
         logging.info("Chrome WebDriver setup completed")
     
     def warmup_session(self):
         """Open SteamWorks home once to ensure domain session is active"""
+        if self.warm:
+            # Daemon tabs are opened on the partner site and kept logged in
+            return
         try:
             base_url = "https://partner.steampowered.com/"
             self.driver.get(base_url)
@@ -345,11 +387,24 @@ class SteamworksMarketingCrawler:
         except Exception as e:
             logging.warning(f"Warmup failed: {str(e)}")
 
-    def ensure_partner_context(self):
-        """Switch to the correct partner account if needed (View as: select)."""
+    def check_session_health(self):
+        """Fail fast before any game if warmup landed on a login page (unattended runs raise SessionExpiredError)"""
+        if check_session(self.driver):
+            return True
+        logging.warning("SteamWorks session is not logged in")
+        wait_for_manual_login("SteamWorks")
+        self.warmup_session()
+        if not check_session(self.driver):
+            raise SessionExpiredError("Still on login page after manual login")
+        return True
+
+    def ensure_partner_context(self, partner_id=None):
+        """Switch to the correct partner account if needed (View as: select).
+        partner_id overrides the game's registry partner for this call only (queue jobs naming an account)."""
         try:
-            target_name = os.environ.get('STEAMWORKS_TARGET_PARTNER_NAME', 'Proxima Beta Europe B.V.')
-            target_id = os.environ.get('STEAMWORKS_TARGET_PARTNER_ID', '').strip()
+            target_id, target_name = partner_for(self.steam_app_id)
+            if partner_id:
+                target_id, target_name = partner_id, None
 
             # Find the partner switcher select
             selects = self.driver.find_elements(By.XPATH, "//select[@name='runasPubid']")
@@ -417,7 +472,7 @@ class SteamworksMarketingCrawler:
 
     def navigate_to_marketing_page(self):
         """Navigate to the marketing traffic stats page and handle login if needed"""
-        url = f"https://partner.steamgames.com/apps/navtrafficstats/{self.steam_app_id}"
+        url = MARKETING_URL.format(app_id=self.steam_app_id)
         logging.info(f"Navigating to marketing page: {url}")
         self.driver.get(url)
         
@@ -468,12 +523,11 @@ class SteamworksMarketingCrawler:
         # Check if we're on a login page or still on redirect
         if "login" in current_url.lower() or "signin" in current_url.lower() or "?goto=" in current_url:
             logging.warning(f"Detected login page or redirect for marketing page. Manual login required.")
-            print(f"\nManual login required for marketing page")
-            print("Please:")
-            print("1. Log in to SteamWorks in the browser window")
-            print("2. Navigate to the marketing page manually if needed")
-            print("3. Press Enter here when ready...")
-            input("Press Enter after logging in...")
+            wait_for_manual_login("marketing page", [
+                "Log in to SteamWorks in the browser window",
+                "Navigate to the marketing page manually if needed",
+                "Press Enter here when ready...",
+            ])
             
             # Try to navigate again after manual login
             logging.info(f"Navigating to marketing page again after manual login...")
@@ -500,6 +554,39 @@ class SteamworksMarketingCrawler:
                 logging.warning(f"Not on expected marketing page: {current_url}")
                 return False
     
+    def fetch_marketing_snapshot(self, target_date):
+        """The single-day marketing page fetched without rendering (lean mode), or None to use the live page.
+        The date filter form is a plain GET, so its query string selects the day directly."""
+        query = urlencode({
+            'attribution_filter': 'all', 'preset_date_range': 'custom',
+            'start_date': target_date.strftime("%m/%d/%Y"), 'end_date': target_date.strftime("%m/%d/%Y"),
+        })
+        url = f"{MARKETING_URL.format(app_id=self.steam_app_id)}?{query}"
+        logging.info(f"Fetching marketing page for {target_date} without rendering: {url}")
+        page = fetch_html(self.driver, url)
+        if not page or 'navtrafficstats' not in page['url'] or 'dataCountries' not in page['html']:
+            # Login redirects and unexpected pages go through the rendered path, which handles them
+            logging.warning("Marketing page not served as expected; falling back to the rendered page")
+            return None
+        return PageSnapshot(page['html'], page['url'])
+
+    def extract_from_snapshot(self, snapshot):
+        """extract_basic_metrics() on a fetched snapshot instead of the live page.
+        Returns None (use the rendered page) when extraction failed or the inline data arrays were missing,
+        so an incomplete snapshot never overwrites a stored row with NULLs."""
+        live_driver, live_wait = self.driver, self.wait
+        self.driver, self.wait = snapshot, WebDriverWait(snapshot, 0)
+        try:
+            metrics = self.extract_basic_metrics()
+        finally:
+            self.driver, self.wait = live_driver, live_wait
+        # extract_basic_metrics() reports failure as a dict of Nones; owner/country visits come from dataOwners/dataCountries
+        if not metrics or metrics.get('total_impressions') is None or (
+                metrics.get('owner_visits') is None and metrics.get('top_country_visits') is None):
+            logging.warning("Marketing snapshot incomplete; falling back to the rendered page")
+            return None
+        return metrics
+
     def set_custom_date_filter(self):
         """Set the time filter to 'Custom' and set both dates to stat_date"""
         try:
@@ -1336,33 +1423,25 @@ class SteamworksMarketingCrawler:
     
     def get_game_table_name(self):
         """Get the game-specific table name based on steam_app_id"""
-        game_tables = {
-            2507950: 'delta_force_daily_marketing',
-            3104410: 'terminull_brigade_daily_marketing',
-            3478050: 'road_to_empress_daily_marketing'
-        }
-        return game_tables.get(self.steam_app_id)
+        return marketing_table(self.steam_app_id)
     
-    def store_marketing_data(self, data):
+    def get_stat_date(self):
+        """Pacific Time date of the day that just ended (same as the date filter)"""
+        if ZoneInfo:
+            now_pt = datetime.now(ZoneInfo('America/Los_Angeles'))
+            current_date = (now_pt - timedelta(days=1)).date()
+            logging.info(f"Using Pacific timezone - stat_date: {current_date}")
+        else:
+            # Fallback to system local time minus one day
+            current_date = date.today() - timedelta(days=1)
+            logging.info(f"Using system timezone - stat_date: {current_date}")
+        return current_date
+    
+    def store_marketing_data(self, data, stat_date=None):
         """Store marketing data in both overall and game-specific tables"""
-        connection = None
-        cursor = None
-        
         try:
-            connection = mysql.connector.connect(**self.db_config)
-            cursor = connection.cursor()
-            
-            # Get current date (same calculation as date filter - Pacific timezone)
-            from datetime import date, datetime, timedelta
-            try:
-                from zoneinfo import ZoneInfo
-                now_pt = datetime.now(ZoneInfo('America/Los_Angeles'))
-                current_date = (now_pt - timedelta(days=1)).date()
-                logging.info(f"Using Pacific timezone - stat_date: {current_date}")
-            except ImportError:
-                # Fallback to system local time minus one day
-                current_date = date.today() - timedelta(days=1)
-                logging.info(f"Using system timezone - stat_date: {current_date}")
+            # stat_date defaults to Pacific yesterday; replays pass the spooled date
+            current_date = stat_date if stat_date is not None else self.get_stat_date()
             
             # Prepare data for insertion
             insert_data = {
@@ -1380,79 +1459,30 @@ class SteamworksMarketingCrawler:
                 'all_source_breakdown': json.dumps(data.get('all_source_breakdown')) if data.get('all_source_breakdown') else None,
                 'homepage_breakdown': json.dumps(data.get('homepage_breakdown')) if data.get('homepage_breakdown') else None
             }
+            key_columns = ['steam_app_id', 'stat_date']
+            touch = {'updated_at': 'CURRENT_TIMESTAMP'}
             
-            # Insert into overall table
-            overall_query = """
-                INSERT INTO game_daily_marketing 
-                (steam_app_id, game_name, stat_date, total_impressions, total_visits, 
-                 total_click_through_rate, owner_visits, top_country_visits, takeover_banner, 
-                 pop_up_message, main_cluster, all_source_breakdown, homepage_breakdown)
-                VALUES (%(steam_app_id)s, %(game_name)s, %(stat_date)s, %(total_impressions)s, 
-                        %(total_visits)s, %(total_click_through_rate)s, %(owner_visits)s, 
-                        %(top_country_visits)s, %(takeover_banner)s, %(pop_up_message)s, 
-                        %(main_cluster)s, %(all_source_breakdown)s, %(homepage_breakdown)s)
-                ON DUPLICATE KEY UPDATE
-                    total_impressions = VALUES(total_impressions),
-                    total_visits = VALUES(total_visits),
-                    total_click_through_rate = VALUES(total_click_through_rate),
-                    owner_visits = VALUES(owner_visits),
-                    top_country_visits = VALUES(top_country_visits),
-                    takeover_banner = VALUES(takeover_banner),
-                    pop_up_message = VALUES(pop_up_message),
-                    main_cluster = VALUES(main_cluster),
-                    all_source_breakdown = VALUES(all_source_breakdown),
-                    homepage_breakdown = VALUES(homepage_breakdown),
-                    updated_at = CURRENT_TIMESTAMP
-            """
-            
-            cursor.execute(overall_query, insert_data)
-            logging.info(f"Inserted data into game_daily_marketing for {self.game_name}")
-            
-            # Insert into game-specific table
-            game_table = self.get_game_table_name()
-            if game_table:
-                game_query = f"""
-                    INSERT INTO {game_table} 
-                    (steam_app_id, game_name, stat_date, total_impressions, total_visits, 
-                     total_click_through_rate, owner_visits, top_country_visits, takeover_banner, 
-                     pop_up_message, main_cluster, all_source_breakdown, homepage_breakdown)
-                    VALUES (%(steam_app_id)s, %(game_name)s, %(stat_date)s, %(total_impressions)s, 
-                            %(total_visits)s, %(total_click_through_rate)s, %(owner_visits)s, 
-                            %(top_country_visits)s, %(takeover_banner)s, %(pop_up_message)s, 
-                            %(main_cluster)s, %(all_source_breakdown)s, %(homepage_breakdown)s)
-                    ON DUPLICATE KEY UPDATE
-                        total_impressions = VALUES(total_impressions),
-                        total_visits = VALUES(total_visits),
-                        total_click_through_rate = VALUES(total_click_through_rate),
-                        owner_visits = VALUES(owner_visits),
-                        top_country_visits = VALUES(top_country_visits),
-                        takeover_banner = VALUES(takeover_banner),
-                        pop_up_message = VALUES(pop_up_message),
-                        main_cluster = VALUES(main_cluster),
-                        all_source_breakdown = VALUES(all_source_breakdown),
-                        homepage_breakdown = VALUES(homepage_breakdown),
-                        updated_at = CURRENT_TIMESTAMP
-                """
+            with self.storage.session() as session:
+                # Insert into overall table
+                session.upsert('game_daily_marketing', insert_data, key_columns, touch)
+                logging.info(f"Inserted data into game_daily_marketing for {self.game_name}")
                 
-                cursor.execute(game_query, insert_data)
-                logging.info(f"Inserted data into {game_table} for {self.game_name}")
-            else:
-                logging.warning(f"No game-specific table found for steam_app_id: {self.steam_app_id}")
+                # Insert into game-specific table
+                game_table = self.get_game_table_name()
+                if game_table:
+                    session.upsert(game_table, insert_data, key_columns, touch)
+                    logging.info(f"Inserted data into {game_table} for {self.game_name}")
+                else:
+                    logging.warning(f"No game-specific table found for steam_app_id: {self.steam_app_id}")
             
-            connection.commit()
             logging.info("Marketing data stored successfully")
             
-        except Error as e:
+        except StorageError as e:
             logging.error(f"Database error: {str(e)}")
             raise
         except Exception as e:
             logging.error(f"Error storing marketing data: {str(e)}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection and connection.is_connected():
-                connection.close()
     
     def run_crawler(self):
         """Main execution method"""
@@ -1461,84 +1491,89 @@ class SteamworksMarketingCrawler:
         try:
             logging.info(f"Starting marketing crawler for {self.game_name} ({self.steam_app_id})")
             
-            # Setup Chrome driver
-            self.setup_driver()
-            # Warmup: open SteamWorks home once to ensure proper session
-            self.warmup_session()
-            # Ensure we are viewing as the target partner account
-            self.ensure_partner_context()
-            
-            # Navigate to marketing page
-            if not self.navigate_to_marketing_page():
-                logging.error("Failed to access marketing page - login verification failed")
-                return False, "Failed to access marketing page - please ensure you are logged in"
-            
-            # Set custom date filter for single-day data
-            filter_success = self.set_custom_date_filter()
-            if not filter_success:
-                logging.warning("Could not set custom date filter, proceeding with current data")
-            
-            # Extract basic metrics
-            basic_metrics = self.extract_basic_metrics()
+            if self.owns_driver:
+                # Setup Chrome driver
+                self.setup_driver()
+                # Warmup: open SteamWorks home once to ensure proper session
+                self.warmup_session()
+                self.check_session_health()
+                # Ensure we are viewing as the target partner account
+                self.ensure_partner_context()
+            
+            # Lean mode reads the inline data arrays from the fetched HTML; nothing needs rendering
+            basic_metrics = None
+            if lean_mode():
+                snapshot = self.fetch_marketing_snapshot(self.get_stat_date())
+                if snapshot is not None:
+                    basic_metrics = self.extract_from_snapshot(snapshot)
+            
+            if basic_metrics is None:
+                # Navigate to marketing page
+                if not self.navigate_to_marketing_page():
+                    logging.error("Failed to access marketing page - login verification failed")
+                    return False, "Failed to access marketing page - please ensure you are logged in"
+                
+                # Set custom date filter for single-day data
+                filter_success = self.set_custom_date_filter()
+                if not filter_success:
+                    logging.warning("Could not set custom date filter, proceeding with current data")
+                
+                # Extract basic metrics
+                basic_metrics = self.extract_basic_metrics()
             
             if basic_metrics:
+                # Spool locally first so a database failure never costs a re-crawl
+                stat_date = self.get_stat_date()
+                spool = CrawlSpool()
+                spool_id = None
+                try:
+                    spool_id = spool.append('marketing', self.steam_app_id, self.game_name, stat_date, basic_metrics)
+                    logging.info(f"Marketing payload spooled locally (spool id={spool_id})")
+                except Exception as e:
+                    logging.error(f"Failed to spool marketing payload locally: {e}")
                 # Store data
-                self.store_marketing_data(basic_metrics)
+                try:
+                    self.store_marketing_data(basic_metrics, stat_date=stat_date)
+                except Exception as e:
+                    if spool_id is not None:
+                        logging.warning("Marketing payload kept in local spool; run replay_spool.py once MySQL is reachable")
+                        return False, f"Database save failed; payload spooled for replay (spool id={spool_id}): {e}"
+                    raise
+                if spool_id is not None:
+                    spool.mark_drained(spool_id)
                 logging.info(f"Marketing crawler completed successfully for {self.game_name}")
                 return True, basic_metrics
             else:
                 logging.error("✗ Failed to extract any marketing data")
                 return False, "Data extraction failed"
                 
+        except SessionExpiredError:
+            # Not a per-game failure: the caller stops the whole batch
+            raise
         except Exception as e:
             logging.error(f"Marketing crawler failed for {self.game_name}: {str(e)}")
             return False, str(e)
         finally:
-            if self.driver:
+            if self.driver and self.owns_driver:
                 self.driver.quit()
                 logging.info("WebDriver closed")
 
 def main():
     """Main function to run the marketing crawler"""
-    # Database configuration
-    db_config = {
-        'host': 'localhost',
-        'port': 3306,
-        'database': 'steamworks_crawler',
-        'user': 'root',
-        'password': 'Zh1149191843!'
-    }
+    # Database configuration (STEAMWORKS_DB_* env vars override the defaults)
+    db_config = load_db_config()
     
-    # Games to run (same as financial crawler)
-    games_env = os.environ.get('STEAMWORKS_GAMES', '').strip()
-    games = []
-    if games_env:
-        try:
-            parts = [p for p in games_env.split(',') if p.strip()]
-            for p in parts:
-                if ':' in p:
-                    app_id_str, name = p.split(':', 1)
-                    app_id = int(app_id_str.strip())
-                    games.append((app_id, name.strip()))
-        except Exception:
-            games = []
-    if not games:
-        # Default games list - testing with Delta Force only
-        # games = [
-        #     (2507950, 'Delta Force'),
-        # ]
-        games = [
-            (2507950, 'Delta Force'),
-            (2073620, 'Arena Breakout: Infinite'),
-            (3478050, 'Road to Empress'),
-            (3104410, 'Terminull Brigade'),
-        ]
+    # Games due today (STEAMWORKS_GAMES overrides games.json)
+    games = load_games(date.today())
 
     overall_success = True
     for app_id, name in games:
         print(f"\n=== Running marketing crawler for {name} ({app_id}) ===")
         crawler = SteamworksMarketingCrawler(db_config, steam_app_id=app_id, game_name=name)
-        success, result = crawler.run_crawler()
+        try:
+            success, result = crawler.run_crawler()
+        except SessionExpiredError as e:
+            abort_expired_session(e, "marketing crawl")
         if success:
             print("Marketing crawler completed successfully for this game.")
         else:
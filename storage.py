@@ -0,0 +1,464 @@
+"""
+Storage backends for the SteamWorks crawler.
+
+All persistence (both crawlers, the weekly report, the spool replayer and the
+check scripts) goes through a StorageBackend. Three implementations exist:
+
+    mysql   - the production MySQL server (default)
+    sqlite  - embedded single-file database for dev/test machines and offline re-parse jobs
+    duckdb  - embedded columnar database that can also serve analytic queries directly
+
+Select the backend with STEAMWORKS_STORAGE=mysql|sqlite|duckdb. SQL handed to a
+session is written MySQL-style (%s / %(name)s placeholders); embedded backends
+translate placeholders, and upserts are generated per dialect.
+"""
+
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+
+from game_registry import all_games
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Columns shared by game_daily_metrics and the per-game metrics tables
+METRICS_COLUMNS = [
+    ('stat_date', 'DATE'),
+    ('game_name', 'VARCHAR'),
+    ('steam_app_id', 'INTEGER'),
+    ('dau', 'INTEGER'),
+    ('pcu', 'INTEGER'),
+    ('unique_player', 'INTEGER'),
+    ('new_players', 'INTEGER'),
+    ('total_downloads', 'INTEGER'),
+    ('d1_retention', 'DOUBLE'),
+    ('pcu_over_dau', 'DOUBLE'),
+    ('new_vs_returning_ratio', 'DOUBLE'),
+    ('median_playtime', 'VARCHAR'),
+    ('avg_playtime', 'VARCHAR'),
+    ('players_20h_plus', 'INTEGER'),
+    ('lifetime_total_revenue', 'DOUBLE'),
+    ('daily_total_revenue', 'DOUBLE'),
+    ('lifetime_total_units', 'INTEGER'),
+    ('daily_units', 'INTEGER'),
+    ('daily_arpu', 'DOUBLE'),
+    ('top3_iap_share', 'DOUBLE'),
+    ('wishlist', 'INTEGER'),
+    ('lifetime_wishlist_conversion_rate', 'DOUBLE'),
+    ('wishlist_additions', 'INTEGER'),
+    ('wishlist_deletions', 'INTEGER'),
+    ('wishlist_conversions', 'INTEGER'),
+    ('top10_country_dau', 'JSON'),
+    ('top10_country_downloads', 'JSON'),
+    ('top10_region_downloads', 'JSON'),
+    ('top10_country_revenue', 'JSON'),
+    ('top10_region_revenue', 'JSON'),
+    ('iap_breakdown_json', 'JSON'),
+    ('updated_at', 'TIMESTAMP'),
+]
+
+# Columns shared by game_daily_marketing and the per-game marketing tables
+MARKETING_COLUMNS = [
+    ('steam_app_id', 'INTEGER'),
+    ('game_name', 'VARCHAR'),
+    ('stat_date', 'DATE'),
+    ('total_impressions', 'BIGINT'),
+    ('total_visits', 'BIGINT'),
+    ('total_click_through_rate', 'DOUBLE'),
+    ('owner_visits', 'DOUBLE'),
+    ('top_country_visits', 'JSON'),
+    ('takeover_banner', 'JSON'),
+    ('pop_up_message', 'JSON'),
+    ('main_cluster', 'JSON'),
+    ('all_source_breakdown', 'JSON'),
+    ('homepage_breakdown', 'JSON'),
+    ('created_at', 'TIMESTAMP'),
+    ('updated_at', 'TIMESTAMP'),
+]
+
+# Game-specific copies of the daily tables, one pair per registered game (games.json)
+GAME_METRICS_TABLES = [game['metrics_table'] for game in all_games()]
+
+GAME_MARKETING_TABLES = [game['marketing_table'] for game in all_games()]
+
+# Generic schema: table -> (columns, primary key). Embedded backends create every table
+# from it; on MySQL the original tables come from setup_*.sql and later ones from migrations.
+SCHEMA = {
+    'game_daily_metrics': (METRICS_COLUMNS, ['steam_app_id', 'stat_date']),
+    'game_daily_marketing': (MARKETING_COLUMNS, ['steam_app_id', 'stat_date']),
+    'geo_dictionary': ([('geo_id', 'SERIAL'), ('geo_name', 'VARCHAR')], ['geo_id']),
+    'game_daily_distribution': (
+        [('steam_app_id', 'INTEGER'), ('stat_date', 'DATE'), ('distribution', 'VARCHAR'),
+         ('geo_ids', 'JSON'), ('metrics', 'JSON')],
+        ['steam_app_id', 'stat_date', 'distribution']
+    ),
+    # Week / month / quarter aggregates per game, maintained by rollup.py
+    'game_period_rollup': (
+        [('steam_app_id', 'INTEGER'), ('period_type', 'VARCHAR'), ('period_start', 'DATE'),
+         ('period_end', 'DATE'), ('days', 'INTEGER'), ('last_date', 'DATE'),
+         ('sum_new_players', 'BIGINT'), ('sum_revenue', 'DOUBLE'), ('sum_units', 'BIGINT'),
+         ('sum_dau', 'BIGINT'), ('avg_dau', 'DOUBLE'), ('max_pcu', 'INTEGER'),
+         ('latest_unique_player', 'INTEGER'), ('latest_lifetime_revenue', 'DOUBLE'),
+         ('latest_median_playtime', 'VARCHAR'), ('updated_at', 'TIMESTAMP')],
+        ['steam_app_id', 'period_type', 'period_start']
+    ),
+    # Day / week / month buckets per game and metric for long-range charts, maintained by series_store.py
+    'game_metric_series': (
+        [('steam_app_id', 'INTEGER'), ('metric', 'VARCHAR'), ('resolution', 'VARCHAR'),
+         ('bucket_start', 'DATE'), ('bucket_end', 'DATE'), ('points', 'INTEGER'),
+         ('mean_value', 'DOUBLE'), ('min_value', 'DOUBLE'), ('max_value', 'DOUBLE'),
+         ('sum_value', 'DOUBLE'), ('updated_at', 'TIMESTAMP')],
+        ['steam_app_id', 'metric', 'resolution', 'bucket_start']
+    ),
+    # Which (game, stat_date, page) units of the daily crawl are stored, maintained by run_manifest.py
+    'crawl_manifest': (
+        [('steam_app_id', 'INTEGER'), ('stat_date', 'DATE'), ('page', 'VARCHAR'), ('status', 'VARCHAR'),
+         ('fields', 'INTEGER'), ('source_date', 'DATE'), ('updated_at', 'TIMESTAMP')],
+        ['steam_app_id', 'stat_date', 'page']
+    ),
+    # Last parsed result per game and financial page, carried forward while within its TTL (page_cache.py)
+    'page_cache': (
+        [('steam_app_id', 'INTEGER'), ('page', 'VARCHAR'), ('source_date', 'DATE'), ('payload', 'JSON'),
+         ('updated_at', 'TIMESTAMP')],
+        ['steam_app_id', 'page']
+    ),
+}
+for _table in GAME_METRICS_TABLES:
+    SCHEMA[_table] = (METRICS_COLUMNS, ['stat_date'])
+for _table in GAME_MARKETING_TABLES:
+    SCHEMA[_table] = (MARKETING_COLUMNS, ['steam_app_id', 'stat_date'])
+
+# Unique constraints besides the primary key
+UNIQUE_KEYS = {
+    'geo_dictionary': ['geo_name'],
+}
+
+
+class StorageError(Exception):
+    """Raised for any backend failure (connection, SQL, constraint)"""
+
+
+def load_db_config():
+    """MySQL settings from STEAMWORKS_DB_* (or Visualization's MYSQL_*) environment variables"""
+    def env(name, default):
+        return os.environ.get(f'STEAMWORKS_DB_{name}') or os.environ.get(f'MYSQL_{name}') or default
+    return {
+        'host': env('HOST', 'localhost'),
+        'port': int(env('PORT', 3306)),
+        'database': os.environ.get('STEAMWORKS_DB_NAME') or os.environ.get('MYSQL_DATABASE') or 'steamworks_crawler',
+        'user': env('USER', 'root'),
+        'password': env('PASSWORD', None),
+    }
+
+
+_PLACEHOLDER_RE = re.compile(r"%\((\w+)\)s|%s|%%")
+
+
+def to_qmark(sql, params):
+    """Translate MySQL-style %s / %(name)s placeholders to ? with positional params"""
+    if params is None:
+        return sql.replace('%%', '%'), []
+    positional = []
+    position = iter(params) if not isinstance(params, dict) else None
+
+    def replace(match):
+        if match.group(0) == '%%':
+            return '%'
+        if match.group(1):
+            positional.append(params[match.group(1)])
+        else:
+            positional.append(next(position))
+        return '?'
+
+    return _PLACEHOLDER_RE.sub(replace, sql), positional
+
+
+class StorageSession:
+    """One connection + cursor; commits on clean exit of StorageBackend.session()"""
+
+    def __init__(self, backend, connection):
+        self.backend = backend
+        self.connection = connection
+        self.cursor = connection.cursor()
+
+    def execute(self, sql, params=None):
+        sql, params = self.backend.prepare(sql, params)
+        try:
+            self.cursor.execute(sql, params)
+        except Exception as e:
+            raise StorageError(str(e)) from e
+        return self.cursor.rowcount
+
+    def executemany(self, sql, rows):
+        rows = list(rows)
+        if not rows:
+            return 0
+        prepared = [self.backend.prepare(sql, r) for r in rows]
+        try:
+            self.cursor.executemany(prepared[0][0], [p for _, p in prepared])
+        except Exception as e:
+            raise StorageError(str(e)) from e
+        return len(rows)
+
+    def fetch_all(self, sql, params=None):
+        """Run a query and return rows as dicts"""
+        self.execute(sql, params)
+        columns = [d[0] for d in self.cursor.description or []]
+        return [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+
+    def fetch_one(self, sql, params=None):
+        rows = self.fetch_all(sql, params)
+        return rows[0] if rows else None
+
+    def iter_rows(self, sql, params=None, batch_size=1000):
+        """Yield rows as dicts without holding the whole result in memory"""
+        self.execute(sql, params)
+        columns = [d[0] for d in self.cursor.description or []]
+        while True:
+            try:
+                batch = self.cursor.fetchmany(batch_size)
+            except Exception as e:
+                raise StorageError(str(e)) from e
+            if not batch:
+                return
+            for row in batch:
+                yield dict(zip(columns, row))
+
+    def upsert(self, table, row, key_columns, extra_updates=None):
+        """Insert row or update every non-key column on key conflict"""
+        return self.upsert_many(table, [row], key_columns, extra_updates)
+
+    def upsert_many(self, table, rows, key_columns, extra_updates=None):
+        rows = [r for r in rows if r]
+        if not rows:
+            return 0
+        columns = list(rows[0].keys())
+        sql = self.backend.upsert_sql(table, columns, key_columns, extra_updates or {})
+        return self.executemany(sql, [tuple(r.get(c) for c in columns) for r in rows])
+
+    def insert_ignore(self, table, rows):
+        """Insert rows, silently skipping duplicates"""
+        rows = [r for r in rows if r]
+        if not rows:
+            return 0
+        columns = list(rows[0].keys())
+        sql = self.backend.insert_ignore_sql(table, columns)
+        return self.executemany(sql, [tuple(r.get(c) for c in columns) for r in rows])
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        try:
+            self.connection.rollback()
+        except Exception:
+            pass
+
+    def close(self):
+        try:
+            self.cursor.close()
+        except Exception:
+            pass
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+
+
+class StorageBackend:
+    name = 'base'
+    column_types = {}
+    on_update_clause = ''
+
+    def connect(self):
+        raise NotImplementedError
+
+    def prepare(self, sql, params):
+        """Adapt SQL/params to the driver's placeholder style"""
+        return sql, params if params is not None else ()
+
+    def upsert_sql(self, table, columns, key_columns, extra_updates):
+        raise NotImplementedError
+
+    def insert_ignore_sql(self, table, columns):
+        raise NotImplementedError
+
+    def ensure_schema(self):
+        """Create missing tables (embedded backends only)"""
+
+    def create_table_sql(self, table, columns, primary_key):
+        """CREATE TABLE IF NOT EXISTS from a generic SCHEMA definition"""
+        parts = []
+        for column, column_type in columns:
+            sql_type = self.column_types.get(column_type, column_type)
+            if column_type == 'SERIAL':
+                parts.append(f"{column} {sql_type}")
+                continue
+            if column_type == 'TIMESTAMP':
+                sql_type += " DEFAULT CURRENT_TIMESTAMP"
+                if column == 'updated_at':
+                    sql_type += self.on_update_clause
+            parts.append(f"{column} {sql_type}")
+        if not any(t == 'SERIAL' for _, t in columns):
+            parts.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+        for unique in [UNIQUE_KEYS[table]] if table in UNIQUE_KEYS else []:
+            parts.append(f"UNIQUE ({', '.join(unique)})")
+        return f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(parts)})"
+
+    @contextmanager
+    def session(self):
+        try:
+            connection = self.connect()
+        except StorageError:
+            raise
+        except Exception as e:
+            raise StorageError(f"{self.name} connection failed: {e}") from e
+        session = StorageSession(self, connection)
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def is_available(self):
+        """True if a connection can be opened right now"""
+        try:
+            with self.session() as session:
+                session.fetch_one("SELECT 1 AS ok")
+            return True
+        except Exception:
+            return False
+
+
+class MySQLStorage(StorageBackend):
+    name = 'mysql'
+    column_types = {
+        'SERIAL': 'INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY',
+        'INTEGER': 'INT',
+        'VARCHAR': 'VARCHAR(255)',
+    }
+    on_update_clause = ' ON UPDATE CURRENT_TIMESTAMP'
+
+    def __init__(self, db_config=None):
+        self.db_config = db_config or load_db_config()
+
+    def connect(self):
+        if not self.db_config.get('password'):
+            raise StorageError("No MySQL password configured: set STEAMWORKS_DB_PASSWORD (or MYSQL_PASSWORD)")
+        import mysql.connector
+        return mysql.connector.connect(**self.db_config)
+
+    def upsert_sql(self, table, columns, key_columns, extra_updates):
+        placeholders = ', '.join(['%s'] * len(columns))
+        updates = [f"{c} = VALUES({c})" for c in columns if c not in key_columns]
+        updates += [f"{c} = {expr}" for c, expr in extra_updates.items()]
+        if not updates:
+            updates = [f"{key_columns[0]} = {key_columns[0]}"]
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON DUPLICATE KEY UPDATE {', '.join(updates)}"
+        )
+
+    def insert_ignore_sql(self, table, columns):
+        placeholders = ', '.join(['%s'] * len(columns))
+        return f"INSERT IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+class _EmbeddedStorage(StorageBackend):
+    """Shared SQL generation for SQLite and DuckDB"""
+
+    def prepare(self, sql, params):
+        return to_qmark(sql, params)
+
+    def upsert_sql(self, table, columns, key_columns, extra_updates):
+        placeholders = ', '.join(['%s'] * len(columns))
+        updates = [f"{c} = excluded.{c}" for c in columns if c not in key_columns]
+        updates += [f"{c} = {expr}" for c, expr in extra_updates.items()]
+        touched = 'updated_at' in extra_updates or 'updated_at' in columns
+        if not touched and any(c == 'updated_at' for c, _ in SCHEMA.get(table, ([], []))[0]):
+            updates.append("updated_at = CURRENT_TIMESTAMP")
+        conflict = f"ON CONFLICT ({', '.join(key_columns)}) "
+        conflict += f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING"
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) {conflict}"
+
+    def insert_ignore_sql(self, table, columns):
+        placeholders = ', '.join(['%s'] * len(columns))
+        return f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    def ensure_schema(self):
+        with self.session() as session:
+            for table, (columns, primary_key) in SCHEMA.items():
+                session.execute(self.create_table_sql(table, columns, primary_key))
+
+
+def _adapt_sqlite_types():
+    """Explicit date/Decimal adapters (the implicit ones are deprecated since 3.12)"""
+    sqlite3.register_adapter(date, lambda d: d.isoformat())
+    sqlite3.register_adapter(datetime, lambda d: d.isoformat(sep=' '))
+    sqlite3.register_adapter(Decimal, float)
+    sqlite3.register_converter('DATE', lambda b: date.fromisoformat(b.decode()))
+    sqlite3.register_converter('TIMESTAMP', lambda b: datetime.fromisoformat(b.decode()))
+
+
+class SQLiteStorage(_EmbeddedStorage):
+    name = 'sqlite'
+    column_types = {
+        'SERIAL': 'INTEGER PRIMARY KEY AUTOINCREMENT',
+        'VARCHAR': 'TEXT',
+        'DOUBLE': 'REAL',
+        'JSON': 'TEXT',
+    }
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('STEAMWORKS_SQLITE_PATH') or os.path.join(BASE_DIR, 'steamworks_crawler.sqlite3')
+        _adapt_sqlite_types()
+        self.ensure_schema()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+
+class DuckDBStorage(_EmbeddedStorage):
+    name = 'duckdb'
+    column_types = {
+        'SERIAL': "INTEGER DEFAULT nextval('geo_id_seq') PRIMARY KEY",
+        'JSON': 'VARCHAR',
+    }
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('STEAMWORKS_DUCKDB_PATH') or os.path.join(BASE_DIR, 'steamworks_crawler.duckdb')
+        self.ensure_schema()
+
+    def connect(self):
+        import duckdb
+        return duckdb.connect(self.path)
+
+    def ensure_schema(self):
+        with self.session() as session:
+            session.execute("CREATE SEQUENCE IF NOT EXISTS geo_id_seq START 1")
+        super().ensure_schema()
+
+
+_BACKENDS = {
+    'mysql': MySQLStorage,
+    'sqlite': SQLiteStorage,
+    'duckdb': DuckDBStorage,
+}
+
+
+def get_storage(db_config=None, backend=None):
+    """Build the configured backend; db_config is only used by MySQL"""
+    backend = (backend or os.environ.get('STEAMWORKS_STORAGE') or 'mysql').strip().lower()
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend} (expected one of {', '.join(_BACKENDS)})")
+    if backend == 'mysql':
+        return MySQLStorage(db_config)
+    return _BACKENDS[backend]()
@@ -1,6 +1,7 @@
 """
 Quick script to check what marketing data was actually saved
 """
+import os
 import mysql.connector
 import json
 
@@ -9,7 +10,7 @@ db_config = {
     'port': 3306,
     'database': 'steamworks_crawler',
     'user': 'root',
-    'password': 'Zh1149191843!'
+    'password': os.environ.get('STEAMWORKS_DB_PASSWORD') or os.environ.get('MYSQL_PASSWORD')
 }
 
 try:
@@ -12,9 +12,14 @@ from selenium.webdriver.support import expected_conditions as EC
 import time
 import logging
 import os
+import sys
 from datetime import datetime, timedelta
 from urllib.parse import quote
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_health import SessionExpiredError, abort_expired_session, wait_for_manual_login
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -253,12 +258,11 @@ class MarketingHTMLDownloader:
         # Check if we're on a login page or still on redirect
         if "login" in current_url.lower() or "signin" in current_url.lower() or "?goto=" in current_url:
             logging.warning(f"Detected login page or redirect for marketing page. Manual login required.")
-            print(f"\nManual login required for marketing page")
-            print("Please:")
-            print("1. Log in to SteamWorks in the browser window")
-            print("2. Navigate to the marketing page manually if needed")
-            print("3. Press Enter here when ready...")
-            input("Press Enter after logging in...")
+            wait_for_manual_login("marketing page", [
+                "Log in to SteamWorks in the browser window",
+                "Navigate to the marketing page manually if needed",
+                "Press Enter here when ready...",
+            ])
             
             # Try to navigate again after manual login
             logging.info(f"Navigating to marketing page again after manual login...")
@@ -361,12 +365,7 @@ class MarketingHTMLDownloader:
             # Check if we're on login page
             if "login" in current_url.lower():
                 logging.error("Redirected to login page - authentication required")
-                print("\n" + "="*60)
-                print("MANUAL LOGIN REQUIRED")
-                print("="*60)
-                print("Please log in to SteamWorks in the browser window")
-                print("After logging in, press Enter to continue...")
-                input()
+                wait_for_manual_login("marketing page")
                 
                 # Try navigating again
                 self.driver.get(url)
@@ -427,6 +426,8 @@ class MarketingHTMLDownloader:
             
             return True
             
+        except SessionExpiredError:
+            raise
         except Exception as e:
             logging.error(f"Error downloading HTML for {target_date}: {str(e)}")
             return False
@@ -495,6 +496,8 @@ class MarketingHTMLDownloader:
             
             return True
             
+        except SessionExpiredError:
+            raise
         except Exception as e:
             logging.error(f"Download process failed: {str(e)}")
             return False
@@ -530,7 +533,10 @@ def main():
     )
     
     # Run download
-    success = downloader.run()
+    try:
+        success = downloader.run()
+    except SessionExpiredError as e:
+        abort_expired_session(e, "marketing HTML download")
     
     if success:
         print("\n✓ Download completed successfully!")
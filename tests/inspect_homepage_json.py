@@ -2,6 +2,7 @@
 Inspect the actual homepage_breakdown JSON in the database
 to see what data structure was saved
 """
+import os
 import mysql.connector
 import json
 
@@ -10,7 +11,7 @@ db_config = {
     'port': 3306,
     'database': 'steamworks_crawler',
     'user': 'root',
-    'password': 'Zh1149191843!'
+    'password': os.environ.get('STEAMWORKS_DB_PASSWORD') or os.environ.get('MYSQL_PASSWORD')
 }
 
 try:
@@ -12,20 +12,27 @@ echo.
 REM Change to project directory
 cd /d "D:\Steamworks_Crawler\SteamWorks_crawler"
 
+REM Never wait for a manual login; an expired session exits with code 3
+set STEAMWORKS_UNATTENDED=1
+
 REM Run the marketing crawler (no virtual environment needed if using system Python)
 echo Starting SteamWorks Marketing crawler...
 python steamworks_marketing_crawler.py
+set EXITCODE=%errorlevel%
 
 REM Log completion
-if %errorlevel% equ 0 (
+if %EXITCODE% equ 0 (
     echo.
     echo [%date% %time%] Marketing Crawler completed successfully >> scheduled_runs.log
+) else if %EXITCODE% equ 3 (
+    echo.
+    echo [%date% %time%] Marketing Crawler aborted: SteamWorks session expired, log in interactively once >> scheduled_runs.log
 ) else (
     echo.
-    echo [%date% %time%] Marketing Crawler failed with error code %errorlevel% >> scheduled_runs.log
+    echo [%date% %time%] Marketing Crawler failed with error code %EXITCODE% >> scheduled_runs.log
 )
 
 REM Don't pause - this is for automated runs
-exit /b %errorlevel%
+exit /b %EXITCODE%
 
 
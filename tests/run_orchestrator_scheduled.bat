@@ -0,0 +1,36 @@
+@echo off
+REM SteamWorks Crawl Orchestrator - Scheduled Daily Execution Script
+REM Runs the financial and marketing crawls for every game over one Chrome session
+REM Designed for Windows Task Scheduler (replaces running both crawler scripts separately)
+
+echo ============================================
+echo SteamWorks Crawl Orchestrator - Scheduled Run
+echo Date: %date% %time%
+echo ============================================
+echo.
+
+REM Change to project directory
+cd /d "D:\Steamworks_Crawler\SteamWorks_crawler"
+
+REM Never wait for a manual login; an expired session exits with code 3
+set STEAMWORKS_UNATTENDED=1
+
+REM Run every crawl (no virtual environment needed if using system Python)
+echo Starting SteamWorks crawl orchestrator...
+python crawl_orchestrator.py
+set EXITCODE=%errorlevel%
+
+REM Log completion
+if %EXITCODE% equ 0 (
+    echo.
+    echo [%date% %time%] Orchestrator completed successfully >> scheduled_runs.log
+) else if %EXITCODE% equ 3 (
+    echo.
+    echo [%date% %time%] Orchestrator aborted: SteamWorks session expired, log in interactively once >> scheduled_runs.log
+) else (
+    echo.
+    echo [%date% %time%] Orchestrator finished with failed or skipped jobs, error code %EXITCODE% >> scheduled_runs.log
+)
+
+REM Don't pause - this is for automated runs
+exit /b %EXITCODE%
@@ -3,8 +3,8 @@
 
 # Configuration
 $TaskName = "SteamWorks_Crawler_Daily"
-$TaskDescription = "Runs the SteamWorks crawler daily at 3:30pm to collect Steam analytics data"
-$ScriptPath = "D:\Steamworks_Crawler\SteamWorks_crawler\tests\run_crawler_scheduled.bat"
+$TaskDescription = "Runs the SteamWorks financial and marketing crawls daily at 3:30pm to collect Steam analytics data"
+$ScriptPath = "D:\Steamworks_Crawler\SteamWorks_crawler\tests\run_orchestrator_scheduled.bat"
 $WorkingDirectory = "D:\Steamworks_Crawler\SteamWorks_crawler"
 $RunTime = "15:30"  # 3:30 PM in 24-hour format
 
@@ -0,0 +1,68 @@
+"""
+Test the vectorized anomaly engine against the embedded SQLite backend
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Visualization', 'lib'))
+
+from storage import SQLiteStorage
+from anomaly_engine import run_anomaly_checks
+
+EXPECTED = date(2025, 10, 15)
+
+
+def _seed(storage, app_id, days, dau, last_dau=None):
+    """days of steady DAU (small alternating noise) ending on EXPECTED - (lag)"""
+    with storage.session() as session:
+        for i, stat_date in enumerate(days):
+            value = dau + (5 if i % 2 else -5)
+            if last_dau is not None and stat_date == days[-1]:
+                value = last_dau
+            session.upsert('game_daily_metrics', {
+                'steam_app_id': app_id, 'stat_date': stat_date, 'dau': value, 'new_players': 50,
+            }, ['steam_app_id', 'stat_date'])
+
+
+def _days(last, count=15):
+    return [last - timedelta(days=count - 1 - i) for i in range(count)]
+
+
+def test_spike_and_stale_game():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        _seed(storage, 2507950, _days(EXPECTED), 1000)                    # steady
+        _seed(storage, 2073620, _days(EXPECTED), 1000, last_dau=3000)     # spike on the last day
+        _seed(storage, 3478050, _days(EXPECTED - timedelta(days=2)), 1000)  # two days behind
+        # 3104410 has no rows at all
+
+        summary = run_anomaly_checks(storage, expected_date=EXPECTED, metrics=['dau', 'new_players'])
+        messages = sorted(a['message'] for a in summary['alerts'])
+
+        assert summary['total_checks'] == 4 + 2 * 2 * 4
+        assert messages == [
+            "Arena Breakout: Infinite: dau changed +199% day-over-day",
+            "Arena Breakout: Infinite: dau spike (z=+385.4)",
+            "Road to Empress: data is 2 day(s) stale",
+            "Terminull Brigade: no data in the lookback window",
+        ]
+        spike = next(a for a in summary['alerts'] if 'spike' in a['message'])
+        assert spike['severity'] == 'critical'
+
+
+def test_quiet_when_everything_is_normal():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        _seed(storage, 1, _days(EXPECTED), 1000)
+        summary = run_anomaly_checks(storage, expected_date=EXPECTED, app_ids=[1])
+        assert summary['triggered_alerts'] == 0
+
+
+if __name__ == "__main__":
+    test_spike_and_stale_game()
+    test_quiet_when_everything_is_normal()
+    print("[OK] anomaly engine tests passed")
@@ -0,0 +1,184 @@
+"""
+Test the browser daemon's tab pool, health checks and control API (Chrome and DevTools are stubbed)
+"""
+
+import os
+import sys
+import threading
+import urllib.error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser_daemon import BrowserDaemon, DaemonClient, PartnerBusyError, TabPool, lease_tab
+
+
+class FakeDevTools:
+    def __init__(self):
+        self.address = '127.0.0.1:9222'
+        self.open = []
+        self.opened = 0
+        self.alive = True
+
+    def version(self):
+        if not self.alive:
+            raise ConnectionRefusedError("chrome is gone")
+        return {'Browser': 'Chrome/119'}
+
+    def tabs(self):
+        return [{'id': t, 'type': 'page'} for t in self.open]
+
+    def new_tab(self, url):
+        self.opened += 1
+        self.open.append(f"T{self.opened}")
+        return f"T{self.opened}"
+
+    def close_tab(self, tab_id):
+        if tab_id in self.open:
+            self.open.remove(tab_id)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubDaemon(BrowserDaemon):
+    """Chrome 'starts' instantly; refresh_session reports whatever logged_in_after_refresh says"""
+
+    def __init__(self, **kwargs):
+        super().__init__(db_config=None, **kwargs)
+        self.devtools = FakeDevTools()
+        self.pool.devtools = self.devtools
+        self.logged_in_after_refresh = True
+        self.starts = 0
+
+    def start_browser(self):
+        self.starts += 1
+        self.devtools.alive = True
+        self.devtools.open = []
+        self.owner = object()
+        self.logged_in = True
+        self.pool.reset()
+        self.pool.fill()
+
+    def stop_browser(self, owner=None):
+        self.owner = None
+
+    def refresh_session(self):
+        return self.logged_in_after_refresh
+
+
+def test_pool_recycles_released_and_stale_tabs():
+    devtools, clock = FakeDevTools(), FakeClock()
+    pool = TabPool(devtools, size=2, lease_timeout=60, clock=clock)
+    assert pool.fill() == 2 and devtools.open == ['T1', 'T2']
+
+    first, second, extra = pool.lease(), pool.lease(), pool.lease()
+    # The third lease opened a tab on demand
+    assert (first, second, extra) == ('T1', 'T2', 'T3') and pool.idle == []
+
+    # A released tab is closed and replaced by a fresh warm one
+    assert pool.release(first) and not pool.release('unknown')
+    assert 'T1' not in devtools.open and pool.idle == ['T4', 'T5']
+
+    clock.now += 61
+    assert sorted(pool.reclaim()) == ['T2', 'T3'] and pool.leased == {}
+
+    # Tabs Chrome lost on its own are forgotten
+    devtools.close_tab('T4')
+    pool.prune()
+    assert pool.idle == ['T5']
+
+
+def test_health_check_restarts_chrome_and_tracks_login():
+    daemon = StubDaemon(tabs=2)
+    daemon.start_browser()
+    daemon.devtools.alive = False
+    status = daemon.check_health()
+    assert daemon.starts == 2 and status['restarts'] == 1 and status['idle_tabs'] == 2
+
+    daemon.logged_in_after_refresh = False
+    assert daemon.check_health()['logged_in'] is False and daemon.notified
+    daemon.logged_in_after_refresh = True
+    assert daemon.check_health()['logged_in'] is True and not daemon.notified
+    assert daemon.starts == 2
+
+
+def test_control_api_leases_and_releases_tabs():
+    daemon = StubDaemon(tabs=1)
+    daemon.start_browser()
+    server = daemon.control_server(0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = DaemonClient(f"127.0.0.1:{server.server_address[1]}")
+        lease = client.lease()
+        assert lease == {'tab': 'T1', 'debugger_address': '127.0.0.1:9222'}
+        assert client.status()['leased_tabs'] == 1
+        assert client.release(lease['tab']) == {'released': True}
+        status = client.status()
+        assert (status['leased_tabs'], status['idle_tabs']) == (0, 1)
+
+        # No tabs are handed out while the daemon's session needs a login
+        daemon.logged_in = False
+        try:
+            client.lease()
+            assert False, "expected HTTP 503"
+        except urllib.error.HTTPError as e:
+            assert e.code == 503
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_tabs_are_leased_to_one_partner_at_a_time():
+    pool = TabPool(FakeDevTools(), size=2)
+    pool.fill()
+    first = pool.lease('77')
+    assert pool.lease('77') and pool.lease() and pool.active_partner() == '77'
+    try:
+        pool.lease('Default B.V.')
+        assert False, "expected PartnerBusyError"
+    except PartnerBusyError:
+        pass
+    for tab_id in list(pool.leased):
+        pool.release(tab_id)
+    assert first not in pool.leased and pool.active_partner() is None
+    assert pool.lease('Default B.V.')
+
+
+def test_lease_waits_for_another_partners_tabs():
+    daemon = StubDaemon(tabs=2)
+    daemon.start_browser()
+    server = daemon.control_server(0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = DaemonClient(f"127.0.0.1:{server.server_address[1]}")
+        other = client.lease('77')
+        assert client.status()['leased_partner'] == '77'
+
+        # The waiting crawler gets its tab once the other partner's tab is back
+        waits = []
+        tab = lease_tab(client, 'Default B.V.', sleep=lambda s: waits.append(client.release(other['tab'])))
+        assert waits == [{'released': True}] and client.status()['leased_partner'] == 'Default B.V.'
+
+        try:
+            lease_tab(client, '77', wait=0)
+            assert False, "expected HTTP 409"
+        except urllib.error.HTTPError as e:
+            assert e.code == 409
+        client.release(tab['tab'])
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_pool_recycles_released_and_stale_tabs()
+    test_health_check_restarts_chrome_and_tracks_login()
+    test_control_api_leases_and_releases_tabs()
+    test_tabs_are_leased_to_one_partner_at_a_time()
+    test_lease_waits_for_another_partners_tabs()
+    print("[OK] browser daemon tests passed")
@@ -0,0 +1,127 @@
+"""
+Test the orchestrator's job graph (jobs are plain callables, no browser involved) and its shared session
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date
+
+import game_registry
+from crawl_orchestrator import BrowserSession, build_jobs, run_job_graph, format_report
+from game_registry import load_registry, partner_for
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls = []
+
+
+class FakeDriver:
+    current_url = 'https://partner.steampowered.com/'
+
+    def __init__(self):
+        self.partner = None
+        self.switches = []
+
+
+class FakeCrawler:
+    """Switching partner records the target on the (shared) driver, skipping when it is already there"""
+
+    def __init__(self, app_id):
+        self.steam_app_id = app_id
+        self.driver = None
+
+    def attach_driver(self, driver, wait=None):
+        self.driver = driver
+
+    def ensure_partner_context(self, partner_id=None):
+        target = partner_id or partner_for(self.steam_app_id)[1]
+        if self.driver.partner != target:
+            self.driver.partner = target
+            self.driver.switches.append(target)
+
+
+class StubBrowserSession(BrowserSession):
+    def start(self):
+        self.owner = FakeCrawler(None)
+        self.owner.attach_driver(FakeDriver())
+        self.owner.wait = None
+        self.owner.ensure_partner_context()
+
+
+def _job(name, kind, depends_on=(), outcome=True):
+    def run(session):
+        session.calls.append(name)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome, None if outcome else "extraction failed"
+    return {'name': name, 'kind': kind, 'app_id': 1, 'game_name': 'Game', 'depends_on': list(depends_on), 'run': run}
+
+
+def test_build_jobs_order_and_dependencies():
+    jobs = build_jobs([(1, 'A'), (2, 'B')], backfill=(date(2025, 10, 1), date(2025, 10, 7)))
+    assert [j['name'] for j in jobs] == [
+        'financial:1', 'marketing:1', 'backfill:1', 'financial:2', 'marketing:2', 'backfill:2',
+    ]
+    assert jobs[2]['depends_on'] == ['marketing:1']
+    assert [j['name'] for j in build_jobs([(1, 'A')], ['marketing'])] == ['marketing:1']
+
+
+def test_failed_dependency_skips_dependents():
+    session = FakeSession()
+    jobs = [
+        _job('financial:1', 'financial', outcome=RuntimeError("chrome crashed")),
+        _job('marketing:1', 'marketing', outcome=False),
+        _job('backfill:1', 'backfill', depends_on=['marketing:1']),
+        _job('financial:2', 'financial'),
+    ]
+    results = run_job_graph(jobs, session)
+    assert [r['status'] for r in results] == ['failed', 'failed', 'skipped', 'succeeded']
+    assert results[0]['message'] == 'chrome crashed'
+    assert session.calls == ['financial:1', 'marketing:1', 'financial:2']
+    assert format_report(results, 12.0).endswith("1 succeeded, 2 failed, 1 skipped in 12.0s")
+
+
+def test_unknown_dependency_is_rejected():
+    try:
+        run_job_graph([_job('backfill:1', 'backfill', depends_on=['marketing:9'])], FakeSession())
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert 'marketing:9' in str(e)
+
+
+def test_attach_switches_to_each_games_partner():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'games.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'default_partner': {'id': '', 'name': 'Default B.V.'}, 'games': [
+                {'app_id': 1, 'name': 'A', 'slug': 'a', 'partner': {'id': '77', 'name': 'Other Ltd'},
+                 'metrics_table': 'a_daily_metrics', 'marketing_table': 'a_daily_marketing'},
+                {'app_id': 2, 'name': 'B', 'slug': 'b',
+                 'metrics_table': 'b_daily_metrics', 'marketing_table': 'b_daily_marketing'},
+            ]}, f)
+        cached = game_registry._registry
+        game_registry._registry = load_registry(path)
+        try:
+            session = StubBrowserSession(db_config=None)
+            driver = session.attach(FakeCrawler(1)).driver
+            assert driver.partner == 'Other Ltd'
+            session.attach(FakeCrawler(2))
+            session.attach(FakeCrawler(2))
+            assert driver.partner == 'Default B.V.'
+            assert driver.switches == ['Default B.V.', 'Other Ltd', 'Default B.V.']
+        finally:
+            game_registry._registry = cached
+
+
+if __name__ == "__main__":
+    test_build_jobs_order_and_dependencies()
+    test_failed_dependency_skips_dependents()
+    test_unknown_dependency_is_rejected()
+    test_attach_switches_to_each_games_partner()
+    print("[OK] crawl orchestrator tests passed")
@@ -0,0 +1,183 @@
+"""
+Test the fetch/parse/write pipeline's stage overlap, batching and snapshot lookups (browsers are stubbed)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import game_registry
+from crawl_pipeline import CrawlPipeline, PageSnapshot
+from game_registry import load_registry, partner_for
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = ['default', 'playtime', 'players']
+
+
+class FakeDriver:
+    def __init__(self):
+        self.partner = None
+
+
+class FakeCrawler:
+    """Fetching and parsing take time; game 30's players page never loads"""
+
+    def __init__(self, app_id, name, log):
+        self.steam_app_id = app_id
+        self.game_name = name
+        self.log = log
+        self.page_status = {}
+        self.driver = None
+
+    def attach_driver(self, driver, wait=None):
+        self.driver = driver
+
+    def ensure_partner_context(self):
+        self.driver.partner = partner_for(self.steam_app_id)[1]
+
+    def fetch_page(self, page):
+        self.log.append(('fetch', self.steam_app_id, page, time.time()))
+        self.log.append(('view', self.steam_app_id, self.driver.partner))
+        time.sleep(0.02)
+        return None if (self.steam_app_id, page) == (30, 'players') else f"<html>{page}</html>"
+
+    def parse_snapshot(self, page, snapshot):
+        if snapshot is None:
+            return None
+        time.sleep(0.05)
+        self.log.append(('parse', self.steam_app_id, page, threading.current_thread().name))
+        return {f"{page}_value": self.steam_app_id, 'shared': page}
+
+    def merge_pages(self, parsed, stat_date=None, carried=None):
+        data = {}
+        self.page_status = {}
+        for page in PAGES:
+            if page in parsed:
+                self.page_status[page] = {'fields': len(parsed[page] or {}), 'source_date': stat_date}
+                data.update(parsed[page] or {})
+        for page, (source_date, page_data) in (carried or {}).items():
+            self.page_status[page] = {'fields': len(page_data), 'source_date': source_date}
+            for field, value in page_data.items():
+                data.setdefault(field, value)
+        return data
+
+    def spool_payload(self, data, stat_date, page_status=None):
+        return None
+
+
+class StubPipeline(CrawlPipeline):
+    def __init__(self, plan, **kwargs):
+        super().__init__(db_config=None, **kwargs)
+        self.fixed_plan = plan
+        self.log = []
+        self.batches = []
+        self.browser_starts = 0
+
+    def new_crawler(self, app_id, name):
+        return FakeCrawler(app_id, name, self.log)
+
+    def plan(self, games, stat_date):
+        return {app_id: self.fixed_plan.get(app_id, (list(PAGES), {})) for app_id, _ in games}
+
+    def start_browser(self):
+        self.browser_starts += 1
+        self.owner = FakeCrawler(None, None, self.log)
+        self.owner.driver = FakeDriver()
+        self.owner.wait = None
+        return self.owner
+
+    def save_batch(self, batch):
+        time.sleep(0.05)
+        self.log.append(('write', [r['app_id'] for r in batch], time.time()))
+        self.batches.append([(r['app_id'], r['data'], dict(r['crawler'].page_status)) for r in batch])
+        for result in batch:
+            result['saved'] = bool(result['data'])
+            del result['crawler']
+        with self._lock:
+            self.results.extend(batch)
+
+
+def test_stages_overlap_across_pages_and_games():
+    games = [(10, 'A'), (20, 'B'), (30, 'C'), (40, 'D')]
+    pipeline = StubPipeline({}, parse_workers=3, batch_size=2, queue_size=2, flush_interval=1.0)
+    started = time.time()
+    results = pipeline.run(games, stat_date='day')
+    elapsed = time.time() - started
+
+    # Serially: 12 fetches (0.24s) + 11 parses (0.55s) + 2 writes (0.1s)
+    assert elapsed < 0.6
+    parsers = {entry[3] for entry in pipeline.log if entry[0] == 'parse'}
+    assert len(parsers) > 1
+    # The first batch is written before the last page is fetched
+    first_write = min(entry[2] for entry in pipeline.log if entry[0] == 'write')
+    last_fetch = max(entry[3] for entry in pipeline.log if entry[0] == 'fetch')
+    assert first_write < last_fetch
+
+    assert [r['app_id'] for r in results] == [10, 20, 30, 40]
+    assert all(r['saved'] for r in results)
+    assert sorted(len(batch) for batch in pipeline.batches) == [2, 2]
+    written = {app_id: (data, status) for batch in pipeline.batches for app_id, data, status in batch}
+    # Pages merge in crawl order whatever order they were parsed in
+    assert written[10][0] == {'default_value': 10, 'playtime_value': 10, 'players_value': 10, 'shared': 'players'}
+    assert written[30][1]['players']['fields'] == 0 and written[30][0]['shared'] == 'playtime'
+    assert pipeline.browser_starts == 1
+
+
+def test_complete_and_cached_games_skip_the_browser():
+    carried = {'playtime': ('earlier', {'playtime_value': 1})}
+    pipeline = StubPipeline({10: ([], {}), 20: (['playtime'], carried)}, flush_interval=0.05)
+    results = pipeline.run([(10, 'A'), (20, 'B')], stat_date='day')
+    assert [(r['app_id'], r['saved']) for r in results] == [(10, True), (20, True)]
+    assert pipeline.browser_starts == 0
+    assert not [entry for entry in pipeline.log if entry[0] == 'fetch']
+    assert pipeline.batches == [[(20, {'playtime_value': 1}, {'playtime': {'fields': 1, 'source_date': 'earlier'}})]]
+
+
+def test_each_game_is_fetched_as_its_partner():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'games.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'default_partner': {'id': '', 'name': 'Default B.V.'}, 'games': [
+                {'app_id': 20, 'name': 'B', 'slug': 'b', 'partner': {'id': '77', 'name': 'Other Ltd'},
+                 'metrics_table': 'b_daily_metrics', 'marketing_table': 'b_daily_marketing'},
+            ]}, f)
+        cached = game_registry._registry
+        game_registry._registry = load_registry(path)
+        try:
+            pipeline = StubPipeline({}, flush_interval=0.05)
+            pipeline.run([(10, 'A'), (20, 'B'), (40, 'D')], stat_date='day')
+        finally:
+            game_registry._registry = cached
+    views = {(entry[1], entry[2]) for entry in pipeline.log if entry[0] == 'view'}
+    assert views == {(10, 'Default B.V.'), (20, 'Other Ltd'), (40, 'Default B.V.')}
+
+
+def test_snapshot_answers_extractor_lookups():
+    with open(os.path.join(BASE_DIR, 'html file example', 'Detail.html'), encoding='utf-8', errors='replace') as f:
+        snapshot = PageSnapshot(f.read(), 'https://partner.steampowered.com/app/details/2507950/')
+    cell = snapshot.find_element(
+        'xpath', "//td[contains(text(), 'Lifetime unique users')]/following-sibling::td[@align='right']")
+    assert cell.text == '14,863,260'
+    wishlist = snapshot.find_element('xpath', "//td[normalize-space(text())='Wishlists']/following-sibling::td")
+    assert wishlist.text.split()[0] == '696,921'
+    row = snapshot.find_elements('xpath', "//td[contains(text(), 'Median time played')]/ancestor::tr")[-1]
+    assert row.find_elements('xpath', ".//td")[-1].get_attribute('innerText') == '3 hours 9 minutes'
+    try:
+        snapshot.find_element('xpath', "//td[contains(text(), 'No such label')]")
+        assert False, "expected LookupError"
+    except LookupError:
+        pass
+
+
+if __name__ == "__main__":
+    test_stages_overlap_across_pages_and_games()
+    test_complete_and_cached_games_skip_the_browser()
+    test_each_game_is_fetched_as_its_partner()
+    test_snapshot_answers_extractor_lookups()
+    print("[OK] crawl pipeline tests passed")
@@ -0,0 +1,160 @@
+"""
+Test the parallel crawl pool's rate limiting and work distribution (browsers are stubbed)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import game_registry
+from crawl_pool import TokenBucket, CrawlWorkerPool, partner_groups
+from game_registry import load_registry, partner_for
+from session_health import SessionExpiredError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(round(seconds, 3))
+        self.now += seconds
+
+
+class StubPool(CrawlWorkerPool):
+    """Workers 'crawl' by sleeping; worker 2 fails to start, game 30 fails to extract"""
+
+    def __init__(self, workers, complete=()):
+        super().__init__(db_config=None, workers=workers, rate_limit=1000)
+        self.complete = set(complete)
+        self.threads = set()
+        self.saved = None
+        self.spans = []
+
+    def plan(self, games, stat_date):
+        # Games the run manifest already records as complete for the date
+        return {app_id: [] for app_id in self.complete}
+
+    def start_primary(self):
+        self.primary = 'primary'
+        return self.primary
+
+    def start_worker(self, index):
+        if index == 2:
+            raise RuntimeError("chrome did not start")
+        return self.primary if index == 0 else f"worker{index}"
+
+    def crawl_game(self, owner, app_id, name):
+        self.limiter.acquire()
+        self.threads.add(threading.current_thread().name)
+        if app_id == 70:
+            time.sleep(0.075)
+            raise SessionExpiredError("landed on the login page")
+        started = time.time()
+        time.sleep(0.05)
+        self.spans.append((partner_for(app_id)[1], started, time.time()))
+        if app_id == 30:
+            raise RuntimeError("page timeout")
+        return {'dau': app_id}
+
+    def stop_worker(self, owner):
+        pass
+
+    def save_results(self, results, stat_date):
+        self.saved = [r['app_id'] for r in results if r['data']]
+        return True
+
+
+def test_token_bucket_limits_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(2.0, capacity=2, clock=clock, sleep=clock.sleep)
+    for _ in range(4):
+        bucket.acquire()
+    # Two tokens of burst, then one every 0.5s
+    assert clock.slept == [0.5, 0.5]
+    assert clock.now == 1.0
+
+
+def test_pool_crawls_in_parallel_and_merges_results():
+    games = [(10, 'A'), (20, 'B'), (30, 'C'), (40, 'D'), (50, 'E'), (60, 'F')]
+    pool = StubPool(workers=3)
+    started = time.time()
+    results = pool.run(games, stat_date=None)
+    elapsed = time.time() - started
+
+    # Workers 0 and 1 share six games (worker 2 never started): ~3 rounds, not 6
+    assert len(pool.threads) == 2
+    assert elapsed < 6 * 0.05
+    assert [r['app_id'] for r in results] == [10, 20, 30, 40, 50, 60]
+    assert pool.saved == [10, 20, 40, 50, 60]
+    failed = [r for r in results if not r['saved']]
+    assert [(r['app_id'], r['error']) for r in failed] == [(30, 'page timeout')]
+
+
+def test_pool_skips_games_already_complete():
+    games = [(10, 'A'), (20, 'B'), (40, 'D')]
+    pool = StubPool(workers=2, complete=[10, 40])
+    results = pool.run(games, stat_date=None)
+    assert [r['app_id'] for r in results] == [10, 20, 40]
+    assert pool.saved == [20]
+    assert all(r['saved'] for r in results)
+
+    pool = StubPool(workers=2, complete=[10, 20])
+    assert all(r['saved'] for r in pool.run([(10, 'A'), (20, 'B')], stat_date=None))
+    assert pool.saved is None and not pool.threads
+
+
+def test_expired_session_still_saves_finished_games():
+    """Worker 1's session expires after worker 0 finished a game: finished games are saved, then the expiry raised"""
+    pool = StubPool(workers=2)
+    try:
+        pool.run([(10, 'A'), (70, 'G'), (20, 'B'), (40, 'D'), (50, 'E')], stat_date=None)
+        assert False, "expected SessionExpiredError"
+    except SessionExpiredError:
+        pass
+    # Worker 0 finished 10 before 70 failed and 20 after; 40 and 50 were drained from the queue
+    assert pool.saved == [10, 20]
+
+
+def test_partners_are_crawled_one_at_a_time():
+    """Workers share one session (and so one partner view): a partner's games never overlap another's"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'games.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'default_partner': {'id': '', 'name': 'Default B.V.'}, 'games': [
+                {'app_id': app_id, 'name': name, 'slug': name.lower(),
+                 'partner': {'id': '77', 'name': 'Other Ltd'} if app_id in (20, 50) else None,
+                 'metrics_table': f"{name.lower()}_daily_metrics", 'marketing_table': f"{name.lower()}_daily_marketing"}
+                for app_id, name in [(10, 'A'), (20, 'B'), (40, 'D'), (50, 'E')]
+            ]}, f)
+        cached = game_registry._registry
+        game_registry._registry = load_registry(path)
+        try:
+            games = [(10, 'A'), (20, 'B'), (40, 'D'), (50, 'E')]
+            assert partner_groups(games) == [[(10, 'A'), (40, 'D')], [(20, 'B'), (50, 'E')]]
+            pool = StubPool(workers=2)
+            results = pool.run(games, stat_date=None)
+        finally:
+            game_registry._registry = cached
+    assert [r['app_id'] for r in results] == [10, 20, 40, 50] and all(r['saved'] for r in results)
+    default_end = max(end for partner, _, end in pool.spans if partner == 'Default B.V.')
+    other_start = min(start for partner, start, _ in pool.spans if partner == 'Other Ltd')
+    assert default_end <= other_start
+
+
+if __name__ == "__main__":
+    test_token_bucket_limits_rate()
+    test_pool_crawls_in_parallel_and_merges_results()
+    test_pool_skips_games_already_complete()
+    test_expired_session_still_saves_finished_games()
+    test_partners_are_crawled_one_at_a_time()
+    print("[OK] crawl pool tests passed")
@@ -0,0 +1,64 @@
+"""
+Test the local write-ahead spool used when MySQL is unavailable
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawl_spool import CrawlSpool
+
+
+def test_append_pending_drain():
+    """Appended payloads stay pending until marked drained"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spool = CrawlSpool(os.path.join(tmp, 'spool.db'))
+        first = spool.append('metrics', 2507950, 'Delta Force', date(2025, 10, 6), {'dau': 100})
+        second = spool.append('marketing', 2507950, 'Delta Force', date(2025, 10, 6), {'total_visits': 5})
+
+        pending = spool.pending()
+        assert [e['id'] for e in pending] == [first, second]
+        assert pending[0]['stat_date'] == date(2025, 10, 6)
+        assert pending[0]['payload'] == {'dau': 100}
+        assert [e['kind'] for e in spool.pending(kind='marketing')] == ['marketing']
+
+        spool.record_failure(first, 'connection refused')
+        assert spool.pending()[0]['attempts'] == 1
+
+        spool.mark_drained(first)
+        assert [e['id'] for e in spool.pending()] == [second]
+
+
+def test_page_status_survives_the_spool():
+    """Replays get the page_status back with dates restored, so the manifest and page cache are written"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'spool.db')
+        # A spool created before page_status was kept
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE spool (id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, "
+                           "steam_app_id INTEGER NOT NULL, game_name TEXT, stat_date TEXT NOT NULL, "
+                           "payload TEXT NOT NULL, created_at TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                           "last_error TEXT, drained_at TEXT)")
+        connection.execute("INSERT INTO spool (kind, steam_app_id, stat_date, payload, created_at) "
+                           "VALUES ('metrics', 1, '2025-10-05', '{}', '2025-10-06 08:00:00')")
+        connection.commit()
+        connection.close()
+
+        spool = CrawlSpool(path)
+        page_status = {
+            'default': {'fields': 2, 'source_date': date(2025, 10, 6), 'data': {'dau': 100, 'pcu': 9}},
+            'players': {'fields': 1, 'source_date': date(2025, 10, 1), 'data': {'median_playtime': 40}},
+        }
+        entry_id = spool.append('metrics', 2507950, 'Delta Force', date(2025, 10, 6), {'dau': 100}, page_status)
+        assert [e['page_status'] for e in spool.pending()] == [None, page_status]
+        assert spool.latest('metrics', 2507950, date(2025, 10, 6))['id'] == entry_id
+
+
+if __name__ == "__main__":
+    test_append_pending_drain()
+    test_page_status_survives_the_spool()
+    print("[OK] crawl spool tests passed")
@@ -0,0 +1,55 @@
+"""
+Test columnar encoding of full country/region distributions
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from distribution_store import encode_columnar, decode_columnar, collect_distributions, parse_percent
+
+
+def test_encode_decode_roundtrip():
+    """Entries survive encoding against a shared dictionary and decoding back"""
+    entries = [
+        {'country': 'United States', 'players': 500, 'share': '50.00%', 'rank': 1},
+        {'country': 'Germany', 'players': 300, 'share': '30.00%', 'rank': 2},
+        {'country': 'Chile', 'players': 200, 'share': '20.00%', 'rank': 3},
+    ]
+    geo_ids = {'United States': 1, 'Germany': 7, 'Chile': 42}
+    ids, metrics = encode_columnar(entries, 'country', ['players', 'share'], geo_ids)
+    assert ids == [1, 7, 42]
+    assert metrics == {'players': [500, 300, 200], 'share': [50.0, 30.0, 20.0]}
+
+    geo_names = {v: k for k, v in geo_ids.items()}
+    decoded = decode_columnar(ids, metrics, geo_names)
+    assert [d['country'] for d in decoded] == ['United States', 'Germany', 'Chile']
+    assert decoded[2]['rank'] == 3
+    assert decoded[1]['players'] == 300
+
+
+def test_collect_distributions_skips_empty():
+    """Only non-empty full_* lists are picked up"""
+    data = {
+        'full_country_dau': [{'country': 'Japan', 'players': 1, 'share': '100.00%'}],
+        'full_region_revenue': [],
+        'top10_country_dau': [{'country': 'Japan'}],
+    }
+    found = collect_distributions(data)
+    assert list(found.keys()) == ['country_dau']
+
+
+def test_parse_percent():
+    """Signed and unsigned percentage strings parse to floats"""
+    assert parse_percent('+1.50%') == 1.5
+    assert parse_percent('-2.25%') == -2.25
+    assert parse_percent(None) is None
+    assert parse_percent('n/a') is None
+
+
+if __name__ == "__main__":
+    test_encode_decode_roundtrip()
+    test_collect_distributions_skips_empty()
+    test_parse_percent()
+    print("[OK] distribution store tests passed")
@@ -0,0 +1,75 @@
+"""
+Test the chart export engine's content-hash skipping (rendering is stubbed per test)
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Visualization', 'lib'))
+
+import pandas as pd
+
+from export_engine import ChartExportEngine, frame_hash
+
+
+class FakeFigure:
+    def to_json(self):
+        return '{}'
+
+
+class RecordingEngine(ChartExportEngine):
+    """Writes placeholder files instead of starting worker processes"""
+
+    def __init__(self, export_dir):
+        super().__init__(export_dir)
+        self.rendered = []
+
+    def render_all(self, tasks):
+        for fig_json, path, fmt in tasks:
+            with open(path, 'w') as f:
+                f.write(fmt)
+            self.rendered.append(os.path.basename(path))
+            yield path, None
+
+
+def _jobs(revenue):
+    frame = pd.DataFrame({'game_name': ['A', 'B'], 'daily_total_revenue': revenue})
+    return [
+        {'name': 'revenue', 'data': frame, 'title': 'Revenue', 'build': lambda df: FakeFigure()},
+        {'name': 'revenue_a', 'data': frame[frame['game_name'] == 'A'], 'title': 'Revenue A',
+         'build': lambda df: FakeFigure(), 'formats': ('png',)},
+    ]
+
+
+def test_frame_hash():
+    frame = pd.DataFrame({'x': [1, 2]})
+    assert frame_hash(frame) == frame_hash(frame.copy())
+    assert frame_hash(frame) != frame_hash(pd.DataFrame({'x': [1, 3]}))
+    assert frame_hash(frame) != frame_hash(pd.DataFrame({'y': [1, 2]}))
+
+
+def test_unchanged_charts_are_copied_not_rendered():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = RecordingEngine(tmp)
+        summary = engine.export(_jobs([1.0, 2.0]), '20251014')
+        assert sorted(engine.rendered) == ['revenue_20251014.html', 'revenue_20251014.png', 'revenue_a_20251014.png']
+        assert summary['failed'] == []
+
+        # Next day, same data: nothing is rendered, yesterday's files are copied
+        engine.rendered = []
+        summary = engine.export(_jobs([1.0, 2.0]), '20251015')
+        assert engine.rendered == []
+        assert len(summary['reused']) == 3
+        assert os.path.exists(os.path.join(tmp, 'revenue_a_20251015.png'))
+
+        # Only game B changed: the per-game chart for A is still reused
+        summary = engine.export(_jobs([1.0, 5.0]), '20251016')
+        assert sorted(engine.rendered) == ['revenue_20251016.html', 'revenue_20251016.png']
+        assert [os.path.basename(p) for p in summary['reused']] == ['revenue_a_20251016.png']
+
+
+if __name__ == "__main__":
+    test_frame_hash()
+    test_unchanged_charts_are_copied_not_rendered()
+    print("[OK] export engine tests passed")
@@ -0,0 +1,99 @@
+"""
+Test the games.json registry shared by the crawlers, reports and dashboard
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import game_registry
+from game_registry import (load_registry, all_games, enabled_games, enabled_pages, load_games, partner_for,
+                           marketing_table, metrics_table, create_game_tables)
+from storage import GAME_MARKETING_TABLES, GAME_METRICS_TABLES, SQLiteStorage
+
+
+def _write_registry(tmp, games, default_partner=None):
+    path = os.path.join(tmp, 'games.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'default_partner': default_partner or {'id': '', 'name': 'Default B.V.'}, 'games': games}, f)
+    return path
+
+
+def _game(app_id, slug, **extra):
+    return dict({'app_id': app_id, 'name': slug.title(), 'slug': slug,
+                 'metrics_table': f"{slug}_daily_metrics", 'marketing_table': f"{slug}_daily_marketing"}, **extra)
+
+
+def test_default_registry_covers_every_storage_target():
+    games = all_games()
+    assert [g['app_id'] for g in games] == [2507950, 2073620, 3478050, 3104410]
+    # Arena Breakout used to be missing from the marketing mapping
+    assert marketing_table(2073620) == 'arena_breakout_infinite_daily_marketing'
+    assert metrics_table(3104410) == 'terminull_brigade_daily_metrics'
+    assert GAME_MARKETING_TABLES == [g['marketing_table'] for g in games]
+    assert GAME_METRICS_TABLES == [g['metrics_table'] for g in games]
+    assert marketing_table(1) is None
+
+
+def test_cadence_pages_partner_and_env_override():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = load_registry(_write_registry(tmp, [
+            _game(1, 'daily_game', pages=['default', 'players'], partner={'id': '77', 'name': 'Other Ltd'}),
+            _game(2, 'weekly_game', cadence='weekly'),
+            _game(3, 'retired_game', enabled=False),
+        ]))
+        monday, tuesday = date(2025, 10, 13), date(2025, 10, 14)
+        assert [g['app_id'] for g in enabled_games(monday, registry)] == [1, 2]
+        assert [g['app_id'] for g in enabled_games(tuesday, registry)] == [1]
+        assert [g['app_id'] for g in all_games(registry)] == [1, 2, 3]
+
+        cached = game_registry._registry
+        game_registry._registry = registry
+        try:
+            assert enabled_pages(1, ['default', 'wishlist', 'players']) == ['default', 'players']
+            assert enabled_pages(2, ['default', 'wishlist']) == ['default', 'wishlist']
+            assert partner_for(1) == ('77', 'Other Ltd')
+            assert partner_for(2) == ('', 'Default B.V.')
+            os.environ['STEAMWORKS_GAMES'] = '9:Manual Game'
+            try:
+                assert load_games(tuesday) == [(9, 'Manual Game')]
+            finally:
+                del os.environ['STEAMWORKS_GAMES']
+            assert load_games(tuesday) == [(1, 'Daily_Game')]
+        finally:
+            game_registry._registry = cached
+
+
+def test_invalid_registry_is_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        for games, message in (([_game(1, 'a'), _game(1, 'b')], 'listed twice'),
+                               ([_game(1, 'a', cadence='hourly')], 'unknown cadence'),
+                               ([{'app_id': 1, 'name': 'No Tables'}], 'missing')):
+            try:
+                load_registry(_write_registry(tmp, games))
+                assert False, f"expected ValueError ({message})"
+            except ValueError as e:
+                assert message in str(e)
+
+
+def test_create_tables_for_new_game():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = load_registry(_write_registry(tmp, [_game(5, 'new_game')]))
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        with storage.session() as session:
+            assert create_game_tables(session, registry) == ['new_game_daily_metrics', 'new_game_daily_marketing']
+            session.upsert('new_game_daily_marketing', {'steam_app_id': 5, 'game_name': 'New', 'stat_date': date(2025, 10, 1),
+                                                        'total_visits': 10}, ['steam_app_id', 'stat_date'])
+            assert session.fetch_one("SELECT total_visits FROM new_game_daily_marketing")['total_visits'] == 10
+
+
+if __name__ == "__main__":
+    test_default_registry_covers_every_storage_target()
+    test_cadence_pages_partner_and_env_override()
+    test_invalid_registry_is_rejected()
+    test_create_tables_for_new_game()
+    print("[OK] game registry tests passed")
@@ -0,0 +1,105 @@
+"""
+Test the incremental dashboard refresh against the embedded SQLite backend
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Visualization', 'lib'))
+
+from storage import SQLiteStorage
+from incremental_refresh import IncrementalRefresher, prune_exports
+
+
+class FakeFigure:
+    def __init__(self, label):
+        self.label = label
+
+    def to_html(self, full_html=True, include_plotlyjs=True):
+        return f"<div>{self.label}</div>"
+
+    def to_json(self):
+        return '{}'
+
+
+def _upsert(storage, app_id, stat_date, dau, updated_at):
+    with storage.session() as session:
+        session.upsert('game_daily_metrics', {
+            'steam_app_id': app_id, 'stat_date': stat_date, 'dau': dau, 'updated_at': updated_at,
+        }, ['steam_app_id', 'stat_date'])
+
+
+def _chart(name, app_id=None):
+    return {
+        'name': name, 'title': name, 'tables': ['game_daily_metrics'], 'app_id': app_id,
+        'build': lambda start_date, end_date: FakeFigure(name),
+    }
+
+
+def test_only_changed_charts_rebuild():
+    """A late re-crawl of one game rebuilds that game's chart and the portfolio chart only"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        _upsert(storage, 1, date(2025, 10, 1), 100, '2025-10-02 08:00:00')
+        _upsert(storage, 2, date(2025, 10, 1), 200, '2025-10-02 08:00:00')
+        charts = [_chart('trend'), _chart('game_1', 1), _chart('game_2', 2)]
+        refresher = IncrementalRefresher(charts, '2025-10-01', storage=storage,
+                                         cache_dir=os.path.join(tmp, 'figures'), plotlyjs_url='plotly.js')
+
+        assert refresher.refresh('2025-10-05')['rebuilt'] == ['trend', 'game_1', 'game_2']
+        assert refresher.refresh('2025-10-05')['reused'] == ['trend', 'game_1', 'game_2']
+
+        _upsert(storage, 2, date(2025, 10, 1), 250, '2025-10-03 08:00:00')
+        summary = refresher.refresh('2025-10-05')
+        assert summary['rebuilt'] == ['trend', 'game_2']
+        assert summary['reused'] == ['game_1']
+
+        output = refresher.write_dashboard(os.path.join(tmp, 'dashboard_latest.html'))
+        with open(output, encoding='utf-8') as f:
+            html = f.read()
+        assert '<div>game_1</div>' in html and 'plotly.js' in html
+
+
+def test_failed_chart_is_retried():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        _upsert(storage, 1, date(2025, 10, 1), 100, '2025-10-02 08:00:00')
+        failing = {'fail': True}
+
+        def build(start_date, end_date):
+            if failing['fail']:
+                raise ValueError("loader down")
+            return FakeFigure('trend')
+
+        chart = dict(_chart('trend'), build=build)
+        refresher = IncrementalRefresher([chart], '2025-10-01', storage=storage, cache_dir=os.path.join(tmp, 'figures'))
+        assert refresher.refresh()['failed'] == ['trend']
+        failing['fail'] = False
+        assert refresher.refresh()['rebuilt'] == ['trend']
+
+
+def test_prune_exports():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'charts'))
+        names = [
+            'dashboard_20250901_090000.ipynb', 'dashboard_20251010_090000.ipynb', 'dashboard_latest.ipynb',
+            os.path.join('charts', 'revenue_20250901.png'), os.path.join('charts', 'revenue_20251010.html'),
+        ]
+        for name in names:
+            open(os.path.join(tmp, name), 'w').close()
+
+        removed = prune_exports(tmp, 30, now=datetime(2025, 10, 15))
+        assert [os.path.relpath(p, tmp) for p in removed] == [
+            os.path.join('charts', 'revenue_20250901.png'), 'dashboard_20250901_090000.ipynb'
+        ]
+        assert os.path.exists(os.path.join(tmp, 'dashboard_latest.ipynb'))
+
+
+if __name__ == "__main__":
+    test_only_changed_charts_rebuild()
+    test_failed_chart_is_retried()
+    test_prune_exports()
+    print("[OK] incremental refresh tests passed")
@@ -0,0 +1,76 @@
+"""
+Test that queue jobs view the shared browser as their own partner account (the browser is stubbed)
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import game_registry
+from crawl_orchestrator import BrowserSession
+from game_registry import load_registry, partner_for
+from job_handlers import JobHandlers
+
+
+class FakeDriver:
+    current_url = 'https://partner.steampowered.com/'
+
+    def __init__(self):
+        self.partner = None
+
+
+class FakeCrawler:
+    def __init__(self, app_id):
+        self.steam_app_id = app_id
+        self.driver = None
+
+    def attach_driver(self, driver, wait=None):
+        self.driver = driver
+
+    def ensure_partner_context(self, partner_id=None):
+        target_id, target_name = partner_for(self.steam_app_id)
+        self.driver.partner = partner_id or target_id or target_name
+
+
+class StubBrowserSession(BrowserSession):
+    def start(self):
+        self.owner = FakeCrawler(None)
+        self.owner.attach_driver(FakeDriver())
+        self.owner.wait = None
+        self.owner.ensure_partner_context()
+
+
+def test_job_partner_applies_to_that_job_only():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'games.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'default_partner': {'id': '', 'name': 'Default B.V.'}, 'games': [
+                {'app_id': 1, 'name': 'A', 'slug': 'a',
+                 'metrics_table': 'a_daily_metrics', 'marketing_table': 'a_daily_marketing'},
+                {'app_id': 2, 'name': 'B', 'slug': 'b', 'partner': {'id': '77', 'name': 'Other Ltd'},
+                 'metrics_table': 'b_daily_metrics', 'marketing_table': 'b_daily_marketing'},
+            ]}, f)
+        cached = game_registry._registry
+        game_registry._registry = load_registry(path)
+        env_before = os.environ.get('STEAMWORKS_TARGET_PARTNER_ID')
+        try:
+            handlers = JobHandlers(db_config={})
+            handlers.session = StubBrowserSession(db_config={})
+            driver = handlers._attach({'payload': {'partner_id': '42'}}, FakeCrawler(1)).driver
+            assert driver.partner == '42'
+            # The next job names no partner: back to the game's registry (or default) partner
+            handlers._attach({'payload': None}, FakeCrawler(1))
+            assert driver.partner == 'Default B.V.'
+            handlers._attach({}, FakeCrawler(2))
+            assert driver.partner == '77'
+            assert os.environ.get('STEAMWORKS_TARGET_PARTNER_ID') == env_before
+        finally:
+            game_registry._registry = cached
+
+
+if __name__ == "__main__":
+    test_job_partner_applies_to_that_job_only()
+    print("[OK] job handler tests passed")
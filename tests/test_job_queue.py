@@ -0,0 +1,111 @@
+"""
+Test the crawl job queue (leases, retries, idempotency) on the in-memory and SQLite-file backends
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import JobQueue, SQLiteQueueBackend, LeaseLost, PermanentJobError, run_worker, RETRY_BASE_SECONDS
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_idempotent_enqueue_and_force():
+    queue = JobQueue(SQLiteQueueBackend(':memory:'))
+    first, created = queue.enqueue('crawl', 2507950, stat_date='2025-10-14')
+    again, created_again = queue.enqueue('crawl', 2507950, stat_date='2025-10-14')
+    assert created and not created_again and first == again
+
+    job = queue.lease('w1')
+    queue.complete(job, {'fields': 3})
+    assert queue.enqueue('crawl', 2507950, stat_date='2025-10-14') == (first, False)
+    assert queue.enqueue('crawl', 2507950, stat_date='2025-10-14', force=True) == (first, True)
+    assert queue.get(first)['status'] == 'queued' and queue.get(first)['attempts'] == 0
+
+
+def test_retry_backoff_and_dead_letter():
+    clock = FakeClock()
+    queue = JobQueue(SQLiteQueueBackend(':memory:'), clock=clock)
+    job_id, _ = queue.enqueue('backfill', 1, stat_date='2025-10-01', max_attempts=2, payload={'partner_id': '42'})
+
+    job = queue.lease('w1')
+    assert job['payload'] == {'partner_id': '42'} and job['attempts'] == 1
+    assert queue.fail(job, "timeout") == 'queued'
+    assert queue.lease('w1') is None                      # backing off
+    clock.now += RETRY_BASE_SECONDS
+    job = queue.lease('w1')
+    assert queue.fail(job, "timeout again") == 'dead'
+    assert queue.get(job_id)['last_error'] == 'timeout again'
+
+
+def test_expired_lease_is_reclaimed_and_fenced():
+    clock = FakeClock()
+    queue = JobQueue(SQLiteQueueBackend(':memory:'), clock=clock)
+    queue.enqueue('report', stat_date='2025-10-06', page='week')
+
+    stale = queue.lease('slow-worker', lease_seconds=60)
+    clock.now += 61
+    fresh = queue.lease('other-worker', lease_seconds=60)
+    assert fresh['id'] == stale['id'] and fresh['attempts'] == 2
+
+    # The first worker finishing late must not overwrite the new holder's lease
+    try:
+        queue.complete(stale)
+        assert False, "expected LeaseLost"
+    except LeaseLost:
+        pass
+    queue.heartbeat(fresh, 60)
+    queue.complete(fresh)
+    assert queue.get(fresh['id'])['status'] == 'done'
+
+
+def test_workers_on_shared_file_run_each_job_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'queue.db')
+        producer = JobQueue(SQLiteQueueBackend(path))
+        for app in range(20):
+            producer.enqueue('crawl', app, stat_date='2025-10-14')
+        producer.enqueue('crawl', 99, page='nope', stat_date='2025-10-14')
+
+        seen = []
+        lock = threading.Lock()
+
+        def crawl(job):
+            if job['page'] == 'nope':
+                raise PermanentJobError("Unknown page")
+            with lock:
+                seen.append(job['app_id'])
+            return {'ok': True}
+
+        # Each "machine" has its own backend connection to the shared file
+        threads = [
+            threading.Thread(target=run_worker, args=(JobQueue(SQLiteQueueBackend(path)), {'crawl': crawl}),
+                             kwargs={'worker_id': f"w{i}", 'poll_interval': None})
+            for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(seen) == list(range(20))
+        counts = producer.counts()
+        assert counts[('crawl', 'done')] == 20 and counts[('crawl', 'dead')] == 1
+
+
+if __name__ == "__main__":
+    test_idempotent_enqueue_and_force()
+    test_retry_backoff_and_dead_letter()
+    test_expired_lease_is_reclaimed_and_fenced()
+    test_workers_on_shared_file_run_each_job_once()
+    print("[OK] job queue tests passed")
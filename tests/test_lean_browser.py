@@ -0,0 +1,116 @@
+"""
+Test the lean Chrome profile: options, DevTools resource blocking and render-free page fetches (browsers are stubbed)
+"""
+
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawl_pipeline import PageSnapshot
+from lean_browser import apply_lean_options, blocked_url_patterns, enable_resource_blocking, fetch_html
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeOptions:
+    def __init__(self):
+        self.page_load_strategy = 'normal'
+        self.arguments = []
+        self.experimental = {}
+
+    def add_argument(self, argument):
+        self.arguments.append(argument)
+
+    def add_experimental_option(self, name, value):
+        self.experimental[name] = value
+
+
+class FakeDriver:
+    def __init__(self, current_url, page=None, cdp=True):
+        self.current_url = current_url
+        self.page = page
+        self.cdp = cdp
+        self.commands = []
+        self.visited = []
+
+    def execute_cdp_cmd(self, command, params):
+        if not self.cdp:
+            raise RuntimeError("not a Chromium driver")
+        self.commands.append((command, params))
+
+    def get(self, url):
+        self.visited.append(url)
+        self.current_url = url
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_async_script(self, script, url):
+        return dict(self.page, url=url)
+
+
+def test_lean_options_and_blocked_urls():
+    options = apply_lean_options(FakeOptions())
+    assert options.page_load_strategy == 'eager'
+    assert options.experimental['prefs'] == {'profile.managed_default_content_settings.images': 2}
+    assert "--blink-settings=imagesEnabled=false" in options.arguments
+
+    os.environ['STEAMWORKS_BLOCKED_URLS'] = '*cdn.example.com/*, '
+    try:
+        driver = FakeDriver('https://partner.steampowered.com/')
+        assert enable_resource_blocking(driver) == len(blocked_url_patterns())
+        assert [c for c, _ in driver.commands] == ['Network.enable', 'Network.setBlockedURLs']
+        blocked = driver.commands[1][1]['urls']
+        assert '*cdn.example.com/*' in blocked and '*/jqplot/*' in blocked and '*.png*' in blocked
+    finally:
+        del os.environ['STEAMWORKS_BLOCKED_URLS']
+    # Stylesheets stay: the yesterday filter relies on is_displayed()
+    assert not [p for p in blocked if '.css' in p]
+    assert enable_resource_blocking(FakeDriver('about:blank', cdp=False)) == 0
+
+
+def test_fetch_html_moves_to_the_target_origin_first():
+    url = 'https://partner.steamgames.com/apps/navtrafficstats/2507950?preset_date_range=custom'
+    driver = FakeDriver('https://partner.steampowered.com/', page={'status': 200, 'html': '<html></html>'})
+    assert fetch_html(driver, url)['url'] == url
+    assert driver.visited == ['https://partner.steamgames.com/']
+
+    driver = FakeDriver('https://partner.steamgames.com/apps/landing', page={'status': 302, 'html': ''})
+    assert fetch_html(driver, url) is None
+    assert driver.visited == []
+
+
+def test_marketing_metrics_read_from_unrendered_html():
+    path = os.path.join(BASE_DIR, 'sample marketing html files', 'marketing_2024-12-05.html')
+    with open(path, encoding='utf-8') as f:
+        snapshot = PageSnapshot(f.read(), 'https://partner.steamgames.com/apps/navtrafficstats/2507950')
+    stat = "//div[@class='stats_header_section']//div[contains(text(), '{}')]/following-sibling::div[@class='stat']"
+    assert snapshot.find_element('xpath', stat.format('曝光量')).text == '46.54 百万'
+    assert snapshot.find_element('xpath', stat.format('访问量')).text == '8,713,638'
+    assert 'var dataCountries' in snapshot.page_source and 'var dataOwners' in snapshot.page_source
+
+
+def test_snapshot_without_data_arrays_falls_back():
+    from steamworks_marketing_crawler import SteamworksMarketingCrawler
+    url = 'https://partner.steamgames.com/apps/navtrafficstats/2507950'
+    with open(os.path.join(BASE_DIR, 'sample marketing html files', 'marketing_2024-12-05.html'), encoding='utf-8') as f:
+        html = f.read()
+    crawler = SteamworksMarketingCrawler({}, steam_app_id=2507950, game_name='Delta Force')
+
+    metrics = crawler.extract_from_snapshot(PageSnapshot(html, url))
+    assert metrics['total_impressions'] == 46540000 and metrics['owner_visits'] is not None
+
+    # Headers still parse but the inline arrays are gone: None sends the crawler to the rendered page
+    stripped = re.sub(r'var data\w+\s*=\s*\[.*?\];', '', html, flags=re.S)
+    assert crawler.extract_from_snapshot(PageSnapshot(stripped, url)) is None
+    assert crawler.extract_from_snapshot(PageSnapshot('<html><body></body></html>', url)) is None
+
+
+if __name__ == "__main__":
+    test_lean_options_and_blocked_urls()
+    test_fetch_html_moves_to_the_target_origin_first()
+    test_marketing_metrics_read_from_unrendered_html()
+    test_snapshot_without_data_arrays_falls_back()
+    print("[OK] lean browser tests passed")
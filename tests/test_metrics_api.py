@@ -0,0 +1,91 @@
+"""
+Test the local metrics API against the embedded SQLite backend
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SQLiteStorage
+from metrics_api import MetricsAPI, create_server
+
+
+def _seed(storage, days):
+    with storage.session() as session:
+        for i in range(days):
+            session.upsert('game_daily_metrics', {
+                'steam_app_id': 2507950,
+                'stat_date': date(2024, 1, 1) + timedelta(days=i),
+                'dau': 100 + i,
+                'top10_country_dau': json.dumps([{'country': 'Germany', 'players': i}]),
+            }, ['steam_app_id', 'stat_date'])
+
+
+def _get(api, path, **params):
+    status, headers, body = api.handle(path, {k: [str(v)] for k, v in params.items()})
+    return status, headers, json.loads(body) if body else None
+
+
+def test_series_downsampling_and_validation():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        _seed(storage, 730)
+        api = MetricsAPI(storage)
+
+        status, _, payload = _get(api, '/api/series', metric='dau', start='2024-01-01', end='2024-01-31')
+        assert status == 200 and payload['resolution'] == 'day'
+        assert len(payload['series']['2507950']) == 31
+
+        # Two years at 100 points -> weekly would be 105 buckets, so monthly
+        _, _, payload = _get(api, '/api/series', metric='dau', max_points=100)
+        points = payload['series']['2507950']
+        assert payload['resolution'] == 'month' and len(points) == 24
+        assert points[0] == {'date': '2024-01-01', 'value': 115.0, 'min': 100.0, 'max': 130.0}
+
+        assert _get(api, '/api/series', metric='dau; DROP TABLE x')[0] == 400
+        assert _get(api, '/api/nope')[0] == 404
+
+        status, _, payload = _get(api, '/api/breakdown', dimension='top10_country_dau', app_id=2507950)
+        assert status == 200 and payload['data'] == [{'country': 'Germany', 'players': 729}]
+
+
+def test_http_etag_and_ttl_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        _seed(storage, 3)
+        server = create_server(MetricsAPI(storage, ttl=60), port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/api/series?metric=dau"
+        try:
+            with urllib.request.urlopen(url) as response:
+                etag = response.headers['ETag']
+                first = json.loads(response.read())
+
+            # New rows are not visible until the TTL expires: the cached body is served
+            _seed(storage, 5)
+            with urllib.request.urlopen(url) as response:
+                assert json.loads(response.read()) == first
+
+            request = urllib.request.Request(url, headers={'If-None-Match': etag})
+            try:
+                urllib.request.urlopen(request)
+                assert False, "expected 304"
+            except urllib.error.HTTPError as e:
+                assert e.code == 304
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    test_series_downsampling_and_validation()
+    test_http_etag_and_ttl_cache()
+    print("[OK] metrics API tests passed")
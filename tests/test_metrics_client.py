@@ -0,0 +1,76 @@
+"""
+Test the metrics API client frames against a live API and the direct-storage fallback (embedded SQLite)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Visualization', 'lib'))
+
+from storage import SQLiteStorage
+from metrics_api import MetricsAPI, create_server
+from series_store import rebuild_series
+from metrics_client import get_dau_new_users, load_trend_frame
+
+
+def _seed(storage, days):
+    with storage.session() as session:
+        for i in range(days):
+            session.upsert('game_daily_metrics', {
+                'steam_app_id': 2507950, 'stat_date': date(2024, 1, 1) + timedelta(days=i),
+                'dau': 100 + i, 'new_players': 5,
+            }, ['steam_app_id', 'stat_date'])
+        rebuild_series(session, since=None)
+
+
+def _with_api_address(address, load):
+    saved = os.environ.get('STEAMWORKS_METRICS_API')
+    os.environ['STEAMWORKS_METRICS_API'] = address
+    try:
+        return load()
+    finally:
+        if saved is None:
+            os.environ.pop('STEAMWORKS_METRICS_API', None)
+        else:
+            os.environ['STEAMWORKS_METRICS_API'] = saved
+
+
+def test_api_frame_matches_direct_query():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        _seed(storage, 730)
+        direct = get_dau_new_users(max_points=100, storage=storage)
+
+        api = MetricsAPI(storage)
+        server = create_server(api, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            frame = _with_api_address(f"127.0.0.1:{server.server_address[1]}",
+                                      lambda: get_dau_new_users(max_points=100))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert frame.attrs['resolution'] == direct.attrs['resolution'] == 'month'
+        assert list(frame.columns) == list(direct.columns)
+        assert frame['dau'].tolist() == direct['dau'].tolist()
+        assert frame['game_name'].tolist() == direct['game_name'].tolist()
+        assert (frame['stat_date'] == direct['stat_date']).all()
+
+
+def test_unreachable_api_falls_back_to_storage():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        _seed(storage, 10)
+        frame = _with_api_address('127.0.0.1:1', lambda: load_trend_frame(['dau'], storage=storage))
+        assert frame.attrs['resolution'] == 'day' and frame['dau'].tolist() == [100.0 + i for i in range(10)]
+
+
+if __name__ == "__main__":
+    test_api_frame_matches_direct_query()
+    test_unreachable_api_falls_back_to_storage()
+    print("[OK] metrics client tests passed")
@@ -0,0 +1,60 @@
+"""
+Test the schema migration runner against the embedded SQLite backend
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SQLiteStorage
+from migrate import MigrationRunner, index_exists, column_exists
+
+
+def test_up_down_roundtrip():
+    """Migrations apply once, are recorded, and roll back newest first"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        runner = MigrationRunner(storage)
+
+        assert runner.up() == [1, 2, 3, 4, 5, 6, 7]
+        assert runner.up() == []
+        assert all(applied for _, _, applied in runner.status())
+        with storage.session() as session:
+            assert index_exists(session, 'game_daily_metrics', 'idx_metrics_date_cover')
+            assert index_exists(session, 'game_daily_marketing', 'idx_marketing_updated_at')
+
+        assert runner.down(1) == [7, 6, 5, 4, 3, 2]
+        with storage.session() as session:
+            assert not index_exists(session, 'game_daily_metrics', 'idx_metrics_date_cover')
+            assert index_exists(session, 'game_daily_metrics', 'idx_metrics_updated_at')
+        assert [applied for _, _, applied in runner.status()] == [True, False, False, False, False, False, False]
+
+
+def test_up_to_target():
+    with tempfile.TemporaryDirectory() as tmp:
+        runner = MigrationRunner(SQLiteStorage(os.path.join(tmp, 'test.sqlite3')))
+        assert runner.up(target=1) == [1]
+        assert runner.up() == [2, 3, 4, 5, 6, 7]
+
+
+def test_down_drops_added_column():
+    """Rolling back 0001 removes updated_at; re-applying restores it"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        runner = MigrationRunner(storage)
+        runner.up()
+        runner.down(0)
+        with storage.session() as session:
+            assert not column_exists(session, 'game_daily_metrics', 'updated_at')
+        runner.up()
+        with storage.session() as session:
+            assert column_exists(session, 'game_daily_metrics', 'updated_at')
+
+
+if __name__ == "__main__":
+    test_up_down_roundtrip()
+    test_up_to_target()
+    test_down_drops_added_column()
+    print("[OK] migration tests passed")
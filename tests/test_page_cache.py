@@ -0,0 +1,77 @@
+"""
+Test the per-page refresh TTLs and the carried-forward labels against the embedded SQLite backend
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SQLiteStorage
+from page_cache import fresh_entries, page_ttl, store_pages
+from run_manifest import record_pages
+
+DAY = date(2025, 10, 14)
+PAGES = ['default', 'playtime', 'in_game_purchases']
+
+
+def _status(fields, source_date):
+    return {'fields': len(fields), 'source_date': source_date, 'data': fields}
+
+
+def test_ttl_defaults_and_env_override():
+    assert page_ttl(2507950, 'playtime') == 7 and page_ttl(2507950, 'default') == 1
+    os.environ['STEAMWORKS_PAGE_TTL'] = 'playtime=14,in_game_purchases=bad'
+    try:
+        assert page_ttl(2507950, 'playtime') == 14
+        assert page_ttl(2507950, 'in_game_purchases') == 1
+    finally:
+        del os.environ['STEAMWORKS_PAGE_TTL']
+
+
+def test_slow_page_is_carried_until_its_ttl_expires():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        with storage.session() as session:
+            store_pages(session, 1, DAY, {
+                'default': _status({'unique_player': 900}, DAY),
+                'playtime': _status({'avg_playtime': '3h', 'players_20h_plus': 12.5}, DAY),
+                # Carried pages are not written back, so their source date never moves forward
+                'in_game_purchases': _status({'top3_iap_share': 0.4}, DAY - timedelta(days=3)),
+            })
+
+            # Same day: nothing is "fresh" (the run manifest handles same-day reruns)
+            assert fresh_entries(session, 1, DAY, PAGES) == {}
+
+            # Next day: only the weekly playtime page may be skipped
+            fresh = fresh_entries(session, 1, DAY + timedelta(days=1), PAGES)
+            assert fresh == {'playtime': (DAY, {'avg_playtime': '3h', 'players_20h_plus': 12.5})}
+            assert fresh_entries(session, 1, DAY + timedelta(days=6), PAGES).keys() == {'playtime'}
+            assert fresh_entries(session, 1, DAY + timedelta(days=7), PAGES) == {}
+            assert fresh_entries(session, 2, DAY + timedelta(days=1), PAGES) == {}
+
+
+def test_manifest_labels_carried_values_with_their_source_date():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        next_day = DAY + timedelta(days=1)
+        with storage.session() as session:
+            record_pages(session, 1, next_day, {
+                'default': _status({'unique_player': 950}, next_day),
+                'playtime': _status({'avg_playtime': '3h'}, DAY),
+            })
+            rows = session.fetch_all(
+                "SELECT page, status, source_date FROM crawl_manifest WHERE stat_date = %s ORDER BY page", (next_day,)
+            )
+            assert [(r['page'], r['status'], str(r['source_date'])) for r in rows] == [
+                ('default', 'succeeded', str(next_day)), ('playtime', 'succeeded', str(DAY)),
+            ]
+
+
+if __name__ == "__main__":
+    test_ttl_defaults_and_env_override()
+    test_slow_page_is_carried_until_its_ttl_expires()
+    test_manifest_labels_carried_values_with_their_source_date()
+    print("[OK] page cache tests passed")
@@ -0,0 +1,81 @@
+"""
+Test the incremental Parquet exporter against the embedded SQLite backend
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SQLiteStorage
+from parquet_export import ParquetExporter, explode_breakdowns, month_bounds, read_dataset
+
+
+def _upsert_metrics(storage, stat_date, dau, updated_at):
+    with storage.session() as session:
+        session.upsert('game_daily_metrics', {
+            'steam_app_id': 2507950,
+            'stat_date': stat_date,
+            'dau': dau,
+            'daily_total_revenue': 12.5,
+            'top10_country_dau': json.dumps([{'country': 'Germany', 'players': dau, 'share': '60.00%', 'rank': 1}]),
+            'updated_at': updated_at,
+        }, ['steam_app_id', 'stat_date'])
+
+
+def test_explode_breakdowns():
+    """List and single-object JSON columns explode to one row per metric"""
+    rows = [{
+        'steam_app_id': 1,
+        'stat_date': date(2025, 10, 6),
+        'top_country_visits': [{'country': 'Chile', 'percentage': 12.5, 'visits': 40, 'rank': 1}],
+        'takeover_banner': '{"page_feature": "Takeover Banner", "impressions": 1500}',
+        'main_cluster': None,
+    }]
+    exploded = explode_breakdowns(rows, ['top_country_visits', 'takeover_banner', 'main_cluster'])
+    assert [(r['breakdown'], r['label'], r['metric'], r['value']) for r in exploded] == [
+        ('top_country_visits', 'Chile', 'percentage', 12.5),
+        ('top_country_visits', 'Chile', 'visits', 40.0),
+        ('takeover_banner', 'Takeover Banner', 'impressions', 1500.0),
+    ]
+
+
+def test_month_bounds():
+    assert month_bounds('2024-02') == (date(2024, 2, 1), date(2024, 2, 29))
+    assert month_bounds('2025-12') == (date(2025, 12, 1), date(2025, 12, 31))
+
+
+def test_incremental_export():
+    """Only months with rows updated after the watermark are rewritten"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        exporter = ParquetExporter(storage, os.path.join(tmp, 'parquet'))
+
+        _upsert_metrics(storage, date(2025, 9, 30), 100, '2025-10-01 08:00:00')
+        _upsert_metrics(storage, date(2025, 10, 1), 200, '2025-10-02 08:00:00')
+        first = exporter.export()
+        assert first['metrics'] == ['2025-09', '2025-10']
+
+        # Nothing changed: only the boundary month is re-checked
+        assert exporter.export()['metrics'] == ['2025-10']
+
+        # A late correction to September rewrites September (plus the boundary month)
+        _upsert_metrics(storage, date(2025, 9, 30), 150, '2025-10-05 08:00:00')
+        assert exporter.export()['metrics'] == ['2025-09', '2025-10']
+        assert exporter.export()['metrics'] == ['2025-09']
+
+        df = read_dataset('metrics', start_date='2025-09-01', end_date='2025-09-30', export_dir=exporter.export_dir)
+        assert df['dau'].tolist() == [150]
+
+        breakdowns = read_dataset('breakdowns', export_dir=exporter.export_dir)
+        assert sorted(breakdowns['value'][breakdowns['metric'] == 'players'].tolist()) == [150.0, 200.0]
+
+
+if __name__ == "__main__":
+    test_explode_breakdowns()
+    test_month_bounds()
+    test_incremental_export()
+    print("[OK] parquet export tests passed")
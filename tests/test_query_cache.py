@@ -0,0 +1,81 @@
+"""
+Test the Visualization query cache against the embedded SQLite backend
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Visualization', 'lib'))
+
+import pandas as pd
+
+from storage import SQLiteStorage
+from query_cache import QueryCache, cached
+
+
+def _upsert(storage, stat_date, dau, updated_at):
+    with storage.session() as session:
+        session.upsert('game_daily_metrics', {
+            'steam_app_id': 2507950, 'stat_date': stat_date, 'dau': dau, 'updated_at': updated_at,
+        }, ['steam_app_id', 'stat_date'])
+
+
+def test_hit_until_source_table_changes():
+    """Loader runs once per data version and parameter set"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        cache = QueryCache(os.path.join(tmp, 'cache'), storage=storage)
+        _upsert(storage, date(2025, 10, 1), 100, '2025-10-02 08:00:00')
+
+        calls = []
+
+        @cached(['game_daily_metrics'], cache=cache)
+        def load_dau(start_date):
+            calls.append(start_date)
+            with storage.session() as session:
+                return pd.DataFrame(session.fetch_all(
+                    "SELECT stat_date, dau FROM game_daily_metrics WHERE stat_date >= %s", (start_date,)
+                ))
+
+        assert load_dau('2025-10-01')['dau'].tolist() == [100]
+        assert load_dau('2025-10-01')['dau'].tolist() == [100]
+        assert len(calls) == 1
+
+        # Different parameters are a separate entry
+        load_dau('2025-09-01')
+        assert len(calls) == 2
+
+        # A newer crawl invalidates every entry reading that table
+        _upsert(storage, date(2025, 10, 2), 200, '2025-10-03 08:00:00')
+        assert load_dau('2025-10-01')['dau'].tolist() == [100, 200]
+        assert len(calls) == 3
+
+
+def test_lru_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        cache = QueryCache(os.path.join(tmp, 'cache'), storage=storage)
+        frame = pd.DataFrame({'value': range(1000)})
+        for name in ('a', 'b', 'c'):
+            cache.get_or_load(name, {}, ['game_daily_metrics'], lambda: frame)
+        paths = {name: cache.path_for(cache.cache_key(name, {}, cache.table_versions(['game_daily_metrics'])))
+                 for name in ('a', 'b', 'c')}
+        os.utime(paths['a'], (1, 1))
+        os.utime(paths['b'], (2, 2))
+        os.utime(paths['c'], (3, 3))
+
+        # Hit on 'a' makes it most recent, so 'b' is evicted first
+        cache.get_or_load('a', {}, ['game_daily_metrics'], lambda: frame)
+        cache.max_bytes = sum(size for _, size, _ in cache.entries()) - 1
+        assert cache.evict() == 1
+        assert not os.path.exists(paths['b'])
+        assert os.path.exists(paths['a']) and os.path.exists(paths['c'])
+
+
+if __name__ == "__main__":
+    test_hit_until_source_table_changes()
+    test_lru_eviction()
+    print("[OK] query cache tests passed")
@@ -0,0 +1,90 @@
+"""
+Test the incrementally maintained period rollups against the embedded SQLite backend
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SQLiteStorage
+from rollup import period_bounds, refresh_rollups, fetch_rollups, rebuild_rollups
+from generate_weekly_report import WeeklyReportGenerator
+
+
+def _upsert_day(session, app_id, stat_date, new_players, revenue, dau=100):
+    session.upsert('game_daily_metrics', {
+        'steam_app_id': app_id,
+        'stat_date': stat_date,
+        'new_players': new_players,
+        'daily_total_revenue': revenue,
+        'dau': dau,
+        'unique_player': 1000,
+    }, ['steam_app_id', 'stat_date'])
+    refresh_rollups(session, app_id, stat_date)
+
+
+def test_period_bounds():
+    assert period_bounds('week', date(2025, 10, 8)) == (date(2025, 10, 6), date(2025, 10, 12))
+    assert period_bounds('month', date(2024, 2, 10)) == (date(2024, 2, 1), date(2024, 2, 29))
+    assert period_bounds('quarter', date(2025, 11, 3)) == (date(2025, 10, 1), date(2025, 12, 31))
+
+
+def test_incremental_refresh_and_correction():
+    """Each upsert refreshes its week/month/quarter; a corrected day replaces its old value"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        with storage.session() as session:
+            _upsert_day(session, 1, date(2025, 10, 6), 10, 5.0)
+            _upsert_day(session, 1, date(2025, 10, 7), 20, 5.0)
+            _upsert_day(session, 1, date(2025, 10, 7), 30, 7.5)
+
+            week = fetch_rollups(session, 'week', [date(2025, 10, 6)], [1])[(1, date(2025, 10, 6))]
+            assert week['days'] == 2
+            assert week['sum_new_players'] == 40
+            assert week['sum_revenue'] == 12.5
+
+            quarter = fetch_rollups(session, 'quarter', [date(2025, 10, 1)], [1])[(1, date(2025, 10, 1))]
+            assert quarter['sum_new_players'] == 40
+
+            # A full rebuild agrees with the incremental result
+            assert rebuild_rollups(session) == 3
+            week = fetch_rollups(session, 'week', [date(2025, 10, 6)], [1])[(1, date(2025, 10, 6))]
+            assert week['sum_new_players'] == 40
+
+
+def test_monthly_report_from_rollup():
+    with tempfile.TemporaryDirectory() as tmp:
+        generator = WeeklyReportGenerator({})
+        generator.storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        generator.games = [{'app_id': 1, 'name': 'Game A'}]
+        with generator.storage.session() as session:
+            for i in range(61):
+                day = date(2025, 9, 1) + timedelta(days=i)
+                _upsert_day(session, 1, day, 2 if day.month == 10 else 1, 1.0)
+
+            date_ranges = generator.get_date_ranges(date(2025, 10, 15), 'month')
+            assert (date_ranges['previous_start'], date_ranges['current_end']) == (date(2025, 9, 1), date(2025, 10, 31))
+            metrics, errors = generator.collect_from_rollup(session, date_ranges)
+        assert errors == []
+        assert metrics[1]['sum_new_players'] == 62
+        assert metrics[1]['new_players_wow'] == "+106.7%"
+
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            assert generator.generate_report('20251015', 'month') is True
+            assert os.path.exists('monthly_report_20251001_to_20251031.xlsx')
+            # November has no data yet
+            assert generator.generate_report('20251115', 'month') is False
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_period_bounds()
+    test_incremental_refresh_and_correction()
+    test_monthly_report_from_rollup()
+    print("[OK] rollup tests passed")
@@ -0,0 +1,78 @@
+"""
+Test the run manifest (which pages are stored) and partial-rerun merging against the embedded SQLite backend
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SQLiteStorage
+from run_manifest import completed_pages, pending_pages, record_pages, merge_stored_fields, reset
+
+DAY = date(2025, 10, 14)
+PAGES = ['default', 'playtime', 'wishlist', 'players']
+
+
+def _with_env(values, fn):
+    old = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        return fn()
+    finally:
+        for name, value in old.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def test_rerun_only_fetches_missing_or_failed_pages():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.sqlite3')
+        storage = SQLiteStorage(path)
+        with storage.session() as session:
+            record_pages(session, 1, DAY, {'default': 5, 'playtime': 2, 'wishlist': 0})
+            assert completed_pages(session, 1, DAY) == {'default', 'playtime'}
+
+        env = {'STEAMWORKS_STORAGE': 'sqlite', 'STEAMWORKS_SQLITE_PATH': path}
+        assert _with_env(env, lambda: pending_pages(None, 1, DAY, PAGES)) == ['wishlist', 'players']
+        assert _with_env(env, lambda: pending_pages(None, 2, DAY, PAGES)) == PAGES
+        forced = dict(env, STEAMWORKS_FORCE_RECRAWL='1')
+        assert _with_env(forced, lambda: pending_pages(None, 1, DAY, PAGES)) == PAGES
+
+        with storage.session() as session:
+            # A failed forced recrawl does not demote a page that was already stored
+            record_pages(session, 1, DAY, {'default': 0, 'wishlist': 3, 'players': 4})
+            assert completed_pages(session, 1, DAY) == set(PAGES)
+            reset(session, DAY, [1])
+            assert completed_pages(session, 1, DAY) == set()
+
+
+def test_partial_rerun_merges_into_stored_row():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        with storage.session() as session:
+            session.upsert('game_daily_metrics', {
+                'steam_app_id': 1, 'stat_date': DAY, 'unique_player': 900, 'daily_total_revenue': 250.0,
+                'top10_country_dau': json.dumps([{'country': 'US', 'players': 40}]),
+            }, ['steam_app_id', 'stat_date'])
+
+            # The rerun only fetched the players page
+            merged = merge_stored_fields(session, 1, DAY, {'dau': 100, 'pcu': 30})
+            assert merged['dau'] == 100 and merged['unique_player'] == 900
+            assert merged['daily_total_revenue'] == 250.0
+            assert merged['top10_country_dau'] == [{'country': 'US', 'players': 40}]
+
+            # Freshly extracted values win over stored ones; unknown games merge nothing
+            assert merge_stored_fields(session, 1, DAY, {'unique_player': 950})['unique_player'] == 950
+            assert merge_stored_fields(session, 2, DAY, {'dau': 5}) == {'dau': 5}
+
+
+if __name__ == "__main__":
+    test_rerun_only_fetches_missing_or_failed_pages()
+    test_partial_rerun_merges_into_stored_row()
+    print("[OK] run manifest tests passed")
@@ -0,0 +1,87 @@
+"""
+Test the multi-resolution chart series store against the embedded SQLite backend
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Visualization', 'lib'))
+
+from storage import SQLiteStorage
+from series_store import choose_resolution, refresh_series, rebuild_series, fetch_series
+from series_loader import get_dau_new_users_series
+from metrics_api import MetricsAPI
+
+
+def _upsert_day(session, app_id, stat_date, dau, new_players=10):
+    session.upsert('game_daily_metrics', {
+        'steam_app_id': app_id, 'stat_date': stat_date, 'dau': dau, 'new_players': new_players,
+    }, ['steam_app_id', 'stat_date'])
+    refresh_series(session, app_id, stat_date)
+
+
+def test_choose_resolution():
+    assert choose_resolution(date(2025, 1, 1), date(2025, 12, 31), 500) == 'day'
+    assert choose_resolution(date(2022, 1, 1), date(2025, 12, 31), 500) == 'week'
+    assert choose_resolution(date(2000, 1, 1), date(2025, 12, 31), 500) == 'month'
+
+
+def test_incremental_buckets_and_correction():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        with storage.session() as session:
+            # Wed 2025-10-01 .. Tue 2025-10-07 crosses a Monday week boundary
+            for i in range(7):
+                _upsert_day(session, 1, date(2025, 10, 1) + timedelta(days=i), 100 + 10 * i)
+            _upsert_day(session, 1, date(2025, 10, 3), 500)  # re-crawled day replaces its old value
+
+            week = session.fetch_one(
+                "SELECT * FROM game_metric_series WHERE metric = 'dau' AND resolution = 'week' "
+                "AND bucket_start = %s", (date(2025, 9, 29),)
+            )
+            assert (week['points'], week['min_value'], week['max_value']) == (5, 100.0, 500.0)
+            assert week['mean_value'] == (100 + 110 + 500 + 130 + 140) / 5
+
+            month = session.fetch_one(
+                "SELECT * FROM game_metric_series WHERE metric = 'dau' AND resolution = 'month'"
+            )
+            assert month['points'] == 7 and month['sum_value'] == 100 + 110 + 500 + 130 + 140 + 150 + 160
+
+            # A full rebuild produces the same buckets as the incremental path
+            before = session.fetch_all("SELECT * FROM game_metric_series ORDER BY metric, resolution, bucket_start")
+            assert rebuild_series(session) == len(before)
+            after = session.fetch_all("SELECT * FROM game_metric_series ORDER BY metric, resolution, bucket_start")
+            assert [dict(r, updated_at=None) for r in after] == [dict(r, updated_at=None) for r in before]
+
+
+def test_long_range_reads_few_points():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        with storage.session() as session:
+            for i in range(3 * 365):
+                session.upsert('game_daily_metrics', {
+                    'steam_app_id': 2507950, 'stat_date': date(2023, 1, 1) + timedelta(days=i),
+                    'dau': 100 + i, 'new_players': 5,
+                }, ['steam_app_id', 'stat_date'])
+            rebuild_series(session, since=None)
+            resolution, rows = fetch_series(session, 'dau', [2507950], date(2000, 1, 1), date(2100, 1, 1))
+            assert resolution == 'week' and len(rows) == 158  # 2023-01-01 is a Sunday
+
+        frame = get_dau_new_users_series(max_points=100, storage=storage)
+        assert frame.attrs['resolution'] == 'month' and len(frame) == 36
+        assert list(frame.columns[:4]) == ['game_name', 'stat_date', 'dau', 'dau_min']
+        assert frame.iloc[0]['dau'] == 115.0 and frame.iloc[0]['new_players'] == 5.0
+
+        # The API answers from the stored buckets too
+        status, _, _ = MetricsAPI(storage).handle('/api/series', {'metric': ['dau'], 'max_points': ['100']})
+        assert status == 200
+
+
+if __name__ == "__main__":
+    test_choose_resolution()
+    test_incremental_buckets_and_correction()
+    test_long_range_reads_few_points()
+    print("[OK] series store tests passed")
@@ -0,0 +1,110 @@
+"""
+Test unattended mode: no input() prompts, fail-fast on an expired session, whole batch skipped
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawl_orchestrator import run_job_graph
+from job_queue import JobQueue, SQLiteQueueBackend, run_worker
+from session_health import SessionExpiredError, check_session, is_unattended, notify_operator, wait_for_manual_login
+
+
+class FakeDriver:
+    def __init__(self, url):
+        self.current_url = url
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls = []
+
+
+def _with_env(name, value, fn):
+    old = os.environ.get(name)
+    if value is None:
+        os.environ.pop(name, None)
+    else:
+        os.environ[name] = value
+    try:
+        return fn()
+    finally:
+        if old is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = old
+
+
+def test_unattended_flag_and_login_detection():
+    assert _with_env('STEAMWORKS_UNATTENDED', '1', is_unattended) is True
+    assert _with_env('STEAMWORKS_UNATTENDED', '0', is_unattended) is False
+    assert check_session(FakeDriver("https://partner.steampowered.com/dashboard/"))
+    assert not check_session(FakeDriver("https://partner.steamgames.com/login/?goto=%2Fapps%2F"))
+
+
+def test_unattended_login_raises_instead_of_prompting():
+    def prompt():
+        try:
+            wait_for_manual_login("Players Page")
+            assert False, "expected SessionExpiredError"
+        except SessionExpiredError as e:
+            assert "Players Page" in str(e)
+    _with_env('STEAMWORKS_UNATTENDED', '1', prompt)
+
+
+def test_expired_session_skips_remaining_jobs():
+    session = FakeSession()
+
+    def job(name, error=None):
+        def run(s):
+            s.calls.append(name)
+            if error:
+                raise error
+            return True, None
+        return {'name': name, 'kind': name.split(':')[0], 'app_id': 1, 'game_name': 'Game', 'depends_on': [], 'run': run}
+
+    results = run_job_graph([job('financial:1'), job('marketing:1', SessionExpiredError("login page")),
+                             job('financial:2'), job('marketing:2')], session)
+    assert session.calls == ['financial:1', 'marketing:1']
+    assert [r['status'] for r in results] == ['succeeded', 'failed', 'skipped', 'skipped']
+    assert all(r['message'].startswith('session expired') for r in results[1:])
+
+
+def test_queue_worker_hands_job_back_and_stops():
+    queue = JobQueue(SQLiteQueueBackend(':memory:'))
+    first, _ = queue.enqueue('crawl', 1, stat_date='2025-10-14', max_attempts=1)
+    queue.enqueue('crawl', 2, stat_date='2025-10-14')
+    seen = []
+
+    def crawl(job):
+        seen.append(job['app_id'])
+        raise SessionExpiredError("login page")
+
+    try:
+        run_worker(queue, {'crawl': crawl}, worker_id='w1', poll_interval=None)
+        assert False, "expected SessionExpiredError"
+    except SessionExpiredError:
+        pass
+    assert seen == [1]
+    job = queue.get(first)
+    # The attempt was not spent, so even a max_attempts=1 job is still runnable
+    assert job['status'] == 'queued' and job['attempts'] == 0
+
+
+def test_notify_without_channels_is_harmless():
+    def notify():
+        for name in ('STEAMWORKS_NOTIFY_WEBHOOK', 'SMTP_SERVER', 'ALERT_RECIPIENT'):
+            os.environ.pop(name, None)
+        return notify_operator("subject", "message")
+    assert _with_env('SMTP_SERVER', None, notify) is False
+
+
+if __name__ == "__main__":
+    test_unattended_flag_and_login_detection()
+    test_unattended_login_raises_instead_of_prompting()
+    test_expired_session_skips_remaining_jobs()
+    test_queue_worker_hands_job_back_and_stops()
+    test_notify_without_channels_is_harmless()
+    print("[OK] session health tests passed")
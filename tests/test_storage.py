@@ -0,0 +1,102 @@
+"""
+Test the storage backend abstraction against the embedded SQLite backend
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SQLiteStorage, MySQLStorage, StorageError, to_qmark, get_storage
+from distribution_store import save_distributions
+
+
+def test_to_qmark():
+    """Named and positional MySQL placeholders become positional ?"""
+    sql, params = to_qmark("SELECT * FROM t WHERE a=%(a)s AND b=%(b)s AND c LIKE '10%%'", {'b': 2, 'a': 1})
+    assert sql == "SELECT * FROM t WHERE a=? AND b=? AND c LIKE '10%'"
+    assert params == [1, 2]
+    sql, params = to_qmark("SELECT dau FROM t WHERE id=%s AND d=%s", (5, 'x'))
+    assert sql == "SELECT dau FROM t WHERE id=? AND d=?"
+    assert params == [5, 'x']
+
+
+def test_sqlite_upsert_roundtrip():
+    """Upserts insert then update, and dates come back as date objects"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        key = ['steam_app_id', 'stat_date']
+        with storage.session() as session:
+            session.upsert('game_daily_metrics', {'steam_app_id': 1, 'stat_date': date(2025, 10, 6), 'dau': 100}, key)
+            session.upsert('game_daily_metrics', {'steam_app_id': 1, 'stat_date': date(2025, 10, 6), 'pcu': 40}, key)
+
+        with storage.session() as session:
+            rows = session.fetch_all("SELECT stat_date, dau, pcu FROM game_daily_metrics WHERE steam_app_id=%s", (1,))
+        assert rows == [{'stat_date': date(2025, 10, 6), 'dau': 100, 'pcu': 40}]
+
+
+def test_sqlite_rollback_on_error():
+    """A failing statement rolls back the whole session"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        try:
+            with storage.session() as session:
+                session.upsert('game_daily_metrics', {'steam_app_id': 1, 'stat_date': date(2025, 10, 6)}, ['steam_app_id', 'stat_date'])
+                session.execute("SELECT * FROM missing_table")
+        except Exception:
+            pass
+        with storage.session() as session:
+            assert session.fetch_one("SELECT COUNT(*) AS n FROM game_daily_metrics")['n'] == 0
+
+
+def test_save_distributions_sqlite():
+    """Full distributions share one geo dictionary across saves"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+        data = {
+            'full_country_dau': [
+                {'country': 'Germany', 'players': 300, 'share': '60.00%'},
+                {'country': 'Chile', 'players': 200, 'share': '40.00%'},
+            ],
+            'full_country_downloads': [{'country': 'Chile', 'downloads': 9, 'share': '100.00%'}],
+        }
+        with storage.session() as session:
+            assert save_distributions(session, 2507950, date(2025, 10, 6), data) == 2
+            assert save_distributions(session, 2507950, date(2025, 10, 6), data) == 2
+            geo = session.fetch_all("SELECT geo_id, geo_name FROM geo_dictionary ORDER BY geo_name")
+            row = session.fetch_one(
+                "SELECT geo_ids, metrics FROM game_daily_distribution WHERE distribution=%s", ('country_dau',)
+            )
+        assert [g['geo_name'] for g in geo] == ['Chile', 'Germany']
+        ids = {g['geo_name']: g['geo_id'] for g in geo}
+        assert json.loads(row['geo_ids']) == [ids['Germany'], ids['Chile']]
+        assert json.loads(row['metrics'])['share'] == [60.0, 40.0]
+
+
+def test_get_storage_selects_backend():
+    """STEAMWORKS_STORAGE picks the backend; MySQL is the default"""
+    assert isinstance(get_storage({'host': 'x'}, backend='mysql'), MySQLStorage)
+    upsert = MySQLStorage({}).upsert_sql('t', ['a', 'b'], ['a'], {'updated_at': 'CURRENT_TIMESTAMP'})
+    assert 'ON DUPLICATE KEY UPDATE b = VALUES(b), updated_at = CURRENT_TIMESTAMP' in upsert
+
+
+def test_mysql_requires_a_password():
+    """No password is baked in: connecting without one fails before reaching the server"""
+    try:
+        MySQLStorage({'host': 'localhost', 'user': 'root', 'password': None}).connect()
+        assert False, "expected StorageError"
+    except StorageError as e:
+        assert 'STEAMWORKS_DB_PASSWORD' in str(e)
+
+
+if __name__ == "__main__":
+    test_to_qmark()
+    test_sqlite_upsert_roundtrip()
+    test_sqlite_rollback_on_error()
+    test_save_distributions_sqlite()
+    test_get_storage_selects_backend()
+    test_mysql_requires_a_password()
+    print("[OK] storage tests passed")
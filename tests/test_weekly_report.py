@@ -0,0 +1,200 @@
+"""
+Test the vectorized weekly report metrics against the embedded SQLite backend
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+
+from storage import SQLiteStorage
+from generate_weekly_report import WeeklyReportGenerator, batch_tasks, report_start_dates, run_batch
+
+
+def _generator(tmp):
+    generator = WeeklyReportGenerator({})
+    generator.storage = SQLiteStorage(os.path.join(tmp, 'test.sqlite3'))
+    generator.games = [{'app_id': 1, 'name': 'Game A'}, {'app_id': 2, 'name': 'Game B'}]
+    return generator
+
+
+def _seed(storage, app_id, first_day, days, new_players, revenue, skip=()):
+    with storage.session() as session:
+        for i in range(days):
+            stat_date = first_day + timedelta(days=i)
+            if stat_date in skip:
+                continue
+            session.upsert('game_daily_metrics', {
+                'steam_app_id': app_id,
+                'stat_date': stat_date,
+                'new_players': new_players,
+                'unique_player': 1000 + i,
+                'daily_total_revenue': revenue,
+                'lifetime_total_revenue': 5000 + i,
+                'dau': 100 + i,
+                'median_playtime': f"{i} minutes",
+            }, ['steam_app_id', 'stat_date'])
+
+
+def test_weekly_metrics_and_wow():
+    """Both weeks for every game come from one frame; WoW compares adjacent weeks"""
+    with tempfile.TemporaryDirectory() as tmp:
+        generator = _generator(tmp)
+        previous_start = date(2025, 9, 29)
+        current_start = date(2025, 10, 6)
+        _seed(generator.storage, 1, previous_start, 7, 10, 100.0)
+        _seed(generator.storage, 1, current_start, 7, 15, 50.0)
+        _seed(generator.storage, 2, previous_start, 14, 0, 20.0)
+
+        with generator.storage.session() as session:
+            frame = generator.fetch_report_frame(session, previous_start, current_start + timedelta(days=6))
+        weekly = generator.calculate_weekly_metrics(frame, previous_start, 2)
+
+        game_a = generator.metrics_for_week(weekly, 1, 1)
+        assert game_a['sum_new_players'] == 105
+        assert game_a['new_players_wow'] == "+50.0%"
+        assert game_a['sum_revenue'] == 350
+        assert game_a['revenue_wow'] == "-50.0%"
+        assert game_a['latest_unique_player'] == 1006
+        assert game_a['avg_dau'] == 103
+        assert game_a['median_playtime'] == "6 minutes"
+
+        # Previous week had zero new players: WoW is undefined
+        assert generator.metrics_for_week(weekly, 2, 1)['new_players_wow'] == "N/A"
+
+
+def test_missing_dates_block_report():
+    with tempfile.TemporaryDirectory() as tmp:
+        generator = _generator(tmp)
+        previous_start = date(2025, 9, 29)
+        _seed(generator.storage, 1, previous_start, 14, 1, 1.0, skip={date(2025, 10, 8)})
+        _seed(generator.storage, 2, previous_start, 14, 1, 1.0)
+
+        with generator.storage.session() as session:
+            frame = generator.fetch_report_frame(session, previous_start, date(2025, 10, 12))
+        missing = generator.find_missing_dates(frame, previous_start, 2)
+        assert missing == {(1, 1): [date(2025, 10, 8)]}
+
+        assert generator.generate_report('20251006') is False
+
+
+def test_generate_report_writes_workbook():
+    with tempfile.TemporaryDirectory() as tmp:
+        generator = _generator(tmp)
+        _seed(generator.storage, 1, date(2025, 9, 29), 14, 1, 1.0)
+        _seed(generator.storage, 2, date(2025, 9, 29), 14, 1, 1.0)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            assert generator.generate_report('20251006') is True
+            assert os.path.exists('weekly_report_20251006_to_20251012.xlsx')
+        finally:
+            os.chdir(cwd)
+
+        workbook = openpyxl.load_workbook(os.path.join(tmp, 'weekly_report_20251006_to_20251012.xlsx'))
+        assert workbook.sheetnames == ['Weekly Report', 'Daily Detail']
+        assert workbook['Weekly Report']['A1'].value == 'Game A'
+        assert workbook['Weekly Report']['G1'].value == 'Game B'
+        assert workbook['Weekly Report']['A5'].value == 'Game A - Marketing'
+        assert workbook['Weekly Report']['A7'].value == 'N/A'
+        detail = list(workbook['Daily Detail'].iter_rows(values_only=True))
+        assert len(detail) == 1 + 2 * 7
+        assert detail[1][:2] == ('Game A', datetime(2025, 10, 6))
+
+
+def _seed_marketing(storage, app_id, first_day, days, impressions, visits, owner_share, main_cluster=None):
+    with storage.session() as session:
+        for i in range(days):
+            session.upsert('game_daily_marketing', {
+                'steam_app_id': app_id,
+                'stat_date': first_day + timedelta(days=i),
+                'total_impressions': impressions,
+                'total_visits': visits,
+                'owner_visits': owner_share,
+                'main_cluster': json.dumps(main_cluster) if main_cluster else None,
+            }, ['steam_app_id', 'stat_date'])
+
+
+def test_marketing_section():
+    """Marketing totals for both weeks come from one frame; rates change in points"""
+    with tempfile.TemporaryDirectory() as tmp:
+        generator = _generator(tmp)
+        _seed_marketing(generator.storage, 1, date(2025, 9, 29), 7, 1000, 50, 40.0,
+                        {'impressions': 2000, 'visits': 20})
+        _seed_marketing(generator.storage, 1, date(2025, 10, 6), 7, 1000, 100, 30.0,
+                        {'impressions': 2000, 'visits': 30})
+
+        date_ranges = generator.get_date_ranges(date(2025, 10, 6))
+        with generator.storage.session() as session:
+            marketing = generator.collect_marketing(session, date_ranges)
+
+        assert marketing[1]['impressions'] == "7,000 (+0.0%)"
+        assert marketing[1]['visits'] == "700 (+100.0%)"
+        assert marketing[1]['ctr'] == "10.00% (+5.0pp)"
+        assert marketing[1]['owner_share'] == "30.00% (-10.0pp)"
+        assert marketing[1]['main_cluster'] == "14,000 / 210 (+50.0%)"
+        assert marketing[1]['takeover_banner'] == "N/A"
+        # No marketing rows at all for Game B
+        assert marketing[2] is None
+
+
+def test_report_start_dates():
+    assert report_start_dates('week', date(2025, 9, 15), date(2025, 9, 29)) == [
+        date(2025, 9, 15), date(2025, 9, 22), date(2025, 9, 29)
+    ]
+    assert report_start_dates('quarter', date(2025, 5, 20), date(2025, 10, 1)) == [
+        date(2025, 4, 1), date(2025, 7, 1), date(2025, 10, 1)
+    ]
+
+
+def test_batch_tasks_share_one_report_per_period():
+    """--dates inside the same month/quarter, or repeated in a range, yield one task per workbook"""
+    tasks = batch_tasks(['month', 'quarter', 'week'], [date(2025, 10, 6), date(2025, 10, 20)],
+                        date(2025, 10, 6), date(2025, 10, 13))
+    assert tasks == [
+        ('20251001', 'month'),
+        ('20251001', 'quarter'),
+        ('20251006', 'week'), ('20251020', 'week'), ('20251013', 'week'),
+    ]
+
+
+def test_batch_run_in_worker_processes():
+    """Workers open their own storage from the environment; failures do not stop the batch"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.sqlite3')
+        storage = SQLiteStorage(path)
+        for app_id in (2507950, 2073620, 3478050, 3104410):
+            _seed(storage, app_id, date(2025, 9, 22), 21, 1, 1.0)
+
+        saved = {k: os.environ.get(k) for k in ('STEAMWORKS_STORAGE', 'STEAMWORKS_SQLITE_PATH')}
+        os.environ.update({'STEAMWORKS_STORAGE': 'sqlite', 'STEAMWORKS_SQLITE_PATH': path})
+        try:
+            tasks = [('20250929', 'week'), ('20251006', 'week'), ('20251013', 'week')]
+            results = run_batch({}, tasks, os.path.join(tmp, 'out'), workers=2)
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+        assert results == {('20250929', 'week'): True, ('20251006', 'week'): True, ('20251013', 'week'): False}
+        assert sorted(os.listdir(os.path.join(tmp, 'out'))) == [
+            'weekly_report_20250929_to_20251005.xlsx', 'weekly_report_20251006_to_20251012.xlsx'
+        ]
+
+
+if __name__ == "__main__":
+    test_weekly_metrics_and_wow()
+    test_missing_dates_block_report()
+    test_generate_report_writes_workbook()
+    test_marketing_section()
+    test_report_start_dates()
+    test_batch_tasks_share_one_report_per_period()
+    test_batch_run_in_worker_processes()
+    print("[OK] weekly report tests passed")